@@ -4,15 +4,19 @@ from enum import Enum
 from datetime import datetime, timedelta, timezone
 from core.auth import get_current_user
 from core.db import DB
+from core.database import get_async_db
 from core.models.base import DATA_STATUS
 from core.models.article import Article,ArticleBase
-from sqlalchemy import and_, or_, desc, func, distinct
+from sqlalchemy import and_, or_, desc, func, distinct, select
+from sqlalchemy.orm import undefer
 from .base import success_response, error_response
 from core.config import cfg
-from apis.base import format_search_kw
+from core.article_search import SearchOrder, search_condition, search_subquery
 from core.print import print_warning, print_info, print_error, print_success
 from core.log import logger
 from core.cache import get_cache, set_cache, get_cache_key, clear_cache_pattern
+from core.pagination import InvalidCursor, keyset_condition, keyset_order, next_cursor
+from core.article_count import CountMode, count_signature, resolve_count_async, invalidate_article_counts
 from typing import Optional, List, Tuple, Dict, Any
 from core.article_filter import get_article_filter_engine
 router = APIRouter(prefix=f"/articles", tags=["文章管理"])
@@ -112,9 +116,14 @@ async def clean_orphan_articles(
         
         # 找出Articles表中mp_id不在Feeds表中的记录
         subquery = session.query(Feed.id).subquery()
-        deleted_count = session.query(Article)\
-            .filter(~Article.mp_id.in_(subquery))\
-            .delete(synchronize_session=False)
+        orphans = session.query(Article).filter(~Article.mp_id.in_(subquery))
+        # 批量删除不触发 ORM 事件，先同步删除全文索引
+        from core.article_search import forget_articles
+        from core.article_dedup import forget_fingerprints
+        orphan_ids = [row[0] for row in orphans.with_entities(Article.id).all()]
+        forget_articles(session, orphan_ids)
+        forget_fingerprints(session, orphan_ids)
+        deleted_count = orphans.delete(synchronize_session=False)
         
         session.commit()
         
@@ -177,7 +186,8 @@ async def analyze_ai_filter(
     payload: ArticleAiFilterAnalyzeRequest = Body(...),
     current_user: dict = Depends(get_current_user),
 ):
-    from core.article_filter import get_article_filter_engine
+    from core.article_filter import ArticleFilterDecision, get_article_filter_engine
+    from core.article_dedup import reusable_filter_results
     from core.models.article_ai_filter import ArticleAiFilter
     from core.models.article_tags import ArticleTag
     from core.models.tags import Tags as TagsModel
@@ -223,6 +233,7 @@ async def analyze_ai_filter(
             mp_info = {feed.id: {"mp_name": feed.mp_name, "mp_cover": feed.mp_cover} for feed in feeds}
 
         engine = get_article_filter_engine()
+        reusable = reusable_filter_results(session, [a.id for a in ordered_articles])
         items: List[Dict[str, Any]] = []
         summary = {"hidden": 0, "keep": 0, "maybe": 0}
 
@@ -234,12 +245,23 @@ async def analyze_ai_filter(
                 if tag_id in tags_dict and tags_dict[tag_id].name
             ]
             mp_name = mp_info.get(article.mp_id, {}).get("mp_name", "未知公众号")
-            result = await engine.classify(
-                title=article.title or "",
-                tags=tag_names,
-                source=mp_name,
-                description=article.description or "",
-            )
+            if article.id in reusable:
+                # 近似重复文章沿用原文的判定，不再调用模型
+                source = reusable[article.id]
+                result = ArticleFilterDecision(
+                    decision=source.decision,
+                    category=source.category,
+                    confidence=source.confidence,
+                    reason=f"与文章 {source.article_id} 近似重复，沿用其判定：{source.reason or ''}",
+                    model_name=source.model_name,
+                )
+            else:
+                result = await engine.classify(
+                    title=article.title or "",
+                    tags=tag_names,
+                    source=mp_name,
+                    description=article.description or "",
+                )
 
             row = session.query(ArticleAiFilter).filter(ArticleAiFilter.article_id == article.id).first()
             if not row:
@@ -278,6 +300,7 @@ async def analyze_ai_filter(
 
         session.commit()
         clear_cache_pattern("articles:")
+        invalidate_article_counts()
 
         return success_response({"items": items, "summary": summary})
     except HTTPException as e:
@@ -328,6 +351,7 @@ async def restore_ai_filter(
 
         session.commit()
         clear_cache_pattern("articles:")
+        invalidate_article_counts()
         return success_response({"restored": len(rows)})
     except HTTPException as e:
         raise e
@@ -356,10 +380,14 @@ async def restore_ai_filter(
     },
 )
 async def get_articles(
-    offset: int = Query(0, ge=0, description="分页偏移，从 0 开始"),
+    offset: int = Query(0, ge=0, description="分页偏移，从 0 开始（传 cursor 时忽略）"),
     limit: int = Query(5, ge=1, le=100, description="每页条数，最大 100"),
+    cursor: Optional[str] = Query(
+        None,
+        description="游标分页：上一页返回的 next_cursor，深翻页与第一页同样快；传入后忽略 offset",
+    ),
     status: Optional[str] = Query(None, description="按状态精确筛选；不传则排除已删除文章"),
-    search: Optional[str] = Query(None, description="标题关键词，空格/|/- 拆成多词，满足任一词即匹配"),
+    search: Optional[str] = Query(None, description="关键词（全文检索标题、摘要与正文），空格/|/- 拆成多词，满足任一词即匹配"),
     mp_id: Optional[str] = Query(None, description="仅返回指定公众号 mp_id 的文章"),
     has_content: bool = Query(False, description="true 时只查含正文 content 的记录"),
     publish_from: Optional[int] = Query(
@@ -389,7 +417,16 @@ async def get_articles(
         TagMatchMode.any,
         description="any=命中任一标签；all=必须同时包含所列全部标签",
     ),
+    count: CountMode = Query(
+        CountMode.exact,
+        description="总数计算方式：exact=精确（按筛选条件缓存）；estimate=PostgreSQL 估算；none=不计数（total 为 null）",
+    ),
+    sort: SearchOrder = Query(
+        SearchOrder.time,
+        description="排序：time=发布时间倒序；relevance=按搜索相关度（需 search，仅支持 offset 分页）",
+    ),
     current_user: dict = Depends(get_current_user),
+    db=Depends(get_async_db),
 ):
     resolved_tags = _parse_tag_id_list(tag_id, tag_ids)
     time_low, time_high = _merge_time_bounds(
@@ -397,75 +434,111 @@ async def get_articles(
     )
     if time_low is not None and time_high is not None and time_low > time_high:
         from .base import success_response
-        return success_response({"list": [], "total": 0})
+        return success_response({"list": [], "total": 0, "next_cursor": None})
+    if cursor and search and sort == SearchOrder.relevance:
+        raise HTTPException(
+            status_code=fast_status.HTTP_400_BAD_REQUEST,
+            detail=error_response(code=40001, message="按相关度排序不支持游标分页，请使用 offset"),
+        )
+    if cursor:
+        offset = 0
+        try:
+            cursor_condition = keyset_condition(ArticleBase.publish_time, ArticleBase.id, cursor)
+        except InvalidCursor as e:
+            raise HTTPException(
+                status_code=fast_status.HTTP_400_BAD_REQUEST,
+                detail=error_response(code=40001, message=str(e)),
+            )
 
     # 生成缓存键（含新增筛选条件）
-    cache_key = f"articles:{get_cache_key(offset, limit, status, mp_id, search, has_content, time_low, time_high, resolved_tags, tag_match.value)}"
+    cache_key = f"articles:{get_cache_key(offset, limit, cursor, status, mp_id, search, has_content, time_low, time_high, resolved_tags, tag_match.value, count.value, sort.value)}"
 
     # 尝试从缓存获取
     cached_result = get_cache(cache_key)
     if cached_result is not None:
         return cached_result
 
-    session = DB.get_session()
     try:
         from core.models.article_tags import ArticleTag
 
-        # 构建查询条件
+        # 构建查询条件（异步会话，慢查询不阻塞事件循环）
         # 统一使用 ArticleBase 进行查询（包含 status 字段）
-        query = session.query(ArticleBase)
-        if has_content:
-            query = session.query(Article)
+        entity = Article if has_content else ArticleBase
+        conditions = []
 
         # 默认过滤已删除的文章（除非明确指定 status 参数）
         if status:
             # 如果指定了 status，按指定状态过滤（包括已删除状态）
-            query = query.filter(ArticleBase.status == int(status))
+            conditions.append(ArticleBase.status == int(status))
         else:
             # 默认不显示已删除的文章
-            query = query.filter(ArticleBase.status != DATA_STATUS.DELETED)
+            conditions.append(ArticleBase.status != DATA_STATUS.DELETED)
         if mp_id:
-            query = query.filter(ArticleBase.mp_id == mp_id)
+            conditions.append(ArticleBase.mp_id == mp_id)
+        # 全文索引命中（索引不可用时为 None，退回标题匹配）
+        search_hits = search_subquery(search) if search else None
+        ranked = search_hits is not None and sort == SearchOrder.relevance
+        search_cond = None
         if search:
-            # format_search_kw 使用 Article 模型，但 Article 继承自 ArticleBase，共享同一张表
-            # 所以可以直接使用
-            query = query.filter(
-               format_search_kw(search)
-            )
+            search_cond = search_condition(search, search_hits)
+            conditions.append(search_cond)
 
         if time_low is not None:
-            query = query.filter(ArticleBase.publish_time >= time_low)
+            conditions.append(ArticleBase.publish_time >= time_low)
         if time_high is not None:
-            query = query.filter(ArticleBase.publish_time <= time_high)
+            conditions.append(ArticleBase.publish_time <= time_high)
 
         if resolved_tags:
             if tag_match == TagMatchMode.all:
                 n = len(resolved_tags)
                 subq = (
-                    session.query(ArticleTag.article_id)
-                    .filter(ArticleTag.tag_id.in_(resolved_tags))
+                    select(ArticleTag.article_id)
+                    .where(ArticleTag.tag_id.in_(resolved_tags))
                     .group_by(ArticleTag.article_id)
                     .having(func.count(distinct(ArticleTag.tag_id)) == n)
                 )
-                query = query.filter(ArticleBase.id.in_(subq))
             else:
                 subq = (
-                    session.query(ArticleTag.article_id)
-                    .filter(ArticleTag.tag_id.in_(resolved_tags))
+                    select(ArticleTag.article_id)
+                    .where(ArticleTag.tag_id.in_(resolved_tags))
                     .distinct()
                 )
-                query = query.filter(ArticleBase.id.in_(subq))
+            conditions.append(ArticleBase.id.in_(subq))
 
-        # 获取总数
-        total = query.count()
-        query = query.order_by(ArticleBase.publish_time.desc()).offset(offset).limit(limit)
-        # 分页查询（按发布时间降序）
-        articles = query.all()
+        # 获取总数（按 count 参数精确缓存 / 估算 / 跳过）
+        total = await resolve_count_async(
+            db,
+            select(entity.id).where(*conditions),
+            count_signature("articles", status, mp_id, search, has_content, time_low, time_high, resolved_tags, tag_match.value),
+            count,
+        )
+        # 分页查询（按发布时间降序，id 保证同一时间戳内顺序稳定）
+        if ranked:
+            # 相关度排序：关联命中结果取得分，不再重复 IN 过滤
+            stmt = (
+                select(entity)
+                .join(search_hits, search_hits.c.article_id == ArticleBase.id)
+                .where(*[c for c in conditions if c is not search_cond])
+            )
+        else:
+            stmt = select(entity).where(*conditions)
+        if has_content:
+            # 正文为延迟加载列，仅在显式请求时随列表返回
+            stmt = stmt.options(undefer(Article.content))
+        if cursor:
+            stmt = stmt.where(cursor_condition)
+        else:
+            stmt = stmt.offset(offset)
+        order = keyset_order(ArticleBase.publish_time, ArticleBase.id)
+        if ranked:
+            order = (search_hits.c.score.desc(), *order)
+        stmt = stmt.order_by(*order).limit(limit)
+        articles = (await db.execute(stmt)).scalars().all()
 
         try:
             logger.debug(
                 "articles list SQL: %s",
-                str(query.statement.compile(compile_kwargs={"literal_binds": True})),
+                str(stmt.compile(compile_kwargs={"literal_binds": True})),
             )
         except Exception:
             pass
@@ -475,7 +548,9 @@ async def get_articles(
             from .base import success_response
             empty_result = success_response({
                 "list": [],
-                "total": total
+                "total": total,
+                "count_mode": count.value,
+                "next_cursor": None
             })
             set_cache(cache_key, empty_result, ttl=300)
             return empty_result
@@ -490,14 +565,14 @@ async def get_articles(
         mp_ids = list(set([a.mp_id for a in articles if a.mp_id]))
         mp_info = {}
         if mp_ids:
-            feeds = session.query(Feed).filter(Feed.id.in_(mp_ids)).all()
+            feeds = (await db.execute(select(Feed).where(Feed.id.in_(mp_ids)))).scalars().all()
             # 批量记录名称和头像
             mp_info = {feed.id: {"mp_name": feed.mp_name, "mp_cover": feed.mp_cover} for feed in feeds}
         
         # 2. 批量查询所有文章的标签关联
-        all_article_tags = session.query(ArticleTag).filter(
-            ArticleTag.article_id.in_(article_ids)
-        ).all()
+        all_article_tags = (await db.execute(
+            select(ArticleTag).where(ArticleTag.article_id.in_(article_ids))
+        )).scalars().all()
         
         # 3. 按文章 ID 分组标签 ID
         tags_by_article = {}
@@ -511,16 +586,18 @@ async def get_articles(
         # 4. 批量查询所有标签信息
         tags_dict = {}
         if all_tag_ids:
-            tags = session.query(TagsModel).filter(
-                TagsModel.id.in_(list(all_tag_ids)),
-                TagsModel.status == 1
-            ).all()
+            tags = (await db.execute(
+                select(TagsModel).where(
+                    TagsModel.id.in_(list(all_tag_ids)),
+                    TagsModel.status == 1
+                )
+            )).scalars().all()
             tags_dict = {t.id: t for t in tags}
         
         # 5. 批量查询 AI 过滤结果
-        ai_filter_rows = session.query(ArticleAiFilter).filter(
-            ArticleAiFilter.article_id.in_(article_ids)
-        ).all()
+        ai_filter_rows = (await db.execute(
+            select(ArticleAiFilter).where(ArticleAiFilter.article_id.in_(article_ids))
+        )).scalars().all()
         ai_filter_map = {row.article_id: row for row in ai_filter_rows}
 
         # 6. 在内存中组装数据
@@ -562,7 +639,9 @@ async def get_articles(
         from .base import success_response
         result = success_response({
             "list": article_list,
-            "total": total
+            "total": total,
+            "count_mode": count.value,
+            "next_cursor": None if ranked else next_cursor(articles, limit)
         })
         
         # 存入缓存（缓存5分钟）
@@ -579,8 +658,31 @@ async def get_articles(
                 message=f"获取文章列表失败: {str(e)}"
             )
         )
-    finally:
-        session.close()
+
+def _archived_article_detail(session, article_id: str) -> Optional[Dict[str, Any]]:
+    """归档文章的详情（字段与库中文章一致，另加 archived=True）"""
+    from core.article_archive import load_archived_article
+    record = load_archived_article(article_id)
+    if record is None or record["article"].get("status") == DATA_STATUS.DELETED:
+        return None
+    article_dict = dict(record["article"], archived=True)
+    from core.models.feed import Feed
+    from core.models.tags import Tags as TagsModel
+    if article_dict.get("mp_id"):
+        feed = session.query(Feed).filter(Feed.id == article_dict["mp_id"]).first()
+        article_dict["mp_name"] = feed.mp_name if feed else "未知公众号"
+    tag_ids = [tag["tag_id"] for tag in record["tags"]]
+    tags = session.query(TagsModel).filter(
+        TagsModel.id.in_(tag_ids),
+        TagsModel.status == 1
+    ).all() if tag_ids else []
+    article_dict["tags"] = [{"id": t.id, "name": t.name} for t in tags]
+    article_dict["tag_names"] = [t.name for t in tags]
+    article_dict["topics"] = []
+    article_dict["topic_names"] = []
+    article_dict["duplicate_of"] = None
+    return article_dict
+
 
 @router.get("/{article_id}", summary="获取文章详情")
 async def get_article_detail(
@@ -590,8 +692,13 @@ async def get_article_detail(
 ):
     session = DB.get_session()
     try:
-        article = session.query(Article).filter(Article.id==article_id).filter(Article.status != DATA_STATUS.DELETED).first()
+        article = session.query(Article).options(undefer(Article.content))\
+            .filter(Article.id==article_id).filter(Article.status != DATA_STATUS.DELETED).first()
         if not article:
+            # 已归档的文章按需从归档段文件读取
+            archived = _archived_article_detail(session, article_id)
+            if archived is not None:
+                return success_response(archived)
             from .base import error_response
             raise HTTPException(
                 status_code=fast_status.HTTP_404_NOT_FOUND,
@@ -623,6 +730,9 @@ async def get_article_detail(
         ).all() if tag_ids else []
         article_dict["tags"] = [{"id": t.id, "name": t.name} for t in tags]
         article_dict["tag_names"] = [t.name for t in tags]
+        # 近似重复文章指向的原文
+        from core.article_dedup import duplicate_sources
+        article_dict["duplicate_of"] = duplicate_sources(session, [article.id]).get(article.id)
         # topics 应该独立于 tags，不应该被 tag 覆盖
         article_dict["topics"] = []
         article_dict["topic_names"] = []
@@ -701,6 +811,7 @@ async def update_article(
         
         # 清除文章列表缓存（因为文章信息已更新）
         clear_cache_pattern("articles:")
+        invalidate_article_counts()
         
         return success_response(None, message="文章更新成功")
     except HTTPException as e:
@@ -753,6 +864,7 @@ async def delete_article(
         
         # 清除文章列表缓存（因为文章已删除）
         clear_cache_pattern("articles:")
+        invalidate_article_counts()
         
         return success_response(None, message=message)
     except Exception as e:
@@ -786,7 +898,7 @@ async def get_next_article(
             )
         
         # 查询发布时间更晚的第一篇文章
-        next_article = session.query(Article)\
+        next_article = session.query(Article).options(undefer(Article.content))\
             .filter(Article.publish_time > current_article.publish_time)\
             .filter(Article.status != DATA_STATUS.DELETED)\
             .filter(Article.mp_id == current_article.mp_id)\
@@ -835,7 +947,7 @@ async def get_prev_article(
             )
         
         # 查询发布时间更早的第一篇文章
-        prev_article = session.query(Article)\
+        prev_article = session.query(Article).options(undefer(Article.content))\
             .filter(Article.publish_time < current_article.publish_time)\
             .filter(Article.status != DATA_STATUS.DELETED)\
             .filter(Article.mp_id == current_article.mp_id)\
@@ -925,6 +1037,7 @@ async def fetch_article_content(
                 session.commit()
                 # 清除文章列表缓存（因为文章状态已更新）
                 clear_cache_pattern("articles:")
+                invalidate_article_counts()
                 raise HTTPException(
                     status_code=fast_status.HTTP_406_NOT_ACCEPTABLE,
                     detail=error_response(
@@ -940,6 +1053,7 @@ async def fetch_article_content(
             
             # 清除文章列表缓存（因为文章内容已更新）
             clear_cache_pattern("articles:")
+            invalidate_article_counts()
             
             return success_response({
                 "message": "内容获取成功",
@@ -22,9 +22,7 @@ def error_response(code: int, message: str, data=None):
         "message": message,
         "data": data
     }
-from sqlalchemy import and_,or_
-from core.models import Article
 def format_search_kw(keyword: str):
-    words = keyword.replace("-"," ").replace("|"," ").split(" ")
-    rule = or_(*[Article.title.like(f"%{w}%") for w in words])
-    return rule
\ No newline at end of file
+    """关键词过滤条件：全文索引可用时检索标题/摘要/正文，否则退回标题 LIKE（见 core/article_search.py）"""
+    from core.article_search import search_condition
+    return search_condition(keyword)
\ No newline at end of file
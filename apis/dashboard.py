@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status as fast_status
 from core.auth import get_current_user
 from core.db import DB
+from core.database import get_async_db
 from core.models.base import DATA_STATUS
 from core.models.article import Article, ArticleBase
 from core.models.feed import Feed
-from sqlalchemy import func, and_, case, or_
+from sqlalchemy import func, and_, case, or_, select
 from datetime import datetime, timedelta
 from .base import success_response, error_response
 from typing import Dict, Any, List
@@ -14,7 +15,8 @@ router = APIRouter(prefix="/dashboard", tags=["Dashboard统计"])
 
 @router.get("/stats", summary="获取Dashboard统计数据")
 async def get_dashboard_stats(
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db=Depends(get_async_db),
 ) -> Dict[str, Any]:
     """获取Dashboard统计数据，包括：
     - 总文章数、来源数量、今日新增、本周新增
@@ -22,8 +24,9 @@ async def get_dashboard_stats(
     - 热门关键词统计
     - 关键词趋势数据
     - 抓取趋势数据
+
+    查询通过异步会话执行，统计耗时较长时不会阻塞其他请求。
     """
-    session = DB.get_session()
     try:
         # 检测数据库类型
         db_config = DB.connection_str if hasattr(DB, 'connection_str') else ""
@@ -66,19 +69,24 @@ async def get_dashboard_stats(
 
         # 1. 基础统计
         # 总文章数（排除已删除）
-        total_articles = session.query(ArticleBase).filter(
-            ArticleBase.status != DATA_STATUS.DELETED
-        ).count()
+        total_articles = await db.scalar(
+            select(func.count()).select_from(ArticleBase).where(
+                ArticleBase.status != DATA_STATUS.DELETED
+            )
+        ) or 0
 
         # 总来源数
-        total_sources = session.query(Feed).count()
+        total_sources = await db.scalar(select(func.count()).select_from(Feed)) or 0
 
         # 今日新增文章
         # 使用 func.date() 或直接比较，但需要处理时区问题
         # 先查询所有符合条件的记录，然后在 Python 层面过滤
-        all_recent_articles = session.query(ArticleBase).filter(
-            ArticleBase.status != DATA_STATUS.DELETED
-        ).all()
+        # 只取 created_at 一列，避免加载整行文章
+        all_recent_articles = (await db.execute(
+            select(ArticleBase.created_at).where(
+                ArticleBase.status != DATA_STATUS.DELETED
+            )
+        )).all()
         
         today_articles = 0
         week_articles = 0
@@ -93,7 +101,7 @@ async def get_dashboard_stats(
                     week_articles += 1
 
         # 2. 来源分布统计
-        source_stats_query = session.query(
+        source_stats_query = (await db.execute(select(
             Feed.id,
             Feed.mp_name,
             func.count(
@@ -107,7 +115,7 @@ async def get_dashboard_stats(
             func.count(
                 case((Article.status != DATA_STATUS.DELETED, Article.id), else_=None)
             ).desc()
-        ).limit(10).all()
+        ).limit(10))).all()
 
         source_stats = [
             {
@@ -157,7 +165,7 @@ async def get_dashboard_stats(
                 'unixepoch'
             )
         
-        recent_articles_with_tags = session.query(
+        recent_articles_with_tags = (await db.execute(select(
             Article.id,
             # 优先使用 article_publish_date，如果为 NULL 则从 Article.publish_time 转换
             case(
@@ -169,12 +177,12 @@ async def get_dashboard_stats(
             ArticleTag, Article.id == ArticleTag.article_id
         ).join(
             TagsModel, ArticleTag.tag_id == TagsModel.id
-        ).filter(
+        ).where(
             and_(
                 Article.status != DATA_STATUS.DELETED,
                 TagsModel.status == 1  # 只统计启用的标签
             )
-        ).all()
+        ))).all()
         
         # 在 Python 层面过滤最近30天的文章，避免时区比较问题
         filtered_articles = []
@@ -187,9 +195,10 @@ async def get_dashboard_stats(
                     filtered_articles.append(row)
             else:
                 # 如果没有 tag_date，尝试从 publish_time 转换
-                article = session.query(Article).filter(Article.id == row.id).first()
-                if article and article.publish_time:
-                    publish_timestamp = article.publish_time
+                publish_timestamp = await db.scalar(
+                    select(Article.publish_time).where(Article.id == row.id)
+                )
+                if publish_timestamp:
                     if publish_timestamp < 10000000000:
                         publish_dt = datetime.fromtimestamp(publish_timestamp)
                     else:
@@ -327,18 +336,18 @@ async def get_dashboard_stats(
         thirty_days_ago_timestamp = int((now - timedelta(days=30)).timestamp())
         
         # 查询所有符合条件的文章（使用发布时间）
-        trend_query = session.query(
+        trend_query = (await db.execute(select(
             Article.publish_time,
             Feed.mp_name,
             Article.id
         ).outerjoin(
             Feed, Article.mp_id == Feed.id
-        ).filter(
+        ).where(
             and_(
                 Article.status != DATA_STATUS.DELETED,
                 Article.publish_time >= thirty_days_ago_timestamp
             )
-        ).all()
+        ))).all()
 
         # 在 Python 层面按日期和公众号分组统计
         trend_map: Dict[str, Dict[str, int]] = {}
@@ -391,7 +400,7 @@ async def get_dashboard_stats(
         })
 
     except Exception as e:
-        session.rollback()
+        await db.rollback()
         import traceback
         error_detail = traceback.format_exc()
         from core.print import print_error
@@ -404,6 +413,4 @@ async def get_dashboard_stats(
                 message=f"获取统计数据失败: {str(e)}"
             )
         )
-    finally:
-        session.close()
 
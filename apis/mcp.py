@@ -8,6 +8,7 @@ from fastapi import APIRouter, Body, Header, HTTPException, Request
 from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 from sqlalchemy import and_, case, func
+from sqlalchemy.orm import undefer
 
 from apis.tag_clusters import _get_tag_cluster_payload
 from core.db import DB
@@ -19,6 +20,9 @@ from core.models.feed import Feed
 from core.models.tags import Tags as TagsModel
 from core.models.tag_clusters import TagCluster
 from core.models.tag_cluster_members import TagClusterMember
+from core.article_count import CountMode, count_signature, resolve_count
+from core.pagination import InvalidCursor, keyset_condition, keyset_order, next_cursor
+from core.article_search import SearchOrder, search_condition, search_subquery
 from core.print import print_warning
 from core.visualization import compute_2d_layout, normalize_coordinates
 
@@ -40,10 +44,22 @@ class MCPError(Exception):
 class ArticlesListParams(BaseModel):
     page: int = Field(1, ge=1, description="页码，从 1 开始")
     page_size: int = Field(20, ge=1, le=100, description="每页条数")
-    search: Optional[str] = Field(None, description="标题关键词")
+    search: Optional[str] = Field(None, description="关键词（全文检索标题、摘要与正文）")
     mp_id: Optional[str] = Field(None, description="公众号 ID")
     status: Optional[int] = Field(None, description="文章状态")
     has_content: bool = Field(False, description="仅含正文")
+    cursor: Optional[str] = Field(
+        None,
+        description="游标分页：传入上一页返回的 next_cursor 继续遍历（传入后忽略 page），适合遍历全部文章",
+    )
+    count: CountMode = Field(
+        CountMode.exact,
+        description="总数计算方式：exact=精确（缓存）；estimate=PostgreSQL 估算；none=不计数",
+    )
+    sort: SearchOrder = Field(
+        SearchOrder.time,
+        description="排序：time=发布时间倒序；relevance=按搜索相关度（需 search，不支持 cursor）",
+    )
 
 
 class ArticleGetParams(BaseModel):
@@ -192,6 +208,11 @@ def _get_session():
     return DB.get_session()
 
 
+def _get_read_session():
+    """只读会话：配置了只读副本时走副本（延迟过大自动回退主库），调用方负责 close"""
+    return DB.get_read_session_factory(replica=True)()
+
+
 def _parse_request_body(body: Any):
     if isinstance(body, dict):
         return [body]
@@ -227,7 +248,7 @@ def _article_public_payload(article: ArticleBase, tags_by_article: dict[str, lis
 
 
 def _list_articles(args: dict[str, Any]):
-    session = _get_session()
+    session = _get_read_session()
     try:
         page = max(1, int(args.get("page", 1)))
         page_size = max(1, min(100, int(args.get("page_size", 20))))
@@ -235,25 +256,55 @@ def _list_articles(args: dict[str, Any]):
         mp_id = (args.get("mp_id") or "").strip() or None
         status = args.get("status")
         has_content = bool(args.get("has_content", False))
+        cursor = (args.get("cursor") or "").strip() or None
+        try:
+            count_mode = CountMode(args.get("count") or CountMode.exact.value)
+        except ValueError:
+            raise MCPError(-32602, f"Invalid count mode: {args.get('count')}")
+        try:
+            sort = SearchOrder(args.get("sort") or SearchOrder.time.value)
+        except ValueError:
+            raise MCPError(-32602, f"Invalid sort: {args.get('sort')}")
         offset = (page - 1) * page_size
 
         query = session.query(ArticleBase)
         if has_content:
-            query = session.query(Article)
+            query = session.query(Article).options(undefer(Article.content))
         if status is not None:
             query = query.filter(ArticleBase.status == int(status))
         else:
             query = query.filter(ArticleBase.status != DATA_STATUS.DELETED)
         if mp_id:
             query = query.filter(ArticleBase.mp_id == mp_id)
-        if search:
-            from apis.base import format_search_kw
-            query = query.filter(format_search_kw(search))
-
-        total = query.count()
-        articles = query.order_by(ArticleBase.publish_time.desc()).offset(offset).limit(page_size).all()
+        search_hits = search_subquery(search) if search else None
+        ranked = search_hits is not None and sort == SearchOrder.relevance
+        if ranked:
+            if cursor:
+                raise MCPError(-32602, "relevance sort does not support cursor")
+            query = query.join(search_hits, search_hits.c.article_id == ArticleBase.id)
+        elif search:
+            query = query.filter(search_condition(search, search_hits))
+
+        total = resolve_count(
+            session,
+            query.statement,
+            count_signature("articles", status, mp_id, search, has_content, None, None, [], "any"),
+            count_mode,
+        )
+        order = keyset_order(ArticleBase.publish_time, ArticleBase.id)
+        if ranked:
+            order = (search_hits.c.score.desc(), *order)
+        query = query.order_by(*order)
+        if cursor:
+            try:
+                query = query.filter(keyset_condition(ArticleBase.publish_time, ArticleBase.id, cursor))
+            except InvalidCursor as exc:
+                raise MCPError(-32602, str(exc))
+        else:
+            query = query.offset(offset)
+        articles = query.limit(page_size).all()
         if not articles:
-            return {"items": [], "total": total, "page": page, "page_size": page_size}
+            return {"items": [], "total": total, "page": page, "page_size": page_size, "next_cursor": None}
 
         article_ids = [item.id for item in articles]
         mp_ids = list({item.mp_id for item in articles if item.mp_id})
@@ -285,7 +336,13 @@ def _list_articles(args: dict[str, Any]):
             item["mp_cover"] = mp_lookup.get(article.mp_id, {}).get("mp_cover", "")
             items.append(item)
 
-        return {"items": items, "total": total, "page": page, "page_size": page_size}
+        return {
+            "items": items,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": None if ranked else next_cursor(articles, page_size),
+        }
     finally:
         session.close()
 
@@ -293,7 +350,7 @@ def _list_articles(args: dict[str, Any]):
 def _get_article(article_id: str):
     session = _get_session()
     try:
-        article = session.query(Article).filter(Article.id == article_id).first()
+        article = session.query(Article).options(undefer(Article.content)).filter(Article.id == article_id).first()
         if not article:
             raise MCPError(-32004, "Article not found")
 
@@ -415,7 +472,7 @@ def _update_tag_status(tag_id: str, status: int):
 
 
 def _list_tag_clusters(args: dict[str, Any]):
-    session = _get_session()
+    session = _get_read_session()
     try:
         offset = max(0, int(args.get("offset", 0)))
         limit = max(1, min(100, int(args.get("limit", 20))))
@@ -445,7 +502,7 @@ def _list_tag_clusters(args: dict[str, Any]):
 
 
 def _get_tag_cluster(cluster_id: str):
-    session = _get_session()
+    session = _get_read_session()
     try:
         payload = _get_tag_cluster_payload(session, cluster_id)
         if not payload:
@@ -456,7 +513,7 @@ def _get_tag_cluster(cluster_id: str):
 
 
 def _get_tag_cluster_visualization(params: dict[str, Any]):
-    session = _get_session()
+    session = _get_read_session()
     try:
         cluster_id = params["cluster_id"]
         cluster = session.query(TagCluster).filter(TagCluster.id == cluster_id).first()
@@ -482,7 +539,7 @@ def _get_tag_cluster_visualization(params: dict[str, Any]):
 
 
 def _get_tag_cluster_network(params: dict[str, Any]):
-    session = _get_session()
+    session = _get_read_session()
     try:
         cluster_id = params["cluster_id"]
         cluster = session.query(TagCluster).filter(TagCluster.id == cluster_id).first()
@@ -574,7 +631,8 @@ def _get_tag_cluster_network(params: dict[str, Any]):
 
 
 async def _analyze_articles_ai_filter(arguments: dict[str, Any]):
-    from core.article_filter import get_article_filter_engine
+    from core.article_filter import ArticleFilterDecision, get_article_filter_engine
+    from core.article_dedup import reusable_filter_results
     from core.models.article_ai_filter import ArticleAiFilter
 
     raw_ids = arguments.get("article_ids") or []
@@ -609,6 +667,7 @@ async def _analyze_articles_ai_filter(arguments: dict[str, Any]):
             mp_info = {feed.id: {"mp_name": feed.mp_name, "mp_cover": feed.mp_cover} for feed in feeds}
 
         engine = get_article_filter_engine()
+        reusable = reusable_filter_results(session, [a.id for a in ordered_articles])
         items: list[dict[str, Any]] = []
         summary = {"hidden": 0, "keep": 0, "maybe": 0}
 
@@ -620,12 +679,23 @@ async def _analyze_articles_ai_filter(arguments: dict[str, Any]):
                 if tag_id in tags_dict and tags_dict[tag_id].name
             ]
             mp_name = mp_info.get(article.mp_id, {}).get("mp_name", "未知公众号")
-            result = await engine.classify(
-                title=article.title or "",
-                tags=tag_names,
-                source=mp_name,
-                description=article.description or "",
-            )
+            if article.id in reusable:
+                # 近似重复文章沿用原文的判定，不再调用模型
+                source = reusable[article.id]
+                result = ArticleFilterDecision(
+                    decision=source.decision,
+                    category=source.category,
+                    confidence=source.confidence,
+                    reason=f"与文章 {source.article_id} 近似重复，沿用其判定：{source.reason or ''}",
+                    model_name=source.model_name,
+                )
+            else:
+                result = await engine.classify(
+                    title=article.title or "",
+                    tags=tag_names,
+                    source=mp_name,
+                    description=article.description or "",
+                )
 
             row = session.query(ArticleAiFilter).filter(ArticleAiFilter.article_id == article.id).first()
             if not row:
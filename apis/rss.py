@@ -2,6 +2,9 @@ from fastapi import APIRouter, Depends, Query, HTTPException, Request,Response
 from fastapi import status
 from fastapi.responses import Response
 from core.db import DB
+from core.database import async_session_scope
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
 from core.rss import RSS
 from core.models.feed import Feed
 import json
@@ -10,6 +13,7 @@ from core.auth import get_current_user
 from core.config import cfg
 from apis.base import format_search_kw
 from core.print import print_error,print_success
+from core.pagination import InvalidCursor, decode_cursor, keyset_condition, keyset_order, next_cursor
 def verify_rss_access(current_user: dict = Depends(get_current_user)):
     """
     RSS访问认证方法
@@ -67,10 +71,11 @@ async def get_rss_feeds(
             content=rss_xml,
             media_type="application/xml"
         )
-    session = DB.get_session()
     try:
-        total = session.query(Feed).count()
-        feeds = session.query(Feed).order_by(Feed.created_at.desc()).limit(limit).offset(offset).all()
+        async with async_session_scope() as db:
+            feeds = (await db.execute(
+                select(Feed).order_by(Feed.created_at.desc()).limit(limit).offset(offset)
+            )).scalars().all()
         rss_domain=cfg.get("rss.base_url",request.base_url)
         # 转换为RSS格式数据
         from datetime import datetime, timezone, timedelta
@@ -106,6 +111,9 @@ async def get_rss_feeds(
 async def get_rss_feed(content_id: str):
     rss = RSS()
     content = rss.get_cached_content(content_id)
+    if content is None:
+        # 已归档的文章按需从归档段文件读取
+        content = _archived_content(content_id)
       
     if content is None:
         raise HTTPException(
@@ -146,6 +154,27 @@ async def get_rss_feed(content_id: str):
             content=html,
             media_type="text/html"
         )
+def _archived_content(article_id: str):
+    from core.article_archive import load_archived_article
+    record = load_archived_article(article_id)
+    if record is None:
+        return None
+    article = record["article"]
+    mp_name = None
+    if article.get("mp_id"):
+        with DB.read_session_scope() as session:
+            mp_name = session.query(Feed.mp_name).filter(Feed.id == article["mp_id"]).scalar()
+    return {
+        "id": article.get("id"),
+        "title": article.get("title") or "",
+        "content": article.get("content") or "",
+        "publish_time": article.get("publish_time"),
+        "mp_id": article.get("mp_id"),
+        "pic_url": article.get("pic_url"),
+        "mp_name": mp_name or "",
+    }
+
+
 def UpdateArticle(art:dict):
             return DB.add_article(art)
 
@@ -171,6 +200,34 @@ async def update_rss_feeds(
 
 
 
+async def _archived_page(db, articles, mp_ids, cursor, offset, limit):
+    """紧接库中最后一篇之后的归档文章，返回 [(Feed, 归档文章)]"""
+    from core.article_archive import list_archived_articles
+    if articles:
+        last = articles[-1][1]
+        after = (last.publish_time, last.id)
+    elif cursor:
+        after = decode_cursor(cursor)
+    elif offset == 0:
+        after = None
+    else:
+        # 偏移分页越过了库中全部文章，无法确定归档中的位置
+        return []
+    try:
+        archived = list_archived_articles(mp_ids, after, limit - len(articles))
+    except Exception as e:
+        print_error(f"读取归档文章失败:{e}")
+        return []
+    if not archived:
+        return []
+    feeds = {
+        feed.id: feed for feed in (await db.execute(
+            select(Feed).where(Feed.id.in_({article.mp_id for article in archived}))
+        )).scalars().all()
+    }
+    return [(feeds[article.mp_id], article) for article in archived if article.mp_id in feeds]
+
+
 @router.get("/{feed_id}", summary="获取公众号文章")
 async def get_mp_articles_source(
     request: Request,
@@ -182,10 +239,21 @@ async def get_mp_articles_source(
     kw:str="",
     is_update:bool=True,
     content_type:str=Query(None,alias="ctype"),
-    template:str=None
+    template:str=None,
+    cursor:str=None
     # current_user: dict = Depends(get_current_user)
 ):
-    rss=RSS(name=f'{tag_id}_{feed_id}_{limit}_{offset}',ext=ext)
+    if cursor:
+        # 游标分页：从上一页最后一篇继续，深翻页不再扫描丢弃前面的行
+        try:
+            decode_cursor(cursor)
+        except InvalidCursor as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=error_response(code=40001, message=str(e))
+            )
+        offset = 0
+    rss=RSS(name=f'{tag_id}_{feed_id}_{limit}_{offset}' + (f'_{cursor}' if cursor else ''),ext=ext)
     rss.set_content_type(content_type)
     rss_xml = rss.get_cache()
     if rss_xml is not None and is_update==False:
@@ -193,48 +261,58 @@ async def get_mp_articles_source(
             content=rss_xml,
             media_type=rss.get_type()
         )
-    session = DB.get_session()
     try:
         from core.models.article import Article
         from core.models.tags import Tags
-        # 查询公众号信息
-        feed = session.query(Feed)
-        query=session.query(Feed, Article).join(Article, Feed.id == Article.mp_id)
         rss_domain=cfg.get("rss.base_url",str(request.base_url))
-        if feed_id not in ["all",None]:
-            feed=feed.filter(Feed.id == feed_id).first()
-            query=query.filter(Article.mp_id==feed_id)
-        else:
-            feed=Feed()
-            feed.mp_name=cfg.get("rss.title","WeRss") or "WeRss"
-            feed.mp_intro=cfg.get("rss.description") or "WeRss高效订阅我的公众号"
-            feed.mp_cover=cfg.get("rss.cover") or f"{rss_domain}static/logo.svg"
-            #如果传入了tag_id就加载tag对应的订阅信息
-            if tag_id is not None:
-                tags=session.query(Tags).filter(Tags.id == tag_id).first()
-                if tags:
-                    mps_ids = [str(mp['id']) for mp in json.loads(tags.mps_id)] if tags.mps_id else []
-                    query=query.filter(Feed.id.in_(mps_ids))
-                    feed.mp_name = tags.name
-                    feed.mp_intro = tags.intro
-                    feed.mp_cover = f'{rss_domain}{tags.cover}'
+        async with async_session_scope() as db:
+            # 查询公众号信息
+            stmt=select(Feed, Article).join(Article, Feed.id == Article.mp_id).options(undefer(Article.content))
+            # 归档文章的公众号范围（None 表示不限）
+            archive_mp_ids=None
+            if feed_id not in ["all",None]:
+                feed=(await db.execute(select(Feed).where(Feed.id == feed_id))).scalars().first()
+                stmt=stmt.where(Article.mp_id==feed_id)
+                archive_mp_ids=[feed_id]
+            else:
+                feed=Feed()
+                feed.mp_name=cfg.get("rss.title","WeRss") or "WeRss"
+                feed.mp_intro=cfg.get("rss.description") or "WeRss高效订阅我的公众号"
+                feed.mp_cover=cfg.get("rss.cover") or f"{rss_domain}static/logo.svg"
+                #如果传入了tag_id就加载tag对应的订阅信息
+                if tag_id is not None:
+                    tags=(await db.execute(select(Tags).where(Tags.id == tag_id))).scalars().first()
+                    if tags:
+                        mps_ids = [str(mp['id']) for mp in json.loads(tags.mps_id)] if tags.mps_id else []
+                        stmt=stmt.where(Feed.id.in_(mps_ids))
+                        archive_mp_ids=mps_ids
+                        feed.mp_name = tags.name
+                        feed.mp_intro = tags.intro
+                        feed.mp_cover = f'{rss_domain}{tags.cover}'
 
-        
-        if not feed:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=error_response(
-                    code=40401,
-                    message="公众号不存在"
+            
+            if not feed:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=error_response(
+                        code=40401,
+                        message="公众号不存在"
+                    )
                 )
-            )
-      
-        # 查询文章列表
-        total = query.count()
-        # articles = query.order_by(Article.publish_time.desc()).limit(limit).offset(offset).all()
-        if kw!="":
-            query=query.filter(format_search_kw(kw))
-        articles =query.order_by(Article.publish_time.desc()).limit(limit).offset(offset).all()
+          
+            # 查询文章列表
+            if kw!="":
+                stmt=stmt.where(format_search_kw(kw))
+            if cursor:
+                stmt=stmt.where(keyset_condition(Article.publish_time, Article.id, cursor))
+            else:
+                stmt=stmt.offset(offset)
+            articles=(await db.execute(
+                stmt.order_by(*keyset_order(Article.publish_time, Article.id)).limit(limit)
+            )).all()
+            # 库中文章不足一页时继续列出更早的归档文章（按需从段文件读取）
+            if len(articles) < limit and kw=="":
+                articles += await _archived_page(db, articles, archive_mp_ids, cursor, offset, limit)
         # 转换为RSS格式数据
         from datetime import datetime, timezone, timedelta
         cst = timezone(timedelta(hours=8))
@@ -271,9 +349,20 @@ async def get_mp_articles_source(
         # 生成RSS XML
         rss_xml = rss.generate(rss_list,ext=ext, title=f"{feed.mp_name}",link=rss_domain,description=feed.mp_intro,image_url=feed.mp_cover,template=template)
         
+        # 下一页游标通过响应头返回（X-Next-Cursor / Link rel="next"），不改变 RSS 内容
+        headers = {}
+        following = next_cursor([article for _feed, article in articles], limit)
+        if following:
+            headers["X-Next-Cursor"] = following
+            try:
+                next_url = request.url.remove_query_params("offset").include_query_params(cursor=following)
+                headers["Link"] = f'<{next_url}>; rel="next"'
+            except Exception:
+                pass
         return Response(
             content=rss_xml,
-            media_type=rss.get_type()
+            media_type=rss.get_type(),
+            headers=headers
         )
     except Exception as e:
         print_error(f"获取RSS错误:{e}")
@@ -294,9 +383,10 @@ async def rss(
     offset: int = Query(0, ge=0),
     kw:str="",
     content_type:str=Query(None,alias="ctype"),
-    is_update:bool=True
+    is_update:bool=True,
+    cursor:str=None
 ):
-    return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset, is_update=is_update,ext=ext,kw=kw,content_type=content_type)
+    return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset, is_update=is_update,ext=ext,kw=kw,content_type=content_type,cursor=cursor)
 
 
 @feed_router.get("/search/{kw}/{feed_id}.{ext}", summary="获取公众号文章源")
@@ -308,9 +398,10 @@ async def rss(
     offset: int = Query(0, ge=0),
     kw:str="",
     content_type:str=Query(None,alias="ctype"),
-    is_update:bool=True
+    is_update:bool=True,
+    cursor:str=None
 ):
-    return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset, is_update=is_update,ext=ext,kw=kw,content_type=content_type)
+    return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset, is_update=is_update,ext=ext,kw=kw,content_type=content_type,cursor=cursor)
 @feed_router.get("/tag/{tag_id}.{ext}", summary="获取公众号文章源")
 async def rss(
     request: Request,
@@ -321,8 +412,9 @@ async def rss(
     offset: int = Query(0, ge=0),
     kw:str="",
     content_type:str=Query(None,alias="ctype"),
-    is_update:bool=True
+    is_update:bool=True,
+    cursor:str=None
 ):
-    return await get_mp_articles_source(request=request,feed_id=feed_id, tag_id=tag_id,limit=limit,offset=offset, is_update=is_update,ext=ext,kw=kw,content_type=content_type)
+    return await get_mp_articles_source(request=request,feed_id=feed_id, tag_id=tag_id,limit=limit,offset=offset, is_update=is_update,ext=ext,kw=kw,content_type=content_type,cursor=cursor)
 
 
@@ -13,6 +13,15 @@ from driver.success import getLoginInfo,getStatus
 from jobs.mps import scheduler as mps_scheduler
 from jobs.taskmsg import get_message_task
 from jobs.fetch_no_article import scheduler as fetch_scheduler
+from core.db import DB, engine_registry, db_health_monitor
+from core.database import ASYNC_DB
+from core.content_codec import compression_stats
+from core.article_search import search_status
+from core.article_dedup import dedup_status
+from core.article_archive import archive_status
+from core.wx.crawl_engine import crawl_status
+from core.wx.rate_limit import wx_limiter
+from core.wx.session_pool import session_pool
 router = APIRouter(prefix="/sys", tags=["系统信息"])
 
 # 记录服务器启动时间
@@ -123,6 +132,16 @@ async def get_system_info(
             },
             "article":ARTICLE_INFO,
             'queue':TaskQueue.get_queue_info(),
+            "db": engine_registry.stats(),
+            "db_async": ASYNC_DB.status(),
+            "db_replica": DB.replica_guard.status() if DB.replica_guard is not None else None,
+            "content_compression": compression_stats(),
+            "search": search_status(),
+            "dedup": dedup_status(),
+            "archive": archive_status(),
+            "crawl": crawl_status(),
+            "rate_limit": wx_limiter.status(),
+            "sessions": session_pool.status(),
             "scheduler": {
                 "mps": mps_scheduler.get_scheduler_status() if hasattr(mps_scheduler, 'get_scheduler_status') else {"running": False, "job_count": 0, "next_run_times": []},
                 "fetch": fetch_scheduler.get_scheduler_status() if hasattr(fetch_scheduler, 'get_scheduler_status') else {"running": False, "job_count": 0, "next_run_times": []},
@@ -140,4 +159,30 @@ async def get_system_info(
         return error_response(
             code=50001,
             message=f"获取系统信息失败: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/db_health", summary="数据库连接健康状态")
+async def get_db_health(
+    refresh: bool = False,
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """获取数据库连接池与探活状态
+
+    Args:
+        refresh: 为 True 时立即对所有引擎执行一次探活
+
+    Returns:
+        BaseResponse格式的健康信息，包括:
+        - running: 后台探活线程是否运行
+        - engines: 每个引擎的健康状态、探活延迟、退避信息及连接池借出/归还计数
+    """
+    try:
+        if refresh:
+            import asyncio
+            await asyncio.to_thread(db_health_monitor.probe_all, True)
+        return success_response(data=db_health_monitor.status())
+    except Exception as e:
+        return error_response(
+            code=50001,
+            message=f"获取数据库健康状态失败: {str(e)}"
+        )
@@ -7,7 +7,7 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from core.auth import get_current_user
-from core.database import get_db
+from core.database import get_db, get_read_db
 from core.models.article_tags import ArticleTag
 from core.models.tag_cluster_aliases import TagClusterAlias
 from core.models.tag_cluster_members import TagClusterMember
@@ -140,7 +140,7 @@ def _get_tag_cluster_payload(db: Session, cluster_id: str):
 async def list_tag_clusters(
     offset: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     cur_user: dict = Depends(get_current_user),
 ):
     total = db.query(TagCluster).count()
@@ -177,7 +177,7 @@ async def list_tag_clusters(
 async def get_similar_tags(
     tag_id: str,
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     cur_user: dict = Depends(get_current_user),
 ):
     rows = (
@@ -206,7 +206,7 @@ async def get_similar_tags(
 @router.get("/{cluster_id}")
 async def get_tag_cluster_detail(
     cluster_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     cur_user: dict = Depends(get_current_user),
 ):
     payload = _get_tag_cluster_payload(db, cluster_id)
@@ -218,7 +218,7 @@ async def get_tag_cluster_detail(
 @router.get("/{cluster_id}/export")
 async def export_tag_cluster(
     cluster_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     cur_user: dict = Depends(get_current_user),
 ):
     payload = _get_tag_cluster_payload(db, cluster_id)
@@ -255,7 +255,7 @@ async def rebuild_clusters(
 async def get_clusters_overview(
     method: str = Query('pca', description="降维方法: pca, tsne, umap"),
     limit: int = Query(10, ge=1, le=50, description="包含的聚类数量"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     cur_user: dict = Depends(get_current_user),
 ):
     """
@@ -317,7 +317,7 @@ async def get_cluster_visualization(
     include_edges: bool = Query(True, description="是否包含边信息"),
     min_edge_weight: float = Query(0.5, ge=0.0, le=1.0, description="最小边权重阈值"),
     normalize: bool = Query(True, description="是否归一化坐标"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     cur_user: dict = Depends(get_current_user),
 ):
     """
@@ -370,7 +370,7 @@ async def get_cluster_network(
     min_similarity: float = Query(0.3, ge=0.0, le=1.0, description="最小共现强度阈值"),
     layout_type: str = Query('force', description="布局类型: force, circular, hierarchical"),
     max_nodes: int = Query(100, ge=10, le=500, description="最大节点数量"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     cur_user: dict = Depends(get_current_user),
 ):
     """
@@ -5,13 +5,15 @@ from core.models.tags import Tags as TagsModel
 from core.models.article_tags import ArticleTag
 from core.models.article import Article
 from core.models.base import DATA_STATUS
-from core.database import get_db
+from core.database import get_db, get_async_db
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, case
+from sqlalchemy import func, and_, case, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from schemas.tags import Tags, TagsCreate
 from pydantic import BaseModel
 from .base import success_response, error_response
 from core.auth import get_current_user, requires_permission
+from core.tag_assign import invalidate_tag_cache
 
 # 标签管理API路由
 # 提供标签的增删改查功能
@@ -158,7 +160,7 @@ async def test_extract_keywords(
 @router.get("", 
     summary="获取标签列表",
     description="分页获取所有标签信息")
-async def get_tags(offset: int = 0, limit: int = 100, db: Session = Depends(get_db),cur_user: dict = Depends(get_current_user)):
+async def get_tags(offset: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db),cur_user: dict = Depends(get_current_user)):
     """
     获取标签列表
     
@@ -174,7 +176,7 @@ async def get_tags(offset: int = 0, limit: int = 100, db: Session = Depends(get_
     
     # 查询标签并统计每个标签关联的近三天文章数量
     # 使用条件计数：只统计近三天创建的文章
-    query = db.query(
+    stmt = select(
         TagsModel,
         func.count(
             case(
@@ -192,8 +194,8 @@ async def get_tags(offset: int = 0, limit: int = 100, db: Session = Depends(get_
         Article, Article.id == ArticleTag.article_id
     ).group_by(TagsModel.id)
     
-    total = db.query(TagsModel).count()
-    results = query.offset(offset).limit(limit).all()
+    total = await db.scalar(select(func.count()).select_from(TagsModel)) or 0
+    results = (await db.execute(stmt.offset(offset).limit(limit))).all()
     
     # 将结果转换为字典格式，添加 article_count 字段
     tags = []
@@ -348,6 +350,7 @@ async def update_tag(tag_id: str, tag_data: TagsCreate, db: Session = Depends(ge
             db.query(ArticleTag).filter(ArticleTag.tag_id == tag.id).delete(synchronize_session=False)
         
         db.commit()
+        invalidate_tag_cache()
         db.refresh(tag)
         
         # 如果 is_custom 状态发生变化，刷新标签提取器的缓存
@@ -393,6 +396,7 @@ async def update_tag_status(
             db.query(ArticleTag).filter(ArticleTag.tag_id == tag.id).delete(synchronize_session=False)
 
         db.commit()
+        invalidate_tag_cache()
         db.refresh(tag)
         return success_response(data=tag, message="Tag status updated successfully")
     except Exception as e:
@@ -438,6 +442,7 @@ async def batch_delete_tags(
             deleted_count += 1
         
         db.commit()
+        invalidate_tag_cache()
         return success_response(data={"deleted_count": deleted_count}, message=f"成功删除 {deleted_count} 个标签")
     except Exception as e:
         db.rollback()
@@ -466,6 +471,7 @@ async def delete_tag(tag_id: str, db: Session = Depends(get_db),cur_user: dict =
             return error_response(code=status.HTTP_201_CREATED, message="Tag not found")
         db.delete(tag)
         db.commit()
+        invalidate_tag_cache()
         return success_response(message="Tag deleted successfully")
     except Exception as e:
         return error_response(code=status.HTTP_201_CREATED, message=str(e))
@@ -47,6 +47,7 @@ async def re_extract_tags(
         from core.models.article_tags import ArticleTag
         from core.models.tags import Tags
         from core.models.base import DATA_STATUS
+        from sqlalchemy.orm import undefer
 
         session = DB.get_session()
         try:
@@ -54,84 +55,61 @@ async def re_extract_tags(
             error_count = 0
             results = []
 
-            for article_id in request.article_ids:
-                try:
-                    article = session.query(Article).filter(Article.id == article_id).first()
-                    if not article:
-                        error_count += 1
-                        results.append({"article_id": article_id, "error": "文章不存在"})
-                        continue
-
-                    if not article.title:
-                        error_count += 1
-                        results.append({"article_id": article_id, "error": "文章标题为空"})
-                        continue
-
-                    # 删除旧标签关联
-                    old_tags = session.query(ArticleTag).filter(
-                        ArticleTag.article_id == article_id
-                    ).all()
-                    for old_tag in old_tags:
-                        session.delete(old_tag)
-                    session.flush()
+            article_ids = list(dict.fromkeys(request.article_ids))
+            articles = {
+                article.id: article
+                for article in session.query(Article).options(undefer(Article.content))
+                .filter(Article.id.in_(article_ids)).all()
+            }
 
-                    # 重新提取标签
-                    content = article.content if hasattr(article, 'content') and article.content else ""
-                    description = article.description if article.description else ""
-                    
-                    # 尝试重新提取
-                    try:
-                        DB._assign_tags_by_extraction(
-                            session=session,
-                            article_id=article_id,
-                            title=article.title,
-                            description=description,
-                            content=content
-                        )
-                        # 显式 Commit 确保入库
-                        session.commit()
-                    except Exception as ext_e:
-                        session.rollback()
-                        print_error(f"提取过程报错: {ext_e}")
-                        # 强制回退到 TextRank 提取 (同步调用)
-                        from core.tag_extractor import get_tag_extractor
-                        extractor = get_tag_extractor()
-                        topics = extractor.extract(article.title, description, content, method="textrank")
-                        if topics:
-                            # 手动插入标签逻辑 (简化版)
-                            from core.models.tags import Tags
-                            from core.models.article_tags import ArticleTag
-                            import uuid
-                            for t_name in topics:
-                                tag_obj = session.query(Tags).filter(Tags.name == t_name).first()
-                                if not tag_obj:
-                                    tag_obj = Tags(id=str(uuid.uuid4()), name=t_name, status=1)
-                                    session.add(tag_obj)
-                                    session.flush()
-                                art_tag = ArticleTag(id=str(uuid.uuid4()), article_id=article_id, tag_id=tag_obj.id)
-                                session.add(art_tag)
-                            session.commit()
+            # 逐篇提取关键词（可能调用 AI），标签解析与关联写入统一批量完成
+            plans = []
+            for article_id in article_ids:
+                article = articles.get(article_id)
+                if not article:
+                    error_count += 1
+                    results.append({"article_id": article_id, "error": "文章不存在"})
+                    continue
+                if not article.title:
+                    error_count += 1
+                    results.append({"article_id": article_id, "error": "文章标题为空"})
+                    continue
+                try:
+                    topics = DB._extract_topics(article.title, article.description or "", article.content or "")
+                except Exception as e:
+                    error_count += 1
+                    results.append({"article_id": article_id, "error": str(e)})
+                    print_error(f"重新提取标签失败 [文章ID: {article_id}]: {e}")
+                    continue
+                plans.append((article_id, topics, article.publish_time))
 
-                    # 获取新标签名称用于返回
-                    tag_names = []
-                    new_article_tags = session.query(ArticleTag).filter(ArticleTag.article_id == article_id).all()
-                    if new_article_tags:
-                        t_ids = [at.tag_id for at in new_article_tags]
-                        tags_objs = session.query(Tags).filter(Tags.id.in_(t_ids)).all()
-                        tag_names = [t.name for t in tags_objs]
+            if plans:
+                from core.tag_assign import assign_article_tags
+                planned_ids = [article_id for article_id, _, _ in plans]
+                try:
+                    # 删除旧标签关联后重新关联
+                    session.query(ArticleTag).filter(ArticleTag.article_id.in_(planned_ids))\
+                        .delete(synchronize_session=False)
+                    assign_article_tags(session, plans)
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    print_error(f"批量关联标签失败: {e}")
+                    return error_response(500, f"批量关联标签失败: {str(e)}")
 
+                # 获取新标签名称用于返回
+                tag_names = {}
+                for article_id, name in session.query(ArticleTag.article_id, Tags.name)\
+                        .join(Tags, Tags.id == ArticleTag.tag_id)\
+                        .filter(ArticleTag.article_id.in_(planned_ids)):
+                    tag_names.setdefault(article_id, []).append(name)
+                for article_id in planned_ids:
                     success_count += 1
                     results.append({
                         "article_id": article_id,
-                        "title": article.title[:50],
-                        "tags": tag_names
+                        "title": articles[article_id].title[:50],
+                        "tags": tag_names.get(article_id, [])
                     })
-                except Exception as e:
-                    session.rollback()
-                    error_count += 1
-                    results.append({"article_id": article_id, "error": str(e)})
-                    from core.print import print_error
-                    print_error(f"重新提取标签失败 [文章ID: {article_id}]: {e}")
 
             return success_response({
                 "success_count": success_count,
@@ -0,0 +1,400 @@
+"""
+文章冷归档
+
+多年的历史文章几乎不再被访问，却让 articles 表持续膨胀，拖慢 VACUUM、备份和所有未走索引的扫描。
+这里把发布时间早于 archive.days 天的文章连同 article_tags 关联移出数据库，写入 data/archive 下的段文件：
+
+- 每批文章一个段文件（articles-<时间>-<随机>.jsonl.gz），每篇为一行 JSON，单独压缩为一个 gzip 成员，
+  整个文件可直接 zcat 查看
+- article_archive 表只保留定位信息（文章ID、公众号、标题、发布时间、段文件、偏移、长度），
+  读取单篇只需 seek 到偏移解压一小段
+- 文章详情、RSS 正文在库中找不到时按需从归档读取；RSS 列表翻到库中最早的文章后继续列出归档文章
+- restore_articles 把归档文章连同标签关联写回数据库，段文件中的文章全部恢复后删除该文件
+
+归档的文章同时从全文索引和近似重复索引中移除，恢复时重新建立。
+"""
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, or_
+
+from core.config import cfg
+from core.log import logger
+
+_DATETIME_FIELDS = {"created_at", "updated_at", "article_publish_date"}
+
+
+def archive_settings() -> Dict[str, Any]:
+    """读取 archive 配置"""
+    def _int(key: str, default: int) -> int:
+        try:
+            return int(cfg.get(key, default, silent=True) or default)
+        except (ValueError, TypeError):
+            return default
+
+    return {
+        "enabled": bool(cfg.get("archive.enabled", False, silent=True)),
+        "days": max(1, _int("archive.days", 365)),
+        "dir": str(cfg.get("archive.dir", "data/archive", silent=True) or "data/archive"),
+        "batch_size": _int("archive.batch_size", 500),
+        "batches_per_run": _int("archive.batches_per_run", 20),
+        "cron": str(cfg.get("archive.cron", "30 3 * * *", silent=True) or "30 3 * * *"),
+    }
+
+
+def archive_dir() -> str:
+    path = os.path.abspath(archive_settings()["dir"])
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _segment_path(segment: str) -> str:
+    # 段文件名来自数据库，防止路径穿越
+    return os.path.join(archive_dir(), os.path.basename(segment))
+
+
+def _dump(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()}
+
+
+def _load(row: Dict[str, Any], columns: Iterable[str]) -> Dict[str, Any]:
+    columns = set(columns)
+    data = {}
+    for key, value in row.items():
+        if key not in columns:
+            continue
+        if key in _DATETIME_FIELDS and isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                value = None
+        data[key] = value
+    return data
+
+
+# ---------------------------------------------------------------- 读取
+
+class _RecordCache:
+    """最近读取的归档文章（详情页/RSS 正文反复访问同一篇时不重复解压）"""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._items.get(key)
+            if record is not None:
+                self._items.move_to_end(key)
+            return record
+
+    def put(self, key: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._items[key] = record
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._items.pop(key, None)
+
+
+_records = _RecordCache()
+
+
+def _read_records(entries: Sequence[Any]) -> Dict[str, Dict[str, Any]]:
+    """按 article_archive 行读取归档记录，同一段文件只打开一次"""
+    result: Dict[str, Dict[str, Any]] = {}
+    by_segment: Dict[str, List[Any]] = {}
+    for entry in entries:
+        cached = _records.get(entry.article_id)
+        if cached is not None:
+            result[entry.article_id] = cached
+        else:
+            by_segment.setdefault(entry.segment, []).append(entry)
+    for segment, items in by_segment.items():
+        try:
+            with open(_segment_path(segment), "rb") as f:
+                for entry in sorted(items, key=lambda e: e.offset):
+                    f.seek(entry.offset)
+                    record = json.loads(gzip.decompress(f.read(entry.length)))
+                    _records.put(entry.article_id, record)
+                    result[entry.article_id] = record
+        except (OSError, ValueError) as e:
+            logger.error(f"读取归档段 {segment} 失败: {e}")
+    return result
+
+
+def as_article(record: Dict[str, Any]) -> SimpleNamespace:
+    """归档记录转为与 Article 属性一致的只读对象（RSS 等按属性访问的地方直接使用）"""
+    return SimpleNamespace(archived=True, **record["article"])
+
+
+def load_archived_article(article_id: str) -> Optional[Dict[str, Any]]:
+    """
+    按需读取单篇归档文章
+
+    Returns:
+        {"article": 文章字段, "tags": 标签关联}，未归档时返回 None
+    """
+    from core.db import DB
+    from core.models.article_archive import ArticleArchive
+    if not article_id:
+        return None
+    with DB.read_session_scope() as session:
+        entry = session.query(ArticleArchive).filter(ArticleArchive.article_id == article_id).first()
+        if entry is None:
+            return None
+        session.expunge(entry)
+    return _read_records([entry]).get(article_id)
+
+
+def list_archived_articles(
+    mp_ids: Optional[Sequence[str]] = None,
+    after: Optional[Tuple[int, str]] = None,
+    limit: int = 10,
+) -> List[SimpleNamespace]:
+    """
+    按发布时间倒序列出归档文章（与文章列表的 publish_time DESC, id DESC 顺序衔接）
+
+    Args:
+        mp_ids: 只列出这些公众号的文章，为空时不限
+        after: 从该 (publish_time, id) 之后（更早）开始
+        limit: 条数
+    """
+    from core.db import DB
+    from core.models.article_archive import ArticleArchive
+    if limit <= 0:
+        return []
+    with DB.read_session_scope() as session:
+        query = session.query(ArticleArchive)
+        if mp_ids is not None:
+            query = query.filter(ArticleArchive.mp_id.in_(list(mp_ids)))
+        if after is not None:
+            query = query.filter(or_(
+                ArticleArchive.publish_time < after[0],
+                and_(ArticleArchive.publish_time == after[0], ArticleArchive.article_id < after[1]),
+            ))
+        entries = query.order_by(ArticleArchive.publish_time.desc(), ArticleArchive.article_id.desc())\
+            .limit(limit).all()
+        session.expunge_all()
+    records = _read_records(entries)
+    return [as_article(records[e.article_id]) for e in entries if e.article_id in records]
+
+
+# ---------------------------------------------------------------- 归档
+
+def archive_batch(days: Optional[int] = None, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    归档一批发布时间早于 days 天的文章（最早的优先）
+
+    整批在 DB.transaction_scope 的真实事务中完成：段文件写入并 fsync 后才删除库中的行，
+    事务确认回滚后才删除段文件；回滚状态不明时保留段文件，不会丢数据。
+
+    Returns:
+        {"archived": 本批文章数, "segment": 段文件名}
+    """
+    from sqlalchemy.orm import undefer
+    from core.db import DB, insert_ignore
+    from core.models.article import Article
+    from core.models.article_archive import ArticleArchive
+    from core.models.article_tags import ArticleTag
+    from core.article_search import forget_articles
+    from core.article_dedup import forget_fingerprints
+
+    settings = archive_settings()
+    days = days or settings["days"]
+    batch_size = batch_size or settings["batch_size"]
+    cutoff = int(time.time()) - days * 86400
+    columns = list(Article.__table__.columns.keys())
+    tag_columns = list(ArticleTag.__table__.columns.keys())
+
+    path = None
+    session = None
+    try:
+        with DB.transaction_scope() as session:
+            articles = session.query(Article).options(undefer(Article.content))\
+                .filter(Article.publish_time < cutoff)\
+                .order_by(Article.publish_time, Article.id)\
+                .limit(batch_size).all()
+            if not articles:
+                return {"archived": 0, "segment": None}
+            ids = [article.id for article in articles]
+            tags: Dict[str, List[Dict[str, Any]]] = {}
+            for tag in session.query(ArticleTag).filter(ArticleTag.article_id.in_(ids)):
+                tags.setdefault(tag.article_id, []).append(_dump({c: getattr(tag, c) for c in tag_columns}))
+
+            segment = f"articles-{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}.jsonl.gz"
+            entries = []
+            offset = 0
+            tmp_path = _segment_path(segment) + ".tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    for article in articles:
+                        record = {
+                            "article": _dump({c: getattr(article, c) for c in columns}),
+                            "tags": tags.get(article.id, []),
+                        }
+                        data = gzip.compress(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                        f.write(data)
+                        entries.append({
+                            "article_id": article.id,
+                            "mp_id": article.mp_id,
+                            "title": (article.title or "")[:1000],
+                            "publish_time": article.publish_time,
+                            "segment": segment,
+                            "offset": offset,
+                            "length": len(data),
+                            "archived_at": datetime.now(),
+                        })
+                        offset += len(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, _segment_path(segment))
+            except OSError:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            path = _segment_path(segment)
+
+            insert_ignore(session, ArticleArchive, entries, key="article_id")
+            session.query(ArticleTag).filter(ArticleTag.article_id.in_(ids)).delete(synchronize_session=False)
+            forget_articles(session, ids, strict=True)
+            forget_fingerprints(session, ids, strict=True)
+            session.query(Article).filter(Article.id.in_(ids)).delete(synchronize_session=False)
+    except Exception:
+        if path is not None:
+            if session is not None and session.info.get("transaction") == "rolled_back":
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            else:
+                # 无法确认事务已回滚时段文件可能是文章唯一的副本，必须保留
+                logger.error(f"归档事务状态未知，保留段文件 {path}，请核对 article_archive 后手动处理")
+        raise
+    _records.discard(ids)
+    _articles_changed()
+    return {"archived": len(ids), "segment": segment, "bytes": offset}
+
+
+def run_archive(max_batches: Optional[int] = None, days: Optional[int] = None, batch_size: Optional[int] = None) -> int:
+    """连续归档若干批，返回归档文章数"""
+    settings = archive_settings()
+    max_batches = max_batches or settings["batches_per_run"]
+    total = 0
+    for _ in range(max_batches):
+        result = archive_batch(days, batch_size)
+        if not result["archived"]:
+            break
+        total += result["archived"]
+        logger.info(f"已归档 {result['archived']} 篇文章到 {result['segment']}（{result['bytes'] // 1024}KB）")
+    return total
+
+
+# ---------------------------------------------------------------- 恢复
+
+def restore_articles(
+    article_ids: Optional[Sequence[str]] = None,
+    segment: Optional[str] = None,
+    mp_id: Optional[str] = None,
+) -> int:
+    """
+    把归档文章连同标签关联写回数据库（在 DB.transaction_scope 中整体提交或回滚）
+
+    Args:
+        article_ids: 指定文章
+        segment: 指定段文件中的全部文章
+        mp_id: 指定公众号的全部归档文章
+
+    Returns:
+        恢复的文章数
+    """
+    from core.db import DB, insert_ignore
+    from core.models.article import Article
+    from core.models.article_archive import ArticleArchive
+    from core.models.article_tags import ArticleTag
+    from core.article_search import sync_articles
+    from core.article_dedup import register_fingerprints
+
+    if not (article_ids or segment or mp_id):
+        return 0
+    columns = list(Article.__table__.columns.keys())
+    tag_columns = list(ArticleTag.__table__.columns.keys())
+    with DB.transaction_scope() as session:
+        query = session.query(ArticleArchive)
+        if article_ids:
+            query = query.filter(ArticleArchive.article_id.in_(list(article_ids)))
+        if segment:
+            query = query.filter(ArticleArchive.segment == os.path.basename(segment))
+        if mp_id:
+            query = query.filter(ArticleArchive.mp_id == mp_id)
+        entries = query.all()
+        if not entries:
+            return 0
+        records = _read_records(entries)
+        if len(records) < len(entries):
+            raise RuntimeError("部分归档段文件读取失败，已取消恢复")
+        rows = [_load(record["article"], columns) for record in records.values()]
+        tag_rows = [_load(tag, tag_columns) for record in records.values() for tag in record["tags"]]
+        ids = [row["id"] for row in rows]
+        segments = {entry.segment for entry in entries}
+        insert_ignore(session, Article, rows)
+        insert_ignore(session, ArticleTag, tag_rows)
+        sync_articles(session, rows, strict=True)
+        register_fingerprints(session, sorted(rows, key=lambda r: (r.get("publish_time") or 0, r["id"])))
+        session.query(ArticleArchive).filter(ArticleArchive.article_id.in_(ids)).delete(synchronize_session=False)
+    # 事务提交后，段文件中的文章已全部恢复时删除文件
+    with DB.read_session_scope() as session:
+        remaining = {
+            name for (name,) in session.query(ArticleArchive.segment)
+            .filter(ArticleArchive.segment.in_(list(segments))).distinct()
+        }
+    for name in segments - remaining:
+        try:
+            os.remove(_segment_path(name))
+        except OSError:
+            pass
+    _records.discard(ids)
+    _articles_changed()
+    return len(ids)
+
+
+def _articles_changed() -> None:
+    from core.article_count import invalidate_article_counts
+    from core.cache import clear_cache_pattern
+    invalidate_article_counts()
+    clear_cache_pattern("articles:")
+
+
+def archive_status() -> Dict[str, Any]:
+    """归档状态（系统信息展示）"""
+    from core.db import DB
+    from core.models.article_archive import ArticleArchive
+    settings = archive_settings()
+    status = {"enabled": settings["enabled"], "days": settings["days"]}
+    try:
+        with DB.read_session_scope() as session:
+            count, segments, oldest, newest = session.query(
+                func.count(ArticleArchive.article_id),
+                func.count(func.distinct(ArticleArchive.segment)),
+                func.min(ArticleArchive.publish_time),
+                func.max(ArticleArchive.publish_time),
+            ).one()
+        status.update({"articles": count or 0, "segments": segments or 0, "oldest": oldest, "newest": newest})
+    except Exception as e:
+        status["error"] = str(e)
+    return status
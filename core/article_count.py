@@ -0,0 +1,171 @@
+"""
+文章列表总数策略
+
+大表上带筛选条件的 COUNT（尤其是标签 all 匹配的 HAVING COUNT(DISTINCT) 子查询）常比取一页数据还慢。
+列表接口通过 count 参数选择：
+
+- exact：精确计数，按筛选条件签名缓存；文章入库/删除/改状态时整体失效（默认）
+- estimate：PostgreSQL 使用查询计划的估算行数（EXPLAIN），其他数据库退回 exact
+- none：不计数，total 返回 None，适合无限滚动的客户端
+
+失效采用代数（generation）：入库时只需递增计数器，旧代的缓存在下次读取时自然作废。
+"""
+import json
+import threading
+import time
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, select, text
+
+from core.cache import get_cache_key
+from core.config import cfg
+from core.log import logger
+
+
+class CountMode(str, Enum):
+    """列表总数的计算方式"""
+
+    exact = "exact"
+    estimate = "estimate"
+    none = "none"
+
+
+_lock = threading.Lock()
+_generation = 0
+# 签名 -> (代数, 总数, 过期时间)
+_counts: Dict[str, Tuple[int, int, float]] = {}
+# 缓存条目上限，超过后清理过期/旧代条目
+_MAX_ENTRIES = 2048
+
+
+def _ttl() -> int:
+    try:
+        return int(cfg.get("cache.count_ttl", 600, silent=True) or 600)
+    except (ValueError, TypeError):
+        return 600
+
+
+def count_signature(*filters: Any) -> str:
+    """由筛选条件生成计数缓存签名（不含分页参数）"""
+    return get_cache_key(*filters)
+
+
+def invalidate_article_counts() -> None:
+    """文章集合发生变化（入库、删除、状态变更）时调用，使所有已缓存的总数失效"""
+    global _generation
+    with _lock:
+        _generation += 1
+
+
+def _cached(signature: str) -> Optional[int]:
+    with _lock:
+        entry = _counts.get(signature)
+        if entry is None:
+            return None
+        generation, value, expires = entry
+        if generation != _generation or time.time() >= expires:
+            del _counts[signature]
+            return None
+        return value
+
+
+def _store(signature: str, value: int, generation: int) -> None:
+    with _lock:
+        if generation != _generation:
+            # 计数期间有新文章入库，结果可能已过时，不缓存
+            return
+        if len(_counts) >= _MAX_ENTRIES:
+            now = time.time()
+            for key in [k for k, (g, _, exp) in _counts.items() if g != _generation or exp <= now]:
+                del _counts[key]
+            if len(_counts) >= _MAX_ENTRIES:
+                _counts.clear()
+        _counts[signature] = (generation, value, time.time() + _ttl())
+
+
+def _current_generation() -> int:
+    with _lock:
+        return _generation
+
+
+def _dialect() -> str:
+    from core.db import DB
+    engine = DB.engine
+    return engine.dialect.name if engine is not None else ""
+
+
+def count_statement(stmt):
+    """将列表查询（不含分页）包装为 COUNT 语句"""
+    return select(func.count()).select_from(stmt.order_by(None).subquery())
+
+
+def _explain_statement(stmt):
+    """PostgreSQL 估算行数用的 EXPLAIN 语句（参数以字面量内联）"""
+    from sqlalchemy.dialects import postgresql
+    compiled = stmt.order_by(None).compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    return text(f"EXPLAIN (FORMAT JSON) {compiled}")
+
+
+def _plan_rows(plan: Any) -> Optional[int]:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def _use_estimate(mode: CountMode) -> bool:
+    return mode == CountMode.estimate and _dialect() == "postgresql"
+
+
+async def resolve_count_async(db, stmt, signature: str, mode: CountMode = CountMode.exact) -> Optional[int]:
+    """
+    计算列表总数（异步会话）
+
+    Args:
+        db: AsyncSession 或 ThreadedSession
+        stmt: 列表查询（含筛选条件，不含分页）
+        signature: count_signature 生成的筛选条件签名
+        mode: 计数方式
+    """
+    if mode == CountMode.none:
+        return None
+    if _use_estimate(mode):
+        try:
+            plan = await db.scalar(_explain_statement(stmt))
+            rows = _plan_rows(plan)
+            if rows is not None:
+                return rows
+        except Exception as e:
+            logger.warning(f"估算文章总数失败，改用精确计数: {e}")
+    cached = _cached(signature)
+    if cached is not None:
+        return cached
+    generation = _current_generation()
+    value = await db.scalar(count_statement(stmt)) or 0
+    _store(signature, value, generation)
+    return value
+
+
+def resolve_count(session, stmt, signature: str, mode: CountMode = CountMode.exact) -> Optional[int]:
+    """计算列表总数（同步会话），参数同 resolve_count_async"""
+    if mode == CountMode.none:
+        return None
+    if _use_estimate(mode):
+        try:
+            rows = _plan_rows(session.scalar(_explain_statement(stmt)))
+            if rows is not None:
+                return rows
+        except Exception as e:
+            logger.warning(f"估算文章总数失败，改用精确计数: {e}")
+    cached = _cached(signature)
+    if cached is not None:
+        return cached
+    generation = _current_generation()
+    value = session.scalar(count_statement(stmt)) or 0
+    _store(signature, value, generation)
+    return value
@@ -0,0 +1,313 @@
+"""
+文章近似重复检测（SimHash）
+
+公众号文章经常被多个号转载，仅改动开头结尾几句话。/articles/clean_duplicate_articles 只能事后按标题清理，
+转载文章在此之前已重复入库、重复提取标签、重复调用 AI 过滤。
+
+这里在入库时为每篇文章计算 64 位 SimHash（标题 + 摘要 + 正文文本，按字符 3-gram 加权），
+写入 article_fingerprints 表。指纹拆成 4 段各 16 位分别建索引，海明距离不超过 3 的两个指纹
+至少有一段完全相同，因此一页文章只需一次按段等值的索引查询即可取到全部候选。
+
+命中近似重复的文章记录 duplicate_of（指向最早入库的原文）：
+- 自动打标签时直接沿用原文的标签，不再提取（TextRank/KeyBERT/AI）
+- AI 过滤时沿用原文已有的判定，不再调用模型
+
+只有标题和摘要的短文本（未采集正文）SimHash 不够稳定，只认指纹完全相同的为重复。
+"""
+import hashlib
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+
+from core.config import cfg
+from core.log import logger
+
+FINGERPRINT_BITS = 64
+BAND_COUNT = 4
+BAND_BITS = FINGERPRINT_BITS // BAND_COUNT
+_BAND_MASK = (1 << BAND_BITS) - 1
+# 4 段分桶能保证召回的最大海明距离
+MAX_DISTANCE = BAND_COUNT - 1
+
+_NON_WORD = re.compile(r"[\W_]+", re.U)
+
+
+def dedup_settings() -> Dict[str, Any]:
+    """读取 dedup 配置"""
+    def _int(key: str, default: int) -> int:
+        try:
+            return int(cfg.get(key, default, silent=True) or default)
+        except (ValueError, TypeError):
+            return default
+
+    return {
+        "enabled": bool(cfg.get("dedup.enabled", True, silent=True)),
+        "max_distance": max(0, min(_int("dedup.max_distance", 3), MAX_DISTANCE)),
+        "min_chars": _int("dedup.min_chars", 200),
+        "max_chars": _int("dedup.max_chars", 20000),
+        "shingle": max(1, _int("dedup.shingle", 3)),
+        "batch_size": _int("dedup.batch_size", 500),
+    }
+
+
+# ---------------------------------------------------------------- 指纹计算
+
+def normalize_text(title: Optional[str], description: Optional[str], content: Optional[str], max_chars: int = 20000) -> str:
+    """拼接标题、摘要与正文文本，去掉标点空白并转小写"""
+    from core.article_search import html_to_text
+    body = html_to_text(content)[:max_chars] if content else ""
+    return _NON_WORD.sub("", " ".join([title or "", description or "", body]).lower())
+
+
+def simhash(text: str, shingle: int = 3) -> Optional[int]:
+    """
+    计算 64 位 SimHash（无符号），文本为空时返回 None
+
+    特征为字符 shingle-gram，权重为出现次数。按 8 个字节分别累加各字节取值的权重，
+    最后再展开到 64 位，避免对每个特征逐位循环。
+    """
+    if not text:
+        return None
+    if len(text) <= shingle:
+        features = Counter([text])
+    else:
+        features = Counter(text[i:i + shingle] for i in range(len(text) - shingle + 1))
+    byte_weights = [[0] * 256 for _ in range(8)]
+    total = 0
+    for feature, weight in features.items():
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        for j in range(8):
+            byte_weights[j][digest[j]] += weight
+        total += weight
+    fingerprint = 0
+    for j in range(8):
+        weights = byte_weights[j]
+        for k in range(8):
+            mask = 1 << k
+            ones = sum(w for value, w in enumerate(weights) if w and value & mask)
+            if ones * 2 > total:
+                fingerprint |= 1 << (j * 8 + k)
+    return fingerprint
+
+
+def to_signed(value: int) -> int:
+    """无符号 64 位 -> 有符号（BigInteger 存储）"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def bands(fingerprint: int) -> List[int]:
+    return [(fingerprint >> (BAND_BITS * i)) & _BAND_MASK for i in range(BAND_COUNT)]
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def fingerprint_article(title, description, content, settings: Optional[Dict[str, Any]] = None) -> Tuple[Optional[int], bool]:
+    """
+    计算文章指纹
+
+    Returns:
+        (无符号指纹, 是否只认完全相同)，文本为空时指纹为 None
+    """
+    settings = settings or dedup_settings()
+    text = normalize_text(title, description, content, settings["max_chars"])
+    return simhash(text, settings["shingle"]), len(text) < settings["min_chars"]
+
+
+# ---------------------------------------------------------------- 入库登记
+
+def _load_candidates(session, fingerprints: List[int]) -> List[Tuple[str, int, Optional[str]]]:
+    """一次查询取出与任一指纹至少有一段相同的已登记文章"""
+    from core.models.article_fingerprint import ArticleFingerprint
+    band_values: List[set] = [set() for _ in range(BAND_COUNT)]
+    for fingerprint in fingerprints:
+        for i, value in enumerate(bands(fingerprint)):
+            band_values[i].add(value)
+    columns = [getattr(ArticleFingerprint, f"band_{i}") for i in range(BAND_COUNT)]
+    rows = session.query(
+        ArticleFingerprint.article_id,
+        ArticleFingerprint.simhash,
+        ArticleFingerprint.duplicate_of,
+    ).filter(or_(*[col.in_(list(values)) for col, values in zip(columns, band_values)])).all()
+    return [(article_id, to_unsigned(value), duplicate_of) for article_id, value, duplicate_of in rows]
+
+
+def _best_match(fingerprint: int, exact_only: bool, candidates, max_distance: int, exclude: str) -> Optional[Tuple[str, int]]:
+    limit = 0 if exact_only else max_distance
+    best = None
+    for article_id, value, duplicate_of in candidates:
+        if article_id == exclude:
+            continue
+        distance = hamming(fingerprint, value)
+        if distance <= limit and (best is None or distance < best[1]):
+            best = (duplicate_of or article_id, distance)
+            if distance == 0:
+                break
+    return best
+
+
+def register_fingerprints(session, rows: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    为新入库的文章登记指纹并检测近似重复（随调用方事务提交）
+
+    Args:
+        session: 数据库会话
+        rows: 文章字典（id/title/description/content），按入库先后排列
+
+    Returns:
+        {近似重复文章ID: 原文ID}
+    """
+    from core.models.article_fingerprint import ArticleFingerprint
+    from core.db import insert_ignore
+
+    settings = dedup_settings()
+    if not settings["enabled"]:
+        return {}
+    computed = []
+    for row in rows:
+        if not row.get("id"):
+            continue
+        fingerprint, exact_only = fingerprint_article(
+            row.get("title"), row.get("description"), row.get("content"), settings
+        )
+        if fingerprint is not None:
+            computed.append((row["id"], fingerprint, exact_only))
+    if not computed:
+        return {}
+
+    candidates = _load_candidates(session, [fingerprint for _, fingerprint, _ in computed])
+    duplicates: Dict[str, str] = {}
+    records = []
+    for article_id, fingerprint, exact_only in computed:
+        match = _best_match(fingerprint, exact_only, candidates, settings["max_distance"], article_id)
+        duplicate_of = match[0] if match else None
+        if duplicate_of:
+            duplicates[article_id] = duplicate_of
+        # 同一批中后面的文章也能匹配到前面的
+        candidates.append((article_id, fingerprint, duplicate_of))
+        part = bands(fingerprint)
+        records.append({
+            "article_id": article_id,
+            "simhash": to_signed(fingerprint),
+            **{f"band_{i}": part[i] for i in range(BAND_COUNT)},
+            "duplicate_of": duplicate_of,
+            "distance": match[1] if match else None,
+        })
+    insert_ignore(session, ArticleFingerprint, records, key="article_id")
+    for article_id, source_id in duplicates.items():
+        logger.info(f"近似重复文章: {article_id} -> {source_id}")
+    return duplicates
+
+
+def duplicate_sources(session, article_ids: List[str]) -> Dict[str, str]:
+    """{文章ID: 原文ID}，非近似重复的文章不在结果中"""
+    from core.models.article_fingerprint import ArticleFingerprint
+    ids = [i for i in dict.fromkeys(article_ids) if i]
+    if not ids:
+        return {}
+    rows = session.query(ArticleFingerprint.article_id, ArticleFingerprint.duplicate_of).filter(
+        ArticleFingerprint.article_id.in_(ids),
+        ArticleFingerprint.duplicate_of.isnot(None),
+    ).all()
+    return {article_id: duplicate_of for article_id, duplicate_of in rows}
+
+
+def reusable_filter_results(session, article_ids: List[str]) -> Dict[str, Any]:
+    """近似重复文章可沿用的原文 AI 过滤结果：{文章ID: 原文的 ArticleAiFilter}"""
+    from core.models.article_ai_filter import ArticleAiFilter
+    sources = duplicate_sources(session, article_ids)
+    if not sources:
+        return {}
+    rows = session.query(ArticleAiFilter).filter(ArticleAiFilter.article_id.in_(set(sources.values()))).all()
+    by_source = {row.article_id: row for row in rows}
+    return {article_id: by_source[source] for article_id, source in sources.items() if source in by_source}
+
+
+def forget_fingerprints(session, article_ids: List[str], strict: bool = False) -> None:
+    """
+    删除文章时同步删除指纹
+
+    被删除的原文若还有近似重复的文章，最早登记的一篇成为新的原文，其余改为指向它。
+    strict=True（调用方在 DB.transaction_scope 中）时失败直接抛出，否则只记录警告。
+    """
+    from core.models.article_fingerprint import ArticleFingerprint
+    ids = [i for i in dict.fromkeys(article_ids) if i]
+    if not ids:
+        return
+    try:
+        session.query(ArticleFingerprint).filter(ArticleFingerprint.article_id.in_(ids)).delete(synchronize_session=False)
+        orphans: Dict[str, List[str]] = {}
+        for article_id, duplicate_of in session.query(ArticleFingerprint.article_id, ArticleFingerprint.duplicate_of)\
+                .filter(ArticleFingerprint.duplicate_of.in_(ids))\
+                .order_by(ArticleFingerprint.created_at, ArticleFingerprint.article_id):
+            orphans.setdefault(duplicate_of, []).append(article_id)
+        for members in orphans.values():
+            head, rest = members[0], members[1:]
+            session.query(ArticleFingerprint).filter(ArticleFingerprint.article_id == head)\
+                .update({"duplicate_of": None, "distance": None}, synchronize_session=False)
+            if rest:
+                session.query(ArticleFingerprint).filter(ArticleFingerprint.article_id.in_(rest))\
+                    .update({"duplicate_of": head}, synchronize_session=False)
+    except Exception as e:
+        if strict:
+            raise
+        logger.warning(f"删除文章指纹失败: {e}")
+
+
+# ---------------------------------------------------------------- 已有文章补建
+
+def backfill_batch(after: Optional[Tuple[int, str]] = None, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    为尚未登记指纹的已有文章补建一批（按发布时间从早到晚，较早的文章作为原文）
+
+    Args:
+        after: 上一批最后一篇的 (publish_time, id)，为空时从头开始
+
+    Returns:
+        {"processed": 本批文章数, "duplicates": 其中近似重复数, "last": 本批最后一篇的 (publish_time, id)}
+    """
+    from sqlalchemy import and_
+    from core.db import DB
+    from core.models.article import Article
+    from core.models.article_fingerprint import ArticleFingerprint
+
+    batch_size = batch_size or dedup_settings()["batch_size"]
+    publish_time = func.coalesce(Article.publish_time, 0)
+    with DB.write_session_scope() as session:
+        query = session.query(publish_time, Article.id, Article.title, Article.description, Article.content)\
+            .outerjoin(ArticleFingerprint, ArticleFingerprint.article_id == Article.id)\
+            .filter(ArticleFingerprint.article_id.is_(None))
+        if after:
+            query = query.filter(or_(publish_time > after[0], and_(publish_time == after[0], Article.id > after[1])))
+        articles = query.order_by(publish_time, Article.id).limit(batch_size).all()
+        if not articles:
+            return {"processed": 0, "duplicates": 0, "last": after}
+        duplicates = register_fingerprints(session, [
+            {"id": a.id, "title": a.title, "description": a.description, "content": a.content}
+            for a in articles
+        ])
+        session.commit()
+    return {"processed": len(articles), "duplicates": len(duplicates), "last": (articles[-1][0], articles[-1][1])}
+
+
+def dedup_status() -> Dict[str, Any]:
+    """近似重复索引状态（系统信息展示）"""
+    from core.db import DB
+    from core.models.article_fingerprint import ArticleFingerprint
+    settings = dedup_settings()
+    status = {"enabled": settings["enabled"], "max_distance": settings["max_distance"]}
+    try:
+        with DB.read_session_scope() as session:
+            status["fingerprints"] = session.query(func.count(ArticleFingerprint.article_id)).scalar() or 0
+            status["duplicates"] = session.query(func.count(ArticleFingerprint.article_id))\
+                .filter(ArticleFingerprint.duplicate_of.isnot(None)).scalar() or 0
+    except Exception as e:
+        status["error"] = str(e)
+    return status
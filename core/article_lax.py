@@ -1,4 +1,6 @@
 from core.models import Article,Feed,DATA_STATUS
+from core.models.article import ArticleBase
+from sqlalchemy import func
 from core.db import DB
 import json
 class ArticleInfo():
@@ -15,15 +17,15 @@ class ArticleInfo():
 def laxArticle():
     info=ArticleInfo()
     session=DB.get_session()
-    #获取没有内容的文章数量
-    info.no_content_count=session.query(Article).filter(Article.content == None).count()
+    #获取没有内容的文章数量（只计数，不读取正文）
+    info.no_content_count=session.query(func.count(ArticleBase.id)).filter(Article.content == None).scalar() or 0
     #所有文章数量
-    info.all_count=session.query(Article).count()
+    info.all_count=session.query(func.count(ArticleBase.id)).scalar() or 0
     #有内容的文章数量
     info.has_content_count=info.all_count-info.no_content_count
 
     #获取删除的文章
-    info.wrong_count=session.query(Article).filter(Article.status !=DATA_STATUS.ACTIVE ).count()
+    info.wrong_count=session.query(func.count(ArticleBase.id)).filter(ArticleBase.status !=DATA_STATUS.ACTIVE ).scalar() or 0
 
     #公众号总数
     info.mp_all_count=session.query(Feed).distinct(Feed.id).count()
@@ -0,0 +1,598 @@
+"""
+文章全文检索
+
+原有的 format_search_kw 把关键词拼成 title LIKE '%w%' 的 OR 链，只能搜标题且每次全表扫描。
+这里为标题、摘要和正文建立全文索引，文本先用 jieba 分词（搜索引擎模式）再写入：
+
+- SQLite：FTS5 虚拟表 articles_fts（rowid 为文章 ID 的 64 位哈希，便于按文章更新/删除），bm25 排序
+- PostgreSQL：article_search 表的 tsvector 列 + GIN 索引，ts_rank 排序（标题/摘要/正文权重 A/B/C）
+- 其他数据库或未安装 jieba：退回原来的标题 LIKE 匹配
+
+批量入库、归档与恢复在 DB.transaction_scope 的事务内同步索引（strict），索引失败时整批回滚。
+其余写入通过 Article 的 ORM 事件同步：引擎为 AUTOCOMMIT，索引与文章不在同一事务，失败只记录警告，属尽力而为。
+升级前已入库的文章由后台任务（jobs/search_index）分批补建，补建完成前搜索仍走 LIKE，避免结果缺失；
+补建完成后同一任务定期校对（run_reconcile），补上漏建的索引、清理已删除文章残留的索引。
+
+关键词按空格/|/- 拆成多个词，满足任一词即命中（与原行为一致）；每个词分词后的各个片段都需出现。
+"""
+import hashlib
+import html
+import re
+import threading
+import time
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import Float, String, column, event, inspect as sa_inspect, or_, select, table, text
+
+from core.config import cfg
+from core.log import logger
+
+try:
+    import jieba
+except ImportError:  # 可选依赖，未安装时退回 LIKE
+    jieba = None
+
+SQLITE_TABLE = "articles_fts"
+PG_TABLE = "article_search"
+STATE_KEY = "search_index"
+STATE_READY = "ready"
+RECONCILE_KEY = "search_reconcile"
+
+
+class SearchOrder(str, Enum):
+    """搜索结果排序"""
+
+    time = "time"
+    relevance = "relevance"
+
+
+def search_settings() -> Dict[str, Any]:
+    """读取 search 配置"""
+    def _int(key: str, default: int) -> int:
+        try:
+            return int(cfg.get(key, default, silent=True) or default)
+        except (ValueError, TypeError):
+            return default
+
+    return {
+        "enabled": bool(cfg.get("search.fts", True, silent=True)),
+        "body_max_chars": _int("search.body_max_chars", 20000),
+        "batch_size": _int("search.batch_size", 200),
+        "interval": _int("search.interval", 5),
+        "batches_per_run": _int("search.batches_per_run", 20),
+        "reconcile_cron": str(cfg.get("search.reconcile_cron", "40 4 * * *", silent=True) or "40 4 * * *"),
+        "reconcile_batch_size": _int("search.reconcile_batch_size", 1000),
+    }
+
+
+# ---------------------------------------------------------------- 文本处理
+
+_TAG_BLOCK = re.compile(r"<(script|style)\b.*?</\1\s*>", re.S | re.I)
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+_WORD = re.compile(r"\w", re.U)
+
+
+def html_to_text(value: Optional[str]) -> str:
+    """去掉 HTML 标签，只保留可见文本"""
+    if not value:
+        return ""
+    value = _TAG_BLOCK.sub(" ", value)
+    value = _TAG.sub(" ", value)
+    return _SPACE.sub(" ", html.unescape(value)).strip()
+
+
+def segment(value: Optional[str], for_search: bool = True) -> List[str]:
+    """jieba 分词，去掉标点/空白片段并转小写"""
+    if not value:
+        return []
+    words = jieba.cut_for_search(value) if for_search else jieba.cut(value)
+    return [w.strip().lower() for w in words if _WORD.search(w)]
+
+
+def _doc_id(article_id: str) -> int:
+    """文章 ID -> FTS5 rowid（有符号 64 位）"""
+    digest = hashlib.blake2b(article_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _split_keyword(keyword: str) -> List[str]:
+    return [w for w in keyword.replace("-", " ").replace("|", " ").split(" ") if w.strip()]
+
+
+def _match_expression(keyword: str, dialect: str) -> Optional[str]:
+    """把用户关键词转换为 FTS5 MATCH / to_tsquery 表达式，没有可检索的词时返回 None"""
+    groups = []
+    for word in _split_keyword(keyword):
+        tokens = list(dict.fromkeys(segment(word, for_search=False)))
+        if not tokens:
+            continue
+        # 单字按前缀匹配（"猫" 命中 "猫咪"）；多字词本身已由搜索引擎模式分词收录，精确匹配即可，
+        # 避免前缀展开出大量词项拖慢查询
+        if dialect == "sqlite":
+            parts = ['"{}"{}'.format(t.replace('"', '""'), "*" if len(t) == 1 else "") for t in tokens]
+            groups.append("(" + " AND ".join(parts) + ")")
+        else:
+            parts = ["'{}'{}".format(t.replace("\\", "").replace("'", "''"), ":*" if len(t) == 1 else "") for t in tokens]
+            groups.append("(" + " & ".join(parts) + ")")
+    if not groups:
+        return None
+    return (" OR " if dialect == "sqlite" else " | ").join(groups)
+
+
+# ---------------------------------------------------------------- 索引表
+
+_lock = threading.Lock()
+_ensured: Dict[str, bool] = {}
+_ready_cache: Dict[str, Any] = {"value": False, "at": 0.0}
+
+
+def _backend(dialect: str) -> Optional[str]:
+    if jieba is None or dialect not in ("sqlite", "postgresql"):
+        return None
+    if not search_settings()["enabled"]:
+        return None
+    return dialect
+
+
+def _engine():
+    from core.db import DB
+    return DB.engine
+
+
+def ensure_search_index(engine=None) -> bool:
+    """创建索引表（幂等），返回当前数据库是否支持全文索引"""
+    engine = engine or _engine()
+    if engine is None:
+        return False
+    dialect = engine.dialect.name
+    if _backend(dialect) is None:
+        return False
+    key = str(engine.url)
+    if _ensured.get(key):
+        return True
+    with _lock:
+        if _ensured.get(key):
+            return True
+        from core.db_schema import read_meta, write_meta
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5("
+                    "article_id UNINDEXED, title, description, body, tokenize='unicode61 remove_diacritics 2')"
+                ))
+            else:
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {PG_TABLE} ("
+                    "article_id VARCHAR(255) PRIMARY KEY, tsv TSVECTOR NOT NULL)"
+                ))
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{PG_TABLE}_tsv ON {PG_TABLE} USING GIN (tsv)"
+                ))
+        if read_meta(engine, STATE_KEY) is None:
+            # 首次建立索引：空库直接可用，已有文章则等待后台补建
+            with engine.connect() as conn:
+                has_articles = conn.execute(text("SELECT 1 FROM articles LIMIT 1")).first() is not None
+            write_meta(engine, STATE_KEY, "backfill:" if has_articles else STATE_READY)
+            if has_articles:
+                logger.info("已创建全文索引表，已有文章将由后台任务补建索引，完成前搜索使用标题匹配")
+        _ensured[key] = True
+    return True
+
+
+def index_state(engine=None) -> Optional[str]:
+    from core.db_schema import read_meta
+    engine = engine or _engine()
+    return read_meta(engine, STATE_KEY) if engine is not None else None
+
+
+def is_ready() -> bool:
+    """全文索引已建好且补建完成（结果缓存 60 秒）"""
+    now = time.time()
+    if now - _ready_cache["at"] < 60:
+        return _ready_cache["value"]
+    try:
+        ready = ensure_search_index() and index_state() == STATE_READY
+    except Exception as e:
+        logger.warning(f"全文索引不可用，搜索退回标题匹配: {e}")
+        ready = False
+    _ready_cache.update(value=ready, at=now)
+    return ready
+
+
+def _set_ready(value: bool) -> None:
+    _ready_cache.update(value=value, at=time.time())
+
+
+def _document(row: Dict[str, Any], body_max_chars: int) -> Dict[str, str]:
+    body = html_to_text(row.get("content"))[:body_max_chars]
+    return {
+        "title": " ".join(segment(row.get("title"))),
+        "description": " ".join(segment(row.get("description"))),
+        "body": " ".join(segment(body)),
+    }
+
+
+def _conn_dialect(conn) -> str:
+    dialect = getattr(conn, "dialect", None) or conn.get_bind().dialect
+    return dialect.name
+
+
+def index_articles(conn, rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    写入/更新文章的索引（在调用方的连接/事务内执行）
+
+    Args:
+        conn: Connection 或 Session
+        rows: 含 id/title/description/content 的字典
+    """
+    dialect = _conn_dialect(conn)
+    if _backend(dialect) is None:
+        return 0
+    settings = search_settings()
+    params = []
+    for row in rows:
+        if not row.get("id"):
+            continue
+        doc = _document(row, settings["body_max_chars"])
+        doc["article_id"] = row["id"]
+        doc["rid"] = _doc_id(row["id"])
+        params.append(doc)
+    if not params:
+        return 0
+    if dialect == "sqlite":
+        conn.execute(text(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = :rid"), params)
+        conn.execute(text(
+            f"INSERT INTO {SQLITE_TABLE}(rowid, article_id, title, description, body) "
+            "VALUES (:rid, :article_id, :title, :description, :body)"
+        ), params)
+    else:
+        conn.execute(text(
+            f"INSERT INTO {PG_TABLE}(article_id, tsv) VALUES (:article_id, "
+            "setweight(to_tsvector('simple', :title), 'A') || "
+            "setweight(to_tsvector('simple', :description), 'B') || "
+            "setweight(to_tsvector('simple', :body), 'C')) "
+            "ON CONFLICT (article_id) DO UPDATE SET tsv = EXCLUDED.tsv"
+        ), params)
+    return len(params)
+
+
+def remove_articles(conn, article_ids: Iterable[str]) -> None:
+    """删除文章的索引（在调用方的连接/事务内执行）"""
+    dialect = _conn_dialect(conn)
+    ids = [i for i in article_ids if i]
+    if not ids or _backend(dialect) is None:
+        return
+    if dialect == "sqlite":
+        conn.execute(text(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = :rid"), [{"rid": _doc_id(i)} for i in ids])
+    else:
+        conn.execute(text(f"DELETE FROM {PG_TABLE} WHERE article_id = :id"), [{"id": i} for i in ids])
+
+
+# ---------------------------------------------------------------- 查询
+
+def _like_condition(keyword: str):
+    from core.models.article import ArticleBase
+    return or_(*[ArticleBase.title.like(f"%{w}%") for w in _split_keyword(keyword) or [keyword]])
+
+
+def search_subquery(keyword: str):
+    """
+    命中关键词的文章及相关度（article_id, score，score 越大越相关）
+
+    全文索引不可用或关键词没有可检索的词时返回 None
+    """
+    engine = _engine()
+    if engine is None or not is_ready():
+        return None
+    dialect = engine.dialect.name
+    expression = _match_expression(keyword, dialect)
+    if expression is None:
+        return None
+    if dialect == "sqlite":
+        sql = (
+            f"SELECT article_id, -bm25({SQLITE_TABLE}, 0.0, 10.0, 4.0, 1.0) AS score "
+            f"FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH :fts_query"
+        )
+    else:
+        sql = (
+            f"SELECT article_id, ts_rank(tsv, to_tsquery('simple', :fts_query)) AS score "
+            f"FROM {PG_TABLE} WHERE tsv @@ to_tsquery('simple', :fts_query)"
+        )
+    return (
+        text(sql)
+        .bindparams(fts_query=expression)
+        .columns(column("article_id", String), column("score", Float))
+        .subquery("fts")
+    )
+
+
+def search_condition(keyword: str, hits=None):
+    """
+    关键词过滤条件（替代原来的标题 LIKE）
+
+    Args:
+        keyword: 用户输入的关键词
+        hits: 已构造的 search_subquery，按相关度排序时复用同一个子查询
+    """
+    from core.models.article import ArticleBase
+    hits = hits if hits is not None else search_subquery(keyword)
+    if hits is None:
+        return _like_condition(keyword)
+    return ArticleBase.id.in_(select(hits.c.article_id))
+
+
+# ---------------------------------------------------------------- 同步与补建
+
+def backfill_batch(after_id: str = "", batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """按 id 顺序为已有文章补建一批索引，返回 {"processed", "last_id"}"""
+    from core.db import DB
+    from core.models.article import Article
+    batch_size = batch_size or search_settings()["batch_size"]
+    with DB.session_scope() as session:
+        rows = session.execute(
+            select(Article.id, Article.title, Article.description, Article.content)
+            .where(Article.id > after_id)
+            .order_by(Article.id)
+            .limit(batch_size)
+        ).mappings().all()
+    if not rows:
+        return {"processed": 0, "last_id": after_id}
+    with DB.write_session_scope() as session:
+        index_articles(session, [dict(row) for row in rows])
+        session.commit()
+    return {"processed": len(rows), "last_id": rows[-1]["id"]}
+
+
+def run_backfill(max_batches: int = 0, batch_size: Optional[int] = None) -> bool:
+    """
+    从上次的进度继续补建索引，完成后标记为可用
+
+    Returns:
+        是否已全部补建完成
+    """
+    from core.db_schema import write_meta
+    engine = _engine()
+    if not ensure_search_index(engine):
+        return False
+    state = index_state(engine) or ""
+    if state == STATE_READY:
+        return True
+    last_id = state.partition(":")[2]
+    done = 0
+    while not max_batches or done < max_batches:
+        result = backfill_batch(last_id, batch_size)
+        if not result["processed"]:
+            write_meta(engine, STATE_KEY, STATE_READY)
+            _set_ready(True)
+            logger.info("全文索引补建完成")
+            return True
+        last_id = result["last_id"]
+        done += 1
+        write_meta(engine, STATE_KEY, f"backfill:{last_id}")
+    return False
+
+
+def _indexed_ids(conn, article_ids: List[str]) -> set:
+    """article_ids 中已有索引的文章"""
+    if not article_ids:
+        return set()
+    if _conn_dialect(conn) == "sqlite":
+        fts = table(SQLITE_TABLE, column("rowid"), column("article_id"))
+        rows = conn.execute(select(fts.c.article_id).where(fts.c.rowid.in_([_doc_id(i) for i in article_ids])))
+    else:
+        pg = table(PG_TABLE, column("article_id"))
+        rows = conn.execute(select(pg.c.article_id).where(pg.c.article_id.in_(article_ids)))
+    return {row[0] for row in rows} & set(article_ids)
+
+
+def reconcile_articles_batch(after_id: str = "", batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """按 id 顺序检查一批文章，为缺少索引的补建，返回 {"processed", "last_id", "indexed"}"""
+    from core.db import DB
+    from core.models.article import Article
+    batch_size = batch_size or search_settings()["reconcile_batch_size"]
+    with DB.session_scope() as session:
+        ids = list(session.execute(
+            select(Article.id).where(Article.id > after_id).order_by(Article.id).limit(batch_size)
+        ).scalars())
+        indexed = _indexed_ids(session, ids)
+        missing = [i for i in ids if i not in indexed]
+        rows = [dict(row) for row in session.execute(
+            select(Article.id, Article.title, Article.description, Article.content).where(Article.id.in_(missing))
+        ).mappings()] if missing else []
+    if rows:
+        with DB.write_session_scope() as session:
+            index_articles(session, rows)
+            session.commit()
+    return {"processed": len(ids), "last_id": ids[-1] if ids else after_id, "indexed": len(rows)}
+
+
+def reconcile_index_batch(after: str = "", batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """按索引顺序检查一批索引行，删除文章已不存在的，返回 {"processed", "last", "removed"}"""
+    from core.db import DB
+    from core.models.article import Article
+    batch_size = batch_size or search_settings()["reconcile_batch_size"]
+    with DB.session_scope() as session:
+        if _conn_dialect(session) == "sqlite":
+            # rowid 为有符号 64 位哈希，游标为空时从最小值开始
+            rows = session.execute(text(
+                f"SELECT rowid, article_id FROM {SQLITE_TABLE} WHERE rowid > :after ORDER BY rowid LIMIT :limit"
+            ), {"after": int(after) if after else -(2 ** 63), "limit": batch_size}).all()
+        else:
+            rows = session.execute(text(
+                f"SELECT article_id, article_id FROM {PG_TABLE} WHERE article_id > :after "
+                "ORDER BY article_id LIMIT :limit"
+            ), {"after": after, "limit": batch_size}).all()
+        ids = [article_id for _, article_id in rows]
+        existing = set(session.execute(select(Article.id).where(Article.id.in_(ids))).scalars()) if ids else set()
+    orphans = [i for i in ids if i not in existing]
+    if orphans:
+        with DB.write_session_scope() as session:
+            remove_articles(session, orphans)
+            session.commit()
+    return {"processed": len(rows), "last": str(rows[-1][0]) if rows else after, "removed": len(orphans)}
+
+
+def run_reconcile(max_batches: int = 0, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    校对索引与文章表：先按文章补建缺失的索引，再按索引清理残留，从上次的进度继续
+
+    进度记录在 werss_schema_meta（search_reconcile = articles:<文章ID> / index:<索引游标>），
+    走完一轮后回到开头。补建尚未完成时不校对（补建本身会覆盖全部文章）。
+
+    Returns:
+        {"indexed": 补建数, "removed": 清理数, "complete": 是否走完一轮}
+    """
+    from core.db_schema import read_meta, write_meta
+    result = {"indexed": 0, "removed": 0, "complete": False}
+    engine = _engine()
+    if not ensure_search_index(engine) or index_state(engine) != STATE_READY:
+        return result
+    phase, _, cursor = (read_meta(engine, RECONCILE_KEY) or "articles:").partition(":")
+    done = 0
+    while not max_batches or done < max_batches:
+        done += 1
+        if phase == "index":
+            batch = reconcile_index_batch(cursor, batch_size)
+            result["removed"] += batch["removed"]
+            cursor = batch["last"]
+            if not batch["processed"]:
+                phase, cursor = "articles", ""
+                result["complete"] = True
+        else:
+            batch = reconcile_articles_batch(cursor, batch_size)
+            result["indexed"] += batch["indexed"]
+            cursor = batch["last_id"]
+            if not batch["processed"]:
+                phase, cursor = "index", ""
+        write_meta(engine, RECONCILE_KEY, f"{phase}:{cursor}")
+        if result["complete"]:
+            break
+    if result["indexed"] or result["removed"]:
+        logger.info(f"全文索引校对: 补建 {result['indexed']} 篇，清理 {result['removed']} 条")
+    return result
+
+
+def rebuild_search_index() -> None:
+    """清空索引并重新补建（修改分词方式或索引内容后使用）"""
+    from core.db_schema import write_meta
+    engine = _engine()
+    if not ensure_search_index(engine):
+        return
+    table = SQLITE_TABLE if engine.dialect.name == "sqlite" else PG_TABLE
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {table}"))
+    write_meta(engine, STATE_KEY, "backfill:")
+    write_meta(engine, RECONCILE_KEY, "articles:")
+    _set_ready(False)
+
+
+_INDEXED_FIELDS = ("title", "description", "content")
+
+
+def _row_from_target(target) -> Dict[str, Any]:
+    return {
+        "id": target.id,
+        "title": target.title,
+        "description": target.description,
+        "content": getattr(target, "content", None),
+    }
+
+
+def _sync_enabled(connection) -> bool:
+    # 索引表在 Db 初始化时创建；这里不执行 DDL，避免在 flush 中另开连接（SQLite 会等待写锁）
+    return _backend(connection.dialect.name) is not None and _ensured.get(str(connection.engine.url), False)
+
+
+def sync_articles(session, rows: List[Dict[str, Any]], strict: bool = False) -> None:
+    """
+    批量入库（Core INSERT，不触发 ORM 事件）后同步索引
+
+    strict=True（调用方在 DB.transaction_scope 中）时索引失败直接抛出，文章随事务一起回滚；
+    否则只记录警告，缺失的索引由 run_reconcile 补上
+    """
+    connection = session.connection()
+    if not rows or not _sync_enabled(connection):
+        return
+    try:
+        index_articles(connection, rows)
+    except Exception as e:
+        if strict:
+            raise
+        logger.warning(f"更新全文索引失败: {e}")
+
+
+def forget_articles(session, article_ids: List[str], strict: bool = False) -> None:
+    """批量删除文章（Query.delete，不触发 ORM 事件）时同步删除索引，strict 含义同 sync_articles"""
+    connection = session.connection()
+    if not article_ids or not _sync_enabled(connection):
+        return
+    try:
+        remove_articles(connection, article_ids)
+    except Exception as e:
+        if strict:
+            raise
+        logger.warning(f"删除全文索引失败: {e}")
+
+
+def _after_insert(mapper, connection, target):
+    if target.id and _sync_enabled(connection):
+        try:
+            index_articles(connection, [_row_from_target(target)])
+        except Exception as e:
+            logger.warning(f"更新全文索引失败: {e}")
+
+
+def _after_update(mapper, connection, target):
+    state = sa_inspect(target)
+    changed = any(
+        name in state.attrs and state.attrs[name].history.has_changes()
+        for name in _INDEXED_FIELDS
+    )
+    if not changed or not _sync_enabled(connection):
+        return
+    from core.models.article import Article
+    table = Article.__table__
+    row = _row_from_target(target)
+    try:
+        if "content" not in state.attrs or "content" in state.unloaded:
+            # 正文为延迟加载列，未加载时从库中读取（同一连接，读到的是本事务内的值）
+            row["content"] = connection.execute(
+                select(table.c.content).where(table.c.id == target.id)
+            ).scalar()
+        index_articles(connection, [row])
+    except Exception as e:
+        logger.warning(f"更新全文索引失败: {e}")
+
+
+def _after_delete(mapper, connection, target):
+    if _sync_enabled(connection):
+        try:
+            remove_articles(connection, [target.id])
+        except Exception as e:
+            logger.warning(f"删除全文索引失败: {e}")
+
+
+def register_search_sync() -> None:
+    """注册 Article 的 ORM 事件，保持全文索引与文章表同步"""
+    from core.models.article import ArticleBase
+    if event.contains(ArticleBase, "after_insert", _after_insert):
+        return
+    event.listen(ArticleBase, "after_insert", _after_insert, propagate=True)
+    event.listen(ArticleBase, "after_update", _after_update, propagate=True)
+    event.listen(ArticleBase, "after_delete", _after_delete, propagate=True)
+
+
+def search_status() -> Dict[str, Any]:
+    """全文索引状态（系统信息展示）"""
+    from core.db_schema import read_meta
+    engine = _engine()
+    dialect = engine.dialect.name if engine is not None else ""
+    return {
+        "backend": _backend(dialect) or "like",
+        "jieba": jieba is not None,
+        "state": index_state(engine) if _backend(dialect) else None,
+        "reconcile": read_meta(engine, RECONCILE_KEY) if _backend(dialect) else None,
+        "ready": is_ready() if _backend(dialect) else False,
+    }
@@ -0,0 +1,149 @@
+"""
+采集策略快照
+
+一次采集任务（do_job / do_job_all_feeds）开始时构建一个不可变的 CollectPolicy，
+沿采集链路向下传递（WxGather -> UpdateArticle -> Db.add_article(s)），
+避免在每篇文章/每一页上重复查询 config_management 与解析 cfg。
+
+采集任务开始时以 refresh=True 重建快照（重新读取配置并探测 MinIO 可用性），任务内复用；
+未显式传入快照的调用方（单篇入库、接口等）使用最近一次构建的快照，
+config_management 被修改（invalidate_config_overrides_cache）时也会重建。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from core.config import cfg
+from core.log import logger
+
+# 未配置 collect_start_date 时的默认采集起始日期
+DEFAULT_COLLECT_START_DATE = date(2025, 12, 1)
+
+
+@dataclass(frozen=True)
+class CollectPolicy:
+    """一次采集任务使用的配置快照（不可变）"""
+
+    start_date: date = DEFAULT_COLLECT_START_DATE
+    # 是否在 config_management 中显式配置了起始日期（入库过滤只在显式配置时生效）
+    start_date_configured: bool = False
+    # 标签提取
+    auto_extract: bool = True
+    extract_method: str = "ai"
+    max_tags: int = 5
+    # 内容采集
+    gather_content: bool = False
+    content_mode: str = "web"
+    # MinIO
+    minio_available: bool = False
+    minio_public_url: str = ""
+    built_at: float = field(default_factory=time.time)
+
+    def publish_date(self, publish_time: Any) -> Optional[date]:
+        """将文章发布时间（秒/毫秒时间戳或 datetime）转换为日期，无法解析时返回 None"""
+        if publish_time is None or publish_time == "":
+            return None
+        try:
+            if isinstance(publish_time, datetime):
+                return publish_time.date()
+            if isinstance(publish_time, date):
+                return publish_time
+            publish_timestamp = int(publish_time)
+            if publish_timestamp < 10000000000:  # 秒级时间戳
+                publish_timestamp *= 1000
+            return datetime.fromtimestamp(publish_timestamp / 1000).date()
+        except (ValueError, TypeError, OSError):
+            return None
+
+    def is_before_start(self, publish_time: Any) -> bool:
+        """文章发布时间是否早于采集起始日期（无法解析时视为不早于）"""
+        publish_date = self.publish_date(publish_time)
+        return publish_date is not None and publish_date < self.start_date
+
+    def rejects(self, publish_time: Any) -> bool:
+        """入库时是否应丢弃该文章（仅在显式配置了采集起始日期时过滤）"""
+        return self.start_date_configured and self.is_before_start(publish_time)
+
+    def is_minio_url(self, url: str) -> bool:
+        """是否为已上传到 MinIO 的地址"""
+        if not url:
+            return False
+        return 'minio' in url.lower() or bool(self.minio_public_url and self.minio_public_url in url)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["start_date"] = self.start_date.isoformat()
+        data["built_at"] = int(self.built_at)
+        return data
+
+
+def _parse_start_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        logger.warning(f"采集起始时间格式错误: {value}，使用默认值 {DEFAULT_COLLECT_START_DATE}")
+        return None
+
+
+def build_collect_policy() -> CollectPolicy:
+    """读取当前配置构建一个新的策略快照"""
+    start_value = None
+    try:
+        # config_management 整表已缓存在 config_overrides 中，这里不会额外查询
+        from core.config_overrides import get_config_override
+        start_value = get_config_override('collect_start_date')
+    except Exception as e:
+        logger.warning(f"读取采集起始时间配置失败: {e}")
+
+    minio_available = False
+    minio_public_url = ""
+    try:
+        from core.storage.minio_client import MinIOClient
+        minio_client = MinIOClient()
+        minio_available = minio_client.is_available()
+        minio_public_url = getattr(minio_client, 'public_url', '') or ''
+    except Exception as e:
+        logger.warning(f"检查MinIO可用性失败: {e}")
+
+    try:
+        max_tags = int(cfg.get("article_tag.max_tags", 5, silent=True) or 5)
+    except (ValueError, TypeError):
+        max_tags = 5
+
+    start_date = _parse_start_date(start_value)
+    return CollectPolicy(
+        start_date=start_date or DEFAULT_COLLECT_START_DATE,
+        start_date_configured=start_date is not None,
+        auto_extract=bool(cfg.get("article_tag.auto_extract", True, silent=True)),
+        extract_method=str(cfg.get("article_tag.extract_method", "ai", silent=True) or "ai"),
+        max_tags=max_tags,
+        gather_content=bool(cfg.get("gather.content", False, silent=True)),
+        content_mode=str(cfg.get("gather.content_mode", "web", silent=True) or "web"),
+        minio_available=minio_available,
+        minio_public_url=minio_public_url,
+    )
+
+
+_policy: Optional[CollectPolicy] = None
+_lock = threading.Lock()
+
+
+def get_collect_policy(refresh: bool = False) -> CollectPolicy:
+    """获取当前策略快照（进程内缓存，config_management 变更后自动重建；refresh=True 时立即重建）"""
+    global _policy
+    with _lock:
+        if _policy is None or refresh:
+            _policy = build_collect_policy()
+        return _policy
+
+
+def invalidate_collect_policy() -> None:
+    global _policy
+    with _lock:
+        _policy = None
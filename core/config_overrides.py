@@ -24,6 +24,13 @@ _cache: Optional[Dict[str, str]] = None
 def invalidate_config_overrides_cache() -> None:
     global _cache
     _cache = None
+    # 采集策略快照依赖 config_management，一并失效
+    try:
+        from core.collect_policy import invalidate_collect_policy
+
+        invalidate_collect_policy()
+    except Exception:
+        pass
 
 
 def _load_cache() -> Dict[str, str]:
@@ -0,0 +1,364 @@
+"""
+文章正文压缩存储
+
+微信文章 HTML 冗余度很高（大量内联样式、重复的 span），数据库体积主要由正文构成。
+开启 content_compress.enabled 后，Article.content 在写入时用 zstd 压缩（可选使用基于已有文章训练的字典），
+读取时透明解压，调用方无需感知：
+
+    zstd:v1:<字典ID>:<base64(压缩数据)>
+
+- 字典 ID 为 0 表示未使用字典；字典保存在 article_content_dicts 表，各进程按需加载
+- 低于 min_size 的正文、压缩后没有变小的正文按原文保存
+- 已有数据由后台任务（jobs/compress_content）分批转换，也可用 scripts/compress_article_content.py 手动执行
+- zstandard 为 pyproject 依赖；未安装时开启 content_compress.enabled 会在写入正文和启动压缩任务时报错，
+  读取到压缩数据同样报错提示安装（关闭压缩时不需要 zstandard）
+"""
+import base64
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, func, select, type_coerce, update
+from sqlalchemy.types import TypeDecorator
+
+from core.config import cfg
+from core.log import logger
+from core.models.base import Text
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+COMPRESSED_PREFIX = "zstd:v1:"
+
+
+def zstd_available() -> bool:
+    return zstandard is not None
+
+
+def require_zstd() -> None:
+    """开启了正文压缩但未安装 zstandard 时抛出，避免正文在不知情的情况下按原文保存"""
+    if zstandard is None:
+        raise RuntimeError("已开启 content_compress.enabled 但未安装 zstandard，请执行 pip install zstandard 或关闭正文压缩")
+
+
+def compression_settings() -> Dict[str, Any]:
+    """读取 content_compress 配置"""
+    def _int(key: str, default: int) -> int:
+        try:
+            return int(cfg.get(key, default, silent=True) or default)
+        except (ValueError, TypeError):
+            return default
+
+    return {
+        "enabled": bool(cfg.get("content_compress.enabled", False, silent=True)),
+        "level": _int("content_compress.level", 9),
+        "min_size": _int("content_compress.min_size", 1024),
+        "use_dict": bool(cfg.get("content_compress.use_dict", True, silent=True)),
+        "dict_size_kb": _int("content_compress.dict_size_kb", 112),
+        "batch_size": _int("content_compress.batch_size", 200),
+        "interval": _int("content_compress.interval", 5),
+    }
+
+
+def is_compressed(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(COMPRESSED_PREFIX)
+
+
+class _DictStore:
+    """进程内的字典缓存：字典 ID -> ZstdCompressionDict"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dicts: Dict[int, Any] = {}
+        self._active_id: Optional[int] = None
+        self._loaded = False
+
+    def _load_rows(self, dict_id: Optional[int] = None) -> None:
+        from core.db import DB
+        from core.models.article_content_dict import ArticleContentDict
+        if DB.engine is None:
+            return
+        stmt = select(ArticleContentDict.id, ArticleContentDict.data)
+        if dict_id is not None:
+            stmt = stmt.where(ArticleContentDict.id == dict_id)
+        # 独立连接，避免在调用方会话的结果处理过程中复用同一连接
+        with DB.engine.connect() as conn:
+            rows = conn.execute(stmt).all()
+        for row_id, data in rows:
+            self._dicts[row_id] = zstandard.ZstdCompressionDict(base64.b64decode(data))
+            if self._active_id is None or row_id > self._active_id:
+                self._active_id = row_id
+
+    def get(self, dict_id: int):
+        with self._lock:
+            if dict_id not in self._dicts:
+                self._load_rows(dict_id)
+            return self._dicts.get(dict_id)
+
+    def active(self):
+        """当前用于压缩的字典（最新训练的一个），返回 (ID, 字典)"""
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                try:
+                    self._load_rows()
+                except Exception as e:
+                    logger.warning(f"加载正文压缩字典失败，暂不使用字典: {e}")
+            if self._active_id is None:
+                return 0, None
+            return self._active_id, self._dicts[self._active_id]
+
+    def add(self, dict_id: int, zdict) -> None:
+        with self._lock:
+            self._dicts[dict_id] = zdict
+            if self._active_id is None or dict_id > self._active_id:
+                self._active_id = dict_id
+
+
+_dict_store = _DictStore()
+_local = threading.local()
+
+
+def _compressor(level: int, dict_id: int, zdict):
+    """zstd 压缩器不是线程安全的，按线程缓存"""
+    cache = getattr(_local, "compressors", None)
+    if cache is None:
+        cache = _local.compressors = {}
+    key = (level, dict_id)
+    if key not in cache:
+        cache[key] = zstandard.ZstdCompressor(level=level, dict_data=zdict)
+    return cache[key]
+
+
+def _decompressor(dict_id: int):
+    cache = getattr(_local, "decompressors", None)
+    if cache is None:
+        cache = _local.decompressors = {}
+    if dict_id not in cache:
+        zdict = _dict_store.get(dict_id) if dict_id else None
+        if dict_id and zdict is None:
+            raise ValueError(f"正文压缩字典 {dict_id} 不存在")
+        cache[dict_id] = zstandard.ZstdDecompressor(dict_data=zdict)
+    return cache[dict_id]
+
+
+def compress_content(value: Optional[str], settings: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """按配置压缩正文；未开启、过短、已压缩或压缩无收益时原样返回，开启但未安装 zstandard 时抛出"""
+    if not isinstance(value, str) or not value or is_compressed(value):
+        return value
+    settings = settings or compression_settings()
+    if not settings["enabled"] or len(value) < settings["min_size"]:
+        return value
+    require_zstd()
+    dict_id, zdict = _dict_store.active() if settings["use_dict"] else (0, None)
+    raw = value.encode("utf-8")
+    packed = _compressor(settings["level"], dict_id, zdict).compress(raw)
+    encoded = f"{COMPRESSED_PREFIX}{dict_id}:{base64.b64encode(packed).decode('ascii')}"
+    if len(encoded) >= len(value):
+        return value
+    return encoded
+
+
+def decompress_content(value: Optional[str]) -> Optional[str]:
+    """解压正文；非压缩数据原样返回"""
+    if not is_compressed(value):
+        return value
+    if zstandard is None:
+        raise RuntimeError("正文已使用 zstd 压缩存储，请安装 zstandard: pip install zstandard")
+    dict_part, _, payload = value[len(COMPRESSED_PREFIX):].partition(":")
+    dict_id = int(dict_part or 0)
+    return _decompressor(dict_id).decompress(base64.b64decode(payload)).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """写入时按配置压缩、读取时透明解压的 Text 列"""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_content(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_content(value)
+
+
+def raw_content_column():
+    """不经过压缩/解压处理的正文列表达式（用于按存储形态过滤）"""
+    from core.models.article import Article
+    return type_coerce(Article.content, Text)
+
+
+def train_content_dictionary(sample_limit: int = 2000, dict_size_kb: Optional[int] = None) -> Optional[int]:
+    """
+    用最近的文章正文训练 zstd 字典并保存，返回新字典 ID
+
+    训练后新写入/新迁移的正文使用新字典；旧数据仍可用原字典解压。
+    """
+    if zstandard is None:
+        raise RuntimeError("未安装 zstandard")
+    from core.db import DB
+    from core.models.article import Article
+    from core.models.article_content_dict import ArticleContentDict
+    from datetime import datetime
+
+    settings = compression_settings()
+    dict_size = (dict_size_kb or settings["dict_size_kb"]) * 1024
+    with DB.session_scope() as session:
+        rows = session.execute(
+            select(Article.content)
+            .where(Article.content.isnot(None), raw_content_column() != "")
+            .order_by(Article.publish_time.desc())
+            .limit(sample_limit)
+        ).scalars().all()
+    samples = [row.encode("utf-8") for row in rows if row]
+    if len(samples) < 10:
+        logger.warning(f"正文样本不足（{len(samples)} 篇），跳过字典训练")
+        return None
+    zdict = zstandard.train_dictionary(dict_size, samples)
+    data = zdict.as_bytes()
+    with DB.write_session_scope() as session:
+        row = ArticleContentDict(
+            data=base64.b64encode(data).decode("ascii"),
+            size=len(data),
+            sample_count=len(samples),
+            created_at=datetime.now(),
+        )
+        session.add(row)
+        session.commit()
+        dict_id = row.id
+    _dict_store.add(dict_id, zstandard.ZstdCompressionDict(data))
+    logger.info(f"正文压缩字典训练完成: ID={dict_id}，样本 {len(samples)} 篇，大小 {len(data) // 1024}KB")
+    return dict_id
+
+
+def active_dictionary_id() -> int:
+    """当前用于压缩的字典 ID，0 表示无字典"""
+    if zstandard is None:
+        return 0
+    return _dict_store.active()[0]
+
+
+def migrate_batch(
+    after_id: str = "",
+    batch_size: Optional[int] = None,
+    decompress: bool = False,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """
+    转换一批已有正文（按 id 递增续跑）
+
+    Args:
+        after_id: 从该 id 之后继续
+        batch_size: 每批条数
+        decompress: True 时反向转换为原文（关闭压缩前使用）
+        force: 忽略 content_compress.enabled，按其余配置压缩
+
+    Returns:
+        {"processed": 处理条数, "last_id": 本批最后一个 id, "before": 转换前字节数, "after": 转换后字节数}
+    """
+    from core.db import DB
+    from core.models.article import Article
+
+    settings = compression_settings()
+    if force:
+        settings["enabled"] = True
+    batch_size = batch_size or settings["batch_size"]
+    raw = raw_content_column()
+    stored = raw.like(f"{COMPRESSED_PREFIX}%")
+    conditions = [Article.id > after_id, raw.isnot(None), raw != ""]
+    if decompress:
+        conditions.append(stored)
+    else:
+        # 低于 min_size 的正文始终按原文保存，不必读出来
+        conditions += [~stored, func.length(raw) >= settings["min_size"]]
+    with DB.session_scope() as session:
+        rows = session.execute(
+            select(Article.id, raw)
+            .where(*conditions)
+            .order_by(Article.id)
+            .limit(batch_size)
+        ).all()
+    if not rows:
+        return {"processed": 0, "last_id": after_id, "before": 0, "after": 0}
+
+    before = after = 0
+    updates: List[Dict[str, str]] = []
+    for article_id, value in rows:
+        new_value = decompress_content(value) if decompress else compress_content(value, settings)
+        before += len(value)
+        after += len(new_value)
+        if new_value != value:
+            updates.append({"b_id": article_id, "b_value": new_value})
+    if updates:
+        table = Article.__table__
+        # 直接写入存储形态，绕过 CompressedText 的二次处理
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(content=type_coerce(bindparam("b_value"), Text))
+        )
+        with DB.write_session_scope() as session:
+            session.execute(stmt, updates)
+            session.commit()
+    return {"processed": len(rows), "last_id": rows[-1][0], "before": before, "after": after}
+
+
+_stats_lock = threading.Lock()
+_stats_cache: Dict[str, Any] = {}
+
+
+def compression_stats(sample_size: int = 200, ttl: int = 600) -> Dict[str, Any]:
+    """
+    压缩情况（抽样最近的文章估算，结果缓存 ttl 秒）
+
+    全表统计需要读取所有正文，这里只抽样最近 sample_size 篇有正文的文章。
+    """
+    with _stats_lock:
+        if _stats_cache and time.time() - _stats_cache.get("_at", 0) < ttl:
+            return {k: v for k, v in _stats_cache.items() if k != "_at"}
+    settings = compression_settings()
+    result: Dict[str, Any] = {
+        "enabled": settings["enabled"],
+        "zstd_available": zstd_available(),
+        "dict_id": None,
+        "sampled": 0,
+        "compressed": 0,
+        "stored_bytes": 0,
+        "original_bytes": 0,
+        "ratio": None,
+    }
+    try:
+        from core.db import DB
+        from core.models.article import Article
+        raw = raw_content_column()
+        with DB.read_session_scope() as session:
+            rows = session.execute(
+                select(raw)
+                .where(raw.isnot(None), raw != "")
+                .order_by(Article.publish_time.desc())
+                .limit(sample_size)
+            ).scalars().all()
+        for value in rows:
+            result["sampled"] += 1
+            result["stored_bytes"] += len(value.encode("utf-8"))
+            if is_compressed(value):
+                result["compressed"] += 1
+                try:
+                    result["original_bytes"] += len(decompress_content(value).encode("utf-8"))
+                except Exception:
+                    result["original_bytes"] += len(value.encode("utf-8"))
+            else:
+                result["original_bytes"] += len(value.encode("utf-8"))
+        if result["stored_bytes"]:
+            result["ratio"] = round(result["original_bytes"] / result["stored_bytes"], 2)
+        if zstd_available() and settings["use_dict"]:
+            result["dict_id"] = active_dictionary_id() or None
+    except Exception as e:
+        result["error"] = str(e)
+    with _stats_lock:
+        _stats_cache.clear()
+        _stats_cache.update(result, _at=time.time())
+    return result
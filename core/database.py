@@ -1,3 +1,234 @@
+"""
+数据库会话依赖
+
+- get_db：同步 Session（原有接口，供同步代码与尚未迁移的路由使用）
+- get_async_db：AsyncSession（postgresql+asyncpg / sqlite+aiosqlite / mysql+aiomysql），
+  供 async 路由使用，慢查询不再阻塞 uvicorn 事件循环。
+  未安装对应异步驱动或 db_async.enabled=False 时，回退为在线程池中执行的同步会话
+  （ThreadedSession），接口与 AsyncSession 的常用方法保持一致。
+- get_read_db：同步只读 Session，配置了只读副本（db_read）时走副本，副本延迟过大时回退主库
+"""
+import asyncio
+import importlib.util
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from core.config import cfg
 from core.db import DB
+from core.db_sqlite import apply_sqlite_profile, sqlite_profile
+from core.print import print_success, print_warning
+
+
 def get_db():
-    return DB.get_session()
\ No newline at end of file
+    return DB.get_session()
+
+
+def get_read_db():
+    """FastAPI 依赖项：只读会话（优先只读副本），请求结束后关闭"""
+    session = DB.get_read_session_factory(replica=True)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+# 同步驱动 -> 异步驱动（方言前缀, 需要的模块）
+_ASYNC_DRIVERS = {
+    "sqlite": ("sqlite+aiosqlite", "aiosqlite"),
+    "postgresql": ("postgresql+asyncpg", "asyncpg"),
+    "mysql": ("mysql+aiomysql", "aiomysql"),
+}
+
+
+def to_async_url(con_str: str) -> Optional[str]:
+    """
+    将同步连接串转换为异步驱动连接串
+
+    Returns:
+        异步连接串；不支持的数据库或未安装异步驱动时返回 None
+    """
+    if not con_str or "://" not in con_str:
+        return None
+    scheme, rest = con_str.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "postgres":
+        dialect = "postgresql"
+    driver = _ASYNC_DRIVERS.get(dialect)
+    if driver is None:
+        return None
+    async_scheme, module = driver
+    if importlib.util.find_spec(module) is None:
+        return None
+    return f"{async_scheme}://{rest}"
+
+
+class ThreadedSession:
+    """
+    异步驱动不可用时的回退会话：在线程池中执行同步 Session，
+    结果在工作线程内取完（freeze），事件循环线程中不再有数据库 IO。
+    """
+
+    def __init__(self, session_factory):
+        self._session = session_factory()
+
+    @staticmethod
+    def _buffered(result):
+        return result.freeze()()
+
+    async def execute(self, statement, params=None, **kwargs):
+        def _run():
+            return self._buffered(self._session.execute(statement, params, **kwargs))
+        return await asyncio.to_thread(_run)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await asyncio.to_thread(self._session.scalar, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        result = await self.execute(statement, params, **kwargs)
+        return result.scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await asyncio.to_thread(self._session.get, entity, ident, **kwargs)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await asyncio.to_thread(fn, self._session, *args, **kwargs)
+
+    async def commit(self):
+        await asyncio.to_thread(self._session.commit)
+
+    async def rollback(self):
+        await asyncio.to_thread(self._session.rollback)
+
+    async def close(self):
+        await asyncio.to_thread(self._session.close)
+
+
+class AsyncDb:
+    """进程内唯一的异步引擎（懒加载）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engine = None
+        self._session_factory = None
+        self._replica_engine = None
+        self._replica_session_factory = None
+        self._initialized = False
+        self.url: Optional[str] = None
+        self.replica_url: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(cfg.get("db_async.enabled", True, silent=True))
+
+    def _init(self) -> None:
+        with self._lock:
+            if self._initialized:
+                return
+            self._initialized = True
+            if not self.enabled or not DB.connection_str:
+                return
+            async_url = to_async_url(DB.connection_str)
+            if async_url is None:
+                print_warning("未安装异步数据库驱动（aiosqlite/asyncpg/aiomysql），异步路由将在线程池中执行同步查询")
+                return
+            try:
+                from sqlalchemy.ext.asyncio import async_sessionmaker
+                self._engine = self._create_engine(async_url)
+                self._session_factory = async_sessionmaker(self._engine, expire_on_commit=False)
+                self.url = self._engine.url.render_as_string(hide_password=True)
+                print_success(f"异步数据库引擎初始化: {self.url}")
+            except Exception as e:
+                print_warning(f"异步数据库引擎初始化失败，回退到线程池执行: {e}")
+                self._engine = None
+                self._session_factory = None
+                return
+            # 只读副本的异步引擎（同步侧的 ReplicaGuard 决定是否使用）
+            replica_url = to_async_url(DB.replica_dsn) if DB.replica_dsn else None
+            if replica_url:
+                try:
+                    from sqlalchemy.ext.asyncio import async_sessionmaker
+                    self._replica_engine = self._create_engine(replica_url)
+                    self._replica_session_factory = async_sessionmaker(self._replica_engine, expire_on_commit=False)
+                    self.replica_url = self._replica_engine.url.render_as_string(hide_password=True)
+                    print_success(f"异步只读副本引擎初始化: {self.replica_url}")
+                except Exception as e:
+                    print_warning(f"异步只读副本引擎初始化失败，读请求使用主库: {e}")
+                    self._replica_engine = None
+                    self._replica_session_factory = None
+
+    @staticmethod
+    def _create_engine(async_url: str):
+        from sqlalchemy.ext.asyncio import create_async_engine
+        kwargs = {
+            "pool_pre_ping": True,
+            "pool_recycle": 300,
+        }
+        if async_url.startswith("sqlite"):
+            # SQLite：接口读取使用独立的只读连接池
+            kwargs.update(pool_size=sqlite_profile()["read_pool_size"], max_overflow=0)
+        else:
+            kwargs.update(
+                pool_size=int(cfg.get("db_async.pool_size", 5, silent=True) or 5),
+                max_overflow=int(cfg.get("db_async.max_overflow", 10, silent=True) or 10),
+                pool_timeout=30,
+            )
+        engine = create_async_engine(async_url, **kwargs)
+        # 异步引擎只服务读接口，SQLite 下以 query_only 打开并应用 WAL 等配置
+        apply_sqlite_profile(engine, readonly=True)
+        return engine
+
+    @property
+    def engine(self):
+        self._init()
+        return self._engine
+
+    def session(self) -> Any:
+        """创建一个会话（AsyncSession 或 ThreadedSession），调用方负责 close"""
+        self._init()
+        if self._session_factory is not None:
+            if self._replica_session_factory is not None and DB.replica_guard is not None \
+                    and DB.replica_guard.use_replica():
+                return self._replica_session_factory()
+            return self._session_factory()
+        return ThreadedSession(DB.get_read_session_factory(replica=True))
+
+    def status(self) -> dict:
+        self._init()
+        engine = self._engine
+        return {
+            "enabled": self.enabled,
+            "mode": "async" if engine is not None else "threadpool",
+            "url": self.url,
+            "pool": engine.pool.status() if engine is not None else None,
+            "replica_url": self.replica_url,
+            "replica_pool": self._replica_engine.pool.status() if self._replica_engine is not None else None,
+        }
+
+    async def dispose(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+        if self._replica_engine is not None:
+            await self._replica_engine.dispose()
+
+
+ASYNC_DB = AsyncDb()
+
+
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator[Any]:
+    """在非依赖注入的场景（被其他路由直接调用的函数）中使用的异步会话"""
+    session = ASYNC_DB.session()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_async_db() -> AsyncIterator[Any]:
+    """FastAPI 依赖项：请求范围的异步会话"""
+    session = ASYNC_DB.session()
+    try:
+        yield session
+    finally:
+        await session.close()
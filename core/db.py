@@ -1,5 +1,5 @@
 from sqlalchemy import create_engine, Engine,Text,event,inspect,text
-from sqlalchemy.orm import sessionmaker, declarative_base,scoped_session, Session
+from sqlalchemy.orm import sessionmaker, declarative_base,scoped_session, Session, undefer
 from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.exc import SQLAlchemyError
 from typing import Optional, List, Union, Any
@@ -7,7 +7,10 @@ from .models import Feed, Article
 from .config import cfg
 from core.models.base import Base  
 from core.print import print_warning,print_info,print_error,print_success
+from contextlib import contextmanager
+import threading
 import logging
+import time
 import os
 
 # SQLAlchemy 日志级别将在 init 方法中根据配置文件的 debug 设置来动态配置
@@ -15,18 +18,227 @@ import os
 # 声明基类
 # Base = declarative_base()
 
+class EngineEntry:
+    """注册表中的一条记录：同一连接串共享的 engine、连接池与会话工厂"""
+    def __init__(self, con_str: str, engine: Engine):
+        self.con_str = con_str
+        self.engine = engine
+        self.session_factory = sessionmaker(bind=engine, autoflush=True, expire_on_commit=True, future=True)
+        self.tags: List[str] = []
+        self.handles = 0
+        self.created_at = time.time()
+        from core.db_health import PoolMetrics
+        self.metrics = PoolMetrics().attach(engine)
+
+
+class EngineRegistry:
+    """
+    进程级数据库引擎注册表
+
+    - 按连接串共享 engine / 连接池 / sessionmaker，Db(tag=...) 只是挂在共享引擎上的轻量句柄
+    - 表结构检查（ensure_tables_exist + migrate_tables）每个连接串每个进程只执行一次
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: dict[str, EngineEntry] = {}
+        self._schema_checked: set[str] = set()
+        self._schema_locks: dict[str, threading.Lock] = {}
+
+    def get(self, con_str: str) -> Optional[EngineEntry]:
+        with self._lock:
+            return self._entries.get(con_str)
+
+    def entries(self) -> List[EngineEntry]:
+        with self._lock:
+            return list(self._entries.values())
+
+    def acquire(self, con_str: str, builder, tag: str = "默认") -> tuple[EngineEntry, bool]:
+        """
+        获取连接串对应的共享引擎，不存在时调用 builder(con_str) 创建
+
+        Returns:
+            (EngineEntry, 是否为本次新建)
+        """
+        with self._lock:
+            entry = self._entries.get(con_str)
+            created = False
+            if entry is None:
+                entry = EngineEntry(con_str, builder(con_str))
+                self._entries[con_str] = entry
+                created = True
+            entry.handles += 1
+            if tag not in entry.tags:
+                entry.tags.append(tag)
+            return entry, created
+
+    def run_schema_check_once(self, con_str: str, check) -> bool:
+        """
+        每个连接串只执行一次表结构检查；并发调用方会等待首次检查完成
+
+        Returns:
+            本次是否实际执行了检查
+        """
+        with self._lock:
+            if con_str in self._schema_checked:
+                return False
+            lock = self._schema_locks.setdefault(con_str, threading.Lock())
+        with lock:
+            if con_str in self._schema_checked:
+                return False
+            check()
+            self._schema_checked.add(con_str)
+            return True
+
+    def dispose(self, con_str: Optional[str] = None) -> int:
+        """释放引擎及其连接池（用于断线重建或测试），返回释放的引擎数量"""
+        with self._lock:
+            keys = [con_str] if con_str else list(self._entries.keys())
+            disposed = 0
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is None:
+                    continue
+                try:
+                    entry.engine.dispose()
+                except Exception as e:
+                    print_warning(f"释放数据库引擎失败: {e}")
+                disposed += 1
+            return disposed
+
+    def stats(self) -> dict:
+        """当前存活的引擎与连接池状态"""
+        with self._lock:
+            pools = []
+            for entry in self._entries.values():
+                pool = entry.engine.pool
+                item = {
+                    "url": entry.engine.url.render_as_string(hide_password=True),
+                    "tags": list(entry.tags),
+                    "handles": entry.handles,
+                    "pool_class": type(pool).__name__,
+                    "status": pool.status(),
+                    "created_at": int(entry.created_at),
+                    "metrics": entry.metrics.snapshot(),
+                }
+                for key in ("size", "checkedin", "checkedout", "overflow"):
+                    fn = getattr(pool, key, None)
+                    if callable(fn):
+                        try:
+                            item[key] = fn()
+                        except Exception:
+                            pass
+                pools.append(item)
+            return {
+                "engines": len(self._entries),
+                "pools": pools,
+                "schema_checked": len(self._schema_checked),
+            }
+
+
+# 全局引擎注册表（进程内共享）
+engine_registry = EngineRegistry()
+_replica_lock = threading.Lock()
+
+from core.db_health import DbHealthMonitor
+from core.collect_policy import get_collect_policy
+from core.article_count import invalidate_article_counts
+from core.article_search import sync_articles
+from core.article_dedup import register_fingerprints
+from core.db_sqlite import is_sqlite, sqlite_profile, apply_sqlite_profile
+# 后台数据库探活（首次创建引擎时启动）
+db_health_monitor = DbHealthMonitor(
+    engine_registry,
+    interval=cfg.get("db_health.interval", 30, silent=True) or 30,
+    max_backoff=cfg.get("db_health.max_backoff", 60, silent=True) or 60,
+)
+
+
+def _insert_ignore_requery(session, model, rows: List[dict], key: str, stmt) -> List[Any]:
+    """
+    不支持 RETURNING 时确定实际插入的行：插入前锁定并排除已存在的主键，插入后按主键读回，
+    再用影响行数核对（在 transaction_scope 中执行时，InnoDB 对不存在的主键加间隙锁，两次查询之间不会有并发插入）
+    """
+    from sqlalchemy import select
+    column = getattr(model, key)
+    keys = [row[key] for row in rows]
+    existing = {value for (value,) in session.execute(select(column).where(column.in_(keys)).with_for_update())}
+    rows = [row for row in rows if row[key] not in existing]
+    if not rows:
+        return []
+    result = session.execute(stmt(rows))
+    candidates = [row[key] for row in rows]
+    present = {value for (value,) in session.execute(select(column).where(column.in_(candidates)))}
+    inserted = [value for value in candidates if value in present]
+    if result.rowcount is not None and result.rowcount >= 0 and result.rowcount != len(inserted):
+        # 两次查询之间有并发写入同一主键，无法确定哪些行是本次插入的
+        raise RuntimeError(
+            f"{model.__tablename__} 批量插入影响 {result.rowcount} 行，读回 {len(inserted)} 行，存在并发写入，请重试"
+        )
+    return inserted
+
+
+def insert_ignore(session, model, rows: List[dict], key: str = "id") -> List[Any]:
+    """
+    按数据库方言批量插入并忽略主键/唯一约束冲突
+
+    Args:
+        session: 数据库会话
+        model: ORM 模型
+        rows: 字段字典列表
+        key: 主键字段名
+
+    Returns:
+        实际插入的 id：支持 RETURNING 时直接返回；MySQL 等不支持时插入后按主键读回并核对影响行数
+    """
+    if not rows:
+        return []
+    dialect = session.get_bind().dialect
+    if dialect.name in ("postgresql", "sqlite"):
+        if dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        if getattr(dialect, "insert_returning", False):
+            stmt = dialect_insert(model).values(rows).on_conflict_do_nothing()
+            result = session.execute(stmt.returning(getattr(model, key)))
+            return [row[0] for row in result]
+        return _insert_ignore_requery(session, model, rows, key,
+                                      lambda values: dialect_insert(model).values(values).on_conflict_do_nothing())
+    if dialect.name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        return _insert_ignore_requery(session, model, rows, key,
+                                      lambda values: dialect_insert(model).values(values).prefix_with("IGNORE"))
+    # 其他数据库：逐条插入，跳过冲突
+    inserted = []
+    from sqlalchemy import insert
+    for row in rows:
+        try:
+            with session.begin_nested():
+                session.execute(insert(model).values(**row))
+            inserted.append(row[key])
+        except SQLAlchemyError:
+            pass
+    return inserted
+
+
 class Db:
     connection_str: Optional[str] = None
     Session: Optional[Any] = None
     engine: Optional[Engine] = None
     session_factory: Optional[Any] = None
+    # 读写分离的会话工厂（SQLite 下为独立连接池，其余数据库与 session_factory 相同）
+    read_session_factory: Optional[Any] = None
+    write_session_factory: Optional[Any] = None
+    # 只读副本（db_read / DB_READ），未配置时为 None
+    replica_dsn: Optional[str] = None
+    replica_session_factory: Optional[Any] = None
+    replica_guard: Optional[Any] = None
     
     def __init__(self,tag:str="默认",User_In_Thread=True):
         self.Session = None
         self.engine = None
         self.User_In_Thread=User_In_Thread
         self.tag=tag
-        print_success(f"[{tag}]连接初始化")
         # 优先使用环境变量 DB（CLI/--db-url、Docker 注入），避免无 config.yaml 时误落 sqlite
         db_config = (os.getenv("DB") or "").strip()
         if not db_config:
@@ -52,64 +264,176 @@ class Db:
             if con_str is None:
                 raise ValueError("Database connection string is None. Please configure 'db' in config.yaml or set DB environment variable.")
             self.connection_str=con_str
-            # 检查SQLite数据库文件是否存在
-            if con_str.startswith('sqlite:///'):
-                db_path = con_str[10:]  # 去掉'sqlite:///'前缀
-                if not os.path.exists(db_path):
-                    try:
-                        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-                    except Exception as e:
-                        pass
-                    open(db_path, 'w').close()
-            # 禁用 SQLAlchemy 数据库查询日志（不显示 SQL 语句）
-            # 如果需要查看 SQL 日志，可以通过环境变量 DB_ECHO=true 启用
-            db_echo_env = os.getenv("DB_ECHO", "").lower() == "true"
+            # 从注册表获取共享引擎（同一连接串在进程内只创建一次 engine 与连接池）
+            entry, created = engine_registry.acquire(con_str, self._create_engine, tag=self.tag)
+            if created:
+                print_success(f"[{self.tag}]连接初始化")
+                if cfg.get("db_health.enabled", True, silent=True):
+                    db_health_monitor.start()
+            if self.engine is not entry.engine:
+                # 切换了引擎，旧的会话工厂不再可用
+                self.Session = None
+            self.engine = entry.engine
+            self.session_factory = entry.session_factory
+            self.read_session_factory = entry.session_factory
+            self.write_session_factory = entry.session_factory
             
-            # 配置 SQLAlchemy 日志级别
-            if db_echo_env:
-                # 只有在明确设置 DB_ECHO=true 时才启用 SQL 日志
-                logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
-                logging.getLogger('sqlalchemy.pool').setLevel(logging.INFO)
-                logging.getLogger('sqlalchemy.dialects').setLevel(logging.INFO)
-            else:
-                # 默认禁用 SQL 日志（只显示 WARNING 及以上级别）
-                logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
-                logging.getLogger('sqlalchemy.pool').setLevel(logging.WARNING)
-                logging.getLogger('sqlalchemy.dialects').setLevel(logging.WARNING)
-                # 同时禁用 sqlalchemy.orm 的日志
-                logging.getLogger('sqlalchemy.orm').setLevel(logging.WARNING)
+            # 自动执行数据库迁移（检测并创建缺失的表和字段），每个进程只执行一次
+            engine_registry.run_schema_check_once(con_str, self._check_schema)
             
-            self.engine = create_engine(con_str,
-                                     pool_size=5,          # 最小空闲连接数（减少到5）
-                                     max_overflow=10,      # 允许的最大溢出连接数（减少到10）
-                                     pool_timeout=30,      # 获取连接时的超时时间（秒）
-                                     echo=db_echo_env,     # 只有在 DB_ECHO=true 时才启用 SQL 日志
-                                     pool_recycle=300,     # 连接池回收时间（秒，增加到5分钟）
-                                     pool_pre_ping=True,   # 连接前检查连接是否有效
-                                     isolation_level="AUTOCOMMIT",  # 设置隔离级别
-                                    #  isolation_level="READ COMMITTED",  # 设置隔离级别
-                                    #  query_cache_size=0,
-                                     connect_args={"check_same_thread": False} if con_str.startswith('sqlite:///') else {}
-                                     )
-            self.session_factory=self.get_session_factory()
+            # SQLite：采集写入使用单连接写池，接口读取使用 query_only 读池
+            if is_sqlite(con_str) and sqlite_profile()["split_pools"]:
+                writer, _ = engine_registry.acquire(f"{con_str}#writer", lambda _: self._create_engine(con_str, role="writer"), tag=self.tag)
+                reader, _ = engine_registry.acquire(f"{con_str}#reader", lambda _: self._create_engine(con_str, role="reader"), tag=self.tag)
+                self.write_session_factory = writer.session_factory
+                self.read_session_factory = reader.session_factory
             
-            # 自动执行数据库迁移（检测并创建缺失的表和字段）
-            try:
-                # 先确保所有表都存在（如果不存在则创建）
-                self.ensure_tables_exist()
-                # 然后执行迁移（添加缺失的字段）
-                self.migrate_tables()
-            except Exception as e:
-                print_warning(f"自动迁移执行失败（不影响启动）: {e}")
-                # 如果迁移失败，尝试直接创建所有表
-                try:
-                    print_info("尝试直接创建所有表...")
-                    self.create_tables()
-                except Exception as create_error:
-                    print_error(f"创建表也失败: {create_error}")
+            # 只读副本：接口与 RSS 的只读查询走副本，写入与采集仍走主库
+            self._init_replica(con_str)
         except Exception as e:
             print(f"Error creating database connection: {e}")
             raise
+    def _init_replica(self, con_str: str) -> None:
+        """挂载 db_read / DB_READ 指定的只读副本，并启动延迟守护（每个副本进程内一个）"""
+        read_dsn = (os.getenv("DB_READ") or "").strip() or cfg.get("db_read", None, silent=True)
+        if not read_dsn or not isinstance(read_dsn, str) or read_dsn == con_str:
+            return
+        if read_dsn.startswith("postgres://"):
+            read_dsn = "postgresql://" + read_dsn[len("postgres://"):]
+        try:
+            entry, created = engine_registry.acquire(read_dsn, lambda dsn: self._create_engine(dsn, role="replica"), tag=self.tag)
+            with _replica_lock:
+                guard = getattr(entry, "replica_guard", None)
+                if guard is None:
+                    from core.db_replica import ReplicaGuard
+                    guard = ReplicaGuard(
+                        entry.engine,
+                        max_lag=cfg.get("db_replica.max_lag", 10, silent=True) or 0,
+                        interval=cfg.get("db_replica.interval", 5, silent=True) or 5,
+                        fallback=bool(cfg.get("db_replica.fallback", True, silent=True)),
+                    )
+                    # 先同步检查一次，避免启动初期全部回退主库
+                    guard.check()
+                    guard.start()
+                    entry.replica_guard = guard
+            if created:
+                print_success(f"[{self.tag}]只读副本连接初始化: {entry.engine.url.render_as_string(hide_password=True)}")
+            self.replica_dsn = read_dsn
+            self.replica_session_factory = entry.session_factory
+            self.replica_guard = guard
+        except Exception as e:
+            print_warning(f"只读副本初始化失败，读请求使用主库: {e}")
+    def get_read_session_factory(self, replica: bool = False):
+        """
+        只读会话工厂
+
+        Args:
+            replica: 是否允许使用只读副本（副本延迟超过阈值或不可用时自动回退主库）
+        """
+        if replica and self.replica_session_factory is not None and self.replica_guard is not None \
+                and self.replica_guard.use_replica():
+            return self.replica_session_factory
+        return self.read_session_factory or self.session_factory
+    def _create_engine(self, con_str: str, role: Optional[str] = None) -> Engine:
+        """
+        创建 engine 与连接池，仅在注册表中不存在该连接串时调用
+
+        Args:
+            role: None 为主连接池；SQLite 下 "writer" 为单连接写池，"reader" 为只读读池；
+                  "replica" 为只读副本
+        """
+        # 检查SQLite数据库文件是否存在
+        if con_str.startswith('sqlite:///'):
+            db_path = con_str[10:]  # 去掉'sqlite:///'前缀
+            if not os.path.exists(db_path):
+                try:
+                    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                except Exception as e:
+                    pass
+                open(db_path, 'w').close()
+        # 禁用 SQLAlchemy 数据库查询日志（不显示 SQL 语句）
+        # 如果需要查看 SQL 日志，可以通过环境变量 DB_ECHO=true 启用
+        db_echo_env = os.getenv("DB_ECHO", "").lower() == "true"
+        
+        # 配置 SQLAlchemy 日志级别
+        if db_echo_env:
+            # 只有在明确设置 DB_ECHO=true 时才启用 SQL 日志
+            logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
+            logging.getLogger('sqlalchemy.pool').setLevel(logging.INFO)
+            logging.getLogger('sqlalchemy.dialects').setLevel(logging.INFO)
+        else:
+            # 默认禁用 SQL 日志（只显示 WARNING 及以上级别）
+            logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
+            logging.getLogger('sqlalchemy.pool').setLevel(logging.WARNING)
+            logging.getLogger('sqlalchemy.dialects').setLevel(logging.WARNING)
+            # 同时禁用 sqlalchemy.orm 的日志
+            logging.getLogger('sqlalchemy.orm').setLevel(logging.WARNING)
+        
+        pool_size, max_overflow, pool_timeout = 5, 10, 30
+        if role == "writer":
+            # 单写连接：采集入库在同一连接上串行执行，避免写锁争用
+            pool_size, max_overflow, pool_timeout = 1, 0, 60
+        elif role == "reader":
+            pool_size, max_overflow = sqlite_profile()["read_pool_size"], 0
+        engine = create_engine(con_str,
+                                 pool_size=pool_size,          # 最小空闲连接数（主池5，SQLite 写池1）
+                                 max_overflow=max_overflow,      # 允许的最大溢出连接数（主池10，SQLite 读写池不溢出）
+                                 pool_timeout=pool_timeout,      # 获取连接时的超时时间（秒）
+                                 echo=db_echo_env,     # 只有在 DB_ECHO=true 时才启用 SQL 日志
+                                 pool_recycle=300,     # 连接池回收时间（秒，增加到5分钟）
+                                 pool_pre_ping=True,   # 连接前检查连接是否有效
+                                 isolation_level="AUTOCOMMIT",  # 设置隔离级别
+                                #  isolation_level="READ COMMITTED",  # 设置隔离级别
+                                #  query_cache_size=0,
+                                 connect_args={"check_same_thread": False} if con_str.startswith('sqlite:///') else {}
+                                 )
+        if is_sqlite(con_str):
+            # WAL、synchronous=NORMAL、缓存与 busy_timeout 等连接级配置
+            apply_sqlite_profile(engine, readonly=(role in ("reader", "replica")))
+        return engine
+    def _check_schema(self) -> None:
+        """检测并创建缺失的表和字段（由注册表保证每个进程只执行一次）"""
+        self.sync_schema()
+        # 全文索引表不在模型元数据中，单独创建并注册同步事件
+        try:
+            from core.article_search import ensure_search_index, register_search_sync
+            if ensure_search_index(self.engine):
+                register_search_sync()
+        except Exception as e:
+            print_warning(f"全文索引初始化失败，搜索使用标题匹配: {e}")
+    def sync_schema(self, force: bool = False) -> None:
+        """
+        同步模型到表结构
+
+        数据库中记录的表结构指纹与当前模型一致时跳过 inspector 检查
+
+        Args:
+            force: 忽略指纹，强制完整检查（也可通过 db_schema.force_check 配置）
+        """
+        from core.models.base import Base as B
+        from core.db_schema import schema_fingerprint, read_fingerprint, write_fingerprint, force_schema_check
+        started = time.perf_counter()
+        fingerprint = schema_fingerprint(B.metadata, self.engine.dialect.name)
+        if not (force or force_schema_check()) and read_fingerprint(self.engine) == fingerprint:
+            print_info(f"表结构指纹一致，跳过结构检查（{(time.perf_counter() - started) * 1000:.0f}ms）")
+            return
+        try:
+            # 先确保所有表都存在（如果不存在则创建）
+            tables_ok = self.ensure_tables_exist()
+            # 然后执行迁移（添加缺失的字段）
+            migrated = self.migrate_tables()
+            # 全部成功才记录指纹，失败的部分下次启动继续检查
+            if tables_ok and migrated:
+                write_fingerprint(self.engine, fingerprint)
+                print_info(f"表结构检查完成并记录指纹（{(time.perf_counter() - started) * 1000:.0f}ms）")
+        except Exception as e:
+            print_warning(f"自动迁移执行失败（不影响启动）: {e}")
+            # 如果迁移失败，尝试直接创建所有表
+            try:
+                print_info("尝试直接创建所有表...")
+                self.create_tables()
+            except Exception as create_error:
+                print_error(f"创建表也失败: {create_error}")
     def create_tables(self):
         """Create all tables defined in models"""
         from core.models.base import Base as B # 导入所有模型
@@ -125,6 +449,9 @@ class Db:
         确保所有表都存在，如果不存在则创建
         这个方法会在 migrate_tables 之前调用，确保表结构存在
         适用于 PostgreSQL、MySQL 等数据库
+
+        Returns:
+            所有表是否都已存在或创建成功
         """
         from core.models.base import Base as B
         from sqlalchemy import inspect as sql_inspect
@@ -169,8 +496,9 @@ class Db:
                     print_success(f"✅ 成功创建 {created_count} 个表")
                 if failed_count > 0:
                     print_warning(f"⚠️  {failed_count} 个表创建失败")
-            else:
-                print_info("✅ 所有表已存在")
+                return failed_count == 0
+            print_info("✅ 所有表已存在")
+            return True
         except Exception as e:
             print_error(f"检查表存在性失败: {e}")
             # 如果检查失败，尝试直接创建所有表（使用 create_all，它会自动跳过已存在的表）
@@ -178,16 +506,21 @@ class Db:
             try:
                 B.metadata.create_all(self.engine, checkfirst=True)
                 print_success("✅ 使用 create_all 创建表成功")
+                return True
             except Exception as create_error:
                 print_error(f"create_all 也失败: {create_error}")
                 # 不抛出异常，允许应用继续启动（可能表已经存在）
                 import traceback
                 traceback.print_exc()
+                return False
     
     def migrate_tables(self):
         """
         自动迁移数据库表结构
-        检测模型定义与数据库表结构的差异，自动添加缺失的字段
+        检测模型定义与数据库表结构的差异，自动添加缺失的字段和索引
+
+        Returns:
+            迁移是否全部成功
         """
         from core.models.base import Base as B
         from sqlalchemy import inspect as sql_inspect
@@ -197,6 +530,7 @@ class Db:
         
         try:
             inspector = sql_inspect(self.engine)
+            success = True
             
             # 遍历所有模型
             for table_name, table in B.metadata.tables.items():
@@ -213,15 +547,79 @@ class Db:
                     for col_name, model_col in model_columns.items():
                         if col_name not in existing_columns:
                             # 字段不存在，添加字段
-                            self._add_column(table_name, col_name, model_col)
+                            success = self._add_column(table_name, col_name, model_col) and success
+                    
+                    # 检查缺失的索引（模型上声明的复合索引等）
+                    success = self._ensure_indexes(inspector, table_name, table) and success
             
             print_success('✅ 数据库迁移完成')
+            return success
         except Exception as e:
             print_error(f"数据库迁移失败: {e}")
             import traceback
             traceback.print_exc()
+            return False
     
-    def _add_column(self, table_name: str, column_name: str, column: Column):
+    def _ensure_indexes(self, inspector, table_name: str, table) -> bool:
+        """
+        创建模型中声明但数据库中缺失的索引
+
+        Returns:
+            是否所有索引都已存在或创建成功
+        """
+        try:
+            existing = {idx.get('name') for idx in inspector.get_indexes(table_name)}
+            # 唯一约束在部分数据库中也以索引形式出现
+            existing |= {uc.get('name') for uc in inspector.get_unique_constraints(table_name)}
+        except Exception as e:
+            print_warning(f"  ⚠️  读取索引失败 {table_name}: {e}")
+            return False
+        success = True
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            if index.name and index.name not in existing:
+                success = self._create_index(index) and success
+        return success
+
+    def _create_index(self, index) -> bool:
+        """
+        创建单个索引
+
+        PostgreSQL 使用 CREATE INDEX CONCURRENTLY，建索引期间不锁写（需在事务外执行）；
+        其他数据库使用普通 CREATE INDEX。
+        """
+        if self.engine is None:
+            raise ValueError("Engine is not initialized")
+        table_name = index.table.name
+        columns = [col.name for col in index.columns]
+        started = time.perf_counter()
+        try:
+            if self.engine.dialect.name == "postgresql":
+                unique = "UNIQUE " if index.unique else ""
+                column_sql = ", ".join(f'"{c}"' for c in columns)
+                with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    try:
+                        conn.execute(text(
+                            f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS "{index.name}" '
+                            f'ON "{table_name}" ({column_sql})'
+                        ))
+                    except SQLAlchemyError:
+                        # 并发建索引失败会留下 INVALID 索引，清理后下次启动重试
+                        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+                        raise
+            else:
+                index.create(self.engine, checkfirst=True)
+            print_success(f"  ✅ 创建索引: {table_name}.{index.name} ({', '.join(columns)})，"
+                          f"耗时 {time.perf_counter() - started:.1f}s")
+            return True
+        except SQLAlchemyError as e:
+            error_msg = str(e)
+            if "already exists" in error_msg or "duplicate key name" in error_msg.lower():
+                print_info(f"  ℹ️  索引已存在: {table_name}.{index.name}")
+                return True
+            print_warning(f"  ⚠️  创建索引失败 {table_name}.{index.name}: {error_msg}")
+            return False
+
+    def _add_column(self, table_name: str, column_name: str, column: Column) -> bool:
         """
         添加字段到现有表
         
@@ -229,6 +627,9 @@ class Db:
             table_name: 表名
             column_name: 字段名
             column: SQLAlchemy Column 对象
+
+        Returns:
+            字段是否已存在于表中（添加成功或本来就存在）
         """
         try:
             # 构建 ALTER TABLE 语句
@@ -305,14 +706,16 @@ class Db:
                             conn.execute(text(comment_sql))
                     except:
                         pass  # 注释添加失败不影响主流程
+            return True
                         
         except SQLAlchemyError as e:
             # 如果字段已存在或其他错误，记录但不中断
             error_msg = str(e)
             if "already exists" in error_msg or "duplicate column" in error_msg.lower():
                 print_info(f"  ℹ️  字段已存在: {table_name}.{column_name}")
-            else:
-                print_warning(f"  ⚠️  添加字段失败 {table_name}.{column_name}: {error_msg}")    
+                return True
+            print_warning(f"  ⚠️  添加字段失败 {table_name}.{column_name}: {error_msg}")
+            return False    
         
     def close(self) -> None:
         """Close the database connection"""
@@ -322,6 +725,86 @@ class Db:
             if hasattr(self.Session, 'remove'):
                 self.Session.remove()
             
+    @contextmanager
+    def session_scope(self):
+        """短生命周期会话：不挂在线程本地会话上，退出时归还连接，适合采集等高频检查"""
+        if self.session_factory is None:
+            raise ValueError("Session factory is not initialized")
+        session = self.session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    @contextmanager
+    def read_session_scope(self, replica: bool = False):
+        """
+        只读短会话：SQLite 下走 query_only 读池，不与采集写入争用连接
+
+        Args:
+            replica: 允许使用只读副本（接口/RSS 读取传 True；采集去重等需要读到最新写入的场景保持 False）
+        """
+        factory = self.get_read_session_factory(replica=replica)
+        if factory is None:
+            raise ValueError("Session factory is not initialized")
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    @contextmanager
+    def write_session_scope(self):
+        """写入短会话：SQLite 下走单连接写池，采集入库串行执行"""
+        factory = self.write_session_factory or self.session_factory
+        if factory is None:
+            raise ValueError("Session factory is not initialized")
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    @contextmanager
+    def transaction_scope(self):
+        """
+        真正的事务会话：with 块正常结束时整体提交，抛出异常时整体回滚
+
+        引擎使用 AUTOCOMMIT，write_session_scope 中每条语句立即提交，session.rollback() 撤销不了任何写入。
+        这里在写连接上切回方言默认的隔离级别并显式开启事务；会话以 rollback_only 方式加入，
+        块内的 session.commit() 只 flush 不提交，session.rollback() 会回滚整个事务。
+
+        退出后 session.info["transaction"] 为 committed / rolled_back / unknown（回滚本身失败），
+        调用方据此决定是否清理事务外的副作用（如归档段文件）。
+        """
+        factory = self.write_session_factory or self.session_factory
+        if factory is None:
+            raise ValueError("Session factory is not initialized")
+        engine = factory.kw["bind"]
+        with engine.connect() as conn:
+            # 连接归还连接池时恢复引擎的 AUTOCOMMIT
+            conn.execution_options(isolation_level=engine.dialect.default_isolation_level)
+            trans = conn.begin()
+            session = Session(bind=conn, join_transaction_mode="rollback_only",
+                              autoflush=True, expire_on_commit=True)
+            session.info["transaction"] = "active"
+            try:
+                yield session
+                session.flush()
+                # 块内已回滚（trans 不再活动）时这里会抛出，不会提交之后自动开启的事务
+                trans.commit()
+                session.info["transaction"] = "committed"
+            except BaseException:
+                try:
+                    conn.rollback()
+                    session.info["transaction"] = "rolled_back"
+                except Exception as rollback_error:
+                    session.info["transaction"] = "unknown"
+                    print_error(f"事务回滚失败: {rollback_error}")
+                raise
+            finally:
+                session.close()
+
     def __enter__(self):
         return self
         
@@ -346,56 +829,35 @@ class Db:
             pass      
         return False
      
-    def add_article(self, article_data: dict,check_exist=False) -> bool:
+    def add_article(self, article_data: dict,check_exist=False,policy=None) -> bool:
         try:
             session=self.get_session()
             from datetime import datetime, date
+            # 采集时解析出的正文纯文本只用于标签提取，不入库
+            article_data = dict(article_data)
+            content_text = article_data.pop('content_text', None)
             art = Article(**article_data)
             article_id = getattr(art, 'id', None)
             if article_id:
                 article_id = f"{str(getattr(art, 'mp_id', ''))}-{article_id}".replace("MP_WXS_","")
                 setattr(art, 'id', article_id)
             
-            # 检查文章的发布时间是否早于配置的采集起始时间
+            # 检查文章的发布时间是否早于配置的采集起始时间（使用采集策略快照，不再逐篇查询配置）
+            policy = policy or get_collect_policy()
             publish_time = getattr(art, 'publish_time', None)
-            if publish_time:
-                try:
-                    # 从配置中获取采集起始时间
-                    from core.models.config_management import ConfigManagement
-                    config = session.query(ConfigManagement).filter(
-                        ConfigManagement.config_key == 'collect_start_date'
-                    ).first()
-                    
-                    if config and config.config_value:
-                        try:
-                            start_date = datetime.strptime(config.config_value, '%Y-%m-%d').date()
-                            # 将 publish_time 转换为日期进行比较
-                            if isinstance(publish_time, (int, float)):
-                                # 如果是时间戳，转换为日期
-                                publish_timestamp = int(publish_time)
-                                if publish_timestamp < 10000000000:  # 秒级时间戳
-                                    publish_timestamp *= 1000
-                                publish_date = datetime.fromtimestamp(publish_timestamp / 1000).date()
-                            else:
-                                # 如果是 datetime 对象，直接获取日期
-                                publish_date = publish_time.date() if hasattr(publish_time, 'date') else publish_time
-                            
-                            # 如果文章发布时间早于起始时间，跳过保存
-                            article_title = getattr(art, 'title', '') or ''
-                            if publish_date < start_date:
-                                print_info(f"文章发布时间 {publish_date} 早于采集起始时间 {start_date}，跳过保存: {article_title[:50]}")
-                                return False
-                        except (ValueError, TypeError, AttributeError) as e:
-                            # 日期解析失败，记录警告但继续保存
-                            print_warning(f"解析采集起始时间或文章发布时间失败: {e}")
-                except Exception as e:
-                    # 读取配置失败，记录警告但继续保存（使用默认行为）
-                    print_warning(f"读取采集起始时间配置失败: {e}")
+            if policy.rejects(publish_time):
+                article_title = getattr(art, 'title', '') or ''
+                print_info(f"文章发布时间 {policy.publish_date(publish_time)} 早于采集起始时间 {policy.start_date}，跳过保存: {article_title[:50]}")
+                return False
             
             # 始终检查文章是否已存在（基于ID）
             if not article_id:
                 return False
-            existing_article = session.query(Article).filter(Article.id == article_id).first()
+            existing_article = session.query(Article.id).filter(Article.id == article_id).first()
+            if existing_article is None:
+                # 已归档的文章同样视为已存在
+                from core.models.article_archive import ArticleArchive
+                existing_article = session.query(ArticleArchive.article_id).filter(ArticleArchive.article_id == article_id).first()
             if existing_article is not None:
                 if check_exist:
                     print_warning(f"Article already exists: {article_id}")
@@ -426,14 +888,30 @@ class Db:
             setattr(art, 'status', DATA_STATUS.ACTIVE)
             session.add(art)
             session.flush()  # 先 flush 获取 article.id
+
+            # 近似重复检测（SimHash），重复文章沿用原文标签
+            duplicate_of = None
+            try:
+                duplicate_of = register_fingerprints(session, [{
+                    'id': article_id,
+                    'title': getattr(art, 'title', None),
+                    'description': getattr(art, 'description', None),
+                    'content': getattr(art, 'content', None),
+                }]).get(article_id)
+            except Exception as dedup_error:
+                print_warning(f"近似重复检测失败: {dedup_error}")
             
             # ========== 自动提取标签 ==========
             try:
                 # 基于文章内容自动提取标签（会自动创建新标签） 
-                auto_extract_enabled = cfg.get("article_tag.auto_extract", True)
+                auto_extract_enabled = policy.auto_extract
                 print_info(f"🔍 标签提取配置: auto_extract={auto_extract_enabled}")
                 
-                if auto_extract_enabled:
+                if auto_extract_enabled and duplicate_of:
+                    from core.tag_assign import copy_article_tags
+                    copied = copy_article_tags(session, [(article_id, duplicate_of, publish_time)]).get(article_id, 0)
+                    print_info(f"近似重复文章，沿用原文 {duplicate_of} 的 {copied} 个标签，跳过提取")
+                elif auto_extract_enabled:
                     article_content = getattr(art, 'content', '') or ''
                     content_length = len(article_content)
                     article_title = getattr(art, 'title', '') or ''
@@ -443,7 +921,9 @@ class Db:
                         article_id, 
                         article_title, 
                         getattr(art, 'description', '') or '', 
-                        article_content
+                        content_text or article_content,
+                        policy=policy,
+                        publish_time=publish_time
                     )
                 else:
                     print_warning("⚠️  标签自动提取已禁用")
@@ -455,6 +935,8 @@ class Db:
             # ==========================================
             
             sta=session.commit()
+            # 文章集合变化，已缓存的列表总数失效
+            invalidate_article_counts()
             
         except Exception as e:
             # 处理各种数据库的唯一约束错误
@@ -479,12 +961,191 @@ class Db:
                 return False
         return True    
         
+    @staticmethod
+    def make_article_id(mp_id: Any, article_id: Any) -> str:
+        """构建入库文章ID（与 add_article 中的逻辑一致）"""
+        return f"{str(mp_id or '')}-{article_id}".replace("MP_WXS_","")
+
+    def get_existing_article_ids(self, article_ids: List[str]) -> dict:
+        """
+        一次 IN 查询获取已入库的文章
+
+        Args:
+            article_ids: 完整文章ID列表（mp_id-aid）
+
+        Returns:
+            {文章ID: {"has_content": 是否已有正文, "pic_url": 封面}}，不存在的ID不在结果中；
+            已归档的文章视为已存在且有正文
+        """
+        ids = list(dict.fromkeys([i for i in article_ids if i]))
+        if not ids:
+            return {}
+        from sqlalchemy import func
+        with self.read_session_scope() as session:
+            rows = session.query(
+                Article.id,
+                func.coalesce(func.length(func.trim(Article.content)), 0),
+                Article.pic_url
+            ).filter(Article.id.in_(ids)).all()
+            existing = {row[0]: {"has_content": bool(row[1]), "pic_url": row[2]} for row in rows}
+            missing = [i for i in ids if i not in existing]
+            if missing:
+                from core.models.article_archive import ArticleArchive
+                for (article_id,) in session.query(ArticleArchive.article_id).filter(ArticleArchive.article_id.in_(missing)):
+                    existing[article_id] = {"has_content": True, "pic_url": None}
+        return existing
+
+    def _insert_ignore(self, session, rows: List[dict]) -> List[str]:
+        """
+        批量插入文章并忽略主键冲突
+
+        Returns:
+            实际插入的文章ID
+        """
+        return insert_ignore(session, Article, rows)
+
+    def add_articles_bulk(self, items: List[dict], mp_id: Optional[str] = None, extract_tags: bool = True, policy=None) -> List[str]:
+        """
+        批量入库一页文章：一次 IN 查询去重，按方言使用 ON CONFLICT DO NOTHING / INSERT IGNORE 写入
+
+        Args:
+            items: 文章字典列表，既支持 add_article 的字段（id/url/pic_url/description/publish_time），
+                   也支持微信 app_msg_list 原始字段（aid/link/cover/digest/update_time）；
+                   content_text（正文纯文本）只用于标签提取，不入库
+            mp_id: 公众号ID，items 中没有 mp_id 时使用
+            extract_tags: 是否对新文章执行自动标签提取
+            policy: 采集策略快照（core.collect_policy.CollectPolicy），为空时使用当前快照
+
+        Returns:
+            新写入的文章ID列表（按输入顺序）
+
+        Raises:
+            写入失败时抛出异常（整页在同一事务中回滚，没有文章写入），调用方据此把这些文章视为失败，
+            不能当作“已存在”推进采集水位/断点
+        """
+        from datetime import datetime, date
+        from core.models.base import DATA_STATUS
+        if not items:
+            return []
+        columns = set(Article.__table__.columns.keys())
+        now = datetime.now()
+
+        policy = policy or get_collect_policy()
+
+        rows: List[dict] = []
+        texts = {}
+        seen = set()
+        for item in items:
+            raw_id = item.get('id') or item.get('aid')
+            item_mp_id = item.get('mp_id') or mp_id
+            if not raw_id or not item_mp_id:
+                continue
+            article_id = self.make_article_id(item_mp_id, raw_id)
+            if article_id in seen:
+                continue
+            seen.add(article_id)
+            publish_time = item.get('publish_time', item.get('update_time'))
+            if policy.rejects(publish_time):
+                print_info(f"文章发布时间早于采集起始时间 {policy.start_date}，跳过保存: {(item.get('title') or '')[:50]}")
+                continue
+            row = {
+                'id': article_id,
+                'mp_id': item_mp_id,
+                'title': item.get('title'),
+                'url': item.get('url') or item.get('link'),
+                'pic_url': item.get('pic_url') or item.get('cover'),
+                'description': item.get('description') or item.get('digest'),
+                'content': item.get('content') or '',
+                'publish_time': publish_time,
+                'is_export': item.get('is_export'),
+                'status': DATA_STATUS.ACTIVE,
+            }
+            for key in ('created_at', 'updated_at'):
+                value = item.get(key) or now
+                if isinstance(value, str):
+                    value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+                row[key] = value
+            rows.append({k: v for k, v in row.items() if k in columns})
+            if item.get('content_text'):
+                texts[article_id] = item['content_text']
+
+        if not rows:
+            return []
+        try:
+            existing = self.get_existing_article_ids([row['id'] for row in rows])
+            rows = [row for row in rows if row['id'] not in existing]
+            if not rows:
+                return []
+            # 入库走写连接池（SQLite 下为单连接，串行写入），文章与全文索引在同一事务中提交
+            with self.transaction_scope() as write_session:
+                new_ids = set(self._insert_ignore(write_session, rows))
+                # Core 批量插入不触发 ORM 事件，这里同步全文索引（失败时整页回滚）
+                sync_articles(write_session, [row for row in rows if row['id'] in new_ids], strict=True)
+                duplicates = {}
+                try:
+                    # 近似重复检测失败不影响入库：放在保存点中，失败时只撤销指纹写入
+                    with write_session.begin_nested():
+                        duplicates = register_fingerprints(write_session, [row for row in rows if row['id'] in new_ids])
+                except Exception as dedup_error:
+                    duplicates = {}
+                    print_warning(f"近似重复检测失败: {dedup_error}")
+        except Exception as e:
+            print_error(f"批量写入文章失败: {e}")
+            raise
+        new_rows = [row for row in rows if row['id'] in new_ids]
+        print_success(f"批量写入文章 {len(new_rows)}/{len(items)} 篇")
+        if new_rows:
+            invalidate_article_counts()
+
+        # ========== 自动提取标签 ==========
+        # 标签提取可能调用 AI，耗时较长，不占用写连接
+        if extract_tags and new_rows and policy.auto_extract:
+            plans = []
+            # 近似重复文章直接沿用原文标签，不再提取
+            copies = [(row['id'], duplicates[row['id']], row.get('publish_time')) for row in new_rows if row['id'] in duplicates]
+            for row in new_rows:
+                if row['id'] in duplicates:
+                    continue
+                try:
+                    topics = self._extract_topics(
+                        row.get('title') or '',
+                        row.get('description') or '',
+                        texts.get(row['id']) or row.get('content') or '',
+                        policy=policy
+                    )
+                except Exception as tag_error:
+                    print_warning(f"自动提取标签失败: {tag_error}")
+                    continue
+                if topics:
+                    plans.append((row['id'], topics, row.get('publish_time')))
+            # 整页文章的标签一次解析、一次写入（原文在同一页时先写原文的标签再复制）
+            if plans or copies:
+                from core.tag_assign import assign_article_tags, copy_article_tags
+                session = self.get_session()
+                try:
+                    assigned = assign_article_tags(session, plans)
+                    copied = copy_article_tags(session, copies)
+                    session.commit()
+                    if plans:
+                        print_success(f"✅ {len(plans)} 篇文章共关联 {sum(assigned.values())} 个标签（基于提取）")
+                    if copies:
+                        print_info(f"{len(copies)} 篇近似重复文章沿用原文标签 {sum(copied.values())} 个，跳过提取")
+                except Exception as tag_error:
+                    print_warning(f"批量关联标签失败: {tag_error}")
+                    try:
+                        session.rollback()
+                    except Exception:
+                        pass
+        return [row['id'] for row in new_rows]
+
     def get_articles(self, id:Optional[str]=None, limit:int=30, offset:int=0) -> List[Article]:
         try:
-            query = self.get_session().query(Article)
-            if id:
-                query = query.filter(Article.id == id)
-            data = query.limit(limit).offset(offset).all()
+            with self.read_session_scope(replica=True) as session:
+                # 返回的对象在会话关闭后使用，正文需随查询一并加载
+                query = session.query(Article).options(undefer(Article.content))
+                if id:
+                    query = query.filter(Article.id == id)
+                data = query.limit(limit).offset(offset).all()
             return data
         except Exception as e:
             print(f"Failed to fetch Articles: {e}")
@@ -572,20 +1233,7 @@ class Db:
             if self.Session is None:
                 raise ValueError("Session factory is not initialized")
             return self.Session()
-        # 检查数据库连接是否已断开
-        try:
-            from core.models import User
-            # 尝试执行一个简单的查询来检查连接状态
-            session.query(User.id).count()
-        except Exception as e:
-            from core.print import print_warning
-            print_warning(f"[{self.tag}] Database connection lost: {e}. Reconnecting...")
-            if self.connection_str:
-                self.init(self.connection_str)
-            _session()
-            if self.Session is None:
-                raise ValueError("Session factory is not initialized")
-            return self.Session()
+        # 不在这里做连接探测：借出连接时由 pool_pre_ping 校验，断线重连由 db_health_monitor 负责
         return session
     def auto_refresh(self):
         # 定义一个事件监听器，在对象更新后自动刷新
@@ -603,148 +1251,87 @@ class Db:
         finally:
             session.remove()
     
-    def _assign_tags_by_extraction(self, session, article_id: str, title: str, description: str = "", content: str = ""):
-        """使用提取方式自动提取标签并关联（标签存储在 tags 表，通过 article_tags 关联）"""
-        try:
-            from core.models.tags import Tags
-            from core.models.article_tags import ArticleTag
-            from core.tag_extractor import TagExtractor
-            import uuid
-            from datetime import datetime
-            
-            # 获取提取方式（默认使用 AI，与配置文件保持一致）
-            extract_method = cfg.get("article_tag.extract_method", "ai")
-            
-            # 使用全局单例提取器（模型常驻内存）
-            from core.tag_extractor import get_tag_extractor
-            extractor = get_tag_extractor()
-            
-            # 提取标签关键词
-            if extract_method == "ai":
-                # AI 提取是异步的，需要特殊处理
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_running():
-                        # 如果事件循环正在运行，使用线程池
-                        import concurrent.futures
-                        with concurrent.futures.ThreadPoolExecutor() as executor:
-                            future = executor.submit(
-                                asyncio.run,
-                                extractor.extract_with_ai(
-                                    title, 
-                                    description, 
-                                    content,
-                                    int(cfg.get("article_tag.max_tags", 5))
-                                )
+    def _extract_topics(self, title: str, description: str = "", content: str = "", policy=None) -> List[str]:
+        """按采集策略的提取方式提取标签关键词（AI 失败时回退 TextRank）"""
+        # 获取提取方式（默认使用 AI，与配置文件保持一致）
+        policy = policy or get_collect_policy()
+        extract_method = policy.extract_method
+        max_tags = policy.max_tags
+        
+        # 使用全局单例提取器（模型常驻内存）
+        from core.tag_extractor import get_tag_extractor
+        extractor = get_tag_extractor()
+        
+        # 提取标签关键词
+        if extract_method == "ai":
+            # AI 提取是异步的，需要特殊处理
+            import asyncio
+            try:
+                loop = asyncio.get_event_loop()
+                if loop.is_running():
+                    # 如果事件循环正在运行，使用线程池
+                    import concurrent.futures
+                    with concurrent.futures.ThreadPoolExecutor() as executor:
+                        future = executor.submit(
+                            asyncio.run,
+                            extractor.extract_with_ai(
+                                title, 
+                                description, 
+                                content,
+                                max_tags
                             )
-                            topics = future.result()
-                    else:
-                        topics = asyncio.run(extractor.extract_with_ai(
-                            title, 
-                            description, 
-                            content,
-                            int(cfg.get("article_tag.max_tags", 5))
-                        ))
-                except RuntimeError:
+                        )
+                        topics = future.result()
+                else:
                     topics = asyncio.run(extractor.extract_with_ai(
                         title, 
                         description, 
                         content,
-                        int(cfg.get("article_tag.max_tags", 5))
+                        max_tags
                     ))
-                except Exception as ai_error:
-                    print_warning(f"⚠️  AI 提取失败，回退到 TextRank: {ai_error}")
-                    # AI 提取失败时回退到 TextRank
-                    topics = extractor.extract(title, description, content, method="textrank")
-                    print_info(f"🔍 TextRank 提取到 {len(topics)} 个关键词: {topics}")
-            else:
-                # TextRank 或 KeyBERT 提取（同步）
-                try:
-                    method_str = str(extract_method) if extract_method else "textrank"
-                    topics = extractor.extract(title, description, content, method=method_str)
-                    print_info(f"🔍 {method_str} 提取到 {len(topics)} 个关键词: {topics}")
-                except Exception as extract_error:
-                    print_warning(f"⚠️  {extract_method} 提取失败: {extract_error}")
-                    # 提取失败时尝试使用 TextRank 作为后备
-                    topics = extractor.extract(title, description, content, method="textrank")
-                    print_info(f"🔍 TextRank 提取到 {len(topics)} 个关键词: {topics}")
-            
+            except RuntimeError:
+                topics = asyncio.run(extractor.extract_with_ai(
+                    title, 
+                    description, 
+                    content,
+                    max_tags
+                ))
+            except Exception as ai_error:
+                print_warning(f"⚠️  AI 提取失败，回退到 TextRank: {ai_error}")
+                # AI 提取失败时回退到 TextRank
+                topics = extractor.extract(title, description, content, method="textrank")
+                print_info(f"🔍 TextRank 提取到 {len(topics)} 个关键词: {topics}")
+        else:
+            # TextRank 或 KeyBERT 提取（同步）
+            try:
+                method_str = str(extract_method) if extract_method else "textrank"
+                topics = extractor.extract(title, description, content, method=method_str)
+                print_info(f"🔍 {method_str} 提取到 {len(topics)} 个关键词: {topics}")
+            except Exception as extract_error:
+                print_warning(f"⚠️  {extract_method} 提取失败: {extract_error}")
+                # 提取失败时尝试使用 TextRank 作为后备
+                topics = extractor.extract(title, description, content, method="textrank")
+                print_info(f"🔍 TextRank 提取到 {len(topics)} 个关键词: {topics}")
+        return topics or []
+
+    def _assign_tags_by_extraction(self, session, article_id: str, title: str, description: str = "", content: str = "", policy=None, publish_time=None):
+        """
+        使用提取方式自动提取标签并关联（标签存储在 tags 表，通过 article_tags 关联）
+
+        标签名称解析、缺失标签创建与关联写入均为批量操作，见 core/tag_assign.py
+
+        Args:
+            publish_time: 文章发布时间戳（用于关联的发布日期与新标签的创建时间），为空时从库中读取
+        """
+        try:
+            topics = self._extract_topics(title, description, content, policy=policy)
             if not topics:
                 print_warning(f"⚠️  未提取到任何关键词，标题: {title[:50]}")
                 return
-            
-            assigned_count = 0
-            auto_create = True  # 始终启用自动创建标签
-            
-            # 获取文章的发布日期，用于设置标签的创建时间
-            article = session.query(Article).filter(Article.id == article_id).first()
-            tag_created_at = datetime.now()  # 默认使用当前时间
-            if article and article.publish_time:
-                try:
-                    # 将 publish_time（时间戳）转换为 datetime
-                    publish_timestamp = int(article.publish_time)
-                    if publish_timestamp < 10000000000:  # 秒级时间戳
-                        publish_timestamp *= 1000
-                    tag_created_at = datetime.fromtimestamp(publish_timestamp / 1000)
-                except Exception as e:
-                    print_warning(f"转换文章发布时间失败，使用当前时间: {e}")
-                    tag_created_at = datetime.now()
-            
-            for topic_name in topics:
-                # 查找匹配的标签
-                tag = session.query(Tags).filter(
-                    Tags.name == topic_name,
-                    Tags.status == 1
-                ).first()
-                
-                if tag:
-                    # 检查是否已存在关联
-                    existing = session.query(ArticleTag).filter(
-                        ArticleTag.article_id == article_id,
-                        ArticleTag.tag_id == tag.id
-                    ).first()
-                    
-                    if not existing:
-                        article_tag = ArticleTag(
-                            id=str(uuid.uuid4()),
-                            article_id=article_id,
-                            tag_id=tag.id,
-                            created_at=datetime.now(),  # 关联创建时间（当前时间）
-                            article_publish_date=tag_created_at  # 文章的发布日期（用于趋势统计）
-                        )
-                        session.add(article_tag)
-                        assigned_count += 1
-                elif auto_create:
-                    # 自动创建新标签（所有模式都支持）
-                    try:
-                        import json
-                        new_tag = Tags(
-                            id=str(uuid.uuid4()),
-                            name=topic_name,
-                            cover="",
-                            intro=f"自动创建的标签：{topic_name}",
-                            mps_id="[]",  # 空数组
-                            status=1,
-                            created_at=tag_created_at,  # 使用文章的发布日期
-                            updated_at=tag_created_at   # 使用文章的发布日期
-                        )
-                        session.add(new_tag)
-                        session.flush()  # 获取新标签的 ID
-                        
-                        article_tag = ArticleTag(
-                            id=str(uuid.uuid4()),
-                            article_id=article_id,
-                            tag_id=new_tag.id,
-                            created_at=datetime.now(),  # 关联创建时间（当前时间）
-                            article_publish_date=tag_created_at  # 文章的发布日期（用于趋势统计）
-                        )
-                        session.add(article_tag)
-                        assigned_count += 1
-                        print_success(f"✅ 自动创建标签: {topic_name}")
-                    except Exception as e:
-                        print_warning(f"自动创建标签失败: {e}")
-            
+            if publish_time is None:
+                publish_time = session.query(Article.publish_time).filter(Article.id == article_id).scalar()
+            from core.tag_assign import assign_article_tags
+            assigned_count = assign_article_tags(session, [(article_id, topics, publish_time)]).get(article_id, 0)
             if assigned_count > 0:
                 print_success(f"✅ 文章 {article_id} 已关联 {assigned_count} 个标签（基于提取）")
             else:
@@ -0,0 +1,219 @@
+"""
+数据库连接健康检查
+
+- PoolMetrics：挂在连接池事件上的计数器（连接建立 / 借出 / 归还 / 失效、借出占用时长）
+- DbHealthMonitor：后台探活线程，定期对注册表中的每个引擎执行 SELECT 1，
+  失败时重建连接池并按指数退避重试，供 /sys/db_health 展示
+
+会话获取路径（Db.get_session）不再额外发查询，断线由 pool_pre_ping 与本模块负责。
+"""
+import threading
+import time
+from typing import Optional, Dict, Any
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from core.print import print_warning, print_success
+
+
+class PoolMetrics:
+    """连接池计数器（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.hold_total_ms = 0.0
+        self.hold_max_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    def attach(self, engine: Engine) -> "PoolMetrics":
+        """在 engine 的连接池上注册事件监听"""
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            connection_record.info["_werss_checkout_at"] = time.perf_counter()
+            with self._lock:
+                self.checkouts += 1
+                self.in_use += 1
+                if self.in_use > self.peak_in_use:
+                    self.peak_in_use = self.in_use
+
+        @event.listens_for(engine, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            started = connection_record.info.pop("_werss_checkout_at", None)
+            with self._lock:
+                self.checkins += 1
+                if self.in_use > 0:
+                    self.in_use -= 1
+                if started is not None:
+                    held = (time.perf_counter() - started) * 1000
+                    self.hold_total_ms += held
+                    if held > self.hold_max_ms:
+                        self.hold_max_ms = held
+
+        @event.listens_for(engine, "invalidate")
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+                if exception is not None:
+                    self.last_error = str(exception)
+
+        return self
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            avg = self.hold_total_ms / self.checkins if self.checkins else 0.0
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "hold_avg_ms": round(avg, 2),
+                "hold_max_ms": round(self.hold_max_ms, 2),
+                "last_error": self.last_error,
+            }
+
+
+class EngineHealth:
+    """单个引擎的探活状态"""
+
+    def __init__(self):
+        self.healthy = True
+        self.failures = 0
+        self.probes = 0
+        self.latency_ms: Optional[float] = None
+        self.last_ok: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.next_probe_at = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "probes": self.probes,
+            "latency_ms": self.latency_ms,
+            "last_ok": int(self.last_ok) if self.last_ok else None,
+            "last_error": self.last_error,
+            "next_probe_in": max(0, round(self.next_probe_at - time.time(), 1)),
+        }
+
+
+class DbHealthMonitor:
+    """
+    后台数据库探活
+
+    Args:
+        registry: core.db.EngineRegistry
+        interval: 健康时的探测间隔（秒）
+        max_backoff: 失败重连的最大退避时间（秒）
+    """
+
+    def __init__(self, registry, interval: float = 30, max_backoff: float = 60):
+        self.registry = registry
+        self.interval = max(1.0, float(interval))
+        self.max_backoff = max(1.0, float(max_backoff))
+        self._health: Dict[str, EngineHealth] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "DbHealthMonitor":
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="数据库健康检查", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _get_health(self, con_str: str) -> EngineHealth:
+        with self._lock:
+            health = self._health.get(con_str)
+            if health is None:
+                health = EngineHealth()
+                self._health[con_str] = health
+            return health
+
+    def probe(self, con_str: str, engine: Engine) -> bool:
+        """对单个引擎执行一次探活，失败时重建连接池并安排退避重试"""
+        health = self._get_health(con_str)
+        started = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            latency = round((time.perf_counter() - started) * 1000, 2)
+            recovered = not health.healthy
+            health.healthy = True
+            health.failures = 0
+            health.latency_ms = latency
+            health.last_ok = time.time()
+            health.next_probe_at = time.time() + self.interval
+            if recovered:
+                print_success(f"数据库连接已恢复: {engine.url.render_as_string(hide_password=True)}")
+            return True
+        except Exception as e:
+            health.healthy = False
+            health.failures += 1
+            health.last_error = str(e)
+            backoff = min(self.max_backoff, 2 ** (health.failures - 1))
+            health.next_probe_at = time.time() + backoff
+            print_warning(f"数据库探活失败（第{health.failures}次），{backoff}s 后重试: {e}")
+            try:
+                # 丢弃池中可能已断开的连接，下次借出时重新建立
+                engine.dispose()
+            except Exception:
+                pass
+            return False
+        finally:
+            health.probes += 1
+
+    def probe_all(self, force: bool = False) -> None:
+        now = time.time()
+        for entry in self.registry.entries():
+            health = self._get_health(entry.con_str)
+            if force or now >= health.next_probe_at:
+                self.probe(entry.con_str, entry.engine)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.probe_all()
+            except Exception as e:
+                print_warning(f"数据库健康检查异常: {e}")
+            self._stop_event.wait(1.0)
+
+    def status(self) -> Dict[str, Any]:
+        engines = []
+        for entry in self.registry.entries():
+            item = {
+                "url": entry.engine.url.render_as_string(hide_password=True),
+                "tags": list(entry.tags),
+                "pool": entry.engine.pool.status(),
+                "metrics": entry.metrics.snapshot() if entry.metrics else {},
+            }
+            item.update(self._get_health(entry.con_str).to_dict())
+            engines.append(item)
+        return {
+            "running": self.is_running(),
+            "interval": self.interval,
+            "max_backoff": self.max_backoff,
+            "healthy": all(e["healthy"] for e in engines) if engines else True,
+            "engines": engines,
+        }
@@ -0,0 +1,143 @@
+"""
+只读副本（读写分离）
+
+配置 db_read（或环境变量 DB_READ）后，接口与 RSS 的只读查询走副本，写入与采集仍走主库。
+ReplicaGuard 在后台线程中定期测量副本延迟，超过 db_replica.max_lag 秒或探测失败时，
+读请求回退到主库，直到副本追上。
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from core.print import print_success, print_warning
+
+
+def measure_replica_lag(engine: Engine) -> float:
+    """
+    查询副本相对主库的延迟（秒）
+
+    - PostgreSQL：无待回放 WAL 时为 0，否则为 now() - pg_last_xact_replay_timestamp()
+    - MySQL：SHOW REPLICA STATUS / SHOW SLAVE STATUS 的 Seconds_Behind_*
+    - 其他数据库：无法测量，视为 0
+    """
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        if dialect == "postgresql":
+            lag = conn.execute(text(
+                "SELECT CASE "
+                "WHEN NOT pg_is_in_recovery() THEN 0 "
+                "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+            )).scalar()
+            return float(lag or 0)
+        if dialect in ("mysql", "mariadb"):
+            for sql, column in (
+                ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+                ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+            ):
+                try:
+                    row = conn.execute(text(sql)).mappings().first()
+                except Exception:
+                    continue
+                if row is None:
+                    return 0.0
+                value = row.get(column)
+                if value is None:
+                    # 复制线程未运行
+                    raise RuntimeError("replication is not running")
+                return float(value)
+            return 0.0
+        conn.execute(text("SELECT 1"))
+        return 0.0
+
+
+class ReplicaGuard:
+    """
+    副本延迟守护
+
+    Args:
+        engine: 副本引擎
+        max_lag: 允许的最大延迟（秒），超过后读请求回退主库；<=0 表示不检查延迟
+        interval: 检查间隔（秒）
+        fallback: 副本不可用时是否回退主库（False 时始终使用副本）
+    """
+
+    def __init__(self, engine: Engine, max_lag: float = 10, interval: float = 5, fallback: bool = True):
+        self.engine = engine
+        self.max_lag = float(max_lag)
+        self.interval = max(1.0, float(interval))
+        self.fallback = fallback
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """测量一次延迟并更新状态，返回副本当前是否可用"""
+        try:
+            lag = measure_replica_lag(self.engine)
+            usable = self.max_lag <= 0 or lag <= self.max_lag
+            with self._lock:
+                recovered = usable and not self.healthy and self.checked_at is not None
+                self.lag = round(lag, 3)
+                self.healthy = usable
+                self.last_error = None if usable else f"副本延迟 {lag:.1f}s 超过阈值 {self.max_lag}s"
+                self.checked_at = time.time()
+            if recovered:
+                print_success(f"只读副本已恢复，延迟 {lag:.1f}s")
+            elif not usable:
+                print_warning(f"只读副本延迟 {lag:.1f}s 超过阈值 {self.max_lag}s，读请求回退主库")
+        except Exception as e:
+            with self._lock:
+                self.healthy = False
+                self.last_error = str(e)
+                self.checked_at = time.time()
+            print_warning(f"只读副本检查失败，读请求回退主库: {e}")
+        return self.healthy
+
+    def use_replica(self) -> bool:
+        """当前读请求是否应使用副本（只读缓存状态，不访问数据库）"""
+        if not self.fallback:
+            return True
+        with self._lock:
+            usable = self.healthy
+        if not usable:
+            self.fallbacks += 1
+        return usable
+
+    def start(self) -> "ReplicaGuard":
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="只读副本延迟检查", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self.check()
+            self._stop_event.wait(self.interval)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "url": self.engine.url.render_as_string(hide_password=True),
+                "healthy": self.healthy,
+                "lag": self.lag,
+                "max_lag": self.max_lag,
+                "fallback": self.fallback,
+                "fallbacks": self.fallbacks,
+                "last_error": self.last_error,
+                "checked_at": int(self.checked_at) if self.checked_at else None,
+            }
@@ -0,0 +1,79 @@
+"""
+表结构指纹
+
+启动时的 ensure_tables_exist + migrate_tables 会用 inspector 逐表检查，远程 PostgreSQL 上很慢。
+这里对模型元数据（表、字段、类型、索引）计算一个哈希，迁移成功后写入 werss_schema_meta 表；
+下次启动时指纹一致则直接跳过整个 inspector 检查，只需一次主键查询。
+
+模型有任何变更（新增表/字段/索引、类型调整）都会改变指纹，从而触发一次完整检查。
+"""
+import hashlib
+import time
+from typing import Optional
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, delete, insert, select
+from sqlalchemy.engine import Engine
+
+from core.config import cfg
+
+SCHEMA_META_TABLE = "werss_schema_meta"
+FINGERPRINT_KEY = "schema_fingerprint"
+
+# 独立的 MetaData，不参与模型指纹计算，也不会被 create_all 建到业务表里
+_meta = MetaData()
+schema_meta = Table(
+    SCHEMA_META_TABLE, _meta,
+    Column("key", String(64), primary_key=True),
+    Column("value", String(128), nullable=False),
+    Column("updated_at", Integer, nullable=False),
+)
+
+
+def schema_fingerprint(metadata: MetaData, dialect: str = "") -> str:
+    """计算模型元数据的指纹（与表/字段的定义顺序无关）"""
+    parts = [f"dialect={dialect}"]
+    for table_name in sorted(metadata.tables):
+        table = metadata.tables[table_name]
+        parts.append(f"table={table_name}")
+        for column in sorted(table.columns, key=lambda c: c.name):
+            parts.append(
+                f"col={column.name}|{column.type!r}|{column.nullable}|{column.primary_key}"
+            )
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            columns = ",".join(str(getattr(c, "name", c)) for c in index.expressions)
+            parts.append(f"idx={index.name}|{columns}|{bool(index.unique)}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def read_meta(engine: Engine, key: str) -> Optional[str]:
+    """读取 werss_schema_meta 中的值；meta 表不存在或查询失败时返回 None"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(schema_meta.c.value).where(schema_meta.c.key == key)
+            ).scalar()
+    except Exception:
+        return None
+
+
+def write_meta(engine: Engine, key: str, value: str) -> None:
+    """写入 werss_schema_meta 中的值（覆盖）"""
+    schema_meta.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.execute(delete(schema_meta).where(schema_meta.c.key == key))
+        conn.execute(insert(schema_meta).values(key=key, value=value, updated_at=int(time.time())))
+
+
+def read_fingerprint(engine: Engine) -> Optional[str]:
+    """读取已记录的指纹"""
+    return read_meta(engine, FINGERPRINT_KEY)
+
+
+def write_fingerprint(engine: Engine, fingerprint: str) -> None:
+    """记录迁移完成后的指纹"""
+    write_meta(engine, FINGERPRINT_KEY, fingerprint)
+
+
+def force_schema_check() -> bool:
+    """db_schema.force_check=True 时忽略指纹，每次启动都完整检查"""
+    return bool(cfg.get("db_schema.force_check", False, silent=True))
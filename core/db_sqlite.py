@@ -0,0 +1,89 @@
+"""
+SQLite 生产配置
+
+边缘部署默认使用 sqlite:///data/db.db，默认的回滚日志模式下采集写入会阻塞接口读取，
+高并发时出现 "database is locked"。这里在每个连接建立时应用一组 PRAGMA：
+
+- journal_mode=WAL：读写互不阻塞（持久化到数据库文件，只需写连接设置一次）
+- synchronous=NORMAL：WAL 下安全且显著减少 fsync
+- cache_size / mmap_size：加大页缓存与内存映射
+- busy_timeout：写锁冲突时等待而不是立即报错
+- temp_store=MEMORY：临时表/排序放在内存
+
+并区分两类连接池（见 Db.init）：
+- writer：单连接，采集入库串行写入
+- reader：query_only 的多连接池，供接口读取
+"""
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import cfg
+
+
+def is_sqlite(con_str: str) -> bool:
+    return isinstance(con_str, str) and con_str.startswith("sqlite")
+
+
+def sqlite_profile() -> Dict[str, Any]:
+    """读取 db_sqlite 配置"""
+    def _int(key: str, default: int) -> int:
+        try:
+            return int(cfg.get(key, default, silent=True) or default)
+        except (ValueError, TypeError):
+            return default
+
+    return {
+        "enabled": bool(cfg.get("db_sqlite.enabled", True, silent=True)),
+        "wal": bool(cfg.get("db_sqlite.wal", True, silent=True)),
+        "synchronous": str(cfg.get("db_sqlite.synchronous", "NORMAL", silent=True) or "NORMAL").upper(),
+        "cache_size_mb": _int("db_sqlite.cache_size_mb", 64),
+        "mmap_size_mb": _int("db_sqlite.mmap_size_mb", 256),
+        "busy_timeout_ms": _int("db_sqlite.busy_timeout_ms", 5000),
+        "split_pools": bool(cfg.get("db_sqlite.split_pools", True, silent=True)),
+        "read_pool_size": _int("db_sqlite.read_pool_size", 8),
+    }
+
+
+def profile_pragmas(profile: Dict[str, Any], readonly: bool = False) -> list:
+    """根据配置生成需要在连接上执行的 PRAGMA 语句"""
+    pragmas = [f"PRAGMA busy_timeout={int(profile['busy_timeout_ms'])}"]
+    if profile["wal"] and not readonly:
+        pragmas.append("PRAGMA journal_mode=WAL")
+    if profile["synchronous"] in ("OFF", "NORMAL", "FULL", "EXTRA"):
+        pragmas.append(f"PRAGMA synchronous={profile['synchronous']}")
+    # 负数表示 KiB
+    pragmas.append(f"PRAGMA cache_size=-{int(profile['cache_size_mb']) * 1024}")
+    pragmas.append(f"PRAGMA mmap_size={int(profile['mmap_size_mb']) * 1024 * 1024}")
+    pragmas.append("PRAGMA temp_store=MEMORY")
+    if readonly:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def apply_sqlite_profile(engine: Engine, readonly: bool = False) -> bool:
+    """
+    在 engine 的每个新连接上应用 SQLite 配置（同步或异步引擎均可）
+
+    Returns:
+        是否注册了配置（非 SQLite 或已禁用时返回 False）
+    """
+    target = getattr(engine, "sync_engine", engine)
+    if target.dialect.name != "sqlite":
+        return False
+    profile = sqlite_profile()
+    if not profile["enabled"]:
+        return False
+    pragmas = profile_pragmas(profile, readonly=readonly)
+
+    @event.listens_for(target, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return True
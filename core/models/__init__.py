@@ -23,5 +23,13 @@ from .tag_cluster_aliases import TagClusterAlias
 from .api_key import ApiKey, ApiKeyLog
 # 导入文章 AI 过滤结果模型
 from .article_ai_filter import ArticleAiFilter
+# 导入正文压缩字典模型
+from .article_content_dict import ArticleContentDict
+# 导入文章 SimHash 指纹模型
+from .article_fingerprint import ArticleFingerprint
+# 导入归档文章索引模型
+from .article_archive import ArticleArchive
+# 导入历史回溯采集断点模型
+from .crawl_checkpoint import CrawlCheckpoint
 # 导入基础模型
 from .base import *
@@ -1,4 +1,6 @@
-from  .base import Base,Column,String,Integer,DateTime,Text,DATA_STATUS
+from  .base import Base,Column,String,Integer,DateTime,Text,Index,DATA_STATUS
+from sqlalchemy.orm import deferred
+from core.content_codec import CompressedText
 class ArticleBase(Base):
     from_attributes = True
     __tablename__ = 'articles'
@@ -13,5 +15,13 @@ class ArticleBase(Base):
     created_at = Column(DateTime)
     updated_at = Column(DateTime)  
     is_export = Column(Integer)
+    # 文章列表 / RSS / MCP：按公众号或状态过滤并按发布时间倒序
+    __table_args__ = (
+        Index('ix_articles_mp_id_publish_time', 'mp_id', 'publish_time'),
+        Index('ix_articles_status_publish_time', 'status', 'publish_time'),
+    )
 class Article(ArticleBase):
-    content = Column(Text)
+    # 正文（完整 HTML，常在 100KB 以上）延迟加载：列表查询不再读取，
+    # 需要渲染正文的地方显式使用 options(undefer(Article.content))
+    # 开启 content_compress 后以 zstd 压缩存储，读写透明（见 core/content_codec.py）
+    content = deferred(Column(CompressedText))
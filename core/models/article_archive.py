@@ -0,0 +1,29 @@
+"""归档文章索引（正文等完整数据在归档段文件中）"""
+from .base import Base, Column, String, Integer, DateTime, Index
+from sqlalchemy import BigInteger
+from datetime import datetime
+
+
+class ArticleArchive(Base):
+    """
+    已归档文章的定位信息
+
+    文章及其标签关联以 JSON 行写入 data/archive 下的段文件，每篇单独压缩为一个 gzip 成员，
+    按 offset/length 可直接读取单篇；整个段文件仍是合法的 .jsonl.gz。
+    """
+    __tablename__ = "article_archive"
+
+    article_id = Column(String(255), primary_key=True)
+    mp_id = Column(String(255))
+    title = Column(String(1000))
+    publish_time = Column(Integer)
+    segment = Column(String(255), nullable=False, index=True)
+    offset = Column(BigInteger, nullable=False)
+    length = Column(Integer, nullable=False)
+    archived_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index("ix_article_archive_mp_id_publish_time", "mp_id", "publish_time"),
+        Index("ix_article_archive_publish_time", "publish_time"),
+        {"extend_existing": True},
+    )
@@ -0,0 +1,13 @@
+from .base import Base, Column, Integer, DateTime, Text
+from datetime import datetime
+
+
+class ArticleContentDict(Base):
+    """正文压缩字典（zstd，基于已有微信文章 HTML 训练）"""
+    __tablename__ = "article_content_dicts"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    data = Column(Text, nullable=False)  # base64 编码的字典内容
+    size = Column(Integer, nullable=False, default=0)
+    sample_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
@@ -0,0 +1,33 @@
+"""文章 SimHash 指纹（近似重复检测）"""
+from .base import Base, Column, String, Integer, DateTime, Index
+from sqlalchemy import BigInteger
+from datetime import datetime
+
+
+class ArticleFingerprint(Base):
+    """
+    文章 SimHash 指纹
+
+    64 位指纹拆成 4 段各 16 位分别建索引：海明距离不超过 3 的两个指纹至少有一段完全相同，
+    入库时按 4 段等值查询取候选，再逐个计算海明距离。
+    """
+    __tablename__ = "article_fingerprints"
+
+    article_id = Column(String(255), primary_key=True)
+    simhash = Column(BigInteger, nullable=False)  # 有符号 64 位存储
+    band_0 = Column(Integer, nullable=False)
+    band_1 = Column(Integer, nullable=False)
+    band_2 = Column(Integer, nullable=False)
+    band_3 = Column(Integer, nullable=False)
+    # 近似重复时指向最早入库的原文 ID，原文为空
+    duplicate_of = Column(String(255), nullable=True, index=True)
+    distance = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index("ix_article_fingerprints_band_0", "band_0"),
+        Index("ix_article_fingerprints_band_1", "band_1"),
+        Index("ix_article_fingerprints_band_2", "band_2"),
+        Index("ix_article_fingerprints_band_3", "band_3"),
+        {"extend_existing": True},
+    )
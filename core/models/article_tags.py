@@ -1,5 +1,5 @@
 """文章-标签关联表模型"""
-from .base import Base, Column, String, DateTime, UniqueConstraint
+from .base import Base, Column, String, DateTime, UniqueConstraint, Index
 from datetime import datetime
 
 
@@ -18,6 +18,8 @@ class ArticleTag(Base):
     # 唯一约束：同一篇文章不能重复添加同一标签
     __table_args__ = (
         UniqueConstraint('article_id', 'tag_id', name='uq_article_tag'),
+        # 标签趋势 / 标签下文章：按 tag_id 过滤并按文章发布日期筛选排序
+        Index('ix_article_tags_tag_id_publish_date', 'tag_id', 'article_publish_date'),
         {'extend_existing': True}
     )
     
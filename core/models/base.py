@@ -1,5 +1,5 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import create_engine, Column, Integer, String, DateTime,Date,ForeignKey,Boolean,Enum,Table,JSON,UniqueConstraint
+from sqlalchemy import create_engine, Column, Integer, String, DateTime,Date,ForeignKey,Boolean,Enum,Table,JSON,UniqueConstraint,Index
 from sqlalchemy import inspect
 from sqlalchemy.exc import SQLAlchemyError
 from core.config import cfg
@@ -0,0 +1,27 @@
+"""历史回溯采集的断点"""
+from .base import Base, Column, String, Integer, DateTime
+from datetime import datetime
+
+
+class CrawlCheckpoint(Base):
+    """
+    公众号历史回溯采集断点（每翻完一页更新）
+
+    next_begin 为下一次列表请求的 begin 偏移，oldest_seen_time 为已覆盖到的最早发布时间：
+    中断（Session 失效、超时、重启）后从 next_begin 继续，发布时间晚于 oldest_seen_time 的文章
+    （新文章把列表整体后推造成的重复）直接跳过。
+    """
+    __tablename__ = "crawl_checkpoints"
+
+    feed_id = Column(String(255), primary_key=True)
+    next_begin = Column(Integer, nullable=False, default=0)
+    oldest_seen_time = Column(Integer, nullable=True)
+    # 回溯开始时最新文章的发布时间，与已翻页数一起估算剩余页数
+    newest_seen_time = Column(Integer, nullable=True)
+    # 列表接口返回的总数（api 模式为文章数，web/app 模式为发布次数）
+    total_count = Column(Integer, nullable=True)
+    pages = Column(Integer, nullable=False, default=0)
+    # running：未完成；start_date：已到采集起始日期；end：已翻到最早的文章
+    state = Column(String(20), nullable=False, default="running")
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
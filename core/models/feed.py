@@ -11,4 +11,7 @@ class Feed(Base):
     update_time = Column(Integer)
     created_at = Column(DateTime) 
     updated_at = Column(DateTime)
-    faker_id = Column(String(255))
\ No newline at end of file
+    faker_id = Column(String(255))
+    # 增量采集水位：上次完整采集到的最新文章（列表翻页遇到即停止）
+    watermark_aid = Column(String(255))
+    watermark_time = Column(Integer)
\ No newline at end of file
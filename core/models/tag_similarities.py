@@ -1,4 +1,4 @@
-from .base import Base, Column, String, Integer, DateTime
+from .base import Base, Column, String, Integer, DateTime, Index
 from datetime import datetime
 
 
@@ -15,3 +15,7 @@ class TagSimilarity(Base):
     cluster_version = Column(String(64), nullable=False, index=True)
     updated_at = Column(DateTime, default=datetime.now, nullable=False)
 
+    # 相似标签查询：按聚类版本 + 标签定位
+    __table_args__ = (
+        Index('ix_tag_similarities_version_tag_id', 'cluster_version', 'tag_id'),
+    )
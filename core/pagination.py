@@ -0,0 +1,68 @@
+"""
+游标（keyset）分页
+
+文章列表、RSS 与 MCP 均按 publish_time DESC 排序。OFFSET 翻到深页时数据库要扫描并丢弃前面所有行，
+游标分页改为记住上一页最后一条的 (publish_time, id)，下一页直接从该位置继续：
+
+    WHERE publish_time < :t OR (publish_time = :t AND id < :id)
+    ORDER BY publish_time DESC, id DESC
+
+配合 (mp_id, publish_time) / (status, publish_time) 索引，第 500 页与第 1 页耗时相同。
+游标对客户端是不透明字符串（base64url 编码），原有 offset 参数保持兼容。
+
+publish_time 为空的文章不参与游标翻页（采集入库时总会写入发布时间）。
+"""
+import base64
+import json
+from typing import Any, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """游标格式错误或已被篡改"""
+
+
+def encode_cursor(publish_time: Any, article_id: Any) -> str:
+    """将 (publish_time, id) 编码为不透明游标"""
+    raw = json.dumps([int(publish_time), str(article_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """
+    解析游标
+
+    Raises:
+        InvalidCursor: 游标无法解析
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        publish_time, article_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return int(publish_time), str(article_id)
+    except Exception as e:
+        raise InvalidCursor(f"无效的分页游标: {cursor}") from e
+
+
+def keyset_condition(publish_col, id_col, cursor: str):
+    """游标之后（更早发布）的行的过滤条件"""
+    publish_time, article_id = decode_cursor(cursor)
+    return or_(
+        publish_col < publish_time,
+        and_(publish_col == publish_time, id_col < article_id),
+    )
+
+
+def keyset_order(publish_col, id_col) -> Sequence:
+    """与游标配套的排序：publish_time DESC, id DESC（id 保证同一时间戳内顺序稳定）"""
+    return (publish_col.desc(), id_col.desc())
+
+
+def next_cursor(rows: Sequence[Any], limit: int) -> Optional[str]:
+    """本页取满时返回下一页游标，否则返回 None（已到末尾）"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    if last.publish_time is None:
+        return None
+    return encode_cursor(last.publish_time, last.id)
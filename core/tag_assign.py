@@ -0,0 +1,290 @@
+"""
+标签批量解析与关联
+
+自动打标签原先对每个提取出的关键词分别查询 Tags、检查 ArticleTag 是否存在、必要时插入并 flush，
+一篇文章十几个关键词就是几十次往返。这里改为批量：
+
+1. 名称 -> ID 先查进程内缓存，未命中的一次 IN 查询
+2. 缺失的标签批量创建；自动创建的标签 ID 由名称确定（uuid5），多个采集进程同时创建同名标签时
+   主键冲突被忽略（ON CONFLICT DO NOTHING / INSERT IGNORE），不会产生重名标签
+3. 文章-标签关联一次查询已有关联、一次批量插入
+
+仅匹配启用（status=1）的标签；同名标签已被禁用或屏蔽时不再自动创建，也不关联。
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.config import cfg
+from core.print import print_success, print_warning
+
+# 自动创建标签的 ID 命名空间（同名标签在任意进程中生成相同 ID）
+TAG_ID_NAMESPACE = uuid.UUID("6f1c3a52-8d7e-4b0a-9c61-2f5e7a9b4d10")
+# tags.name 列长度
+_MAX_NAME_LENGTH = 255
+
+
+def auto_tag_id(name: str) -> str:
+    """自动创建标签的确定性 ID"""
+    return str(uuid.uuid5(TAG_ID_NAMESPACE, name))
+
+
+class TagNameCache:
+    """启用标签的名称 -> ID 缓存（LRU + TTL，标签被修改/删除时整体失效）"""
+
+    def __init__(self, max_size: int = 20000, ttl: int = 600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, str]:
+        now = time.time()
+        found = {}
+        with self._lock:
+            for name in names:
+                entry = self._items.get(name)
+                if entry is None or entry[1] <= now:
+                    if entry is not None:
+                        del self._items[name]
+                    self.misses += 1
+                    continue
+                self._items.move_to_end(name)
+                found[name] = entry[0]
+                self.hits += 1
+        return found
+
+    def put_many(self, mapping: Dict[str, str]) -> None:
+        expires = time.time() + self.ttl
+        with self._lock:
+            for name, tag_id in mapping.items():
+                self._items[name] = (tag_id, expires)
+                self._items.move_to_end(name)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+tag_name_cache = TagNameCache(
+    max_size=int(cfg.get("article_tag.name_cache_size", 20000, silent=True) or 20000),
+    ttl=int(cfg.get("article_tag.name_cache_ttl", 600, silent=True) or 600),
+)
+
+
+def invalidate_tag_cache() -> None:
+    """标签改名、改状态或删除后调用"""
+    tag_name_cache.invalidate()
+
+
+def publish_datetime(publish_time: Any) -> datetime:
+    """文章发布时间（秒/毫秒时间戳）转 datetime，无效时返回当前时间"""
+    if publish_time:
+        try:
+            timestamp = int(publish_time)
+            if timestamp >= 10000000000:  # 毫秒级时间戳
+                timestamp //= 1000
+            return datetime.fromtimestamp(timestamp)
+        except (ValueError, TypeError, OverflowError, OSError) as e:
+            print_warning(f"转换文章发布时间失败，使用当前时间: {e}")
+    return datetime.now()
+
+
+def _clean_names(names: Iterable[str]) -> List[str]:
+    cleaned = []
+    for name in names:
+        name = (name or "").strip()
+        if name and len(name) <= _MAX_NAME_LENGTH:
+            cleaned.append(name)
+    return list(dict.fromkeys(cleaned))
+
+
+def resolve_tag_ids(
+    session,
+    names: Sequence[str],
+    created_at: Optional[Dict[str, datetime]] = None,
+    auto_create: bool = True,
+) -> Dict[str, str]:
+    """
+    批量解析标签名称为 ID
+
+    Args:
+        session: 数据库会话（新建的标签随调用方事务提交）
+        names: 标签名称
+        created_at: 新建标签的创建时间（按名称，默认当前时间），使用文章发布日期便于趋势统计
+        auto_create: 是否自动创建不存在的标签
+
+    Returns:
+        {名称: 标签ID}，已禁用/屏蔽的名称不在结果中
+    """
+    from core.models.tags import Tags
+    from core.db import insert_ignore
+
+    names = _clean_names(names)
+    resolved = tag_name_cache.get_many(names)
+    missing = [n for n in names if n not in resolved]
+    if not missing:
+        return resolved
+
+    found: Dict[str, str] = {}
+    inactive = set()
+    for tag_id, name, status in session.query(Tags.id, Tags.name, Tags.status).filter(Tags.name.in_(missing)):
+        if status == 1:
+            # 历史数据中可能存在重名标签，固定取 ID 最小的一个
+            if name not in found or tag_id < found[name]:
+                found[name] = tag_id
+        else:
+            inactive.add(name)
+
+    # 只缓存已提交的标签；本次新建的标签可能随调用方事务回滚（如试运行），下次查询时再缓存
+    tag_name_cache.put_many(found)
+    to_create = [n for n in missing if n not in found and n not in inactive]
+    if to_create and auto_create:
+        created_at = created_at or {}
+        now = datetime.now()
+        rows = [{
+            "id": auto_tag_id(name),
+            "name": name,
+            "cover": "",
+            "intro": f"自动创建的标签：{name}",
+            "mps_id": "[]",
+            "status": 1,
+            "is_custom": False,
+            "created_at": created_at.get(name, now),
+            "updated_at": created_at.get(name, now),
+        } for name in to_create]
+        inserted = insert_ignore(session, Tags, rows)
+        # 主键冲突说明其他进程刚创建了同名标签，按 ID 读回确认状态
+        ids = {row["id"]: row["name"] for row in rows}
+        for tag_id, status in session.query(Tags.id, Tags.status).filter(Tags.id.in_(list(ids))):
+            if status == 1:
+                found[ids[tag_id]] = tag_id
+        created = [ids[i] for i in inserted] if inserted is not None else to_create
+        for name in created:
+            print_success(f"✅ 自动创建标签: {name}")
+
+    resolved.update(found)
+    return resolved
+
+
+def assign_article_tags(
+    session,
+    items: Sequence[Tuple[str, Sequence[str], Any]],
+    auto_create: bool = True,
+) -> Dict[str, int]:
+    """
+    批量关联文章与标签
+
+    Args:
+        session: 数据库会话（由调用方提交）
+        items: [(文章ID, 标签名称列表, 文章发布时间戳)]
+        auto_create: 是否自动创建不存在的标签
+
+    Returns:
+        {文章ID: 新增关联数}
+    """
+    plans: List[Tuple[str, List[str], datetime]] = []
+    created_at: Dict[str, datetime] = {}
+    for article_id, names, publish_time in items:
+        if not article_id:
+            continue
+        names = _clean_names(names or [])
+        publish_date = publish_datetime(publish_time)
+        plans.append((article_id, names, publish_date))
+        for name in names:
+            # 同一批中多篇文章用到的新标签，创建时间取最早的发布日期
+            if name not in created_at or publish_date < created_at[name]:
+                created_at[name] = publish_date
+    result = {article_id: 0 for article_id, _, _ in plans}
+    if not created_at:
+        return result
+
+    tag_ids = resolve_tag_ids(session, list(created_at), created_at, auto_create=auto_create)
+    pairs = [
+        (article_id, tag_ids[name], publish_date)
+        for article_id, names, publish_date in plans
+        for name in names
+        if name in tag_ids
+    ]
+    result.update(_insert_associations(session, pairs))
+    return result
+
+
+def copy_article_tags(session, items: Sequence[Tuple[str, str, Any]]) -> Dict[str, int]:
+    """
+    近似重复文章直接沿用原文的标签（不再提取）
+
+    Args:
+        session: 数据库会话（由调用方提交）
+        items: [(文章ID, 原文ID, 文章发布时间戳)]
+
+    Returns:
+        {文章ID: 新增关联数}
+    """
+    from core.models.article_tags import ArticleTag
+    from core.models.tags import Tags
+
+    items = [item for item in items if item[0] and item[1]]
+    result = {article_id: 0 for article_id, _, _ in items}
+    if not items:
+        return result
+    source_tags: Dict[str, List[str]] = {}
+    for source_id, tag_id in session.query(ArticleTag.article_id, ArticleTag.tag_id)\
+            .join(Tags, Tags.id == ArticleTag.tag_id)\
+            .filter(ArticleTag.article_id.in_({source_id for _, source_id, _ in items}), Tags.status == 1):
+        source_tags.setdefault(source_id, []).append(tag_id)
+    pairs = [
+        (article_id, tag_id, publish_datetime(publish_time))
+        for article_id, source_id, publish_time in items
+        for tag_id in source_tags.get(source_id, [])
+    ]
+    result.update(_insert_associations(session, pairs))
+    return result
+
+
+def _insert_associations(session, pairs: Sequence[Tuple[str, str, datetime]]) -> Dict[str, int]:
+    """一次查询已有关联、一次批量插入新关联，返回 {文章ID: 新增关联数}"""
+    from core.models.article_tags import ArticleTag
+    from core.db import insert_ignore
+
+    result: Dict[str, int] = {}
+    if not pairs:
+        return result
+    article_ids = list({article_id for article_id, _, _ in pairs})
+    existing = set(
+        session.query(ArticleTag.article_id, ArticleTag.tag_id)
+        .filter(ArticleTag.article_id.in_(article_ids))
+        .all()
+    )
+    now = datetime.now()
+    rows = []
+    for article_id, tag_id, publish_date in pairs:
+        if (article_id, tag_id) in existing:
+            continue
+        existing.add((article_id, tag_id))
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "article_id": article_id,
+            "tag_id": tag_id,
+            "created_at": now,  # 关联创建时间
+            "article_publish_date": publish_date,  # 文章的发布日期（用于趋势统计）
+        })
+    if not rows:
+        return result
+    inserted = insert_ignore(session, ArticleTag, rows)
+    inserted_ids = set(inserted) if inserted is not None else {row["id"] for row in rows}
+    for row in rows:
+        if row["id"] in inserted_ids:
+            result[row["article_id"]] = result.get(row["article_id"], 0) + 1
+    return result
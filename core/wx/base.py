@@ -5,6 +5,8 @@ from core.models import Feed
 from core.db import DB
 from core.models.feed import Feed
 from .cfg import cfg,wx_cfg
+from .rate_limit import wx_limiter
+from .seen import SeenSet,get_seen_bloom
 from core.print import print_error,print_info
 from core.rss import RSS
 from driver.success import setStatus
@@ -36,42 +38,75 @@ USER_AGENTS = [
 ]
 # 定义基类
 class WxGather:
-    articles=[]
-    aids=[]
     def all_count(self):
         if getattr(self, 'articles', None) is not None:
             return len(self.articles)
         return 0
+    def _seen_key(self,aid:str):
+        return f"{getattr(self, '_mp_id', None) or ''}:{aid}"
     def RecordAid(self,aid:str):
-        self.aids.append(aid)
-        pass
+        key=self._seen_key(aid)
+        self.seen.add(key)
+        bloom=get_seen_bloom()
+        if bloom is not None:
+            bloom.add(key)
+    def LoadKnown(self,mp_id:str,aids:list,reset:bool=False):
+        """
+        一次 IN 查询加载本页文章的入库状态，供逐条处理时做字典查找
+
+        Args:
+            reset: 清空之前页面的缓存（每页开始时传入，避免缓存长期驻留而过期）
+
+        Returns:
+            {完整文章ID: {"has_content":..., "pic_url":...}}
+        """
+        import core.db as db
+        if reset or getattr(self, '_known', None) is None:
+            self._known={}
+            self._known_checked=set()
+        ids=[db.Db.make_article_id(mp_id,aid) for aid in aids if aid]
+        ids=[i for i in ids if i not in self._known_checked]
+        if ids:
+            try:
+                self._known.update(db.DB.get_existing_article_ids(ids))
+                self._known_checked.update(ids)
+            except Exception as e:
+                logger.warning(f"批量检查文章是否存在时出错: {e}")
+        return self._known
+    def KnownArticle(self,mp_id:str,aid:str):
+        """返回已入库文章的状态（未入库返回 None），优先使用 LoadKnown 的缓存"""
+        if not mp_id or not aid:
+            return None
+        import core.db as db
+        full_article_id=db.Db.make_article_id(mp_id,aid)
+        if full_article_id not in (getattr(self, '_known_checked', None) or ()):
+            self.LoadKnown(mp_id,[aid])
+        return (getattr(self, '_known', None) or {}).get(full_article_id)
     def HasGathered(self,aid:str):
-        if aid in self.aids:
-            return True
-        self.RecordAid(aid)
-        return False
+        """本次采集（开启 gather.seen_bloom 时包括以往采集）是否已处理过该文章，未处理过则记录"""
+        key=self._seen_key(aid)
+        seen=self.seen.add(key)
+        bloom=get_seen_bloom()
+        if bloom is not None:
+            seen=bloom.add(key) or seen
+        return seen
+    @property
+    def collect_policy(self):
+        """本次采集使用的策略快照（由任务传入，未传入时使用当前快照）"""
+        policy=getattr(self, 'policy', None)
+        if policy is None:
+            from core.collect_policy import get_collect_policy
+            policy=get_collect_policy()
+        return policy
+    def SetPolicy(self,policy=None):
+        """设置本次采集使用的策略快照，返回自身便于链式调用"""
+        self.policy=policy
+        if policy is not None:
+            self.Gather_Content=policy.gather_content
+        return self
     def get_collect_start_date(self):
         """获取采集起始日期，用于在抓取时判断是否应该停止"""
-        from datetime import datetime, date
-        try:
-            from core.models.config_management import ConfigManagement
-            session = DB.get_session()
-            try:
-                config = session.query(ConfigManagement).filter(
-                    ConfigManagement.config_key == 'collect_start_date'
-                ).first()
-                if config and config.config_value:
-                    try:
-                        start_date = datetime.strptime(config.config_value, '%Y-%m-%d').date()
-                        return start_date
-                    except (ValueError, TypeError):
-                        pass
-            finally:
-                session.close()
-        except Exception as e:
-            logger.warning(f"读取采集起始时间配置失败: {e}")
-        # 默认值：2025-12-01
-        return date(2025, 12, 1)
+        return self.collect_policy.start_date
     def Model(self,type=None):
         type=type or cfg.get("gather.model","web")
         print(f"采集模式:{type}")
@@ -86,7 +121,10 @@ class WxGather:
             wx=MpsApi()
         return wx
     def __init__(self,is_add:bool=False):
+        # 本次采集新入库的文章（每次 Start 重置）
         self.articles=[]
+        self.seen=SeenSet()
+        self.policy=None
         self.is_add=is_add
         self._cookies={}
         session=  requests.Session()
@@ -97,9 +135,18 @@ class WxGather:
     def get_token(self):
         cfg.reload()
         wx_cfg.reload()
-        self.Gather_Content=cfg.get('gather.content',False)
+        policy=getattr(self, 'policy', None)
+        self.Gather_Content=policy.gather_content if policy is not None else cfg.get('gather.content',False)
         self.cookies = wx_cfg.get('cookie', '')
         self.token=wx_cfg.get('token','')
+        # 账号池中有可用账号时使用最空闲的账号（失效、过期的账号跳过）
+        self.session_key=""
+        from .session_pool import session_pool
+        wx_session=session_pool.pick()
+        if wx_session is not None:
+            self.cookies=wx_session.cookie
+            self.token=wx_session.token
+            self.session_key=wx_session.key
         # 随机选择一个 User-Agent
         self.user_agent = cfg.get('user_agent', '')
         user_agent = random.choice(USER_AGENTS)
@@ -121,172 +168,261 @@ class WxGather:
                 "Connection": "keep-alive"
             })
          return headers
-    def content_extract(self,  url):
+    def fetch_article_page(self, url):
+        """下载文章页面（经过全局限流），返回未清理的HTML，失败或触发环境验证时返回空字符串"""
         text=""
         try:
             # 确保使用 requests.Session，而不是 SQLAlchemy Session
             requests_session = self.session
+            wx_limiter.acquire()
             # 更新请求头
             headers = self.fix_header(url)
             r = requests_session.get(url, headers=headers)
             if r.status_code == 200:
                 text = r.text
-                text=self.remove_common_html_elements(text)
                 if "当前环境异常，完成验证后即可继续访问" in text:
+                    wx_limiter.on_throttled("文章正文")
                     print_error("当前环境异常，完成验证后即可继续访问")
                     text=""
+                else:
+                    wx_limiter.on_success()
         except:
             pass
         return text
-    def FillBack(self,CallBack=None,data=None,Ext_Data=None):
-        if CallBack is not None:
-            if data is not  None:
-                setStatus(True)
-                from core.models import Article
-                from datetime import datetime
+    def content_extract(self,  url):
+        text=self.fetch_article_page(url)
+        if text:
+            text=self.remove_common_html_elements(text)
+        return text
+    def parse_content(self, html, url, root_id="js_content", upload_images=True):
+        """单遍解析正文（core.wx.html_extract）：定位正文、清理、改写图片地址，需要时上传图片到MinIO"""
+        from .html_extract import extract_article
+        rewrite = None
+        if upload_images and self.collect_policy.minio_available:
+            try:
+                from core.storage.minio_client import MinIOClient
+                minio_client = MinIOClient()
+                if minio_client.is_available():
+                    article_id = self._extract_article_id_from_url(url) or "unknown"
+                    def rewrite(img_url):
+                        minio_url = minio_client.upload_image(img_url, article_id)
+                        if minio_url:
+                            logger.info(f"图片已上传到MinIO: {img_url} -> {minio_url}")
+                        return minio_url
+            except Exception as e:
+                logger.warning(f"MinIO客户端初始化失败: {e}")
+        return extract_article(html, root_id=root_id, rewrite_image=rewrite)
+    def upload_content_images(self,html:str,article_id:str):
+        """将正文图片上传到MinIO并替换地址（配合 content_extract(upload_images=False) 使用），返回处理后的正文"""
+        if not html or "<img" not in html or not self.collect_policy.minio_available:
+            return html
+        try:
+            from core.storage.minio_client import MinIOClient
+            minio_client = MinIOClient()
+            if not minio_client.is_available():
+                return html
+        except Exception as e:
+            logger.warning(f"MinIO客户端初始化失败: {e}")
+            return html
+        from .html_extract import extract_article, html_engine
+        if html_engine() == "lxml":
+            uploaded = []
+            def rewrite(img_url):
+                # 跳过已经是MinIO URL的图片
+                if not img_url.startswith('http') or 'minio' in img_url.lower() or (minio_client.public_url and minio_client.public_url in img_url):
+                    return None
+                minio_url = minio_client.upload_image(img_url, article_id)
+                if minio_url:
+                    uploaded.append(minio_url)
+                    logger.info(f"图片已上传到MinIO: {img_url} -> {minio_url}")
+                return minio_url
+            try:
+                parsed = extract_article(html, root_id=None, clean=False, rewrite_image=rewrite)
+            except Exception as e:
+                logger.warning(f"解析正文图片失败: {e}")
+                return html
+            return parsed.html if uploaded and parsed.found else html
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        uploaded = 0
+        for img_tag in soup.find_all('img'):
+            img_url = str(img_tag.get('src') or '')
+            # 跳过已经是MinIO URL的图片
+            if not img_url.startswith('http') or 'minio' in img_url.lower() or (minio_client.public_url and minio_client.public_url in img_url):
+                continue
+            minio_url = minio_client.upload_image(img_url, article_id)
+            if minio_url:
+                img_tag['src'] = minio_url
+                uploaded += 1
+                logger.info(f"图片已上传到MinIO: {img_url} -> {minio_url}")
+        return soup.prettify() if uploaded else html
+    def PrepareArticle(self,data:dict,Ext_Data=None):
+        """由列表项构建入库数据：封面、公众号头像上传到MinIO（已入库文章跳过），不入库"""
+        from core.models import Article
+        from datetime import datetime
+        
+        # 先构建文章ID，用于检查文章是否已存在
+        article_id = str(data.get('id', ''))
+        mp_id = data.get('mp_id', '')
+        if article_id and mp_id:
+            # 构建完整的文章ID（与 add_article 中的逻辑一致）
+            full_article_id = f"{str(mp_id)}-{article_id}".replace("MP_WXS_","")
+        else:
+            full_article_id = None
+        
+        # 先检查文章是否已存在，避免重复上传图片（使用本页批量加载的结果）
+        known = self.KnownArticle(mp_id, article_id) if full_article_id else None
+        article_exists = known is not None
+        if article_exists:
+            logger.info(f"文章已存在，跳过图片上传: {full_article_id}")
+        
+        # 只有在文章不存在时才上传封面图片
+        policy = self.collect_policy
+        pic_url = data.get('cover', '')
+        if pic_url and not article_exists and policy.minio_available:
+            try:
+                from core.storage.minio_client import MinIOClient
+                import re
+                minio_client = MinIOClient()
                 
-                # 先构建文章ID，用于检查文章是否已存在
-                article_id = str(data.get('id', ''))
-                mp_id = data.get('mp_id', '')
-                if article_id and mp_id:
-                    # 构建完整的文章ID（与 add_article 中的逻辑一致）
-                    full_article_id = f"{str(mp_id)}-{article_id}".replace("MP_WXS_","")
-                else:
-                    full_article_id = None
+                # 从URL中提取文章ID（用于MinIO路径）
+                article_id_for_minio = article_id or "unknown"
+                if not article_id_for_minio or article_id_for_minio == "unknown":
+                    # 尝试从link中提取
+                    link = data.get('link', '')
+                    if link:
+                        match = re.search(r'/s/([^/?]+)', str(link))
+                        if match:
+                            article_id_for_minio = match.group(1)
                 
-                # 先检查文章是否已存在，避免重复上传图片
-                article_exists = False
-                if full_article_id:
-                    try:
-                        import core.db as db
-                        DB = db.Db(tag="文章检查")
-                        session = DB.get_session()
-                        existing_article = session.query(Article).filter(Article.id == full_article_id).first()
-                        if existing_article is not None:
-                            article_exists = True
-                            logger.info(f"文章已存在，跳过图片上传: {full_article_id}")
-                    except Exception as e:
-                        logger.warning(f"检查文章是否存在时出错: {e}")
-                        # 检查失败时继续处理，避免影响正常流程
+                # 如果MinIO可用且封面图不是MinIO URL，则上传
+                if minio_client.is_available() and pic_url:
+                    # 跳过已经是MinIO URL的图片
+                    if 'minio' not in pic_url.lower() and (not minio_client.public_url or minio_client.public_url not in pic_url):
+                        minio_cover_url = minio_client.upload_image(pic_url, article_id_for_minio)
+                        if minio_cover_url:
+                            pic_url = minio_cover_url
+                            print_info(f"封面图片已上传到MinIO: {data.get('cover', '')[:80]}... -> {minio_cover_url[:80]}...")
+            except Exception as e:
+                logger.warning(f"处理封面图片失败: {e}")
+                # 失败时使用原始URL
+                pass
+        elif article_exists:
+            # 如果文章已存在且已有MinIO URL，直接使用
+            existing_pic_url = known.get("pic_url")
+            if policy.is_minio_url(existing_pic_url):
+                pic_url = existing_pic_url
+                logger.info(f"使用已存在的封面图URL: {pic_url[:80]}...")
+        
+        # 处理公众号头像上传到MinIO
+        if mp_id and policy.minio_available:
+            try:
+                from core.storage.minio_client import MinIOClient
+                from core.models.feed import Feed
+                import core.db as db
+                minio_client = MinIOClient()
                 
-                # 只有在文章不存在时才上传封面图片
-                pic_url = data.get('cover', '')
-                if pic_url and not article_exists:
-                    try:
-                        from core.storage.minio_client import MinIOClient
-                        import re
-                        minio_client = MinIOClient()
-                        
-                        # 从URL中提取文章ID（用于MinIO路径）
-                        article_id_for_minio = article_id or "unknown"
-                        if not article_id_for_minio or article_id_for_minio == "unknown":
-                            # 尝试从link中提取
-                            link = data.get('link', '')
-                            if link:
-                                match = re.search(r'/s/([^/?]+)', str(link))
-                                if match:
-                                    article_id_for_minio = match.group(1)
-                        
-                        # 如果MinIO可用且封面图不是MinIO URL，则上传
-                        if minio_client.is_available() and pic_url:
-                            # 跳过已经是MinIO URL的图片
-                            if 'minio' not in pic_url.lower() and (not minio_client.public_url or minio_client.public_url not in pic_url):
-                                minio_cover_url = minio_client.upload_image(pic_url, article_id_for_minio)
-                                if minio_cover_url:
-                                    pic_url = minio_cover_url
-                                    print_info(f"封面图片已上传到MinIO: {data.get('cover', '')[:80]}... -> {minio_cover_url[:80]}...")
-                    except Exception as e:
-                        logger.warning(f"处理封面图片失败: {e}")
-                        # 失败时使用原始URL
-                        pass
-                elif article_exists:
-                    # 如果文章已存在，尝试从现有文章中获取已上传的封面图URL
-                    try:
-                        import core.db as db
-                        from core.storage.minio_client import MinIOClient
-                        DB = db.Db(tag="文章检查")
-                        session = DB.get_session()
-                        existing_article = session.query(Article).filter(Article.id == full_article_id).first()
-                        if existing_article and existing_article.pic_url:
-                            # 如果现有文章已有MinIO URL，使用它
-                            minio_client = MinIOClient()
-                            if 'minio' in existing_article.pic_url.lower() or (minio_client.public_url and minio_client.public_url in existing_article.pic_url):
-                                pic_url = existing_article.pic_url
-                                logger.info(f"使用已存在的封面图URL: {pic_url[:80]}...")
-                    except Exception as e:
-                        logger.warning(f"获取已存在文章封面图失败: {e}")
+                # 检查data中是否有mp_info和logo
+                mp_info = data.get('mp_info', {})
+                logo_url = mp_info.get('logo') if isinstance(mp_info, dict) else None
+                
+                # 如果没有从data中获取到logo，检查Ext_Data中是否有
+                if not logo_url and Ext_Data:
+                    mp_info_from_ext = Ext_Data.get('mp_info', {})
+                    if isinstance(mp_info_from_ext, dict):
+                        logo_url = mp_info_from_ext.get('logo')
                 
-                # 处理公众号头像上传到MinIO
-                if mp_id:
+                # 如果获取到logo URL且MinIO可用，尝试上传头像
+                if logo_url and minio_client.is_available():
+                    # 检查Feed表中是否已有MinIO URL的头像
+                    DB = db.Db(tag="头像处理")
+                    session = DB.get_session()
                     try:
-                        from core.storage.minio_client import MinIOClient
-                        from core.models.feed import Feed
-                        import core.db as db
-                        minio_client = MinIOClient()
-                        
-                        # 检查data中是否有mp_info和logo
-                        mp_info = data.get('mp_info', {})
-                        logo_url = mp_info.get('logo') if isinstance(mp_info, dict) else None
-                        
-                        # 如果没有从data中获取到logo，检查Ext_Data中是否有
-                        if not logo_url and Ext_Data:
-                            mp_info_from_ext = Ext_Data.get('mp_info', {})
-                            if isinstance(mp_info_from_ext, dict):
-                                logo_url = mp_info_from_ext.get('logo')
-                        
-                        # 如果获取到logo URL且MinIO可用，尝试上传头像
-                        if logo_url and minio_client.is_available():
-                            # 检查Feed表中是否已有MinIO URL的头像
-                            DB = db.Db(tag="头像处理")
-                            session = DB.get_session()
-                            try:
-                                feed = session.query(Feed).filter(Feed.id == mp_id).first()
-                                if feed:
-                                    # 如果已有MinIO URL，跳过上传
-                                    existing_cover = feed.mp_cover or ""
-                                    if 'minio' in existing_cover.lower() or (minio_client.public_url and minio_client.public_url in existing_cover):
-                                        logger.info(f"公众号 {mp_id} 已有MinIO头像，跳过上传")
+                        feed = session.query(Feed).filter(Feed.id == mp_id).first()
+                        if feed:
+                            # 如果已有MinIO URL，跳过上传
+                            existing_cover = feed.mp_cover or ""
+                            if 'minio' in existing_cover.lower() or (minio_client.public_url and minio_client.public_url in existing_cover):
+                                logger.info(f"公众号 {mp_id} 已有MinIO头像，跳过上传")
+                            else:
+                                # 如果头像不是MinIO URL，尝试上传
+                                # 跳过已经是MinIO URL的图片
+                                if 'minio' not in logo_url.lower() and (not minio_client.public_url or minio_client.public_url not in logo_url):
+                                    minio_avatar_url = minio_client.upload_avatar(logo_url, mp_id)
+                                    if minio_avatar_url:
+                                        # 更新Feed表的mp_cover字段
+                                        feed.mp_cover = minio_avatar_url
+                                        session.commit()
+                                        print_info(f"公众号头像已上传到MinIO: {logo_url[:80]}... -> {minio_avatar_url[:80]}...")
                                     else:
-                                        # 如果头像不是MinIO URL，尝试上传
-                                        # 跳过已经是MinIO URL的图片
-                                        if 'minio' not in logo_url.lower() and (not minio_client.public_url or minio_client.public_url not in logo_url):
-                                            minio_avatar_url = minio_client.upload_avatar(logo_url, mp_id)
-                                            if minio_avatar_url:
-                                                # 更新Feed表的mp_cover字段
-                                                feed.mp_cover = minio_avatar_url
-                                                session.commit()
-                                                print_info(f"公众号头像已上传到MinIO: {logo_url[:80]}... -> {minio_avatar_url[:80]}...")
-                                            else:
-                                                logger.warning(f"公众号头像上传到MinIO失败: {logo_url[:80]}...")
-                                else:
-                                    # Feed不存在，尝试上传头像（可能在创建Feed之前）
-                                    if 'minio' not in logo_url.lower() and (not minio_client.public_url or minio_client.public_url not in logo_url):
-                                        minio_avatar_url = minio_client.upload_avatar(logo_url, mp_id)
-                                        if minio_avatar_url:
-                                            print_info(f"公众号头像已上传到MinIO（Feed尚未创建）: {logo_url[:80]}... -> {minio_avatar_url[:80]}...")
-                            except Exception as e:
-                                logger.warning(f"处理公众号头像失败: {e}")
-                            finally:
-                                session.close()
+                                        logger.warning(f"公众号头像上传到MinIO失败: {logo_url[:80]}...")
+                        else:
+                            # Feed不存在，尝试上传头像（可能在创建Feed之前）
+                            if 'minio' not in logo_url.lower() and (not minio_client.public_url or minio_client.public_url not in logo_url):
+                                minio_avatar_url = minio_client.upload_avatar(logo_url, mp_id)
+                                if minio_avatar_url:
+                                    print_info(f"公众号头像已上传到MinIO（Feed尚未创建）: {logo_url[:80]}... -> {minio_avatar_url[:80]}...")
                     except Exception as e:
-                        logger.warning(f"处理公众号头像时出错: {e}")
-                        # 失败时继续处理，不影响文章处理流程
-                
-                art={
-                    "id":str(data['id']),
-                    "mp_id":data['mp_id'],
-                    "title":data['title'],
-                    "url":data['link'],
-                    "pic_url":pic_url,
-                    "content":data.get("content",""),
-                    "publish_time":data['update_time'],
-                }
-                if 'digest' in data:
-                    art['description']=data['digest']
+                        logger.warning(f"处理公众号头像失败: {e}")
+                    finally:
+                        session.close()
+            except Exception as e:
+                logger.warning(f"处理公众号头像时出错: {e}")
+                # 失败时继续处理，不影响文章处理流程
+        
+        art={
+            "id":str(data['id']),
+            "mp_id":data['mp_id'],
+            "title":data['title'],
+            "url":data['link'],
+            "pic_url":pic_url,
+            "content":data.get("content",""),
+            "publish_time":data['update_time'],
+        }
+        if 'digest' in data:
+            art['description']=data['digest']
+        if data.get('content_text'):
+            art['content_text']=data['content_text']
+        return art
+    def FillBack(self,CallBack=None,data=None,Ext_Data=None):
+        if CallBack is not None:
+            if data is not  None:
+                setStatus(True)
+                art=self.PrepareArticle(data,Ext_Data)
+                if getattr(CallBack, 'bulk', None) is not None:
+                    # 支持批量入库的回调：先缓存，在每页结束时一次写入
+                    if getattr(self, '_pending', None) is None:
+                        self._pending=[]
+                    self._pending.append((art,Ext_Data))
+                    self._pending_callback=CallBack.bulk
+                    return
                 if CallBack(art):
                     art["ext"]=Ext_Data
                     # art.pop("content")
                     self.articles.append(art)
+    def FlushPending(self):
+        """将本页缓存的文章批量入库，新写入的文章计入 self.articles"""
+        pending=getattr(self, '_pending', None)
+        if not pending:
+            return 0
+        self._pending=[]
+        try:
+            new_ids=set(self._pending_callback([art for art,_ in pending],policy=self.collect_policy) or [])
+        except Exception as e:
+            print_error(f"批量入库失败: {e}")
+            return 0
+        import core.db as db
+        count=0
+        for art,Ext_Data in pending:
+            full_article_id=db.Db.make_article_id(art['mp_id'],art['id'])
+            if full_article_id in new_ids:
+                art["ext"]=Ext_Data
+                self.articles.append(art)
+                count+=1
+            # 同一次运行中后续页面不再把它当作新文章
+            if getattr(self, '_known', None) is not None:
+                self._known[full_article_id]={"has_content":bool((art.get("content") or "").strip()),"pic_url":art.get("pic_url")}
+        return count
 
 
     #通过公众号码平台接口查询公众号
@@ -310,6 +446,7 @@ class WxGather:
             return
         data={}
         try:
+            wx_limiter.acquire()
             response = requests.get(
             url,
             params=params,
@@ -319,8 +456,11 @@ class WxGather:
             data = response.text  # 解析JSON数据
             msg = json.loads(data)  # 手动解析
             if msg['base_resp']['ret'] == 200013:
+                wx_limiter.on_throttled("搜索公众号")
                 self.Error("frequencey control, stop at {}".format(str(kw)))
                 return
+            if msg['base_resp']['ret'] == 0:
+                wx_limiter.on_success()
             if msg['base_resp']['ret'] != 0:
                 self.Error("错误原因:{}:代码:{}".format(msg['base_resp']['err_msg'],msg['base_resp']['ret']),code="Invalid Session")
                 return 
@@ -335,6 +475,10 @@ class WxGather:
     
     def Start(self,mp_id=None):
         self.articles=[]
+        self._mp_id=mp_id
+        self.seen.clear()
+        self._known=None
+        self._pending=[]
         self.get_token()
         if self.token=="" or self.token is None:
              self.Error("请先扫码登录公众号平台")
@@ -346,6 +490,7 @@ class WxGather:
         ))
 
     def Item_Over(self,item=None,CallBack=None):
+        self.FlushPending()
         print(f"item end")
         _cookies=[{'name': c.name, 'value': c.value, 'domain': c.domain,'expiry':c.expires,'expires':c.expires} for c in self._cookies]
         _cookies.append({'name':'token','value':self.token})
@@ -355,6 +500,12 @@ class WxGather:
     def Error(self,error:str,code=None):
         self.Over()
         if code=="Invalid Session":
+            from .session_pool import session_pool
+            session_pool.invalidate(session_pool.get(getattr(self, 'session_key', '')), error)
+            if session_pool.available():
+                # 账号池中还有其它可用账号：只停用当前账号，不清空任务队列、不触发重新登录
+                logger.warning(f"账号 Session 失效，后续请求改用其它账号: {error}")
+                raise Exception(error)
             from driver.success import getStatus
             from core.queue import TaskQueue
             already_handling = not getStatus()
@@ -370,6 +521,10 @@ class WxGather:
             raise Exception(error)
 
     def Over(self,CallBack=None):
+        self.FlushPending()
+        bloom=get_seen_bloom()
+        if bloom is not None:
+            bloom.flush()
         if getattr(self, 'articles', None) is not None:
             print(f"成功{len(self.articles)}条")
             rss=RSS()
@@ -0,0 +1,120 @@
+"""
+历史回溯采集断点
+
+collect_start_date 设得很早时，回溯一个公众号的历史要翻很多页，中途 Session 失效、超时或容器重启
+都会让下一次从第 0 页重新开始。回溯模式（CrawlEngine(backfill=True)）为每个公众号记录断点
+（crawl_checkpoints 表）：
+
+- next_begin：下一次列表请求的偏移，每翻完一页、且该页文章全部处理完后推进
+- oldest_seen_time：已覆盖到的最早发布时间（晚于它的文章都已处理），续采时晚于它的文章直接跳过
+- 到达采集起始日期或翻到最早的文章后标记完成；到达起始日期的那一页断点不越过，
+  之后把起始日期再往前调，会从这一页继续
+"""
+import math
+from dataclasses import dataclass, asdict
+from datetime import datetime, date
+from typing import Any, Dict, Iterable, Optional
+
+from core.log import logger
+
+STATE_RUNNING = "running"
+STATE_START_DATE = "start_date"
+STATE_END = "end"
+
+
+def start_timestamp(start_date: Optional[date]) -> Optional[int]:
+    """采集起始日期 -> 当天 0 点的时间戳"""
+    if start_date is None:
+        return None
+    return int(datetime.combine(start_date, datetime.min.time()).timestamp())
+
+
+@dataclass
+class Checkpoint:
+    """单个公众号的回溯断点"""
+
+    feed_id: str
+    next_begin: int = 0
+    oldest_seen_time: Optional[int] = None
+    newest_seen_time: Optional[int] = None
+    total_count: Optional[int] = None
+    pages: int = 0
+    state: str = STATE_RUNNING
+
+    def finished(self, start_ts: Optional[int]) -> bool:
+        """已翻到最早的文章，或已处理到采集起始日期之前"""
+        if self.state == STATE_END:
+            return True
+        return start_ts is not None and self.oldest_seen_time is not None and self.oldest_seen_time <= start_ts
+
+    def remaining_pages(self, start_ts: Optional[int], page_size: int) -> Optional[int]:
+        """
+        估算剩余页数，无法估算时返回 None
+
+        两种估算取较小值：列表总数减去已翻过的偏移；已翻过的每页平均覆盖的时间跨度推算到采集起始日期。
+        """
+        if self.finished(start_ts):
+            return 0
+        estimates = []
+        if self.total_count:
+            estimates.append(max(0, math.ceil((self.total_count - self.next_begin) / page_size)))
+        if start_ts is not None and self.pages and self.oldest_seen_time is not None \
+                and self.newest_seen_time is not None and self.newest_seen_time > self.oldest_seen_time:
+            per_page = (self.newest_seen_time - self.oldest_seen_time) / self.pages
+            estimates.append(max(1, math.ceil((self.oldest_seen_time - start_ts) / per_page)))
+        return min(estimates) if estimates else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def load_checkpoints(feed_ids: Iterable[str]) -> Dict[str, Checkpoint]:
+    """批量读取断点 {feed_id: Checkpoint}，没有断点的公众号不在结果中"""
+    from core.db import DB
+    from core.models.crawl_checkpoint import CrawlCheckpoint
+    feed_ids = [i for i in feed_ids if i]
+    if not feed_ids:
+        return {}
+    with DB.read_session_scope() as session:
+        rows = session.query(CrawlCheckpoint).filter(CrawlCheckpoint.feed_id.in_(feed_ids)).all()
+        return {
+            row.feed_id: Checkpoint(
+                feed_id=row.feed_id,
+                next_begin=int(row.next_begin or 0),
+                oldest_seen_time=row.oldest_seen_time,
+                newest_seen_time=row.newest_seen_time,
+                total_count=row.total_count,
+                pages=int(row.pages or 0),
+                state=row.state or STATE_RUNNING,
+            )
+            for row in rows
+        }
+
+
+def save_checkpoint(checkpoint: Checkpoint) -> None:
+    """写入断点（不存在时创建）"""
+    from core.db import DB
+    from core.models.crawl_checkpoint import CrawlCheckpoint
+    values = checkpoint.to_dict()
+    with DB.write_session_scope() as session:
+        row = session.get(CrawlCheckpoint, checkpoint.feed_id)
+        if row is None:
+            session.add(CrawlCheckpoint(**values))
+        else:
+            for key, value in values.items():
+                setattr(row, key, value)
+        session.commit()
+    logger.debug(f"公众号 {checkpoint.feed_id} 回溯断点: begin={checkpoint.next_begin} state={checkpoint.state}")
+
+
+def reset_checkpoints(feed_ids: Optional[Iterable[str]] = None) -> int:
+    """删除断点（不传 feed_ids 时删除全部），下次回溯从第 0 页开始"""
+    from core.db import DB
+    from core.models.crawl_checkpoint import CrawlCheckpoint
+    with DB.write_session_scope() as session:
+        query = session.query(CrawlCheckpoint)
+        if feed_ids is not None:
+            query = query.filter(CrawlCheckpoint.feed_id.in_(list(feed_ids)))
+        count = query.delete(synchronize_session=False)
+        session.commit()
+    return count
@@ -0,0 +1,888 @@
+"""
+多公众号并发采集引擎（asyncio + httpx）
+
+jobs/mps.do_job_all_feeds 原先逐个公众号串行采集，每页前 sleep(randint(0, interval))、每篇文章前再 sleep 1~3 秒，
+300 个公众号即使大多没有新文章也要跑几个小时。这里改为：
+
+- 公众号并发采集，同时进行的公众号数不超过 crawl.concurrency
+- 列表接口每次请求从账号池（core.wx.session_pool）租用一个账号，经过该账号的限流器；同一账号两次请求
+  至少间隔 crawl.request_interval 秒（带随机抖动），单次运行最多 crawl.account_budget 次请求
+- 翻页到公众号的采集水位（上次采集到的最新文章，见 core.wx.watermark）即停止；没有水位时沿用原采集器的停止条件：
+  早于采集起始日期、连续 3 篇已存在、最大页数。full_resync=True 时忽略水位和已存在判断，一直翻到采集起始日期
+- 某个账号频率限制（200013）时该账号冷却、Session 失效时标记失效，本页改用其它账号重试；
+  所有账号都被限流时本次运行暂停（剩余公众号跳过），都失效时终止本次运行并触发重新登录
+- 每个公众号的进度（页数、新文章数、停止原因）实时记录，可在系统信息中查看
+- 回溯模式（backfill=True）从断点（core.wx.checkpoint）继续翻历史文章，每页更新断点；
+  各公众号每翻一页就让出并发名额，轮流前进，并估算剩余页数
+
+采集按阶段组成流水线（列表 → 正文 → 图片上传 → 入库），阶段之间用有界队列连接，各自有 worker 数，
+一张慢图片只占用一个图片 worker，不会卡住翻页和其它公众号；各阶段吞吐记录在系统信息 crawl.last_run.stages。
+
+列表页用 httpx 异步请求；判断已入库、正文提取、封面上传与批量入库仍复用 WxGather 采集器的同步实现
+（在线程中执行），入库逻辑与原来一致。
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from core.config import cfg
+from core.log import logger
+from core.print import print_info, print_success, print_warning
+from core.wx.pipeline import Stage, StageMetrics
+from core.wx.checkpoint import (STATE_END, STATE_RUNNING, STATE_START_DATE, Checkpoint,
+                                load_checkpoints, save_checkpoint, start_timestamp)
+from core.wx.rate_limit import RET_FREQUENCY_CONTROL, RateLimited
+from core.wx.session_pool import SessionUnavailable, WxSession, session_pool
+from core.wx.watermark import Watermark, load_watermarks, save_watermark
+
+try:
+    import httpx
+except ImportError:  # requirements 已包含，未安装时退回串行采集
+    httpx = None
+
+LIST_URLS = {
+    "api": "https://mp.weixin.qq.com/cgi-bin/appmsg",
+    "web": "https://mp.weixin.qq.com/cgi-bin/appmsgpublish",
+    "app": "https://mp.weixin.qq.com/cgi-bin/appmsgpublish",
+}
+PAGE_SIZE = 5
+# 连续遇到多少篇已存在文章后停止处理当前公众号
+MAX_CONSECUTIVE_EXISTING = 3
+
+RET_INVALID_SESSION = 200003
+
+
+def crawl_settings() -> Dict[str, Any]:
+    """读取 crawl 配置"""
+    def _num(key: str, default, cast=int):
+        try:
+            return cast(cfg.get(key, default, silent=True) or default)
+        except (ValueError, TypeError):
+            return default
+
+    return {
+        "engine": str(cfg.get("crawl.engine", "async", silent=True) or "async"),
+        "concurrency": max(1, _num("crawl.concurrency", 4)),
+        "request_interval": max(0.0, _num("crawl.request_interval", 3.0, float)),
+        "account_budget": max(1, _num("crawl.account_budget", 600)),
+        "timeout": max(1.0, _num("crawl.timeout", 15.0, float)),
+        "content_workers": max(1, _num("crawl.content_workers", 4)),
+        "image_workers": max(1, _num("crawl.image_workers", 4)),
+        "persist_batch": max(1, _num("crawl.persist_batch", 20)),
+        "queue_size": max(1, _num("crawl.queue_size", 50)),
+        "watermark_max_pages": max(1, _num("crawl.watermark_max_pages", 10)),
+    }
+
+
+def engine_available() -> bool:
+    return httpx is not None and crawl_settings()["engine"] == "async"
+
+
+@dataclass
+class FeedProgress:
+    """单个公众号的采集进度"""
+
+    feed_id: str
+    mp_name: str = ""
+    state: str = "pending"  # pending / running / done / skipped / failed
+    pages: int = 0
+    requests: int = 0
+    new_articles: int = 0
+    existing: int = 0
+    stop_reason: str = ""
+    error: str = ""
+    # 回溯模式下估算的剩余页数（无法估算时为 None）
+    remaining_pages: Optional[int] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    articles: List[dict] = field(default_factory=list, repr=False)
+
+    @property
+    def elapsed(self) -> float:
+        if not self.started_at:
+            return 0.0
+        return round((self.finished_at or time.time()) - self.started_at, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("articles")
+        data["elapsed"] = self.elapsed
+        return data
+
+
+class BudgetExhausted(Exception):
+    """账号本次运行的请求预算已用完"""
+
+
+class AccountBudget:
+    """单个公众号平台账号的请求预算：最小请求间隔（带抖动）+ 单次运行的请求上限"""
+
+    def __init__(self, key: str, max_requests: int, interval: float):
+        self.key = key
+        self.max_requests = max_requests
+        self.interval = interval
+        self.used = 0
+        self.blocked = ""  # 非空表示账号已被限制（频率限制等），剩余公众号跳过
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            if self.blocked:
+                raise BudgetExhausted(self.blocked)
+            if self.used >= self.max_requests:
+                raise BudgetExhausted("budget")
+            delay = self._next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.used += 1
+            self._next_at = time.monotonic() + self.interval * random.uniform(0.5, 1.5)
+
+    def status(self) -> Dict[str, Any]:
+        return {"used": self.used, "max": self.max_requests, "blocked": self.blocked}
+
+
+def _page_items(msg: Dict[str, Any], mode: str) -> Optional[List[dict]]:
+    """解析列表接口返回的文章（最新的在前），没有列表字段时返回 None"""
+    if mode == "api":
+        if "app_msg_list" not in msg:
+            return None
+        return list(reversed(msg["app_msg_list"] or []))
+    if "publish_page" not in msg:
+        return None
+    page = msg["publish_page"]
+    if isinstance(page, str):
+        page = json.loads(page or "{}")
+    items: List[dict] = []
+    for publish in page.get("publish_list", []) or []:
+        try:
+            info = json.loads(publish.get("publish_info") or "{}")
+        except (ValueError, TypeError):
+            continue
+        items.extend(reversed(info.get("appmsgex", []) or []))
+    return items
+
+
+def _total_count(msg: Dict[str, Any], mode: str) -> Optional[int]:
+    """列表接口返回的总数（api 模式为文章数，web/app 模式为发布次数）"""
+    if mode == "api":
+        return _int_or_none(msg.get("app_msg_cnt"))
+    page = msg.get("publish_page")
+    if isinstance(page, str):
+        try:
+            page = json.loads(page or "{}")
+        except ValueError:
+            return None
+    return _int_or_none((page or {}).get("total_count"))
+
+
+def _int_or_none(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _publish_date(item: dict):
+    publish_timestamp = int(item["update_time"])
+    if publish_timestamp < 10000000000:  # 秒级时间戳
+        publish_timestamp *= 1000
+    return datetime.fromtimestamp(publish_timestamp / 1000).date()
+
+
+@dataclass
+class _FeedRun:
+    """单个公众号在流水线中的状态：列表阶段结束且所有文章都走完流水线后才算完成"""
+
+    feed: Any
+    wx: Any
+    progress: FeedProgress
+    gather_content: bool = False
+    ext_data: Dict[str, Any] = field(default_factory=dict)
+    articles: List[dict] = field(default_factory=list)
+    # 采集水位 (aid, update_time)，以及本次列表中最新的文章
+    watermark: Optional[Watermark] = None
+    newest: Optional[Watermark] = None
+    # 本次翻页完整覆盖到水位（或首次采集正常结束），文章处理完后可以推进水位
+    advance: bool = False
+    dropped: int = 0
+    pending: int = 0
+    listing_done: bool = False
+    drained: asyncio.Event = field(default_factory=asyncio.Event)
+    # 回溯模式：断点、已翻过但未提交的页 (begin, 该页覆盖到的最早发布时间, 该页文章是否全部需要处理)、
+    # 各页未处理完的文章数、有文章失败的页
+    checkpoint: Optional[Checkpoint] = None
+    listed: List[Tuple[int, Optional[int], bool]] = field(default_factory=list)
+    page_pending: Dict[int, int] = field(default_factory=dict)
+    failed_pages: Set[int] = field(default_factory=set)
+
+    def add(self, begin: Optional[int] = None) -> None:
+        self.pending += 1
+        if begin is not None:
+            self.page_pending[begin] = self.page_pending.get(begin, 0) + 1
+
+    def done(self, begin: Optional[int] = None, failed: bool = False) -> None:
+        self.pending -= 1
+        if begin is not None:
+            self.page_pending[begin] -= 1
+            if failed:
+                self.failed_pages.add(begin)
+        if self.listing_done and self.pending <= 0:
+            self.drained.set()
+
+    def close_listing(self) -> None:
+        self.listing_done = True
+        if self.pending <= 0:
+            self.drained.set()
+
+
+@dataclass
+class _Job:
+    """流水线中的一篇文章"""
+
+    run: _FeedRun
+    item: dict
+    # 列表阶段查到的入库状态（未入库为 None），已入库文章不再上传图片
+    known: Optional[dict] = None
+    art: Optional[dict] = None
+    # 回溯模式下文章所在列表页的 begin 偏移
+    begin: Optional[int] = None
+
+
+class CrawlEngine:
+    """
+    并发采集一组公众号
+
+    采集分为四个阶段，阶段之间用有界队列连接（队列满时上游等待）：
+        list     公众号列表翻页（crawl.concurrency 个公众号同时进行）
+        content  下载正文（crawl.content_workers）
+        image    正文图片、封面、头像上传 MinIO（crawl.image_workers）
+        persist  批量入库（单个 worker，每批最多 crawl.persist_batch 篇）
+
+    用法：
+        engine = CrawlEngine(policy=policy, max_pages=1)
+        results = engine.run(feeds, CallBack=UpdateArticle)
+
+    backfill=True 时为历史回溯：不看水位和已存在文章，从断点翻到采集起始日期（见 _backfill_pages）。
+    """
+
+    def __init__(
+        self,
+        policy=None,
+        max_pages: int = 1,
+        mode: Optional[str] = None,
+        settings: Optional[Dict[str, Any]] = None,
+        on_progress: Optional[Callable[[FeedProgress], None]] = None,
+        full_resync: bool = False,
+        backfill: bool = False,
+    ):
+        from core.collect_policy import get_collect_policy
+        self.policy = policy or get_collect_policy()
+        self.max_pages = max(1, int(max_pages or 1))
+        self.full_resync = full_resync
+        self.backfill = backfill
+        self.watermarks: Dict[str, Watermark] = {}
+        self.checkpoints: Dict[str, Checkpoint] = {}
+        self.mode = mode or cfg.get("gather.model", "web")
+        if self.mode not in LIST_URLS:
+            self.mode = "api"
+        self.settings = settings or crawl_settings()
+        self.on_progress = on_progress
+        self.progress: Dict[str, FeedProgress] = {}
+        self.accounts: Dict[str, AccountBudget] = {}
+        self.stage_metrics: List[StageMetrics] = []
+        self.aborted = ""
+        # 最近一次 Session 失效的错误信息（所有账号都失效时用于触发重新登录）
+        self.session_error = ""
+        self.callback = None
+
+    # ------------------------------------------------------------ 入口
+
+    def run(self, feeds: List[Any], CallBack=None, Over_CallBack=None) -> List[FeedProgress]:
+        """同步入口（任务队列线程中调用），返回按输入顺序的进度"""
+        coro = self.crawl(feeds, CallBack=CallBack, Over_CallBack=Over_CallBack)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # 已在事件循环中（例如从接口调用）时放到独立线程执行
+        result: List[FeedProgress] = []
+        error: List[BaseException] = []
+
+        def _target():
+            try:
+                result.extend(asyncio.run(coro))
+            except BaseException as e:  # noqa: B902
+                error.append(e)
+
+        thread = threading.Thread(target=_target, name="crawl-engine")
+        thread.start()
+        thread.join()
+        if error:
+            raise error[0]
+        return result
+
+    async def crawl(self, feeds: List[Any], CallBack=None, Over_CallBack=None) -> List[FeedProgress]:
+        feeds = [feed for feed in feeds if getattr(feed, "id", None)]
+        for feed in feeds:
+            self.progress[feed.id] = FeedProgress(feed_id=feed.id, mp_name=getattr(feed, "mp_name", "") or "")
+        self.callback = CallBack
+        settings = self.settings
+        queue_size = settings["queue_size"]
+        self.persist_stage = Stage("persist", self._persist, 1, queue_size,
+                                   batch_size=settings["persist_batch"], on_error=self._drop)
+        self.image_stage = Stage("image", self._images, settings["image_workers"], queue_size,
+                                 downstream=self.persist_stage, on_error=self._drop)
+        self.content_stage = Stage("content", self._content, settings["content_workers"], queue_size,
+                                   downstream=self.image_stage, on_error=self._drop)
+        self.list_metrics = StageMetrics("list", settings["concurrency"])
+        self.stage_metrics = [self.list_metrics, self.content_stage.metrics,
+                              self.image_stage.metrics, self.persist_stage.metrics]
+        _run_started(self)
+        if self.backfill:
+            try:
+                self.checkpoints = await asyncio.to_thread(load_checkpoints, [feed.id for feed in feeds])
+            except Exception as e:
+                logger.warning(f"读取回溯断点失败，从第 0 页开始: {e}")
+        elif not self.full_resync:
+            try:
+                self.watermarks = await asyncio.to_thread(load_watermarks, [feed.id for feed in feeds])
+            except Exception as e:
+                logger.warning(f"读取采集水位失败，按原有条件翻页: {e}")
+        for stage in (self.persist_stage, self.image_stage, self.content_stage):
+            stage.start()
+        semaphore = asyncio.Semaphore(settings["concurrency"])
+        timeout = httpx.Timeout(settings["timeout"], connect=5.0)
+        started = time.time()
+        try:
+            # 回溯模式每翻一页就让出名额；Semaphore 按等待顺序唤醒，各公众号轮流翻页
+            async with httpx.AsyncClient(timeout=timeout, verify=False) as client:
+                await asyncio.gather(*[self._crawl_feed(client, semaphore, feed, Over_CallBack) for feed in feeds])
+        finally:
+            for stage in (self.content_stage, self.image_stage, self.persist_stage):
+                await stage.close()
+            _run_finished(self)
+        results = [self.progress[feed.id] for feed in feeds]
+        total_new = sum(p.new_articles for p in results)
+        print_success(
+            f"{'历史回溯' if self.backfill else '并发采集'}完成: {len(results)} 个公众号，新文章 {total_new} 篇，"
+            f"耗时 {time.time() - started:.1f}s（并发 {settings['concurrency']}）"
+        )
+        if self.backfill:
+            remaining = [p.remaining_pages for p in results if p.remaining_pages]
+            unknown = sum(1 for p in results if p.remaining_pages is None)
+            print_info(f"回溯剩余: {len(remaining)} 个公众号约 {sum(remaining)} 页"
+                       + (f"，{unknown} 个无法估算" if unknown else ""))
+        print_info("各阶段: " + "，".join(
+            f"{m.name} {m.processed} 条/忙碌 {m.busy_seconds:.1f}s/背压 {m.blocked_seconds:.1f}s"
+            for m in self.stage_metrics
+        ))
+        return results
+
+    # ------------------------------------------------------------ 单个公众号
+
+    def _account(self, key: str) -> AccountBudget:
+        account = self.accounts.get(key)
+        if account is None:
+            account = AccountBudget(key, self.settings["account_budget"], self.settings["request_interval"])
+            self.accounts[key] = account
+        return account
+
+    def _report(self, progress: FeedProgress) -> None:
+        if self.on_progress is not None:
+            try:
+                self.on_progress(progress)
+            except Exception as e:
+                logger.warning(f"采集进度回调失败: {e}")
+
+    def _finish(self, progress: FeedProgress, state: str, reason: str = "", error: str = "") -> None:
+        progress.state = state
+        progress.stop_reason = progress.stop_reason or reason
+        progress.error = error
+        progress.finished_at = time.time()
+        done = sum(1 for p in self.progress.values() if p.finished_at)
+        line = (
+            f"[{done}/{len(self.progress)}] {progress.mp_name}: 新文章 {progress.new_articles} 篇，"
+            f"{progress.pages} 页，{progress.elapsed}s，停止原因 {progress.stop_reason or '-'}"
+        )
+        if self.backfill:
+            line += f"，预计剩余 {'-' if progress.remaining_pages is None else progress.remaining_pages} 页"
+        if state == "failed":
+            print_warning(f"{line}，错误 {error}")
+        else:
+            print_info(line)
+        self._report(progress)
+
+    async def _crawl_feed(self, client, semaphore: asyncio.Semaphore, feed, Over_CallBack) -> None:
+        from core.wx.base import WxGather
+        progress = self.progress[feed.id]
+        error = ""
+        # 并发上限只约束列表阶段，列表翻完后释放名额，等待流水线处理剩余文章
+        async with semaphore:
+            if self.aborted:
+                self._finish(progress, "skipped", self.aborted)
+                return
+            progress.state = "running"
+            progress.started_at = time.time()
+            self._report(progress)
+            try:
+                wx = WxGather().Model(self.mode).SetPolicy(self.policy)
+            except Exception as e:
+                self._finish(progress, "failed", "error", str(e))
+                return
+            run = _FeedRun(feed=feed, wx=wx, progress=progress, gather_content=bool(wx.Gather_Content),
+                           ext_data={"mp_title": feed.mp_name, "mp_id": feed.id},
+                           watermark=self.watermarks.get(feed.id),
+                           checkpoint=(self.checkpoints.get(feed.id) or Checkpoint(feed.id)) if self.backfill else None)
+            try:
+                await asyncio.to_thread(wx.Start, feed.id)
+                if not self.backfill:
+                    await self._crawl_pages(client, run)
+            except Exception as e:
+                error = str(e)
+        if self.backfill and not error:
+            try:
+                await self._backfill_pages(client, semaphore, run)
+            except Exception as e:
+                error = str(e)
+        run.close_listing()
+        await run.drained.wait()
+        if self.backfill:
+            await self._commit_checkpoint(run, final=not error)
+            progress.remaining_pages = run.checkpoint.remaining_pages(
+                start_timestamp(wx.get_collect_start_date()), PAGE_SIZE)
+        try:
+            wx.articles = run.articles
+            await asyncio.to_thread(wx.Over, Over_CallBack)
+        except Exception as e:
+            error = error or str(e)
+        progress.articles = list(run.articles)
+        progress.new_articles = len(progress.articles)
+        if run.advance and run.newest and run.newest != run.watermark and not error and not run.dropped:
+            try:
+                await asyncio.to_thread(save_watermark, feed.id, *run.newest)
+            except Exception as e:
+                logger.warning(f"保存采集水位失败: {e}")
+        elif run.dropped:
+            # 有文章没能入库时水位不动，下次采集重新翻到这些文章
+            logger.warning(f"{feed.mp_name}: {run.dropped} 篇文章处理失败，本次不推进采集水位")
+        if error:
+            self._finish(progress, "failed", "error", error)
+        else:
+            self._finish(progress, "done")
+
+    async def _lease(self) -> Tuple[WxSession, AccountBudget]:
+        """租用一个账号并取得本次运行的请求额度，跳过额度用完或已被限制的账号"""
+        while True:
+            excluded = {key for key, account in self.accounts.items()
+                        if account.blocked or account.used >= account.max_requests}
+            session = await session_pool.lease_async(exclude=excluded)
+            account = self._account(session.key)
+            try:
+                await account.acquire()
+                return session, account
+            except BudgetExhausted:
+                continue
+
+    async def _fetch(self, client, wx, session: WxSession, progress: FeedProgress, params: Dict[str, Any]) -> Dict[str, Any]:
+        url = LIST_URLS[self.mode]
+        progress.requests += 1
+        headers = wx.fix_header(url)
+        headers["Cookie"] = session.cookie
+        started = time.monotonic()
+        try:
+            resp = await client.get(url, params=params, headers=headers)
+            return resp.json()
+        finally:
+            self.list_metrics.busy_seconds += time.monotonic() - started
+
+    def _params(self, faker_id: str, token: str, begin: int) -> Dict[str, Any]:
+        if self.mode == "api":
+            return {
+                "action": "list_ex", "begin": str(begin), "count": PAGE_SIZE, "fakeid": faker_id,
+                "type": "9", "token": token, "lang": "zh_CN", "f": "json", "ajax": "1",
+            }
+        return {
+            "sub": "list", "sub_action": "list_ex", "begin": str(begin), "count": PAGE_SIZE,
+            "fakeid": faker_id, "token": token, "lang": "zh_CN", "f": "json", "ajax": 1,
+        }
+
+    async def _list_page(self, client, run: _FeedRun, begin: int) -> Optional[Dict[str, Any]]:
+        """
+        请求一页列表，返回 None 时已记录停止原因
+
+        账号触发频率限制（冷却并在本次运行中停用）或 Session 失效（标记失效）时改用其它账号重试本页；
+        没有账号可用时：都被限流则暂停本次运行，都失效则终止本次运行并触发重新登录，都用完额度则本公众号停止。
+        """
+        feed, wx, progress = run.feed, run.wx, run.progress
+        while True:
+            try:
+                session, account = await self._lease()
+            except SessionUnavailable as e:
+                await self._no_session(run, e)
+                return None
+            except RateLimited as e:
+                # 最空闲的账号也在冷却中：暂停本次运行，不再消耗请求
+                self.aborted = "frequency_control"
+                progress.stop_reason = "frequency_control"
+                progress.error = str(e)
+                return None
+            try:
+                msg = await self._fetch(client, wx, session, progress, self._params(feed.faker_id, session.token, begin))
+            except (httpx.HTTPError, ValueError) as e:
+                progress.stop_reason = "request_error"
+                progress.error = str(e)
+                return None
+            ret = (msg.get("base_resp") or {}).get("ret")
+            if ret == RET_FREQUENCY_CONTROL:
+                session_pool.on_throttled(session, "文章列表")
+                account.blocked = "frequency_control"
+                print_warning(f"{feed.mp_name}: 账号 {session.name} 触发频率限制（{ret}），改用其它账号")
+                continue
+            if ret is not None and ret != 0:
+                err = (msg.get("base_resp") or {}).get("err_msg")
+                self.session_error = f"错误原因:{err}:代码:{ret}"
+                session_pool.invalidate(session, f"{err}（{ret}）")
+                account.blocked = "invalid_session"
+                continue
+            if ret == 0:
+                session_pool.on_success(session)
+            return msg
+
+    async def _no_session(self, run: _FeedRun, error: SessionUnavailable) -> None:
+        """账号池没有可用账号时的停止处理"""
+        progress = run.progress
+        if self.aborted:
+            progress.stop_reason = self.aborted
+            return
+        if error.reason == "excluded":
+            # 仍有效的账号都在本次运行中被停用：有被限流的则暂停本次运行，否则只是额度用完
+            if any(account.blocked == "frequency_control" for account in self.accounts.values()):
+                self.aborted = "frequency_control"
+                progress.stop_reason = "frequency_control"
+                print_warning(f"{run.feed.mp_name}: 所有账号都触发频率限制，暂停本次采集")
+            else:
+                progress.stop_reason = "budget"
+            return
+        self.aborted = "invalid_session"
+        progress.stop_reason = "invalid_session"
+        await asyncio.to_thread(_invalid_session, run.wx, self.session_error or str(error))
+
+    async def _crawl_pages(self, client, run: _FeedRun) -> None:
+        """列表阶段：翻页判断停止条件，需要处理的文章放入正文阶段"""
+        from core.db import Db
+        feed, wx, progress = run.feed, run.wx, run.progress
+        collect_start_date = wx.get_collect_start_date()
+        watermark = run.watermark
+        if self.full_resync:
+            max_pages = None
+        elif watermark:
+            # 有水位时以到达水位为准，max_page 只作为没有水位时的兜底
+            max_pages = max(self.max_pages, self.settings["watermark_max_pages"])
+        else:
+            max_pages = self.max_pages
+        page = 0
+        found_start_date_article = False
+        should_stop_by_date = False
+        consecutive_existing = 0
+        while True:
+            if self.aborted:
+                progress.stop_reason = self.aborted
+                return
+            if max_pages is not None and page >= max_pages and found_start_date_article:
+                progress.stop_reason = "max_page"
+                # 没有水位时按原逻辑以这次采集到的最新文章建立水位；有水位但没翻到时保留原水位
+                run.advance = watermark is None
+                if watermark:
+                    print_warning(f"{feed.mp_name}: 翻页 {max_pages} 页仍未到达采集水位，本次不推进水位")
+                return
+            if should_stop_by_date and found_start_date_article:
+                progress.stop_reason = "start_date"
+                run.advance = True
+                return
+            msg = await self._list_page(client, run, page * PAGE_SIZE)
+            if msg is None:
+                return
+            items = _page_items(msg, self.mode)
+            if not items:
+                progress.stop_reason = "all_parsed"
+                run.advance = True
+                return
+            progress.pages += 1
+            known = await asyncio.to_thread(wx.LoadKnown, feed.id, [it.get("aid") for it in items], True)
+            stop_this_page = False
+            for item in items:
+                article_id = str(item.get("aid", ""))
+                update_time = _int_or_none(item.get("update_time"))
+                if update_time is not None and (run.newest is None or update_time > run.newest[1]):
+                    run.newest = (article_id, update_time)
+                if watermark and (article_id == watermark[0] or (update_time is not None and update_time < watermark[1])):
+                    progress.stop_reason = "watermark"
+                    run.advance = True
+                    stop_this_page = True
+                    break
+                existing = known.get(Db.make_article_id(feed.id, article_id)) if article_id else None
+                if existing and existing["has_content"]:
+                    progress.existing += 1
+                    consecutive_existing += 1
+                    # 有水位或全量重采时以水位/起始日期为准，不再按连续已存在停止
+                    if consecutive_existing >= MAX_CONSECUTIVE_EXISTING and not watermark and not self.full_resync:
+                        should_stop_by_date = True
+                        stop_this_page = True
+                        progress.stop_reason = "existing"
+                        run.advance = True
+                        break
+                    continue
+                consecutive_existing = 0
+                if "update_time" in item:
+                    try:
+                        publish_date = _publish_date(item)
+                        if publish_date >= collect_start_date:
+                            found_start_date_article = True
+                        else:
+                            should_stop_by_date = True
+                    except (ValueError, TypeError, OSError) as e:
+                        logger.warning(f"解析文章发布时间失败: {e}")
+                item["id"] = item["aid"]
+                item["mp_id"] = feed.id
+                run.add()
+                await self.content_stage.put(_Job(run=run, item=item, known=existing), source=self.list_metrics)
+                self.list_metrics.processed += 1
+            if should_stop_by_date and (found_start_date_article or consecutive_existing >= MAX_CONSECUTIVE_EXISTING):
+                progress.stop_reason = progress.stop_reason or "start_date"
+                run.advance = True
+                return
+            if stop_this_page:
+                return
+            page += 1
+
+    async def _backfill_pages(self, client, semaphore: asyncio.Semaphore, run: _FeedRun) -> None:
+        """
+        回溯模式的列表阶段：从断点 next_begin 开始翻页，直到采集起始日期或最早的文章
+
+        每页持有一次并发名额，翻完即释放，让等待中的公众号轮流前进。
+        已入库（有正文）的文章和晚于断点 oldest_seen_time 的文章跳过，不会因为连续已存在而停止。
+        """
+        from core.db import Db
+        feed, wx, progress, checkpoint = run.feed, run.wx, run.progress, run.checkpoint
+        start_ts = start_timestamp(wx.get_collect_start_date())
+        progress.remaining_pages = checkpoint.remaining_pages(start_ts, PAGE_SIZE)
+        if checkpoint.finished(start_ts):
+            progress.stop_reason = "backfill_done"
+            return
+        if checkpoint.state != STATE_RUNNING:
+            # 采集起始日期调早后从断点继续
+            checkpoint.state = STATE_RUNNING
+        begin = checkpoint.next_begin
+        # 续采时晚于上次断点的文章已经处理过（新文章把列表后推造成的重复）
+        resume_after = checkpoint.oldest_seen_time
+        while True:
+            async with semaphore:
+                if self.aborted:
+                    progress.stop_reason = self.aborted
+                    return
+                msg = await self._list_page(client, run, begin)
+                if msg is None:
+                    return
+                total = _total_count(msg, self.mode)
+                if total:
+                    checkpoint.total_count = total
+                items = _page_items(msg, self.mode)
+                if not items:
+                    progress.stop_reason = STATE_END
+                    return
+                progress.pages += 1
+                known = await asyncio.to_thread(wx.LoadKnown, feed.id, [it.get("aid") for it in items], True)
+                times = [t for t in (_int_or_none(it.get("update_time")) for it in items) if t is not None]
+                if checkpoint.newest_seen_time is None and times:
+                    checkpoint.newest_seen_time = max(times)
+                reached_start = start_ts is not None and any(t < start_ts for t in times)
+                # 先登记本页，文章全部处理完后断点才会推进。本页有早于起始日期的文章时只覆盖到起始日期，
+                # 断点停在本页，起始日期调早后从本页继续
+                if reached_start:
+                    run.listed.append((begin, start_ts, False))
+                else:
+                    run.listed.append((begin, min(times) if times else None, True))
+                for item in items:
+                    article_id = str(item.get("aid", ""))
+                    update_time = _int_or_none(item.get("update_time"))
+                    if update_time is not None and start_ts is not None and update_time < start_ts:
+                        continue
+                    if update_time is not None and resume_after is not None and update_time > resume_after:
+                        continue
+                    existing = known.get(Db.make_article_id(feed.id, article_id)) if article_id else None
+                    if existing and existing["has_content"]:
+                        progress.existing += 1
+                        continue
+                    item["id"] = item["aid"]
+                    item["mp_id"] = feed.id
+                    run.add(begin)
+                    await self.content_stage.put(_Job(run=run, item=item, known=existing, begin=begin),
+                                                 source=self.list_metrics)
+                    self.list_metrics.processed += 1
+                begin += PAGE_SIZE
+            await self._commit_checkpoint(run)
+            progress.remaining_pages = checkpoint.remaining_pages(start_ts, PAGE_SIZE)
+            reached = f"{datetime.fromtimestamp(checkpoint.oldest_seen_time):%Y-%m-%d}" if checkpoint.oldest_seen_time else "-"
+            remaining = "-" if progress.remaining_pages is None else progress.remaining_pages
+            logger.info(f"{feed.mp_name}: 回溯偏移 {begin}，已处理到 {reached}，预计剩余 {remaining} 页")
+            self._report(progress)
+            if reached_start:
+                progress.stop_reason = STATE_START_DATE
+                return
+
+    async def _commit_checkpoint(self, run: _FeedRun, final: bool = False) -> None:
+        """
+        推进断点：按翻页顺序越过文章已全部处理完的页，遇到仍有文章在流水线中（或处理失败）的页即停
+
+        final 为 True（文章全部处理完、没有出错）且停在采集起始日期/最早文章时标记完成。
+        """
+        checkpoint = run.checkpoint
+        if checkpoint is None:
+            return
+        changed = False
+        while run.listed:
+            begin, oldest, complete = run.listed[0]
+            if run.page_pending.get(begin, 0) > 0 or begin in run.failed_pages:
+                break
+            run.listed.pop(0)
+            if complete:
+                checkpoint.next_begin = begin + PAGE_SIZE
+                checkpoint.pages += 1
+            if oldest is not None and (checkpoint.oldest_seen_time is None or oldest < checkpoint.oldest_seen_time):
+                checkpoint.oldest_seen_time = oldest
+            changed = True
+        reason = run.progress.stop_reason
+        if final and not run.listed and reason in (STATE_START_DATE, STATE_END) and checkpoint.state != reason:
+            checkpoint.state = reason
+            changed = True
+        if not changed:
+            return
+        try:
+            await asyncio.to_thread(save_checkpoint, checkpoint)
+        except Exception as e:
+            logger.warning(f"保存回溯断点失败: {e}")
+
+    # ------------------------------------------------------------ 流水线阶段
+
+    def _drop(self, jobs: List[_Job], error: BaseException) -> None:
+        for job in jobs:
+            job.run.dropped += 1
+            job.run.done(job.begin, failed=True)
+
+    async def _content(self, job: _Job) -> _Job:
+        """正文阶段：下载并解析正文（图片留给下一阶段上传），纯文本随文章带给标签提取"""
+        run, item = job.run, job.item
+        if not run.gather_content:
+            item["content"] = ""
+        elif not run.wx.HasGathered(item["aid"]):
+            content = await asyncio.to_thread(run.wx.content_extract, item["link"], run.feed.id, False, True)
+            if isinstance(content, dict):
+                if "mp_info" in content:
+                    item["mp_info"] = content["mp_info"]
+                if content.get("text"):
+                    item["content_text"] = content["text"]
+                content = content.get("content", "")
+            item["content"] = content or ""
+        return job
+
+    async def _images(self, job: _Job) -> _Job:
+        """图片阶段：正文图片、封面、公众号头像上传 MinIO，生成入库数据"""
+        if self.callback is not None:
+            await asyncio.to_thread(self._prepare, job)
+        return job
+
+    @staticmethod
+    def _prepare(job: _Job) -> None:
+        wx, item = job.run.wx, job.item
+        if item.get("content") and job.known is None:
+            article_id = wx._extract_article_id_from_url(item.get("link", "")) or "unknown"
+            item["content"] = wx.upload_content_images(item["content"], article_id)
+        job.art = wx.PrepareArticle(item, job.run.ext_data)
+
+    async def _persist(self, jobs: List[_Job]) -> None:
+        """入库阶段：批量写入，新写入的文章计入对应公众号"""
+        if not isinstance(jobs, list):
+            # persist_batch 为 1 时 Stage 逐个传入
+            jobs = [jobs]
+        await asyncio.to_thread(self._persist_batch, jobs)
+        for job in jobs:
+            job.run.done(job.begin)
+
+    def _persist_batch(self, jobs: List[_Job]) -> None:
+        from core.db import Db
+        CallBack = self.callback
+        jobs = [job for job in jobs if job.art is not None]
+        if CallBack is None or not jobs:
+            return
+        bulk = getattr(CallBack, "bulk", None)
+        if bulk is not None:
+            new_ids = set(bulk([job.art for job in jobs], policy=self.policy) or [])
+            created = [job for job in jobs if Db.make_article_id(job.art["mp_id"], job.art["id"]) in new_ids]
+        else:
+            created = [job for job in jobs if CallBack(job.art)]
+        for job in created:
+            job.art["ext"] = job.run.ext_data
+            job.run.articles.append(job.art)
+            job.run.progress.new_articles = len(job.run.articles)
+
+
+def _invalid_session(wx, message: str) -> None:
+    """沿用采集器的 Session 失效处理（标记失效、清空任务队列、触发重新登录）"""
+    try:
+        wx.Error(message, code="Invalid Session")
+    except Exception:
+        pass
+
+
+# ---------------------------------------------------------------- 运行状态
+
+_status_lock = threading.Lock()
+_last_run: Dict[str, Any] = {}
+
+
+def _run_started(engine: CrawlEngine) -> None:
+    with _status_lock:
+        _last_run.clear()
+        _last_run.update({"engine": engine, "started_at": time.time(), "finished_at": None})
+
+
+def _run_finished(engine: CrawlEngine) -> None:
+    with _status_lock:
+        if _last_run.get("engine") is engine:
+            _last_run["finished_at"] = time.time()
+
+
+def crawl_status(limit: int = 50) -> Dict[str, Any]:
+    """最近一次并发采集的进度（系统信息展示）"""
+    settings = crawl_settings()
+    status: Dict[str, Any] = {
+        "engine": settings["engine"] if httpx is not None else "legacy",
+        "concurrency": settings["concurrency"],
+        "request_interval": settings["request_interval"],
+        "account_budget": settings["account_budget"],
+    }
+    with _status_lock:
+        engine = _last_run.get("engine")
+        if engine is None:
+            return status
+        feeds = list(engine.progress.values())
+        status["last_run"] = {
+            "started_at": _last_run.get("started_at"),
+            "finished_at": _last_run.get("finished_at"),
+            "running": _last_run.get("finished_at") is None,
+            "feeds": len(feeds),
+            "done": sum(1 for p in feeds if p.finished_at),
+            "new_articles": sum(p.new_articles for p in feeds),
+            "aborted": engine.aborted,
+            "backfill": engine.backfill,
+            "accounts": {key: account.status() for key, account in engine.accounts.items()},
+            "stages": [m.to_dict() for m in engine.stage_metrics],
+            "progress": [p.to_dict() for p in feeds if p.state != "pending"][:limit],
+        }
+    return status
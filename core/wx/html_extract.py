@@ -0,0 +1,184 @@
+"""
+公众号文章正文的单遍解析（lxml）
+
+原先的正文处理对同一篇文章反复解析：正则去掉 script/style/注释，gather.clean_html 开启时
+htmltools.clean_html 再用 BeautifulSoup 解析三次（删选择器、删隐藏元素、删空元素），
+content_extract 又解析一次找 #js_content、改写图片并 prettify()，入库后标签提取再解析一次取纯文本。
+
+这里只用 lxml 解析一次，在同一棵树上完成：
+- 定位 #js_content（web 模式拿到的已经是正文片段，不需要定位）
+- 删除 script/style/注释；clean 时删除 link/head、隐藏元素和空元素（与 clean_html 规则一致）
+- data-src 改写为 src（可传入 rewrite_image 替换为 MinIO 地址），收集图片地址，统一图片宽度
+- 输出正文 HTML 和供标签提取使用的纯文本
+
+gather.html_engine 设为 bs4 时沿用原来的处理方式（lxml 不可用时也会退回）。
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from core.config import cfg
+
+try:
+    import lxml.html as lxml_html
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml 在 requirements 中
+    lxml_html = None
+    etree = None
+
+# 不含文字也要保留的媒体标签（与 htmltools.remove_empty_text_elements 一致）
+MEDIA_TAGS = frozenset(["img", "video", "audio", "picture", "source", "track", "canvas", "svg", "iframe", "embed", "object"])
+# clean_html 删除的属性（属性值包含即删除）
+HIDDEN_ATTRIBUTES = (("style", "display: none;"), ("style", "display:none;"), ("aria-hidden", "true"))
+
+_WIDTH = re.compile(r"width\s*:\s*\d+\s*px")
+_SPACE = re.compile(r"\s+")
+
+
+@dataclass
+class ExtractedArticle:
+    """正文解析结果"""
+
+    # 找到了正文节点（root_id 对应的节点不存在、或正文为空时为 False）
+    found: bool = False
+    html: str = ""
+    # 纯文本（空白已合并），供标签提取使用
+    text: str = ""
+    # 正文中的图片原始地址（按出现顺序）
+    images: List[str] = field(default_factory=list)
+
+
+def html_engine() -> str:
+    """正文解析引擎：lxml（默认）或 bs4"""
+    engine = str(cfg.get("gather.html_engine", "lxml", silent=True) or "lxml").lower()
+    if engine == "lxml" and lxml_html is None:
+        return "bs4"
+    return engine if engine in ("lxml", "bs4") else "lxml"
+
+
+def _hidden(el) -> bool:
+    for name, value in HIDDEN_ATTRIBUTES:
+        attr = el.get(name)
+        if attr and value in attr:
+            return True
+    return False
+
+
+def _remove_empty(root) -> bool:
+    """
+    删除空元素，规则与 htmltools.remove_empty_text_elements 相同：
+    非媒体元素、子树中没有媒体和可见文字，并且只有一串单子节点、或后代都是没有属性和内容的空标签
+
+    返回正文节点本身是否为空
+    """
+    # 先序的逆序：子元素一定先于父元素处理
+    nodes = list(root.iter(etree.Element))
+    info = {}
+    removable = []
+    for el in reversed(nodes):
+        children = list(el)
+        text = bool((el.text or "").strip())
+        media = el.tag in MEDIA_TAGS
+        rich = False
+        for child in children:
+            c_text, c_media, c_rich, _ = info[child]
+            text = text or c_text or bool((child.tail or "").strip())
+            media = media or c_media
+            # bs4 中后代元素有属性或有内容（子节点、文字，空白也算）时保留
+            rich = rich or c_rich or bool(child.attrib) or len(child) > 0 or bool(child.text)
+        # bs4 的 .string：唯一的子节点是文字，或唯一的子元素也满足该条件
+        if not children:
+            single = bool(el.text)
+        else:
+            single = (len(children) == 1 and not el.text and not children[0].tail and info[children[0]][3])
+        info[el] = (text, media, rich, single)
+        if not media and not text and (single or not rich):
+            removable.append(el)
+    if not removable:
+        return False
+    if removable[-1] is root:
+        return True
+    dropped = set()
+    # 按文档顺序删除，祖先已删除的跳过
+    for el in reversed(removable):
+        parent = el.getparent()
+        ancestor_dropped = False
+        while parent is not None:
+            if parent in dropped:
+                ancestor_dropped = True
+                break
+            parent = parent.getparent()
+        if ancestor_dropped:
+            continue
+        dropped.add(el)
+        el.drop_tree()
+    return False
+
+
+def extract_article(
+    html: str,
+    root_id: Optional[str] = "js_content",
+    clean: Optional[bool] = None,
+    rewrite_image: Optional[Callable[[str], Optional[str]]] = None,
+) -> ExtractedArticle:
+    """
+    解析文章页面，返回正文 HTML、纯文本和图片地址
+
+    Args:
+        html: 文章页面（或正文片段）
+        root_id: 正文节点 id；为 None 时整个片段都是正文
+        clean: 是否按 gather.clean_html 规则清理（None 时读取配置）
+        rewrite_image: 图片地址改写函数，返回新地址（如 MinIO 地址），返回空时使用原地址
+    """
+    result = ExtractedArticle()
+    if not html or not html.strip():
+        return result
+    if clean is None:
+        clean = bool(cfg.get("gather.clean_html", False, silent=True))
+    doc = lxml_html.fromstring(html)
+    if root_id:
+        root = doc.get_element_by_id(root_id, None)
+        if root is None:
+            return result
+        # 正文节点的 visibility: hidden 样式
+        root.attrib.pop("style", None)
+    elif doc.tag == "html":
+        body = doc.find("body")
+        root = body if body is not None else doc
+    else:
+        root = doc
+    # 一次遍历找出需要删除的节点
+    drops = []
+    for el in root.iter():
+        tag = el.tag
+        if not isinstance(tag, str):
+            # 注释、处理指令
+            drops.append(el)
+        elif tag in ("script", "style") or (clean and (tag in ("link", "head") or _hidden(el))):
+            drops.append(el)
+    for el in drops:
+        if el is root:
+            return result
+        el.drop_tree()
+    if clean and _remove_empty(root):
+        return result
+
+    for img in root.iter("img"):
+        url = str(img.get("data-src") or img.get("src") or "")
+        if not url:
+            continue
+        result.images.append(url)
+        new_url = rewrite_image(url) if rewrite_image is not None else None
+        if new_url:
+            img.set("src", new_url)
+            img.attrib.pop("data-src", None)
+        elif "data-src" in img.attrib:
+            img.set("src", img.attrib.pop("data-src"))
+        style = img.get("style")
+        if style:
+            img.set("style", _WIDTH.sub("width: 1080px", style))
+
+    result.found = True
+    result.html = lxml_html.tostring(root, encoding="unicode")
+    result.text = _SPACE.sub(" ", " ".join(t.strip() for t in root.itertext() if t.strip())).strip()
+    return result
@@ -6,13 +6,21 @@ import yaml
 import re
 from bs4 import BeautifulSoup
 from core.wx.base import WxGather
+from core.wx.html_extract import html_engine
+from core.wx.rate_limit import wx_limiter, RateLimited
 from core.print import print_error, print_info
 from core.log import logger
 # 继承 BaseGather 类
 class MpsApi(WxGather):
 
     # 重写 content_extract 方法
-    def content_extract(self, url, mp_id=None):
+    def content_extract(self, url, mp_id=None, upload_images=True, with_text=False):
+        """
+        提取文章正文
+
+        with_text 为 True 且使用 lxml 引擎时返回 {"content": 正文HTML, "text": 纯文本}，
+        纯文本随文章传给标签提取，避免入库后再解析一次正文
+        """
         try:
             # 如果提供了 mp_id，先检查文章是否已存在，避免重复上传图片
             article_exists = False
@@ -23,21 +31,31 @@ class MpsApi(WxGather):
                     article_id = self._extract_article_id_from_url(url) or "unknown"
                     if article_id != "unknown":
                         full_article_id = f"{str(mp_id)}-{article_id}".replace("MP_WXS_", "")
-                        DB = db.Db(tag="文章检查")
-                        db_session = DB.get_session()
-                        existing_article = db_session.query(Article).filter(Article.id == full_article_id).first()
-                        if existing_article is not None:
+                        known = self.KnownArticle(mp_id, article_id)
+                        if known is not None:
                             article_exists = True
                             # 如果文章已存在且有完整内容，直接返回已存在的内容（避免重复处理）
-                            if existing_article.content and len(existing_article.content.strip()) > 0:
+                            if known["has_content"]:
+                                DB = db.Db(tag="文章检查")
+                                with DB.session_scope() as db_session:
+                                    # 只取正文一列（content 为延迟加载列，会话关闭后不能再访问）
+                                    existing_content = db_session.query(Article.content).filter(Article.id == full_article_id).scalar()
                                 logger.info(f"文章已存在且有完整内容，跳过内容提取和图片上传: {full_article_id}")
-                                return existing_article.content
+                                return existing_content or ""
                             else:
                                 logger.info(f"文章已存在但内容不完整，继续提取内容但跳过图片上传: {full_article_id}")
                 except Exception as e:
                     logger.warning(f"检查文章是否存在时出错: {e}")
                     # 检查失败时继续处理，避免影响正常流程
             
+            if html_engine() == "lxml":
+                text = self.fetch_article_page(url)
+                if not text:
+                    return ""
+                parsed = self.parse_content(text, url, upload_images=upload_images and not article_exists)
+                if not parsed.found:
+                    return ""
+                return {"content": parsed.html, "text": parsed.text} if with_text else parsed.html
             text = super().content_extract(url)
             if text is not None:
                 soup = BeautifulSoup(text, 'html.parser')
@@ -69,8 +87,8 @@ class MpsApi(WxGather):
                     if not img_url:
                         continue
                     
-                    # 如果文章已存在，跳过图片上传，只处理src属性
-                    if article_exists:
+                    # 如果文章已存在（或图片交由采集流水线单独上传），跳过图片上传，只处理src属性
+                    if article_exists or not upload_images:
                         # 如果上传失败，至少确保src可用
                         if hasattr(img_tag, 'attrs') and 'data-src' in img_tag.attrs:
                             img_tag['src'] = img_tag['data-src']  # type: ignore
@@ -162,6 +180,7 @@ class MpsApi(WxGather):
             # 随机暂停几秒，避免过快的请求导致过快的被查到
             time.sleep(random.randint(0,interval))
             try:
+                wx_limiter.acquire()
                 headers = self.fix_header(url)
                 resp = session.get(url, headers=headers, params = params, verify=False)
                 
@@ -170,8 +189,11 @@ class MpsApi(WxGather):
                 self._cookies=resp.cookies
                 # 流量控制了, 退出
                 if msg['base_resp']['ret'] == 200013:
+                    wx_limiter.on_throttled("文章列表")
                     super().Error("frequencey control, stop at {}".format(str(begin)))
                     break
+                if msg['base_resp']['ret'] == 0:
+                    wx_limiter.on_success()
                 
                 if msg['base_resp']['ret'] == 200003:
                     super().Error("Invalid Session, stop at {}".format(str(begin)),code="Invalid Session")
@@ -189,6 +211,8 @@ class MpsApi(WxGather):
                     app_msg_list = msg["app_msg_list"]
                     app_msg_list.reverse()  # 反转列表，最新的在前
                     should_stop_this_page = False  # 标记是否应该停止处理当前页
+                    # 一次查询本页所有文章的入库状态
+                    known = super().LoadKnown(Mps_id, [it.get("aid") for it in app_msg_list], reset=True)
                     for item in app_msg_list:
                         # 先检查文章是否已存在且有完整内容，如果存在则跳过
                         article_id = str(item.get("aid", ""))
@@ -196,12 +220,8 @@ class MpsApi(WxGather):
                         if article_id and Mps_id:
                             full_article_id = f"{str(Mps_id)}-{article_id}".replace("MP_WXS_", "")
                             try:
-                                from core.models import Article
-                                import core.db as db
-                                DB = db.Db(tag="文章检查")
-                                db_session = DB.get_session()
-                                existing_article = db_session.query(Article).filter(Article.id == full_article_id).first()
-                                if existing_article and existing_article.content and len(existing_article.content.strip()) > 0:
+                                existing_article = known.get(full_article_id)
+                                if existing_article and existing_article["has_content"]:
                                     # 文章已存在且有完整内容，跳过处理
                                     article_exists = True
                                     consecutive_existing_count += 1
@@ -269,10 +289,13 @@ class MpsApi(WxGather):
                     # 或者遇到连续已存在文章时，也停止
                     if should_stop_by_date:
                         if found_start_date_article or consecutive_existing_count >= max_consecutive_existing:
-                        break
+                            break
                     print(f"第{i+1}页爬取成功\n")
                 # 翻页
                 i += 1
+            except RateLimited as e:
+                print(f"{e}, stop at {begin}")
+                break
             except requests.exceptions.Timeout:
                 print("Request timed out")
                 break
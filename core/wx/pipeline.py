@@ -0,0 +1,130 @@
+"""
+有界队列连接的异步处理阶段（采集流水线）
+
+每个阶段有自己的队列和 worker 数：队列满时上游 put 会等待（背压），
+慢阶段只会拖慢自己的上游，不会让整个采集串行卡住。
+每个阶段记录处理数、错误数、忙碌时间、背压等待时间和队列峰值，用于观察各阶段吞吐。
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.log import logger
+
+_STOP = object()
+
+
+@dataclass
+class StageMetrics:
+    """单个阶段的统计"""
+
+    name: str
+    workers: int
+    processed: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    # 向下游放入时因队列已满而等待的时间（背压）
+    blocked_seconds: float = 0.0
+    queue_peak: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "errors": self.errors,
+            "throughput": round(self.processed / elapsed, 2),
+            "utilization": round(self.busy_seconds / (elapsed * max(self.workers, 1)), 2),
+            "busy_seconds": round(self.busy_seconds, 1),
+            "blocked_seconds": round(self.blocked_seconds, 1),
+            "queue_peak": self.queue_peak,
+        }
+
+
+class Stage:
+    """
+    一个流水线阶段
+
+    handler 返回值非 None 时放入下游阶段；batch_size > 1 时 handler 收到的是列表
+    （取到第一个元素后把队列中已有的元素一并取出，最多 batch_size 个）。
+    handler 抛出异常时计入 errors 并调用 on_error(items, exc)，由调用方做收尾。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        workers: int = 1,
+        maxsize: int = 0,
+        downstream: Optional["Stage"] = None,
+        batch_size: int = 1,
+        on_error: Optional[Callable[[List[Any], BaseException], None]] = None,
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(0, int(maxsize)))
+        self.downstream = downstream
+        self.batch_size = max(1, int(batch_size))
+        self.on_error = on_error
+        self.metrics = StageMetrics(name, self.workers)
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> "Stage":
+        self.metrics.started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._worker(), name=f"{self.name}-{i}") for i in range(self.workers)]
+        return self
+
+    async def put(self, item: Any, source: Optional[StageMetrics] = None) -> None:
+        """放入一个元素；队列满时等待，等待时间计入 source（上游）的 blocked_seconds"""
+        if self.queue.full():
+            started = time.monotonic()
+            await self.queue.put(item)
+            if source is not None:
+                source.blocked_seconds += time.monotonic() - started
+        else:
+            self.queue.put_nowait(item)
+        self.metrics.queue_peak = max(self.metrics.queue_peak, self.queue.qsize())
+
+    async def close(self) -> None:
+        """等待队列中已有元素处理完后停止 worker"""
+        for _ in self._tasks:
+            await self.queue.put(_STOP)
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self.queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    more = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if more is _STOP:
+                    stop = True
+                    break
+                batch.append(more)
+            started = time.monotonic()
+            result = None
+            try:
+                result = await self.handler(batch if self.batch_size > 1 else item)
+            except Exception as e:
+                self.metrics.errors += len(batch)
+                logger.warning(f"采集流水线阶段 {self.name} 处理失败: {e}")
+                if self.on_error is not None:
+                    self.on_error(batch, e)
+            finally:
+                self.metrics.busy_seconds += time.monotonic() - started
+                self.metrics.processed += len(batch)
+            if result is not None and self.downstream is not None:
+                await self.downstream.put(result, source=self.metrics)
+            if stop:
+                return
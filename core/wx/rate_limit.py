@@ -0,0 +1,196 @@
+"""
+mp.weixin.qq.com 请求的全局自适应限流（令牌桶 + AIMD）
+
+列表接口、正文页、公众号搜索都从同一个令牌桶取令牌：
+- 正常响应时缓慢加速（每次成功速率加 rate_limit.increase，不超过 max_rate）
+- 遇到频率限制（ret=200013 / “当前环境异常”）时速率乘以 rate_limit.decrease（不低于 min_rate），
+  并进入冷却期；连续触发时冷却时间翻倍（不超过 max_cooldown）
+- 冷却期间不再发出请求：等待时间超过 max_wait 的调用直接抛出 RateLimited，
+  调度任务据此暂停整轮采集，而不是继续把请求浪费在被限流的账号上
+
+当前速率与冷却状态可通过 wx_limiter.status() 查看（系统信息 rate_limit）。
+启用账号池（core.wx.session_pool）时，列表接口改用各账号自己的限流器（参数相同），wx_limiter 只管不依赖账号的请求。
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from core.config import cfg
+from core.log import logger
+
+# 频率限制返回码
+RET_FREQUENCY_CONTROL = 200013
+
+
+class RateLimited(Exception):
+    """限流器处于冷却期（或排队时间过长），本次请求未发出"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(0.0, float(retry_after))
+        super().__init__(f"公众号平台请求频率限制，约 {int(self.retry_after)} 秒后再试")
+
+
+def rate_limit_settings() -> Dict[str, Any]:
+    """读取 rate_limit 配置"""
+    def _float(key: str, default: float) -> float:
+        try:
+            return float(cfg.get(key, default, silent=True) or default)
+        except (ValueError, TypeError):
+            return default
+
+    max_rate = max(0.01, _float("rate_limit.max_rate", 1.0))
+    min_rate = min(max_rate, max(0.001, _float("rate_limit.min_rate", 0.05)))
+    return {
+        "enabled": bool(cfg.get("rate_limit.enabled", True, silent=True)),
+        "rate": min(max_rate, max(min_rate, _float("rate_limit.rate", 0.5))),
+        "min_rate": min_rate,
+        "max_rate": max_rate,
+        "burst": max(1.0, _float("rate_limit.burst", 3)),
+        "increase": max(0.0, _float("rate_limit.increase", 0.01)),
+        "decrease": min(0.95, max(0.05, _float("rate_limit.decrease", 0.5))),
+        "cooldown": max(0.0, _float("rate_limit.cooldown", 300)),
+        "max_cooldown": max(0.0, _float("rate_limit.max_cooldown", 3600)),
+        "max_wait": max(0.0, _float("rate_limit.max_wait", 60)),
+    }
+
+
+class AdaptiveRateLimiter:
+    """
+    进程级令牌桶，线程与协程共用
+
+    acquire() 先预约令牌再在锁外等待，多个线程/协程按预约顺序依次放行；
+    on_throttled()/on_success() 由调用方根据响应结果反馈。
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self._lock = threading.Lock()
+        self.configure(settings or rate_limit_settings())
+
+    def configure(self, settings: Dict[str, Any]) -> None:
+        with self._lock:
+            self.settings = settings
+            self.enabled = settings["enabled"]
+            self.rate = settings["rate"]
+            self.tokens = settings["burst"]
+            self._updated = time.monotonic()
+            self._cooldown_until = 0.0
+            self._throttle_streak = 0
+            self.requests = 0
+            self.throttled = 0
+            self.last_throttled_at: Optional[float] = None
+
+    # ------------------------------------------------------------ 取令牌
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self.tokens = min(self.settings["burst"], self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def _reserve(self, max_wait: Optional[float]) -> float:
+        """预约一个令牌，返回需要等待的秒数；等待超过 max_wait 时不预约并抛出 RateLimited"""
+        if not self.enabled:
+            return 0.0
+        if max_wait is None:
+            max_wait = self.settings["max_wait"]
+        with self._lock:
+            now = time.monotonic()
+            # 冷却期内从冷却结束时刻开始计算令牌
+            start = max(now, self._cooldown_until)
+            self._refill(start)
+            wait = start - now
+            if self.tokens < 1:
+                wait += (1 - self.tokens) / self.rate
+            if wait > max_wait:
+                raise RateLimited(wait)
+            # 令牌为负表示已被排队中的请求预约
+            self.tokens -= 1
+            self.requests += 1
+            return wait
+
+    def acquire(self, max_wait: Optional[float] = None) -> float:
+        """同步取令牌（阻塞到可以发请求），返回实际等待的秒数"""
+        wait = self._reserve(max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, max_wait: Optional[float] = None) -> float:
+        """协程版 acquire"""
+        wait = self._reserve(max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def wait_time(self) -> float:
+        """现在取令牌需要排队的秒数（只估算，不预约），账号池据此选最空闲的账号"""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._cooldown_until)
+            tokens = self.tokens
+            if start > self._updated:
+                tokens = min(self.settings["burst"], tokens + (start - self._updated) * self.rate)
+            wait = start - now
+            if tokens < 1:
+                wait += (1 - tokens) / self.rate
+            return wait
+
+    # ------------------------------------------------------------ 响应反馈
+
+    def on_success(self) -> None:
+        """正常响应：加性增速"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if time.monotonic() >= self._cooldown_until:
+                self._throttle_streak = 0
+            self.rate = min(self.settings["max_rate"], self.rate + self.settings["increase"])
+
+    def on_throttled(self, source: str = "") -> float:
+        """触发频率限制：乘性降速并进入冷却期，返回冷却秒数"""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            self.last_throttled_at = time.time()
+            self._throttle_streak += 1
+            self.rate = max(self.settings["min_rate"], self.rate * self.settings["decrease"])
+            cooldown = min(
+                self.settings["max_cooldown"],
+                self.settings["cooldown"] * (2 ** (self._throttle_streak - 1)),
+            )
+            self._cooldown_until = max(self._cooldown_until, now + cooldown)
+            self.tokens = min(self.tokens, 0.0)
+            rate = self.rate
+        logger.warning(f"公众号平台频率限制{f'（{source}）' if source else ''}: 速率降至 {rate:.3f} 次/秒，冷却 {int(cooldown)} 秒")
+        return cooldown
+
+    # ------------------------------------------------------------ 状态
+
+    def cooldown_remaining(self) -> float:
+        return max(0.0, self._cooldown_until - time.monotonic()) if self.enabled else 0.0
+
+    def cooling_down(self) -> bool:
+        return self.cooldown_remaining() > 0
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "enabled": self.enabled,
+                "rate": round(self.rate, 4),
+                "min_rate": self.settings["min_rate"],
+                "max_rate": self.settings["max_rate"],
+                "tokens": round(self.tokens, 2),
+                "cooling_down": self.cooling_down(),
+                "cooldown_remaining": int(self.cooldown_remaining()),
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "last_throttled_at": self.last_throttled_at,
+            }
+
+
+wx_limiter = AdaptiveRateLimiter()
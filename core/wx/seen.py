@@ -0,0 +1,160 @@
+"""
+采集去重用的“已处理文章”集合
+
+WxGather.HasGathered 原先把 aid 追加到类属性列表：所有实例共用、进程生命周期内只增不减，
+判断是 O(n) 的列表查找。这里改为：
+- SeenSet：每次采集运行一个，按 LRU 淘汰、容量有上限（gather.seen_capacity）的哈希集合
+- SeenBloom：可选的磁盘布隆过滤器（gather.seen_bloom），跨运行记住已采集过正文的文章；
+  有一定误判率（gather.seen_bloom_error_rate），误判的文章本次不采正文，由正文补采任务补上
+"""
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from core.config import cfg
+from core.log import logger
+
+
+def _int(key: str, default: int) -> int:
+    try:
+        return int(cfg.get(key, default, silent=True) or default)
+    except (ValueError, TypeError):
+        return default
+
+
+class SeenSet:
+    """容量有上限的 LRU 集合（单次采集运行内使用）"""
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = max(1, capacity or _int("gather.seen_capacity", 10000))
+        self._items: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key: str) -> bool:
+        """记录 key，返回之前是否已经存在"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return True
+            self._items[key] = None
+            if len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+            return False
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+class SeenBloom:
+    """
+    持久化的布隆过滤器
+
+    位数组按 capacity 和误判率计算大小，直接以文件保存（文件头记录参数，参数变化时重建）。
+    写入只改内存，flush() 时整体写回（临时文件 + 替换）。
+    """
+
+    MAGIC = b"WSBF1"
+
+    def __init__(self, path: str, capacity: int = 1000000, error_rate: float = 0.001):
+        self.path = path
+        self.capacity = max(1000, int(capacity))
+        self.error_rate = min(0.5, max(1e-6, float(error_rate)))
+        self.bits = max(8, int(-self.capacity * math.log(self.error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.bits / self.capacity * math.log(2))))
+        self._data = bytearray((self.bits + 7) // 8)
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _header(self) -> bytes:
+        return self.MAGIC + f":{self.bits}:{self.hashes}\n".encode()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                header = f.readline()
+                if header != self._header():
+                    logger.info("布隆过滤器参数已变化，重新建立")
+                    return
+                data = f.read()
+            if len(data) == len(self._data):
+                self._data = bytearray(data)
+        except OSError as e:
+            logger.warning(f"读取布隆过滤器失败: {e}")
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key: str) -> bool:
+        """记录 key，返回之前是否（可能）已经存在"""
+        with self._lock:
+            existed = True
+            for pos in self._positions(key):
+                byte, bit = divmod(pos, 8)
+                if not self._data[byte] & (1 << bit):
+                    existed = False
+                    self._data[byte] |= 1 << bit
+            if not existed:
+                self._dirty = True
+            return existed
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return all(self._data[pos // 8] & (1 << (pos % 8)) for pos in self._positions(key))
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = bytes(self._data)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(self._header())
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            self._dirty = True
+            logger.warning(f"保存布隆过滤器失败: {e}")
+
+
+_bloom: Optional[SeenBloom] = None
+_bloom_lock = threading.Lock()
+
+
+def get_seen_bloom() -> Optional[SeenBloom]:
+    """gather.seen_bloom 开启时返回进程内共用的布隆过滤器，否则返回 None"""
+    global _bloom
+    if not cfg.get("gather.seen_bloom", False, silent=True):
+        return None
+    if _bloom is None:
+        with _bloom_lock:
+            if _bloom is None:
+                try:
+                    error_rate = float(cfg.get("gather.seen_bloom_error_rate", 0.001, silent=True) or 0.001)
+                except (ValueError, TypeError):
+                    error_rate = 0.001
+                _bloom = SeenBloom(
+                    str(cfg.get("gather.seen_bloom_path", "data/seen_articles.bloom", silent=True) or "data/seen_articles.bloom"),
+                    capacity=_int("gather.seen_bloom_capacity", 1000000),
+                    error_rate=error_rate,
+                )
+    return _bloom
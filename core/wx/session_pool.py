@@ -0,0 +1,415 @@
+"""
+公众号平台账号池（多个已授权账号轮流请求）
+
+原先采集只用 driver/token.wx_cfg（data/wx.lic）中的一个登录账号：所有公众号共用一个账号的请求频率，
+Session 失效时 Error(code="Invalid Session") 让整轮采集停止并等待重新登录。账号池保存多个已授权账号：
+
+- 每次扫码登录（driver.token.set_token）都会把账号加入账号池文件（session_pool.path，默认 data/wx_accounts.json），
+  同一账号重新登录时更新 token/cookie 并清除失效标记；wx.lic 中的当前账号始终在池中
+- 每个账号有自己的 token/cookie、有效期和限流器（AdaptiveRateLimiter，参数同 rate_limit 配置）
+- 采集每次请求列表接口前租用一个账号（lease/lease_async）：跳过已失效、即将过期（剩余不足 expiry_margin 秒）的账号，
+  在其余账号中选排队时间最短的；调用方按响应结果反馈 on_success / on_throttled / invalidate
+- 所有账号都不可用时抛出 SessionUnavailable；只有这时才按原来的方式标记登录失效并触发重新登录
+
+session_pool.enabled 为 False 时池中只有 wx.lic 的账号，并且使用全局限流器 wx_limiter，与原来的行为一致。
+启用时正文页、公众号搜索等不依赖账号的请求仍走全局限流器，列表接口按账号限流。
+
+各账号状态可通过 session_pool.status() 查看（系统信息 sessions）。
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.config import cfg
+from core.log import logger
+from core.wx.rate_limit import AdaptiveRateLimiter, rate_limit_settings, wx_limiter
+
+_SLAVE_USER = re.compile(r"(?:^|;\s*)slave_user=([^;]+)")
+
+
+class SessionUnavailable(Exception):
+    """账号池中没有可用的账号"""
+
+    def __init__(self, reason: str, message: str = ""):
+        # no_session：没有登录账号；invalid_session：全部失效或过期；excluded：其余账号都被调用方排除
+        self.reason = reason
+        super().__init__(message or f"没有可用的公众号平台账号（{reason}）")
+
+
+def session_pool_settings() -> Dict[str, Any]:
+    """读取 session_pool 配置"""
+    try:
+        margin = float(cfg.get("session_pool.expiry_margin", 600, silent=True) or 0)
+    except (ValueError, TypeError):
+        margin = 600.0
+    return {
+        "enabled": bool(cfg.get("session_pool.enabled", True, silent=True)),
+        "path": str(cfg.get("session_pool.path", "data/wx_accounts.json", silent=True) or "data/wx_accounts.json"),
+        "expiry_margin": max(0.0, margin),
+    }
+
+
+def _mask(value: str, keep: int = 4) -> str:
+    value = str(value or "")
+    if len(value) <= keep * 2:
+        return "*" * len(value)
+    return f"{value[:keep]}***{value[-keep:]}"
+
+
+def session_key(token: str, cookie: str = "", ext_data: Optional[Dict[str, Any]] = None) -> str:
+    """账号标识：公众号原始 ID（登录信息 wx_app_name / cookie 中的 slave_user），都没有时用 token 摘要"""
+    name = str((ext_data or {}).get("wx_app_name") or "").strip()
+    if name:
+        return name
+    match = _SLAVE_USER.search(cookie or "")
+    if match:
+        return match.group(1).strip()
+    return "token-" + hashlib.md5(str(token or "").encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class WxSession:
+    """账号池中的一个已授权账号"""
+
+    key: str
+    token: str
+    cookie: str
+    fingerprint: str = ""
+    expiry: Dict[str, Any] = field(default_factory=dict)
+    ext_data: Dict[str, Any] = field(default_factory=dict)
+    added_at: float = field(default_factory=time.time)
+    # 非空表示 Session 已失效（接口返回的错误），重新登录后清除
+    invalid: str = ""
+    invalid_at: Optional[float] = None
+    # 运行时状态（不写入账号池文件）
+    limiter: Optional[AdaptiveRateLimiter] = None
+    primary: bool = False
+    requests: int = 0
+    throttled: int = 0
+    last_used_at: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return str(self.ext_data.get("wx_app_name") or self.key)
+
+    @property
+    def expiry_timestamp(self) -> Optional[float]:
+        try:
+            value = self.expiry.get("expiry_timestamp") if isinstance(self.expiry, dict) else None
+            return float(value) if value else None
+        except (ValueError, TypeError):
+            return None
+
+    def remaining_seconds(self) -> Optional[int]:
+        expiry = self.expiry_timestamp
+        return None if expiry is None else int(expiry - time.time())
+
+    def expired(self, margin: float = 0) -> bool:
+        remaining = self.remaining_seconds()
+        return remaining is not None and remaining < margin
+
+    def usable(self, margin: float = 0) -> bool:
+        """已登录、未失效且未过期（不考虑限流冷却）"""
+        return bool(self.token) and not self.invalid and not self.expired(margin)
+
+    def state(self, margin: float = 0) -> str:
+        if not self.token:
+            return "no_token"
+        if self.invalid:
+            return "invalid"
+        if self.expired(margin):
+            return "expired"
+        if self.limiter is not None and self.limiter.cooling_down():
+            return "cooling_down"
+        return "healthy"
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "key": self.key, "token": self.token, "cookie": self.cookie, "fingerprint": self.fingerprint,
+            "expiry": self.expiry, "ext_data": self.ext_data, "added_at": self.added_at,
+            "invalid": self.invalid, "invalid_at": self.invalid_at,
+        }
+
+    def status(self, margin: float = 0) -> Dict[str, Any]:
+        limiter = self.limiter.status() if self.limiter is not None else {}
+        return {
+            "key": self.key,
+            "name": self.name,
+            "primary": self.primary,
+            "state": self.state(margin),
+            "token": _mask(self.token),
+            "expiry_time": self.expiry.get("expiry_time", "") if isinstance(self.expiry, dict) else "",
+            "remaining_seconds": self.remaining_seconds(),
+            "invalid": self.invalid,
+            "invalid_at": self.invalid_at,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "last_used_at": self.last_used_at,
+            "rate": limiter.get("rate"),
+            "cooldown_remaining": limiter.get("cooldown_remaining", 0),
+        }
+
+
+class SessionPool:
+    """
+    账号池，线程与协程共用
+
+    账号列表在首次使用时从账号池文件和 wx.lic 加载，reload() 重新读取（保留各账号的限流状态）。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sessions: Dict[str, WxSession] = {}
+        self._loaded = False
+        self.settings = session_pool_settings()
+
+    # ------------------------------------------------------------ 加载与保存
+
+    def _limiter_for(self, session: WxSession) -> AdaptiveRateLimiter:
+        if not self.settings["enabled"]:
+            return wx_limiter
+        if session.limiter is None or session.limiter is wx_limiter:
+            return AdaptiveRateLimiter(rate_limit_settings())
+        return session.limiter
+
+    def _read_file(self) -> List[Dict[str, Any]]:
+        path = self.settings["path"]
+        if not os.path.exists(path):
+            return []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取账号池文件 {path} 失败: {e}")
+            return []
+        records = data.get("accounts", []) if isinstance(data, dict) else []
+        return [r for r in records if isinstance(r, dict) and r.get("token")]
+
+    def _write_file(self) -> None:
+        if not self.settings["enabled"]:
+            return
+        path = self.settings["path"]
+        records = [s.to_record() for s in self._sessions.values()]
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"accounts": records}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"保存账号池文件 {path} 失败: {e}")
+
+    @staticmethod
+    def _primary_record() -> Optional[Dict[str, Any]]:
+        """wx.lic 中当前登录的账号"""
+        from driver.token import wx_cfg
+        token = str(wx_cfg.get("token", "", silent=True) or "")
+        if not token:
+            return None
+        ext_data = wx_cfg.get("ext_data", {}, silent=True)
+        expiry = wx_cfg.get("expiry", {}, silent=True)
+        return {
+            "token": token,
+            "cookie": str(wx_cfg.get("cookie", "", silent=True) or ""),
+            "fingerprint": str(wx_cfg.get("fingerprint", "", silent=True) or ""),
+            "expiry": expiry if isinstance(expiry, dict) else {},
+            "ext_data": ext_data if isinstance(ext_data, dict) else {},
+        }
+
+    def _merge(self, record: Dict[str, Any], primary: bool = False) -> WxSession:
+        """按账号标识合并一条记录：token 变化（重新登录）时更新凭据并清除失效标记"""
+        ext_data = record.get("ext_data") or {}
+        key = record.get("key") or session_key(record.get("token", ""), record.get("cookie", ""), ext_data)
+        session = self._sessions.get(key)
+        if session is None:
+            session = WxSession(
+                key=key, token=record.get("token", ""), cookie=record.get("cookie", ""),
+                fingerprint=record.get("fingerprint", ""), expiry=record.get("expiry") or {},
+                ext_data=ext_data, added_at=record.get("added_at") or time.time(),
+                invalid=record.get("invalid") or "", invalid_at=record.get("invalid_at"),
+            )
+            self._sessions[key] = session
+        elif record.get("token") and record.get("token") != session.token:
+            session.token = record["token"]
+            session.cookie = record.get("cookie", "")
+            session.fingerprint = record.get("fingerprint", "")
+            session.expiry = record.get("expiry") or {}
+            session.ext_data = ext_data or session.ext_data
+            session.invalid = record.get("invalid") or ""
+            session.invalid_at = record.get("invalid_at")
+        session.primary = session.primary or primary
+        session.limiter = self._limiter_for(session)
+        return session
+
+    def reload(self) -> None:
+        """重新读取账号池文件和 wx.lic（保留各账号的限流器和计数）"""
+        with self._lock:
+            self.settings = session_pool_settings()
+            previous = self._sessions
+            self._sessions = {}
+            records = self._read_file() if self.settings["enabled"] else []
+            for record in records:
+                self._merge(record)
+            primary = self._primary_record()
+            if primary is not None:
+                self._merge(primary, primary=True)
+            for key, session in self._sessions.items():
+                old = previous.get(key)
+                if old is None:
+                    continue
+                session.requests, session.throttled, session.last_used_at = old.requests, old.throttled, old.last_used_at
+                if self.settings["enabled"] and old.limiter is not None and old.limiter is not wx_limiter:
+                    session.limiter = old.limiter
+                if old.invalid and not session.invalid and old.token == session.token:
+                    # 内存中标记的失效（wx.lic 还没有更新）保留到重新登录
+                    session.invalid, session.invalid_at = old.invalid, old.invalid_at
+            self._loaded = True
+            if primary is not None and self.settings["enabled"]:
+                # wx.lic 中的账号（例如升级前登录的）也写入账号池文件
+                key = session_key(primary["token"], primary["cookie"], primary["ext_data"])
+                if key not in {r.get("key") for r in records}:
+                    self._write_file()
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.reload()
+
+    # ------------------------------------------------------------ 账号管理
+
+    def add(self, data: Dict[str, Any], ext_data: Optional[Dict[str, Any]] = None) -> Optional[WxSession]:
+        """登录成功后加入（或更新）账号，data 与 driver.token.set_token 的参数相同"""
+        token = str((data or {}).get("token") or "")
+        if not token:
+            return None
+        record = {
+            "token": token,
+            "cookie": data.get("cookies_str", "") or data.get("cookie", ""),
+            "fingerprint": data.get("fingerprint", ""),
+            "expiry": data.get("expiry") or {},
+            "ext_data": ext_data or {},
+        }
+        with self._lock:
+            self._ensure_loaded()
+            if not self.settings["enabled"]:
+                # 只用 wx.lic 的账号：新登录替换原账号
+                self._sessions = {}
+            session = self._merge(record, primary=True)
+            # 同一账号重新登录：即使 token 相同也更新 cookie/有效期并清除失效标记
+            session.cookie, session.expiry = record["cookie"], record["expiry"]
+            session.fingerprint = record["fingerprint"] or session.fingerprint
+            session.ext_data = record["ext_data"] or session.ext_data
+            session.invalid, session.invalid_at = "", None
+            for other in self._sessions.values():
+                other.primary = other is session
+            self._write_file()
+        logger.info(f"账号池: 账号 {session.name} 已加入（共 {len(self._sessions)} 个）")
+        return session
+
+    def remove(self, key: str) -> bool:
+        """从账号池移除账号（wx.lic 中的当前账号下次 reload 时会重新加入）"""
+        with self._lock:
+            self._ensure_loaded()
+            if self._sessions.pop(key, None) is None:
+                return False
+            self._write_file()
+            return True
+
+    def sessions(self) -> List[WxSession]:
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._sessions.values())
+
+    def get(self, key: Optional[str]) -> Optional[WxSession]:
+        if not key:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            return self._sessions.get(key)
+
+    # ------------------------------------------------------------ 租用
+
+    def available(self, exclude: Optional[Iterable[str]] = None) -> List[WxSession]:
+        """未失效、未过期的账号（冷却中的也算），按排队时间、最久未使用排序"""
+        exclude = set(exclude or ())
+        margin = self.settings["expiry_margin"]
+        with self._lock:
+            self._ensure_loaded()
+            candidates = [s for s in self._sessions.values() if s.key not in exclude and s.usable(margin)]
+        return sorted(candidates, key=lambda s: (round(s.limiter.wait_time(), 3), s.last_used_at or 0, not s.primary))
+
+    def pick(self, exclude: Optional[Iterable[str]] = None) -> Optional[WxSession]:
+        """当前最空闲的可用账号（不取令牌），没有时返回 None"""
+        candidates = self.available(exclude)
+        return candidates[0] if candidates else None
+
+    def _choose(self, exclude: Optional[Iterable[str]]) -> WxSession:
+        exclude = set(exclude or ())
+        session = self.pick(exclude)
+        with self._lock:
+            if session is not None:
+                session.requests += 1
+                session.last_used_at = time.time()
+                return session
+            if not self._sessions:
+                raise SessionUnavailable("no_session", "没有已登录的公众号平台账号")
+            if any(s.usable(self.settings["expiry_margin"]) for s in self._sessions.values()):
+                raise SessionUnavailable("excluded", "其余公众号平台账号都已被限制")
+            raise SessionUnavailable("invalid_session", "公众号平台账号全部失效或即将过期")
+
+    def lease(self, exclude: Optional[Iterable[str]] = None, max_wait: Optional[float] = None) -> WxSession:
+        """
+        租用一个账号发一次请求：选排队时间最短的可用账号并取令牌（阻塞到可以发请求）
+
+        没有可用账号时抛出 SessionUnavailable；最空闲的账号也要排队超过 max_wait 时抛出 RateLimited
+        """
+        session = self._choose(exclude)
+        session.limiter.acquire(max_wait)
+        return session
+
+    async def lease_async(self, exclude: Optional[Iterable[str]] = None, max_wait: Optional[float] = None) -> WxSession:
+        """协程版 lease"""
+        session = self._choose(exclude)
+        await session.limiter.acquire_async(max_wait)
+        return session
+
+    # ------------------------------------------------------------ 响应反馈
+
+    def on_success(self, session: WxSession) -> None:
+        session.limiter.on_success()
+
+    def on_throttled(self, session: WxSession, source: str = "") -> float:
+        session.throttled += 1
+        return session.limiter.on_throttled(f"{session.name} {source}".strip())
+
+    def invalidate(self, session: Optional[WxSession], reason: str) -> None:
+        """标记账号 Session 失效（写入账号池文件，重新登录该账号后清除）"""
+        if session is None or session.invalid:
+            return
+        with self._lock:
+            session.invalid = str(reason or "invalid")
+            session.invalid_at = time.time()
+            self._write_file()
+        remaining = len(self.available())
+        logger.warning(f"账号池: 账号 {session.name} Session 失效（{reason}），剩余可用账号 {remaining} 个")
+
+    # ------------------------------------------------------------ 状态
+
+    def status(self) -> Dict[str, Any]:
+        margin = self.settings["expiry_margin"]
+        sessions = self.sessions()
+        accounts = [s.status(margin) for s in sessions]
+        return {
+            "enabled": self.settings["enabled"],
+            "total": len(accounts),
+            "available": sum(1 for s in sessions if s.usable(margin)),
+            "healthy": sum(1 for a in accounts if a["state"] == "healthy"),
+            "accounts": accounts,
+        }
+
+
+session_pool = SessionPool()
@@ -0,0 +1,66 @@
+"""
+公众号增量采集水位
+
+每个公众号记录上次完整采集到的最新文章（aid + 发布时间，存于 feeds.watermark_aid / watermark_time）。
+采集翻页时遇到水位文章（或更早的文章）即停止，定时任务通常每个有更新的公众号只需请求一页列表。
+只有本次翻页确实到达水位（或首次采集正常结束）且所有文章都已处理时才推进水位，
+中途失败、被限流或达到页数上限而没到水位时保留原水位，下次从头补齐。
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import or_
+
+from core.log import logger
+
+Watermark = Tuple[str, int]
+
+
+def load_watermarks(feed_ids: Iterable[str]) -> Dict[str, Watermark]:
+    """批量读取水位 {feed_id: (aid, update_time)}，没有水位的公众号不在结果中"""
+    from core.db import DB
+    from core.models.feed import Feed
+    feed_ids = [i for i in feed_ids if i]
+    if not feed_ids:
+        return {}
+    with DB.read_session_scope() as session:
+        rows = (
+            session.query(Feed.id, Feed.watermark_aid, Feed.watermark_time)
+            .filter(Feed.id.in_(feed_ids), Feed.watermark_time.isnot(None))
+            .all()
+        )
+    return {row.id: (row.watermark_aid or "", int(row.watermark_time)) for row in rows}
+
+
+def save_watermark(feed_id: str, aid: str, update_time: int) -> bool:
+    """推进水位（只前进不后退），返回是否更新"""
+    from core.db import DB
+    from core.models.feed import Feed
+    with DB.write_session_scope() as session:
+        updated = (
+            session.query(Feed)
+            .filter(
+                Feed.id == feed_id,
+                or_(Feed.watermark_time.is_(None), Feed.watermark_time <= int(update_time)),
+            )
+            .update(
+                {Feed.watermark_aid: str(aid), Feed.watermark_time: int(update_time)},
+                synchronize_session=False,
+            )
+        )
+        session.commit()
+    if updated:
+        logger.info(f"公众号 {feed_id} 采集水位推进到 {aid}@{update_time}")
+    return bool(updated)
+
+
+def reset_watermarks(feed_ids: Optional[Iterable[str]] = None) -> int:
+    """清除水位（不传 feed_ids 时清除全部），下次采集按原有停止条件翻页"""
+    from core.db import DB
+    from core.models.feed import Feed
+    with DB.write_session_scope() as session:
+        query = session.query(Feed).filter(Feed.watermark_time.isnot(None))
+        if feed_ids is not None:
+            query = query.filter(Feed.id.in_(list(feed_ids)))
+        count = query.update({Feed.watermark_aid: None, Feed.watermark_time: None}, synchronize_session=False)
+        session.commit()
+    return count
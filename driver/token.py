@@ -3,7 +3,7 @@ from core.config import Config,cfg
 # 确保data目录和wx.lic文件存在
 import os
 
-from core.print import print_success
+from core.print import print_success,print_warning
 lic_path="./data/wx.lic"
 os.makedirs(os.path.dirname(lic_path), exist_ok=True)
 if not os.path.exists(lic_path):
@@ -28,6 +28,12 @@ def set_token(data:any,ext_data:any=None):
         wx_cfg.set("ext_data", ext_data)
     wx_cfg.save_config()
     wx_cfg.reload()
+    # 同时加入账号池，多次扫码登录不同账号时轮流使用
+    try:
+        from core.wx.session_pool import session_pool
+        session_pool.add(data, ext_data)
+    except Exception as e:
+        print_warning(f"账号加入账号池失败: {e}")
     from jobs.notice import sys_notice
     
 #     sys_notice(f"""WeRss授权成功
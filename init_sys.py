@@ -36,10 +36,8 @@ def init_user(_db: Db):
         print_error(f"Init user error: {str(e)}")
         pass
 def sync_models():
-     # 同步模型到表结构
-         DB.create_tables()
-         time.sleep(1)
-         DB.migrate_tables()
+     # 同步模型到表结构（表结构指纹一致时跳过检查）
+         DB.sync_schema()
          print_info("模型同步完成")
 
      
@@ -0,0 +1,29 @@
+from core.task import TaskScheduler
+from core.print import print_success, print_error
+scheduler = TaskScheduler()
+
+
+def archive_old_articles():
+    """把发布时间早于 archive.days 天的文章移入归档段文件"""
+    from core.article_archive import run_archive
+    try:
+        total = run_archive()
+        if total:
+            print_success(f"已归档 {total} 篇历史文章")
+    except Exception as e:
+        print_error(f"归档历史文章失败: {e}")
+
+
+def start_archive():
+    from core.article_archive import archive_settings
+    settings = archive_settings()
+    if not settings["enabled"]:
+        return
+    scheduler.clear_all_jobs()
+    job_id = scheduler.add_cron_job(archive_old_articles, cron_expr=settings["cron"], tag="历史文章归档")
+    print_success(f"已添加历史文章归档任务: {job_id}")
+    scheduler.start()
+
+
+if __name__ == "__main__":
+    archive_old_articles()
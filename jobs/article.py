@@ -15,6 +15,19 @@ def UpdateArticle(art:dict,check_exist=False):
         mps_count=mps_count+1
         return True
     return False
+def UpdateArticles(arts:list,policy=None):
+    """
+    批量入库一页文章，返回新写入的文章ID；写入失败时抛出异常（整页回滚），不能当作没有新文章
+
+    新文章的计数与通知登记（self.articles）由采集器按返回的ID完成，
+    见 WxGather.FlushPending 与采集引擎 _persist_batch，与逐篇入库时 FillBack 的处理一致
+    """
+    if DEBUG:
+        # DB.delete_article(art)
+        pass
+    return DB.add_articles_bulk(arts,policy=policy)
+# 采集器检测到 bulk 属性时按页批量入库
+UpdateArticle.bulk=UpdateArticles
 def Update_Over(data=None):
     print("更新完成")
     pass
\ No newline at end of file
@@ -0,0 +1,67 @@
+from core.task import TaskScheduler
+from core.config import cfg
+from core.print import print_success, print_error
+scheduler = TaskScheduler()
+
+# 迁移进度（按文章 id 续跑）。新写入的正文已由 CompressedText 压缩，已有正文只需扫描一遍；
+# 进程重启后从头扫描，已压缩的行和低于 min_size 的行会被过滤掉
+_state = {"last_id": "", "dict_checked": False, "done": False}
+
+
+def compress_existing_content():
+    """
+    将已有的未压缩正文分批转换为压缩存储
+
+    首次执行时若启用了字典且库中还没有字典，先用已有文章训练一个。
+    """
+    from core.content_codec import (
+        active_dictionary_id,
+        compression_settings,
+        migrate_batch,
+        train_content_dictionary,
+        zstd_available,
+    )
+    settings = compression_settings()
+    if _state["done"] or not settings["enabled"] or not zstd_available():
+        return
+    try:
+        if settings["use_dict"] and not _state["dict_checked"]:
+            _state["dict_checked"] = True
+            if not active_dictionary_id():
+                train_content_dictionary()
+        # 每次执行最多处理若干批，避免长时间占用写锁
+        max_batches = int(cfg.get("content_compress.batches_per_run", 5, silent=True) or 5)
+        for _ in range(max_batches):
+            result = migrate_batch(_state["last_id"], settings["batch_size"])
+            if not result["processed"]:
+                _state["done"] = True
+                print_success("已有文章正文压缩完成")
+                scheduler.clear_all_jobs()
+                return
+            _state["last_id"] = result["last_id"]
+            print_success(
+                f"正文压缩: {result['processed']} 篇，{result['before'] // 1024}KB -> {result['after'] // 1024}KB"
+            )
+    except Exception as e:
+        print_error(f"正文压缩迁移失败: {e}")
+
+
+def start_compress_content():
+    if not cfg.get("content_compress.enabled", False, silent=True):
+        return
+    from core.content_codec import require_zstd
+    try:
+        require_zstd()
+    except RuntimeError as e:
+        # 正文写入也会因此失败，这里在启动时先报出来
+        print_error(str(e))
+        return
+    interval = int(cfg.get("content_compress.interval", 5, silent=True) or 5)  # 每隔多少分钟
+    scheduler.clear_all_jobs()
+    job_id = scheduler.add_cron_job(compress_existing_content, cron_expr=f"*/{interval} * * * *", tag="正文压缩")
+    print_success(f"已添加正文压缩迁移任务: {job_id}")
+    scheduler.start()
+
+
+if __name__ == "__main__":
+    compress_existing_content()
@@ -1,4 +1,5 @@
 from datetime import datetime, date, timedelta
+from sqlalchemy.orm import undefer
 from core.models.article import Article
 from .article import UpdateArticle,Update_Over
 import core.db as db
@@ -12,37 +13,14 @@ from driver.wx import WX_API
 from driver.success import Success
 wx_db=db.Db(tag="任务调度")
 
-def calculate_pages_from_month_start():
+def calculate_pages_from_month_start(policy=None):
     """计算从配置的起始时间到现在需要抓取的页数"""
     today = date.today()
     
-    # 从配置中获取采集起始时间
-    start_date_str = None
-    try:
-        from core.models.config_management import ConfigManagement
-        session = db.DB.get_session()
-        try:
-            config = session.query(ConfigManagement).filter(
-                ConfigManagement.config_key == 'collect_start_date'
-            ).first()
-            if config and config.config_value:
-                start_date_str = config.config_value
-        finally:
-            session.close()
-    except Exception as e:
-        logger.warning(f"读取采集起始时间配置失败: {e}")
-    
-    # 如果没有配置或配置无效，使用默认值：2025-12-01
-    if not start_date_str:
-        start_date_str = '2025-12-01'
-    
-    try:
-        # 解析日期字符串
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-    except (ValueError, TypeError):
-        # 如果日期格式错误，使用默认值：2025-12-01
-        logger.warning(f"采集起始时间格式错误: {start_date_str}，使用默认值 2025-12-01")
-        start_date = date(2025, 12, 1)
+    # 从采集策略快照中获取采集起始时间（未配置时为默认值 2025-12-01）
+    from core.collect_policy import get_collect_policy
+    policy = policy or get_collect_policy()
+    start_date = policy.start_date
     
     # 确保起始日期不超过今天
     if start_date > today:
@@ -58,7 +36,8 @@ def calculate_pages_from_month_start():
     return estimated_pages
 def fetch_all_article():
     print("开始更新")
-    wx=WxGather().Model()
+    from core.collect_policy import get_collect_policy
+    wx=WxGather().Model().SetPolicy(get_collect_policy(refresh=True))
     try:
         # 获取公众号列表
         mps=db.DB.get_all_mps()
@@ -85,10 +64,30 @@ interval=int(cfg.get("interval",60)) # 每隔多少秒执行一次
 import time as _time
 def check_session_valid() -> bool:
     """
-    检查微信 Session 是否有效（登录状态 + cookie 剩余时间）。
+    检查微信 Session 是否有效（登录状态 + cookie 剩余时间 + 频率限制冷却）。
+    账号池中有多个账号时，只要还有未失效、未过期、不在冷却中的账号就继续采集。
     返回 True 表示可以继续采集，False 表示应跳过。
     """
     from driver.success import getStatus
+    from core.wx.rate_limit import wx_limiter
+    from core.wx.session_pool import session_pool
+    if wx_limiter.cooling_down():
+        print_warning(f"公众号平台频率限制冷却中（剩余约 {int(wx_limiter.cooldown_remaining())}s），跳过本次采集")
+        return False
+    try:
+        session_pool.reload()
+        sessions = session_pool.available()
+        if session_pool.settings["enabled"] and len(session_pool.sessions()) > 1:
+            if not sessions:
+                print_warning("账号池中没有可用的公众号平台账号（全部失效或即将过期），跳过本次采集")
+                return False
+            if all(s.limiter.cooling_down() for s in sessions):
+                wait = min(s.limiter.cooldown_remaining() for s in sessions)
+                print_warning(f"账号池中的账号都在频率限制冷却中（最早约 {int(wait)}s 后恢复），跳过本次采集")
+                return False
+            return True
+    except Exception as e:
+        logger.warning(f"检查账号池时出错: {e}")
     if not getStatus():
         print_warning("微信 Session 未登录或已失效，跳过本次采集")
         return False
@@ -119,7 +118,8 @@ def get_existing_articles(mp_id: str, limit: int = 10):
         session = db.DB.get_session()
         try:
             # 查询该公众号的已有文章，按发布时间降序排列
-            articles = session.query(Article).filter(
+            # 消息模板可能引用正文，会话关闭前显式加载
+            articles = session.query(Article).options(undefer(Article.content)).filter(
                 Article.mp_id == mp_id
             ).order_by(Article.publish_time.desc()).limit(limit).all()
             return articles
@@ -193,7 +193,8 @@ def get_today_articles(mp_id: str = None):
             # 计算明天的开始时间戳
             tomorrow_start = int((datetime.combine(today, datetime.min.time()) + timedelta(days=1)).timestamp())
             
-            query = session.query(Article).filter(
+            # 消息模板可能引用正文，会话关闭前显式加载
+            query = session.query(Article).options(undefer(Article.content)).filter(
                 Article.publish_time >= today_start,
                 Article.publish_time < tomorrow_start
             )
@@ -218,7 +219,10 @@ def do_job(mp=None,task:MessageTask=None,isTest=False):
                 return
             print("执行任务")
         all_count=0
-        wx=WxGather().Model()
+        # 每次任务开始时重新构建采集策略快照（重新探测 MinIO 可用性），任务内复用
+        from core.collect_policy import get_collect_policy
+        policy=get_collect_policy(refresh=True)
+        wx=WxGather().Model().SetPolicy(policy)
         try:
             if isTest:
                 # 测试模式：从数据库获取已有文章
@@ -337,6 +341,25 @@ def do_job_all_feeds(feeds: list[Feed] = None, task: MessageTask = None, isTest:
         print_info("【任务执行】执行任务（汇总所有公众号）")
     
     all_articles_by_feed = []  # 按公众号分组的文章列表
+    # 每次任务开始时重新构建采集策略快照（重新探测 MinIO 可用性），整个任务共用
+    from core.collect_policy import get_collect_policy
+    policy = get_collect_policy(refresh=True)
+    
+    # 并发采集：所有公众号先一起抓取新文章，再逐个从数据库汇总当天文章
+    crawled = False
+    from core.wx.rate_limit import wx_limiter
+    if not isTest:
+        from core.wx.crawl_engine import CrawlEngine, engine_available
+        if engine_available():
+            max_pages = int(cfg.get("max_page", 1))
+            engine = CrawlEngine(policy=policy, max_pages=max_pages)
+            engine.run(feeds or [], CallBack=UpdateArticle, Over_CallBack=Update_Over)
+            if engine.aborted == "invalid_session":
+                print_error(f"并发采集中止: {engine.aborted}")
+                return
+            if engine.aborted:
+                print_warning(f"并发采集暂停: {engine.aborted}，未采集的公众号留待下次运行")
+            crawled = True
     
     # 收集所有公众号的文章
     for feed in feeds:
@@ -394,12 +417,15 @@ def do_job_all_feeds(feeds: list[Feed] = None, task: MessageTask = None, isTest:
                     print_info(f"获取到 {feed.mp_name} 的 {len(articles_list)} 篇已有文章")
             else:
                 # 正常模式：先抓取新文章，然后从数据库获取当天发布的文章
-                print_info(f"抓取 {feed.mp_name} 的新文章")
-                wx = WxGather().Model()
-                # 使用配置的 max_page（默认1页），而不是计算从月初到现在的页数
-                max_pages = int(cfg.get("max_page", 1))
-                print_info(f"定时任务抓取，使用配置的页数: {max_pages} 页")
-                wx.get_Articles(feed.faker_id, CallBack=UpdateArticle, Mps_id=feed.id, Mps_title=feed.mp_name, MaxPage=max_pages, Over_CallBack=Update_Over, interval=interval)
+                if not crawled and wx_limiter.cooling_down():
+                    print_warning(f"公众号平台频率限制冷却中，跳过抓取 {feed.mp_name}")
+                elif not crawled:
+                    print_info(f"抓取 {feed.mp_name} 的新文章")
+                    wx = WxGather().Model().SetPolicy(policy)
+                    # 使用配置的 max_page（默认1页），而不是计算从月初到现在的页数
+                    max_pages = int(cfg.get("max_page", 1))
+                    print_info(f"定时任务抓取，使用配置的页数: {max_pages} 页")
+                    wx.get_Articles(feed.faker_id, CallBack=UpdateArticle, Mps_id=feed.id, Mps_title=feed.mp_name, MaxPage=max_pages, Over_CallBack=Update_Over, interval=interval)
                 
                 # 抓取完成后，从数据库获取当天发布的文章（基于 publish_time）
                 print_info(f"从数据库获取 {feed.mp_name} 的当天发布文章（基于 publish_time）")
@@ -747,6 +773,15 @@ def start_all_task():
       #开启自动同步未同步 文章任务
     from jobs.fetch_no_article import start_sync_content
     start_sync_content()
+    #开启正文压缩迁移任务（content_compress.enabled）
+    from jobs.compress_content import start_compress_content
+    start_compress_content()
+    #补建已有文章的全文索引（仅升级后首次需要）
+    from jobs.search_index import start_search_index
+    start_search_index()
+    #历史文章归档（archive.enabled）
+    from jobs.archive import start_archive
+    start_archive()
     start_job()
 if __name__ == '__main__':
     # do_job()
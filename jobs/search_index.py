@@ -0,0 +1,52 @@
+from core.task import TaskScheduler
+from core.print import print_success, print_error, print_info
+scheduler = TaskScheduler()
+
+
+def backfill_search_index():
+    """为启用全文索引前已入库的文章分批补建索引，完成后搜索切换到全文索引，改为定期校对"""
+    from core.article_search import run_backfill, search_settings
+    settings = search_settings()
+    try:
+        if run_backfill(max_batches=settings["batches_per_run"], batch_size=settings["batch_size"]):
+            print_success("全文索引已就绪")
+            scheduler.clear_all_jobs()
+            _add_reconcile_job()
+    except Exception as e:
+        print_error(f"补建全文索引失败: {e}")
+
+
+def reconcile_search_index():
+    """校对全文索引：补上漏建的索引（ORM 事件同步失败等），清理已删除文章残留的索引"""
+    from core.article_search import run_reconcile
+    try:
+        result = run_reconcile()
+        if result["indexed"] or result["removed"]:
+            print_info(f"全文索引校对: 补建 {result['indexed']} 篇，清理 {result['removed']} 条")
+    except Exception as e:
+        print_error(f"校对全文索引失败: {e}")
+
+
+def _add_reconcile_job():
+    from core.article_search import search_settings
+    job_id = scheduler.add_cron_job(reconcile_search_index, cron_expr=search_settings()["reconcile_cron"], tag="全文索引校对")
+    print_success(f"已添加全文索引校对任务: {job_id}")
+
+
+def start_search_index():
+    from core.article_search import ensure_search_index, index_state, search_settings, STATE_READY
+    if not ensure_search_index():
+        return
+    scheduler.clear_all_jobs()
+    if index_state() == STATE_READY:
+        _add_reconcile_job()
+    else:
+        interval = search_settings()["interval"]  # 每隔多少分钟
+        job_id = scheduler.add_cron_job(backfill_search_index, cron_expr=f"*/{interval} * * * *", tag="全文索引补建")
+        print_success(f"已添加全文索引补建任务: {job_id}")
+    scheduler.start()
+
+
+if __name__ == "__main__":
+    backfill_search_index()
+    reconcile_search_index()
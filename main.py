@@ -56,12 +56,8 @@ if __name__ == '__main__':
     clear_debug_log()
     
     # 确保数据库表存在（无论是否传递 -init 参数）
+    # DB 初始化时已同步表结构，表结构指纹一致时不再逐表检查
     from core.db import DB
-    try:
-        # 确保所有表都存在
-        DB.ensure_tables_exist()
-    except Exception as e:
-        print_warning(f"检查数据库表失败: {e}")
     
     if cfg.args.init=="True":
         import init_sys as init
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+历史文章归档管理
+
+用法：
+    python scripts/archive_articles.py --stats                 # 查看归档状态
+    python scripts/archive_articles.py --archive               # 归档早于 archive.days 天的文章
+    python scripts/archive_articles.py --archive --days 730 --batch 1000
+    python scripts/archive_articles.py --restore ID [ID ...]   # 恢复指定文章
+    python scripts/archive_articles.py --restore-mp MP_ID      # 恢复某个公众号的全部归档文章
+    python scripts/archive_articles.py --restore-segment articles-20250101-033000-ab12cd.jsonl.gz
+
+--archive 不要求 archive.enabled（该开关只控制定时任务）。
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from core.article_archive import archive_batch, archive_status, restore_articles  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="历史文章归档管理")
+    parser.add_argument("--archive", action="store_true", help="归档历史文章")
+    parser.add_argument("--days", type=int, default=0, help="归档早于多少天的文章（默认读取 archive.days）")
+    parser.add_argument("--batch", type=int, default=0, help="每个段文件的文章数（默认读取 archive.batch_size）")
+    parser.add_argument("--limit", type=int, default=0, help="最多归档批数，0 表示全部")
+    parser.add_argument("--restore", nargs="+", default=None, metavar="ID", help="恢复指定文章")
+    parser.add_argument("--restore-mp", default=None, metavar="MP_ID", help="恢复某个公众号的全部归档文章")
+    parser.add_argument("--restore-segment", default=None, metavar="NAME", help="恢复某个段文件中的全部文章")
+    parser.add_argument("--stats", action="store_true", help="查看归档状态")
+    args = parser.parse_args()
+
+    if args.archive:
+        total = batches = 0
+        started = time.perf_counter()
+        while not args.limit or batches < args.limit:
+            result = archive_batch(args.days or None, args.batch or None)
+            if not result["archived"]:
+                break
+            batches += 1
+            total += result["archived"]
+            print(f"{result['segment']}: {result['archived']} 篇，{result['bytes'] // 1024}KB")
+        print(f"完成: 归档 {total} 篇（{time.perf_counter() - started:.1f}s）")
+    if args.restore or args.restore_mp or args.restore_segment:
+        count = restore_articles(args.restore, segment=args.restore_segment, mp_id=args.restore_mp)
+        print(f"已恢复 {count} 篇文章")
+    for key, value in archive_status().items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
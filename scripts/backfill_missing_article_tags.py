@@ -147,6 +147,7 @@ def backfill_one(
                 title=article.title,
                 description=description,
                 content=content,
+                publish_time=article.publish_time,
             )
             session.flush()
             rows = (
@@ -172,6 +173,7 @@ def backfill_one(
             title=article.title,
             description=description,
             content=content,
+            publish_time=article.publish_time,
         )
         session.flush()
         rows = session.query(ArticleTag).filter(ArticleTag.article_id == article.id).all()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+正文解析基准：对比原来的多次解析流程与 core.wx.html_extract 的 lxml 单遍解析。
+
+legacy（升级前 content_extract + 标签提取的处理）：
+- gather.clean_html 开启时 htmltools.clean_html：BeautifulSoup 删 link/head/script、删隐藏元素、
+  正则删 script/style/注释、BeautifulSoup 删空元素
+- BeautifulSoup 找 #js_content、改写 data-src、统一图片宽度、prettify()
+- 标签提取时 BeautifulSoup 再解析一次正文取纯文本
+
+lxml：extract_article() 一次解析完成以上处理，同时输出纯文本。
+
+页面来自 --dir 目录下保存的公众号文章页面（*.html，浏览器“另存为”或 curl 下载即可），
+没有提供时生成一篇结构类似的公众号页面。除耗时外还输出两种方式纯文本是否一致及相似度，用于核对结果。
+
+用法：
+    python scripts/bench_html_extract.py
+    python scripts/bench_html_extract.py --dir data/saved_pages --repeat 20
+    python scripts/bench_html_extract.py --paragraphs 400 --no-clean
+"""
+from __future__ import annotations
+
+import argparse
+import difflib
+import glob
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from bs4 import BeautifulSoup, Tag
+
+import tools.html
+from core.wx.html_extract import extract_article
+from tools.html import htmltools
+
+# htmltools 每次清理都会打印移除数量，基准中不输出
+tools.html.print_info = lambda *args, **kwargs: None
+
+
+def synthetic_page(paragraphs: int, seed: int = 1) -> str:
+    """生成一篇结构类似公众号文章的页面：大段内联脚本/样式、带样式的段落、懒加载图片、空段落和隐藏元素"""
+    rnd = random.Random(seed)
+    words = ["公众号", "采集", "正文", "解析", "性能", "数据库", "标签", "模型", "接口", "缓存", "Python", "lxml"]
+    head = "".join(
+        f"<script>var data{i} = {{{', '.join(f'k{j}: {rnd.random()}' for j in range(200))}}};</script>"
+        for i in range(20)
+    ) + "".join(f"<style>.c{i} {{ color: #{i:06x}; font-family: Helvetica; }}</style>" for i in range(20))
+    body = []
+    for i in range(paragraphs):
+        text = "".join(rnd.choice(words) for _ in range(rnd.randint(10, 60)))
+        body.append(
+            f'<section style="margin: 0px 8px;"><p style="font-size: 15px;">'
+            f'<span style="color: rgb(62, 62, 62); font-family: Helvetica;">{text}</span></p></section>'
+        )
+        if i % 5 == 0:
+            body.append(
+                f'<p style="text-align: center;"><img class="rich_pages wxw-img" '
+                f'data-src="https://mmbiz.qpic.cn/mmbiz_jpg/{i}/640?wx_fmt=jpeg" '
+                f'style="width: 677px !important; visibility: visible !important;" data-ratio="0.56"></p>'
+            )
+        if i % 7 == 0:
+            body.append('<p><br></p><p style="display: none;">隐藏内容</p><!-- 注释 -->')
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>示例文章</title>"
+        f"<link rel='stylesheet' href='x.css'>{head}</head><body>"
+        "<div id='page-content'><h1 class='rich_media_title'>示例文章</h1>"
+        f"<div class='rich_media_content' id='js_content' style='visibility: hidden;'>{''.join(body)}</div>"
+        f"</div>{head}</body></html>"
+    )
+
+
+def _legacy_text(html_content: str) -> str:
+    """标签提取的 html_to_text（core/tag_extractor.py）"""
+    soup = BeautifulSoup(html_content, "html.parser")
+    for script in soup(["script", "style"]):
+        script.decompose()
+    for tag in soup.find_all(True):
+        if isinstance(tag, Tag):
+            tag.attrs.pop("style", None)
+            tag.attrs.pop("class", None)
+    text = soup.get_text(separator=" ", strip=True)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def legacy(page: str, clean: bool):
+    if clean:
+        page = htmltools.clean_html(
+            page.strip(),
+            remove_selectors=["link", "head", "script"],
+            remove_attributes=[
+                {"name": "style", "value": "display: none;"},
+                {"name": "style", "value": "display:none;"},
+                {"name": "aria-hidden", "value": "true"},
+            ],
+            remove_normal_tag=True,
+        )
+    else:
+        page = htmltools.remove_common_html_elements(page)
+    soup = BeautifulSoup(page, "html.parser")
+    content = soup.find("div", {"id": "js_content"})
+    if content is None:
+        return "", ""
+    content.attrs.pop("style", None)
+    for img in content.find_all("img"):
+        if "data-src" in img.attrs:
+            img["src"] = img["data-src"]
+            del img["data-src"]
+        if "style" in img.attrs:
+            img["style"] = re.sub(r"width\s*:\s*\d+\s*px", "width: 1080px", str(img["style"]))
+    html = content.prettify()
+    return html, _legacy_text(html)
+
+
+def single_pass(page: str, clean: bool):
+    parsed = extract_article(page, clean=clean)
+    return parsed.html, parsed.text
+
+
+def measure(fn, pages, clean: bool, repeat: int):
+    timings = []
+    outputs = []
+    for _ in range(repeat):
+        for page in pages:
+            started = time.perf_counter()
+            outputs.append(fn(page, clean))
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings, outputs[:len(pages)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="正文解析基准：多次 BeautifulSoup 解析 vs lxml 单遍解析")
+    parser.add_argument("--dir", default=None, help="保存的公众号文章页面目录（*.html）")
+    parser.add_argument("--repeat", type=int, default=10, help="每个页面重复次数")
+    parser.add_argument("--paragraphs", type=int, default=200, help="合成页面的段落数（未提供 --dir 时）")
+    parser.add_argument("--no-clean", action="store_true", help="按 gather.clean_html 关闭时的流程对比")
+    args = parser.parse_args()
+
+    if args.dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(args.dir, "*.html"))):
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                pages.append(f.read())
+        if not pages:
+            parser.error(f"{args.dir} 下没有 .html 文件")
+    else:
+        pages = [synthetic_page(args.paragraphs)]
+    clean = not args.no_clean
+    size = sum(len(page) for page in pages) / len(pages)
+    print(f"页面 {len(pages)} 个，平均 {size / 1024:.0f} KB，重复 {args.repeat} 次，clean={clean}")
+
+    results = {}
+    for name, fn in (("legacy", legacy), ("lxml", single_pass)):
+        timings, outputs = measure(fn, pages, clean, args.repeat)
+        results[name] = (timings, outputs)
+
+    print(f"{'engine':>8} | {'mean_ms':>10} | {'p50_ms':>10} | {'max_ms':>10} | {'pages/s':>10}")
+    for name, (timings, _) in results.items():
+        mean = statistics.mean(timings)
+        print(f"{name:>8} | {mean:>10.2f} | {statistics.median(timings):>10.2f} | {max(timings):>10.2f} | {1000 / mean:>10.1f}")
+    speedup = statistics.mean(results["legacy"][0]) / statistics.mean(results["lxml"][0])
+    print(f"加速比: {speedup:.1f}x")
+
+    same = 0
+    ratios = []
+    for (_, old_text), (_, new_text) in zip(results["legacy"][1], results["lxml"][1]):
+        same += old_text == new_text
+        ratios.append(difflib.SequenceMatcher(None, old_text, new_text, autojunk=False).quick_ratio() if old_text or new_text else 1.0)
+    print(f"纯文本完全一致 {same}/{len(pages)} 页，相似度最低 {min(ratios):.4f}，平均 {statistics.mean(ratios):.4f}")
+
+
+if __name__ == "__main__":
+    main()
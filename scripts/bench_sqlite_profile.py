@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+SQLite 配置基准：模拟采集持续写入时接口的读取吞吐。
+
+对比两种模式：
+- default：默认回滚日志、一个共享连接池（升级前的行为）
+- profile：core.db_sqlite 的 WAL/PRAGMA 配置 + 单连接写池 + query_only 读池
+
+写线程按批插入带正文的文章（模拟采集入库），读线程反复执行文章列表查询
+（count + 按 publish_time 倒序分页），统计读取 QPS、延迟分位数与 "database is locked" 次数。
+
+用法：
+    python scripts/bench_sqlite_profile.py
+    python scripts/bench_sqlite_profile.py --seconds 20 --readers 8 --batch 20
+    python scripts/bench_sqlite_profile.py --mode profile --keep /tmp/bench.db
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from sqlalchemy import (Column, Integer, MetaData, String, Table, Text, create_engine,
+                        event, func, insert, select)
+from sqlalchemy.exc import OperationalError
+
+metadata = MetaData()
+articles = Table(
+    "articles", metadata,
+    Column("id", String(255), primary_key=True),
+    Column("mp_id", String(255), index=True),
+    Column("title", String(1000)),
+    Column("description", Text),
+    Column("content", Text),
+    Column("status", Integer, default=1),
+    Column("publish_time", Integer, index=True),
+)
+
+
+def build_engines(db_path: str, mode: str):
+    """返回 (写引擎, 读引擎)；default 模式两者为同一个引擎"""
+    url = f"sqlite:///{db_path}"
+    common = dict(isolation_level="AUTOCOMMIT", connect_args={"check_same_thread": False})
+    if mode == "default":
+        engine = create_engine(url, pool_size=5, max_overflow=10, **common)
+        return engine, engine
+
+    from core.db_sqlite import profile_pragmas, sqlite_profile
+    profile = sqlite_profile()
+
+    def attach(engine, readonly):
+        pragmas = profile_pragmas(profile, readonly=readonly)
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+        return engine
+
+    writer = attach(create_engine(url, pool_size=1, max_overflow=0, pool_timeout=60, **common), False)
+    reader = attach(create_engine(url, pool_size=profile["read_pool_size"], max_overflow=0, **common), True)
+    return writer, reader
+
+
+def seed(engine, count: int) -> None:
+    now = int(time.time())
+    rows = [{
+        "id": f"seed-{i}",
+        "mp_id": f"mp-{i % 50}",
+        "title": f"种子文章 {i}",
+        "description": "摘要" * 20,
+        "content": "正文" * 2000,
+        "status": 1,
+        "publish_time": now - i * 60,
+    } for i in range(count)]
+    with engine.begin() as conn:
+        for start in range(0, len(rows), 500):
+            conn.execute(insert(articles), rows[start:start + 500])
+
+
+def run(mode: str, seconds: float, readers: int, batch: int, seed_rows: int, keep: str | None) -> dict:
+    if keep:
+        db_path = keep
+        if os.path.exists(db_path):
+            os.remove(db_path)
+    else:
+        fd, db_path = tempfile.mkstemp(suffix=".db", prefix=f"werss_bench_{mode}_")
+        os.close(fd)
+        os.remove(db_path)
+    writer, reader = build_engines(db_path, mode)
+    metadata.create_all(writer)
+    seed(writer, seed_rows)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies: list[float] = []
+    stats = {"reads": 0, "read_locked": 0, "writes": 0, "write_locked": 0}
+
+    def write_loop():
+        seq = 0
+        while not stop.is_set():
+            now = int(time.time())
+            rows = [{
+                "id": f"w-{seq}-{i}",
+                "mp_id": f"mp-{random.randint(0, 49)}",
+                "title": f"新文章 {seq}-{i}",
+                "description": "摘要" * 20,
+                "content": "正文" * 2000,
+                "status": 1,
+                "publish_time": now,
+            } for i in range(batch)]
+            seq += 1
+            try:
+                with writer.begin() as conn:
+                    conn.execute(insert(articles), rows)
+                with lock:
+                    stats["writes"] += len(rows)
+            except OperationalError:
+                with lock:
+                    stats["write_locked"] += 1
+
+    def read_loop():
+        while not stop.is_set():
+            mp_id = f"mp-{random.randint(0, 49)}"
+            started = time.perf_counter()
+            try:
+                with reader.connect() as conn:
+                    conn.execute(select(func.count()).select_from(articles).where(articles.c.status != 1000)).scalar()
+                    conn.execute(
+                        select(articles.c.id, articles.c.title, articles.c.publish_time)
+                        .where(articles.c.mp_id == mp_id)
+                        .order_by(articles.c.publish_time.desc())
+                        .limit(20)
+                    ).all()
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    stats["reads"] += 1
+                    latencies.append(elapsed)
+            except OperationalError:
+                with lock:
+                    stats["read_locked"] += 1
+
+    threads = [threading.Thread(target=write_loop, daemon=True)]
+    threads += [threading.Thread(target=read_loop, daemon=True) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join(timeout=30)
+
+    writer.dispose()
+    if reader is not writer:
+        reader.dispose()
+    if not keep:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(db_path + suffix)
+            except OSError:
+                pass
+
+    latencies.sort()
+
+    def pct(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return {
+        "mode": mode,
+        "read_qps": round(stats["reads"] / seconds, 1),
+        "read_p50_ms": round(statistics.median(latencies), 2) if latencies else 0.0,
+        "read_p99_ms": round(pct(0.99), 2),
+        "read_locked": stats["read_locked"],
+        "write_rows_per_s": round(stats["writes"] / seconds, 1),
+        "write_locked": stats["write_locked"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite 配置基准：采集写入期间的接口读取吞吐")
+    parser.add_argument("--mode", choices=["default", "profile", "both"], default="both")
+    parser.add_argument("--seconds", type=float, default=10, help="每种模式运行时长（秒）")
+    parser.add_argument("--readers", type=int, default=4, help="读线程数")
+    parser.add_argument("--batch", type=int, default=10, help="每批写入文章数")
+    parser.add_argument("--seed", type=int, default=5000, help="预置文章数")
+    parser.add_argument("--keep", default=None, help="保留数据库文件到指定路径（仅单模式）")
+    args = parser.parse_args()
+
+    modes = ["default", "profile"] if args.mode == "both" else [args.mode]
+    results = [run(mode, args.seconds, args.readers, args.batch, args.seed,
+                   args.keep if len(modes) == 1 else None) for mode in modes]
+
+    keys = list(results[0].keys())
+    print(" | ".join(f"{k:>16}" for k in keys))
+    for r in results:
+        print(" | ".join(f"{str(r[k]):>16}" for k in keys))
+
+
+if __name__ == "__main__":
+    main()
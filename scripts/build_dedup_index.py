@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+文章近似重复索引（SimHash 指纹）管理
+
+用法：
+    python scripts/build_dedup_index.py                # 为尚未登记指纹的已有文章补建指纹
+    python scripts/build_dedup_index.py --batch 1000
+    python scripts/build_dedup_index.py --stats        # 查看指纹与近似重复数量
+
+新入库的文章在入库时登记，此脚本只需在升级后执行一次。
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from core.article_dedup import backfill_batch, dedup_settings, dedup_status  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章近似重复索引管理")
+    parser.add_argument("--batch", type=int, default=0, help="每批条数（默认读取 dedup.batch_size）")
+    parser.add_argument("--stats", action="store_true", help="只查看状态")
+    args = parser.parse_args()
+
+    if not args.stats:
+        if not dedup_settings()["enabled"]:
+            print("dedup.enabled 未开启")
+            sys.exit(1)
+        total = duplicates = 0
+        last = None
+        started = time.perf_counter()
+        while True:
+            result = backfill_batch(last, args.batch or None)
+            if not result["processed"]:
+                break
+            last = result["last"]
+            total += result["processed"]
+            duplicates += result["duplicates"]
+            print(f"已处理 {total} 篇，近似重复 {duplicates} 篇")
+        print(f"完成: {total} 篇，近似重复 {duplicates} 篇（{time.perf_counter() - started:.1f}s）")
+    for key, value in dedup_status().items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
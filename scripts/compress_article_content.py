@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+文章正文压缩存储管理
+
+用法：
+    python scripts/compress_article_content.py --stats              # 抽样统计压缩率
+    python scripts/compress_article_content.py --train-dict         # 用已有文章训练新字典
+    python scripts/compress_article_content.py --migrate            # 压缩全部未压缩的正文（需 content_compress.enabled）
+    python scripts/compress_article_content.py --migrate --limit 1000 --batch 500
+    python scripts/compress_article_content.py --decompress         # 全部恢复为原文（关闭压缩前使用）
+
+content_compress.enabled 为 False 时 --migrate 需加 --force（按其余配置压缩）；
+未开启压缩时新入库的正文仍按原文保存。
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from core.content_codec import (  # noqa: E402
+    compression_settings,
+    compression_stats,
+    migrate_batch,
+    train_content_dictionary,
+    zstd_available,
+)
+
+
+def run_migration(batch: int, limit: int, decompress: bool, force: bool = False) -> None:
+    last_id = ""
+    total = before = after = 0
+    started = time.perf_counter()
+    while not limit or total < limit:
+        size = min(batch, limit - total) if limit else batch
+        result = migrate_batch(last_id, size, decompress=decompress, force=force)
+        if not result["processed"]:
+            break
+        last_id = result["last_id"]
+        total += result["processed"]
+        before += result["before"]
+        after += result["after"]
+        print(f"已处理 {total} 篇，{before // 1024}KB -> {after // 1024}KB")
+    elapsed = time.perf_counter() - started
+    ratio = f"{before / after:.2f}" if after else "-"
+    print(f"完成: {total} 篇，{before // 1024}KB -> {after // 1024}KB（{ratio}x，{elapsed:.1f}s）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章正文压缩存储管理")
+    parser.add_argument("--stats", action="store_true", help="抽样统计压缩率")
+    parser.add_argument("--train-dict", action="store_true", help="用已有文章训练新的压缩字典")
+    parser.add_argument("--samples", type=int, default=2000, help="训练字典使用的文章数")
+    parser.add_argument("--migrate", action="store_true", help="压缩未压缩的正文")
+    parser.add_argument("--decompress", action="store_true", help="将已压缩的正文恢复为原文")
+    parser.add_argument("--force", action="store_true", help="content_compress.enabled 为 False 时也执行压缩")
+    parser.add_argument("--batch", type=int, default=0, help="每批条数（默认读取 content_compress.batch_size）")
+    parser.add_argument("--limit", type=int, default=0, help="最多处理条数，0 表示全部")
+    args = parser.parse_args()
+
+    if not zstd_available():
+        print("未安装 zstandard，请执行 pip install zstandard")
+        sys.exit(1)
+    batch = args.batch or compression_settings()["batch_size"]
+
+    if args.train_dict:
+        dict_id = train_content_dictionary(args.samples)
+        print(f"新字典 ID: {dict_id}" if dict_id else "样本不足，未生成字典")
+    if args.migrate:
+        if not compression_settings()["enabled"] and not args.force:
+            print("content_compress.enabled 未开启，如需仍然压缩请加 --force")
+            sys.exit(1)
+        run_migration(batch, args.limit, decompress=False, force=args.force)
+    if args.decompress:
+        run_migration(batch, args.limit, decompress=True)
+    if args.stats or not (args.train_dict or args.migrate or args.decompress):
+        for key, value in compression_stats(ttl=0).items():
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+手动执行并发采集 / 历史回溯 / 管理采集水位与回溯断点
+
+用法：
+    python scripts/crawl_feeds.py                          # 增量采集全部公众号（翻到采集水位即停止）
+    python scripts/crawl_feeds.py --mp MP_WXS_123 MP_WXS_456
+    python scripts/crawl_feeds.py --full-resync            # 忽略水位，一直翻到采集起始日期
+    python scripts/crawl_feeds.py --watermarks             # 查看各公众号的采集水位
+    python scripts/crawl_feeds.py --reset-watermark [--mp ...]
+    python scripts/crawl_feeds.py --backfill               # 从断点继续回溯历史文章，直到采集起始日期
+    python scripts/crawl_feeds.py --checkpoints            # 查看回溯断点和预计剩余页数
+    python scripts/crawl_feeds.py --reset-checkpoint [--mp ...]
+    python scripts/crawl_feeds.py --sessions               # 查看账号池中各账号的状态
+    python scripts/crawl_feeds.py --remove-session KEY     # 从账号池移除账号
+
+需要公众号平台已登录（与定时任务相同的 Session 检查）。
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from core.config import cfg  # noqa: E402
+from core.db import DB  # noqa: E402
+from core.models.feed import Feed  # noqa: E402
+from core.wx.checkpoint import load_checkpoints, reset_checkpoints, start_timestamp  # noqa: E402
+from core.wx.watermark import load_watermarks, reset_watermarks  # noqa: E402
+
+
+def _feeds(mp_ids):
+    with DB.read_session_scope() as session:
+        query = session.query(Feed)
+        if mp_ids:
+            query = query.filter(Feed.id.in_(mp_ids))
+        feeds = query.all()
+        session.expunge_all()
+    return feeds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发采集公众号文章")
+    parser.add_argument("--mp", nargs="+", default=None, metavar="MP_ID", help="只采集指定公众号")
+    parser.add_argument("--full-resync", action="store_true", help="忽略采集水位和已存在判断，翻到采集起始日期")
+    parser.add_argument("--max-pages", type=int, default=0, help="没有水位时的最大页数（默认读取 max_page）")
+    parser.add_argument("--watermarks", action="store_true", help="查看采集水位")
+    parser.add_argument("--reset-watermark", action="store_true", help="清除采集水位")
+    parser.add_argument("--backfill", action="store_true", help="历史回溯：从断点继续翻到采集起始日期")
+    parser.add_argument("--checkpoints", action="store_true", help="查看回溯断点")
+    parser.add_argument("--reset-checkpoint", action="store_true", help="删除回溯断点（下次回溯从第 0 页开始）")
+    parser.add_argument("--sessions", action="store_true", help="查看账号池")
+    parser.add_argument("--remove-session", default=None, metavar="KEY", help="从账号池移除账号")
+    args = parser.parse_args()
+
+    if args.sessions or args.remove_session:
+        from core.wx.session_pool import session_pool
+        if args.remove_session:
+            removed = session_pool.remove(args.remove_session)
+            print(f"已移除账号 {args.remove_session}" if removed else f"账号池中没有 {args.remove_session}")
+            return
+        status = session_pool.status()
+        for account in status["accounts"]:
+            remaining = "-" if account["remaining_seconds"] is None else f"{account['remaining_seconds'] // 60} 分钟"
+            primary = "\t当前登录" if account["primary"] else ""
+            print(f"{account['key']}\t{account['name']}\t{account['state']}\t{account['expiry_time'] or '-'}"
+                  f"\t剩余 {remaining}{primary}")
+        print(f"共 {status['total']} 个账号，{status['available']} 个可用")
+        return
+    feeds = _feeds(args.mp)
+    if args.reset_watermark:
+        count = reset_watermarks(args.mp)
+        print(f"已清除 {count} 个公众号的采集水位")
+        return
+    if args.watermarks:
+        watermarks = load_watermarks([feed.id for feed in feeds])
+        for feed in feeds:
+            aid, update_time = watermarks.get(feed.id, ("", None))
+            when = datetime.fromtimestamp(update_time).strftime("%Y-%m-%d %H:%M") if update_time else "-"
+            print(f"{feed.id}\t{feed.mp_name}\t{when}\t{aid or '-'}")
+        print(f"共 {len(feeds)} 个公众号，{len(watermarks)} 个有水位")
+        return
+    if args.reset_checkpoint:
+        count = reset_checkpoints(args.mp)
+        print(f"已删除 {count} 个公众号的回溯断点")
+        return
+    if args.checkpoints:
+        from core.collect_policy import get_collect_policy
+        from core.wx.crawl_engine import PAGE_SIZE
+        start_ts = start_timestamp(get_collect_policy().start_date)
+        checkpoints = load_checkpoints([feed.id for feed in feeds])
+        total = 0
+        for feed in feeds:
+            checkpoint = checkpoints.get(feed.id)
+            if checkpoint is None:
+                print(f"{feed.id}\t{feed.mp_name}\t未开始")
+                continue
+            oldest = checkpoint.oldest_seen_time
+            when = datetime.fromtimestamp(oldest).strftime("%Y-%m-%d") if oldest else "-"
+            remaining = checkpoint.remaining_pages(start_ts, PAGE_SIZE)
+            total += remaining or 0
+            print(f"{feed.id}\t{feed.mp_name}\t{checkpoint.state}\tbegin={checkpoint.next_begin}\t"
+                  f"已到 {when}\t剩余 {'-' if remaining is None else remaining} 页")
+        print(f"共 {len(feeds)} 个公众号，{len(checkpoints)} 个有断点，预计剩余 {total} 页")
+        return
+
+    from jobs.mps import check_session_valid
+    from jobs.article import UpdateArticle, Update_Over
+    from core.wx.crawl_engine import CrawlEngine
+    if not check_session_valid():
+        sys.exit(1)
+    engine = CrawlEngine(max_pages=args.max_pages or int(cfg.get("max_page", 1)), full_resync=args.full_resync,
+                         backfill=args.backfill)
+    results = engine.run(feeds, CallBack=UpdateArticle, Over_CallBack=Update_Over)
+    requests = sum(p.requests for p in results)
+    print(f"完成: {len(results)} 个公众号，新文章 {sum(p.new_articles for p in results)} 篇，列表请求 {requests} 次")
+    if args.backfill:
+        remaining = sum(p.remaining_pages or 0 for p in results)
+        print(f"回溯预计剩余 {remaining} 页（再次执行 --backfill 从断点继续）")
+    if engine.aborted:
+        print(f"采集中止: {engine.aborted}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
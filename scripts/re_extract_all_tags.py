@@ -143,7 +143,8 @@ def re_extract_tags_for_article(session, article: Article, dry_run: bool = False
             article_id=article.id,
             title=article.title,
             description=description,
-            content=content
+            content=content,
+            publish_time=article.publish_time
         )
         
         # 3. 获取新创建的标签关联
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+文章全文索引管理
+
+用法：
+    python scripts/rebuild_search_index.py                  # 补建尚未索引的文章（从上次进度继续）
+    python scripts/rebuild_search_index.py --rebuild        # 清空后全部重建
+    python scripts/rebuild_search_index.py --reconcile      # 校对：补上漏建的索引、清理已删除文章的索引
+    python scripts/rebuild_search_index.py --query 人工智能  # 查询并打印耗时与前 10 条结果
+    python scripts/rebuild_search_index.py --query 人工智能 --repeat 50
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from sqlalchemy import select  # noqa: E402
+
+from core.article_search import (  # noqa: E402
+    STATE_READY,
+    ensure_search_index,
+    index_state,
+    rebuild_search_index,
+    run_backfill,
+    run_reconcile,
+    search_condition,
+    search_status,
+    search_subquery,
+)
+from core.db import DB  # noqa: E402
+from core.models.article import ArticleBase  # noqa: E402
+from core.models.base import DATA_STATUS  # noqa: E402
+from core.pagination import keyset_order  # noqa: E402
+
+
+def run_query(keyword: str, repeat: int, ranked: bool) -> None:
+    timings = []
+    rows = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        hits = search_subquery(keyword)
+        stmt = select(ArticleBase.id, ArticleBase.title).where(ArticleBase.status != DATA_STATUS.DELETED)
+        order = keyset_order(ArticleBase.publish_time, ArticleBase.id)
+        if ranked and hits is not None:
+            stmt = stmt.join(hits, hits.c.article_id == ArticleBase.id)
+            order = (hits.c.score.desc(), *order)
+        else:
+            stmt = stmt.where(search_condition(keyword, hits))
+        with DB.read_session_scope() as session:
+            rows = session.execute(stmt.order_by(*order).limit(10)).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    mode = "全文索引" if search_subquery(keyword) is not None else "标题匹配"
+    print(f"{mode}，{repeat} 次，中位数 {statistics.median(timings):.1f}ms，最大 {max(timings):.1f}ms")
+    for article_id, title in rows:
+        print(f"  {article_id}  {title}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章全文索引管理")
+    parser.add_argument("--rebuild", action="store_true", help="清空索引后全部重建")
+    parser.add_argument("--reconcile", action="store_true", help="校对索引与文章表（走完一轮）")
+    parser.add_argument("--batch", type=int, default=500, help="每批条数")
+    parser.add_argument("--query", default=None, help="查询关键词")
+    parser.add_argument("--repeat", type=int, default=1, help="查询重复次数（统计耗时）")
+    parser.add_argument("--relevance", action="store_true", help="按相关度排序")
+    args = parser.parse_args()
+
+    if not ensure_search_index():
+        print(f"当前数据库不支持全文索引或未安装 jieba: {search_status()}")
+        sys.exit(1)
+    if args.query:
+        run_query(args.query, max(1, args.repeat), args.relevance)
+        return
+    if args.reconcile:
+        if index_state() != STATE_READY:
+            print("索引尚未补建完成，请先不带参数运行补建")
+            sys.exit(1)
+        result = run_reconcile(batch_size=args.batch)
+        print(f"校对完成: 补建 {result['indexed']} 篇，清理 {result['removed']} 条")
+        return
+    if args.rebuild:
+        rebuild_search_index()
+    started = time.perf_counter()
+    run_backfill(batch_size=args.batch)
+    print(f"索引状态: {index_state()}（{time.perf_counter() - started:.1f}s）")
+    if index_state() != STATE_READY:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""
+测试环境：在临时目录中运行，进程级 DB 单例指向该目录下的 SQLite 库
+
+core.config 从当前目录读取 config.yaml，core.db 在导入时按配置初始化连接并建表，
+所以要在收集测试模块（导入 core）之前切换目录并写好配置。
+"""
+import os
+import sys
+import tempfile
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+
+
+def pytest_sessionstart(session):
+    workdir = tempfile.mkdtemp(prefix="werss-test-")
+    os.chdir(workdir)
+    with open("config.yaml", "w", encoding="utf-8") as f:
+        f.write(
+            f"db: sqlite:///{os.path.join(workdir, 'test.db')}\n"
+            "db_health:\n"
+            "  enabled: False\n"
+        )
+    os.environ.pop("DB", None)
@@ -0,0 +1,83 @@
+import os
+import time
+
+import pytest
+
+from core.db import DB
+from core.models.article import Article
+from core.models.article_archive import ArticleArchive
+from core.models.article_tags import ArticleTag
+from core.article_archive import archive_batch, archive_dir, restore_articles
+from core.tag_assign import assign_article_tags
+
+MP_ID = "MP_ARCHIVE_TEST"
+
+
+def _snapshot(ids):
+    with DB.read_session_scope() as session:
+        articles = {a.id for a in session.query(Article.id).filter(Article.id.in_(ids))}
+        tags = session.query(ArticleTag).filter(ArticleTag.article_id.in_(ids)).count()
+        archived = session.query(ArticleArchive).filter(ArticleArchive.article_id.in_(ids)).count()
+    return articles, tags, archived
+
+
+@pytest.fixture
+def old_articles():
+    old = int(time.time()) - 800 * 86400
+    ids = DB.add_articles_bulk([
+        {"id": f"arc{i}", "mp_id": MP_ID, "title": f"旧文{i}", "description": "x",
+         "content": f"<p>正文{i}</p>", "publish_time": old + i}
+        for i in range(3)
+    ], extract_tags=False)
+    session = DB.get_session()
+    assign_article_tags(session, [(ids[0], ["归档标签"], old)])
+    session.commit()
+    yield ids
+    with DB.write_session_scope() as session:
+        session.query(ArticleTag).filter(ArticleTag.article_id.in_(ids)).delete(synchronize_session=False)
+        session.query(ArticleArchive).filter(ArticleArchive.article_id.in_(ids)).delete(synchronize_session=False)
+        session.query(Article).filter(Article.id.in_(ids)).delete(synchronize_session=False)
+        session.commit()
+
+
+def test_archive_failure_mid_batch_changes_nothing(old_articles, monkeypatch):
+    before = _snapshot(old_articles)
+    segments = set(os.listdir(archive_dir()))
+
+    def fail(session, article_ids, strict=False):
+        raise RuntimeError("injected")
+
+    # 此时归档索引已写入、标签关联与全文索引已删除，文章行尚未删除
+    monkeypatch.setattr("core.article_dedup.forget_fingerprints", fail)
+    with pytest.raises(RuntimeError, match="injected"):
+        archive_batch(days=700, batch_size=10)
+
+    assert _snapshot(old_articles) == before == (set(old_articles), 1, 0)
+    assert set(os.listdir(archive_dir())) == segments
+
+
+def test_archive_and_restore_round_trip(old_articles):
+    result = archive_batch(days=700, batch_size=10)
+    assert result["archived"] == 3
+    assert _snapshot(old_articles) == (set(), 0, 3)
+    assert result["segment"] in os.listdir(archive_dir())
+
+    assert restore_articles(segment=result["segment"]) == 3
+    assert _snapshot(old_articles) == (set(old_articles), 1, 0)
+    assert result["segment"] not in os.listdir(archive_dir())
+
+
+def test_restore_failure_keeps_archive(old_articles, monkeypatch):
+    result = archive_batch(days=700, batch_size=10)
+
+    def fail(session, rows):
+        raise RuntimeError("injected")
+
+    monkeypatch.setattr("core.article_dedup.register_fingerprints", fail)
+    with pytest.raises(RuntimeError, match="injected"):
+        restore_articles(segment=result["segment"])
+
+    assert _snapshot(old_articles) == (set(), 0, 3)
+    assert result["segment"] in os.listdir(archive_dir())
+    monkeypatch.undo()
+    assert restore_articles(segment=result["segment"]) == 3
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from core.db import DB, _insert_ignore_requery
+from core.models.article import Article
+
+MP_ID = "MP_BULK_TEST"
+
+
+def _items(*aids):
+    now = int(time.time())
+    return [{"id": aid, "mp_id": MP_ID, "title": f"文章{aid}", "publish_time": now} for aid in aids]
+
+
+def _stored(*aids):
+    return DB.get_existing_article_ids([DB.make_article_id(MP_ID, aid) for aid in aids])
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    yield
+    with DB.write_session_scope() as session:
+        session.query(Article).filter(Article.mp_id == MP_ID).delete(synchronize_session=False)
+        session.commit()
+
+
+def test_returns_only_new_ids():
+    assert DB.add_articles_bulk(_items("a1", "a2"), extract_tags=False) == [
+        DB.make_article_id(MP_ID, "a1"), DB.make_article_id(MP_ID, "a2")]
+    assert DB.add_articles_bulk(_items("a1", "a2", "a3"), extract_tags=False) == [DB.make_article_id(MP_ID, "a3")]
+
+
+def test_insert_failure_raises(monkeypatch):
+    def fail(session, rows):
+        raise RuntimeError("injected")
+
+    monkeypatch.setattr(DB, "_insert_ignore", fail)
+    with pytest.raises(RuntimeError, match="injected"):
+        DB.add_articles_bulk(_items("b1", "b2"), extract_tags=False)
+    assert not _stored("b1", "b2")
+
+
+def test_failure_after_insert_rolls_back_page(monkeypatch):
+    def fail(session, rows, strict=False):
+        raise RuntimeError("injected")
+
+    # 文章已插入、全文索引同步失败：整页回滚
+    monkeypatch.setattr("core.db.sync_articles", fail)
+    with pytest.raises(RuntimeError, match="injected"):
+        DB.add_articles_bulk(_items("c1", "c2"), extract_tags=False)
+    assert not _stored("c1", "c2")
+
+
+def test_requery_returns_inserted_keys():
+    DB.add_articles_bulk(_items("d1"), extract_tags=False)
+    rows = [{"id": DB.make_article_id(MP_ID, aid), "mp_id": MP_ID, "title": aid} for aid in ("d1", "d2", "d3")]
+    with DB.transaction_scope() as session:
+        inserted = _insert_ignore_requery(
+            session, Article, rows, "id",
+            lambda values: sqlite_insert(Article).values(values).on_conflict_do_nothing(),
+        )
+    assert inserted == [rows[1]["id"], rows[2]["id"]]
+    assert len(_stored("d1", "d2", "d3")) == 3
+
+
+def test_transaction_scope_rolls_back_after_session_commit():
+    article_id = DB.make_article_id(MP_ID, "e1")
+    with pytest.raises(RuntimeError):
+        with DB.transaction_scope() as session:
+            session.execute(text("INSERT INTO articles (id, mp_id, title) VALUES (:id, :mp_id, 'x')"),
+                            {"id": article_id, "mp_id": MP_ID})
+            # 块内 commit 只 flush，异常时仍整体回滚
+            session.commit()
+            raise RuntimeError("injected")
+    assert session.info["transaction"] == "rolled_back"
+    assert not _stored("e1")
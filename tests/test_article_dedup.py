@@ -0,0 +1,88 @@
+import random
+import time
+
+import pytest
+
+from core.article_dedup import (
+    MAX_DISTANCE,
+    bands,
+    dedup_settings,
+    duplicate_sources,
+    fingerprint_article,
+    forget_fingerprints,
+    hamming,
+)
+from core.db import DB
+from core.models.article import Article
+from core.models.article_fingerprint import ArticleFingerprint
+
+MP_ID = "MP_DEDUP_TEST"
+
+
+def _text(seed: int, length: int = 3000) -> str:
+    rng = random.Random(seed)
+    return "".join(chr(rng.randint(0x4E00, 0x4FFF)) for _ in range(length))
+
+
+BODY = _text(1)
+# 转载：开头加一句、结尾改一句
+REPRINT = "转载自某公众号，版权归原作者所有。" + BODY[:-30] + "欢迎关注我们获取更多内容"
+
+
+def test_reprint_is_within_max_distance():
+    settings = dedup_settings()
+    original, _ = fingerprint_article("标题", "摘要", BODY, settings)
+    reprint, _ = fingerprint_article("标题", "摘要", REPRINT, settings)
+    other, _ = fingerprint_article("标题", "摘要", _text(2), settings)
+    assert hamming(original, reprint) <= MAX_DISTANCE
+    assert hamming(original, other) > MAX_DISTANCE
+
+
+def test_bands_recall_every_fingerprint_within_max_distance():
+    rng = random.Random(3)
+    for _ in range(200):
+        fingerprint = rng.getrandbits(64)
+        flipped = fingerprint
+        for bit in rng.sample(range(64), MAX_DISTANCE):
+            flipped ^= 1 << bit
+        assert any(a == b for a, b in zip(bands(fingerprint), bands(flipped)))
+
+
+def test_short_text_only_matches_exactly():
+    fingerprint, exact_only = fingerprint_article("标题", "摘要", None)
+    assert fingerprint is not None and exact_only
+
+
+@pytest.fixture
+def articles():
+    if not dedup_settings()["enabled"]:
+        pytest.skip("dedup.enabled 已关闭")
+    now = int(time.time())
+    items = [
+        {"id": "orig", "mp_id": MP_ID, "title": "原文", "content": BODY, "publish_time": now},
+        {"id": "copy1", "mp_id": MP_ID, "title": "原文", "content": REPRINT, "publish_time": now},
+        {"id": "copy2", "mp_id": MP_ID, "title": "原文", "content": BODY + "。", "publish_time": now},
+    ]
+    ids = []
+    for item in items:
+        # 逐篇入库，保证登记顺序（最早的为原文）
+        ids += DB.add_articles_bulk([item], extract_tags=False)
+    yield ids
+    with DB.write_session_scope() as session:
+        session.query(ArticleFingerprint).filter(ArticleFingerprint.article_id.in_(ids)).delete(synchronize_session=False)
+        session.query(Article).filter(Article.id.in_(ids)).delete(synchronize_session=False)
+        session.commit()
+
+
+def test_bulk_insert_links_reprints_to_original(articles):
+    original, copy1, copy2 = articles
+    with DB.read_session_scope() as session:
+        assert duplicate_sources(session, articles) == {copy1: original, copy2: original}
+
+
+def test_forgetting_original_promotes_earliest_duplicate(articles):
+    original, copy1, copy2 = articles
+    with DB.transaction_scope() as session:
+        forget_fingerprints(session, [original], strict=True)
+    with DB.read_session_scope() as session:
+        assert duplicate_sources(session, articles) == {copy2: copy1}
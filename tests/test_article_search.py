@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from core.article_search import (
+    _indexed_ids,
+    ensure_search_index,
+    index_articles,
+    remove_articles,
+    run_backfill,
+    reconcile_articles_batch,
+    run_reconcile,
+)
+import core.article_search as article_search
+from core.db import DB
+from core.models.article import Article
+
+MP_ID = "MP_SEARCH_TEST"
+
+
+@pytest.fixture
+def articles():
+    if not ensure_search_index():
+        pytest.skip("当前环境不支持全文索引")
+    run_backfill()
+    # 其他用例清理数据时直接删除文章行，先校对一轮作为基线
+    run_reconcile()
+    ids = DB.add_articles_bulk([
+        {"id": f"s{i}", "mp_id": MP_ID, "title": f"全文检索{i}", "publish_time": int(time.time())}
+        for i in range(3)
+    ], extract_tags=False)
+    yield ids
+    with DB.write_session_scope() as session:
+        remove_articles(session, ids)
+        session.query(Article).filter(Article.id.in_(ids)).delete(synchronize_session=False)
+        session.commit()
+
+
+def _indexed(ids):
+    with DB.read_session_scope() as session:
+        return _indexed_ids(session, ids)
+
+
+def test_bulk_insert_indexes_in_transaction(articles):
+    assert _indexed(articles) == set(articles)
+
+
+def test_reconcile_repairs_missing_and_orphan_rows(articles):
+    orphan = DB.make_article_id(MP_ID, "gone")
+    with DB.write_session_scope() as session:
+        # 模拟 ORM 事件同步失败：一篇文章缺索引，一条索引的文章已不存在
+        remove_articles(session, [articles[0]])
+        index_articles(session, [{"id": orphan, "title": "残留"}])
+        session.commit()
+    assert _indexed(articles + [orphan]) == {articles[1], articles[2], orphan}
+
+    result = run_reconcile()
+    assert result == {"indexed": 1, "removed": 1, "complete": True}
+    assert _indexed(articles + [orphan]) == set(articles)
+    assert run_reconcile() == {"indexed": 0, "removed": 0, "complete": True}
+
+
+def test_reconcile_resumes_across_runs(articles):
+    with DB.write_session_scope() as session:
+        remove_articles(session, articles)
+        session.commit()
+    indexed, runs = 0, 0
+    while True:
+        result = run_reconcile(max_batches=1, batch_size=1)
+        indexed += result["indexed"]
+        runs += 1
+        if result["complete"]:
+            break
+    assert indexed == 3
+    assert runs > 3
+    assert _indexed(articles) == set(articles)
+
+
+def test_reconcile_checks_index_once_per_batch(articles, monkeypatch):
+    calls = []
+    original = article_search._indexed_ids
+
+    def counting(conn, ids):
+        calls.append(len(ids))
+        return original(conn, ids)
+
+    monkeypatch.setattr(article_search, "_indexed_ids", counting)
+    result = reconcile_articles_batch("", batch_size=50)
+    assert result["processed"] >= len(articles)
+    assert len(calls) == 1
@@ -0,0 +1,27 @@
+import dataclasses
+
+import core.collect_policy as collect_policy
+import jobs.mps as mps
+
+
+def test_each_job_run_rebuilds_the_policy(monkeypatch):
+    minio = iter([False, True])
+    real_build = collect_policy.build_collect_policy
+    monkeypatch.setattr(
+        collect_policy, "build_collect_policy",
+        lambda: dataclasses.replace(real_build(), minio_available=next(minio)),
+    )
+    collect_policy.invalidate_collect_policy()
+    seen = []
+    monkeypatch.setattr(mps, "check_session_valid", lambda: True)
+    monkeypatch.setattr("core.wx.crawl_engine.engine_available", lambda: True)
+    monkeypatch.setattr(
+        "core.wx.crawl_engine.CrawlEngine.run",
+        lambda self, feeds, **kw: seen.append(self.policy.minio_available) or [],
+    )
+
+    # 第一次采集时 MinIO 不可用，下一次任务恢复后重新探测
+    mps.do_job_all_feeds(feeds=[])
+    mps.do_job_all_feeds(feeds=[])
+    assert seen == [False, True]
+    collect_policy.invalidate_collect_policy()
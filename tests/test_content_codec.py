@@ -0,0 +1,82 @@
+import time
+
+import pytest
+from sqlalchemy import select
+
+import core.content_codec as codec
+import jobs.compress_content as compress_job
+from core.db import DB
+from core.models.article import Article
+
+HTML = "<section style=\"margin:0;padding:0\"><span>正文</span></section>" * 200
+
+
+@pytest.fixture
+def settings():
+    return dict(codec.compression_settings(), enabled=True, use_dict=False, min_size=16)
+
+
+def test_round_trip(settings):
+    if not codec.zstd_available():
+        pytest.skip("未安装 zstandard")
+    packed = codec.compress_content(HTML, settings)
+    assert codec.is_compressed(packed)
+    assert len(packed) < len(HTML)
+    assert codec.decompress_content(packed) == HTML
+
+
+def test_short_or_disabled_content_is_stored_as_is(settings):
+    assert codec.compress_content("短文", settings) == "短文"
+    assert codec.compress_content(HTML, dict(settings, enabled=False)) == HTML
+
+
+def test_missing_zstandard_fails_loudly_when_enabled(settings, monkeypatch):
+    packed = codec.compress_content(HTML, settings) if codec.zstd_available() else None
+    monkeypatch.setattr(codec, "zstandard", None)
+    with pytest.raises(RuntimeError, match="zstandard"):
+        codec.compress_content(HTML, settings)
+    # 关闭压缩时不需要 zstandard
+    assert codec.compress_content(HTML, dict(settings, enabled=False)) == HTML
+    if packed is not None:
+        with pytest.raises(RuntimeError, match="zstandard"):
+            codec.decompress_content(packed)
+
+
+@pytest.fixture
+def stored_articles():
+    ids = DB.add_articles_bulk([
+        {"id": f"z{i}", "mp_id": "MP_CODEC_TEST", "title": f"压缩{i}", "content": content, "publish_time": int(time.time())}
+        for i, content in enumerate(["短文", HTML])
+    ], extract_tags=False)
+    yield ids
+    with DB.write_session_scope() as session:
+        session.query(Article).filter(Article.id.in_(ids)).delete(synchronize_session=False)
+        session.commit()
+
+
+def test_migration_skips_short_content_and_runs_once(stored_articles, settings, monkeypatch):
+    if not codec.zstd_available():
+        pytest.skip("未安装 zstandard")
+    monkeypatch.setattr(codec, "compression_settings", lambda: dict(settings, min_size=1024))
+    monkeypatch.setattr(compress_job, "_state", {"last_id": "", "dict_checked": False, "done": False})
+    monkeypatch.setattr(compress_job.scheduler, "clear_all_jobs", lambda: 0)
+    calls = []
+    original = codec.migrate_batch
+    monkeypatch.setattr(codec, "migrate_batch", lambda *args, **kw: calls.append(args) or original(*args, **kw))
+
+    compress_job.compress_existing_content()
+    assert compress_job._state["done"]
+    with DB.read_session_scope() as session:
+        raw = dict(session.execute(
+            select(Article.id, codec.raw_content_column()).where(Article.id.in_(stored_articles))
+        ).all())
+    short_id, long_id = stored_articles
+    assert raw[short_id] == "短文"
+    assert codec.is_compressed(raw[long_id])
+    # 低于 min_size 的正文不会再被选出来
+    assert codec.migrate_batch("", 1000)["processed"] == 0
+
+    # 扫描一遍后不再重复执行
+    count = len(calls)
+    compress_job.compress_existing_content()
+    assert len(calls) == count
@@ -0,0 +1,110 @@
+import dataclasses
+import datetime as dt
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import core.wx.crawl_engine as ce
+from core.collect_policy import get_collect_policy
+from core.db import DB, Db, insert_ignore
+from core.models.article import Article
+from core.models.feed import Feed
+from core.wx.checkpoint import load_checkpoints, reset_checkpoints
+from core.wx.rate_limit import rate_limit_settings, wx_limiter
+from core.wx.session_pool import session_pool
+from driver.token import set_token
+from core.wx.watermark import load_watermarks, reset_watermarks
+from jobs.article import UpdateArticle
+
+FEED_ID = "MP_WXS_engine_test"
+FAKE_ID = "engine_test"
+TOTAL = 12
+NOW = int(time.time())
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    expiry = {"expiry_timestamp": NOW + 3600, "remaining_seconds": 3600, "expiry_time": ""}
+    set_token({"token": "T", "cookies_str": "slave_user=gh_test; x=1", "expiry": expiry}, {"wx_app_name": "gh_test"})
+    session_pool.reload()
+    settings = rate_limit_settings()
+    settings.update(rate=100, burst=100)
+    wx_limiter.configure(settings)
+    for session in session_pool.sessions():
+        session.limiter.configure(dict(settings))
+
+    def handler(request):
+        begin = int(request.url.params["begin"])
+        items = [{"aid": f"{FAKE_ID}_{n}", "title": f"t{n}", "link": "", "cover": "", "digest": "d",
+                  "update_time": NOW - 86400 * n - 100} for n in range(begin, min(begin + ce.PAGE_SIZE, TOTAL))]
+        return httpx.Response(200, json={"base_resp": {"ret": 0}, "app_msg_cnt": TOTAL, "app_msg_list": items})
+
+    client = httpx.AsyncClient
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **kw: client(transport=httpx.MockTransport(handler), **kw))
+    with DB.write_session_scope() as session:
+        insert_ignore(session, Feed, [{"id": FEED_ID, "mp_name": "engine", "faker_id": FAKE_ID}])
+        session.commit()
+    reset_watermarks([FEED_ID])
+    reset_checkpoints([FEED_ID])
+    yield
+    with DB.write_session_scope() as session:
+        session.query(Article).filter(Article.mp_id == FEED_ID).delete(synchronize_session=False)
+        session.commit()
+
+
+@pytest.fixture
+def failing(monkeypatch):
+    """放入 aid 的批量插入失败，放入 "*" 时全部失败，清空后恢复正常"""
+    aids = set()
+    original = Db._insert_ignore
+
+    def insert(self, session, rows):
+        if "*" in aids or any(row["id"].rsplit("-", 1)[-1] in aids for row in rows):
+            raise RuntimeError("injected")
+        return original(self, session, rows)
+
+    monkeypatch.setattr(Db, "_insert_ignore", insert)
+    return aids
+
+
+def _stored():
+    with DB.read_session_scope() as session:
+        return session.query(Article).filter(Article.mp_id == FEED_ID).count()
+
+
+def _run(**kwargs):
+    settings = ce.crawl_settings()
+    settings.update(request_interval=0.0, persist_batch=1)
+    policy = dataclasses.replace(get_collect_policy(), start_date=dt.date.today() - dt.timedelta(days=30))
+    engine = ce.CrawlEngine(policy=policy, mode="api", settings=settings, **kwargs)
+    return engine.run([SimpleNamespace(id=FEED_ID, faker_id=FAKE_ID, mp_name="engine")], CallBack=UpdateArticle)[0]
+
+
+def test_failed_insert_does_not_advance_watermark(feed, failing):
+    failing.add("*")
+    _run(max_pages=5)
+    assert _stored() == 0
+    assert FEED_ID not in load_watermarks([FEED_ID])
+
+    failing.clear()
+    _run(max_pages=5)
+    assert _stored() == TOTAL
+    assert load_watermarks([FEED_ID])[FEED_ID][0] == f"{FAKE_ID}_0"
+
+
+def test_checkpoint_stops_before_failed_page(feed, failing):
+    # 第二页（begin=5）的一篇文章入库失败
+    failing.add(f"{FAKE_ID}_6")
+    _run(backfill=True)
+    assert _stored() == TOTAL - 1
+    checkpoint = load_checkpoints([FEED_ID])[FEED_ID]
+    assert checkpoint.next_begin == ce.PAGE_SIZE
+    assert checkpoint.state != ce.STATE_END
+
+    failing.clear()
+    _run(backfill=True)
+    assert _stored() == TOTAL
+    checkpoint = load_checkpoints([FEED_ID])[FEED_ID]
+    assert checkpoint.next_begin >= TOTAL
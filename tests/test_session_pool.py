@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+import core.wx.session_pool as sp
+from core.wx.session_pool import SessionPool, SessionUnavailable
+
+
+@pytest.fixture
+def make_pool(tmp_path, monkeypatch):
+    """独立的账号池：账号池文件放在临时目录，不合并 wx.lic 中的账号"""
+    settings = dict(sp.session_pool_settings(), enabled=True, path=str(tmp_path / "wx_accounts.json"), expiry_margin=600)
+    monkeypatch.setattr(sp, "session_pool_settings", lambda: dict(settings))
+    monkeypatch.setattr(SessionPool, "_primary_record", staticmethod(lambda: None))
+    return SessionPool
+
+
+def _login(pool, name, token=None, remaining=86400):
+    data = {
+        "token": token or f"token-{name}",
+        "cookies_str": f"slave_user={name}; x=1",
+        "expiry": {"expiry_timestamp": time.time() + remaining},
+    }
+    return pool.add(data, {"wx_app_name": name})
+
+
+def test_lease_rotates_across_accounts(make_pool):
+    pool = make_pool()
+    for name in ("gh_a", "gh_b", "gh_c"):
+        _login(pool, name)
+    leased = [pool.lease(max_wait=0).key for _ in range(3)]
+    assert sorted(leased) == ["gh_a", "gh_b", "gh_c"]
+
+
+def test_throttled_and_expiring_accounts_are_skipped(make_pool):
+    pool = make_pool()
+    a, b = _login(pool, "gh_a"), _login(pool, "gh_b")
+    _login(pool, "gh_c", remaining=60)  # 剩余有效期小于 expiry_margin
+    pool.on_throttled(a, "test")
+    assert a.state(600) == "cooling_down"
+    assert [pool.lease(max_wait=0).key for _ in range(2)] == ["gh_b", "gh_b"]
+    with pytest.raises(SessionUnavailable) as exc:
+        pool.lease(exclude=["gh_a", "gh_b"])
+    assert exc.value.reason == "excluded"
+    assert b.requests == 2
+
+
+def test_invalid_accounts_persist_until_relogin(make_pool):
+    with pytest.raises(SessionUnavailable) as exc:
+        make_pool().lease()
+    assert exc.value.reason == "no_session"
+
+    pool = make_pool()
+    a, b = _login(pool, "gh_a"), _login(pool, "gh_b")
+    pool.invalidate(a, "invalid session")
+    assert [s.key for s in pool.available()] == ["gh_b"]
+    pool.invalidate(b, "invalid session")
+    with pytest.raises(SessionUnavailable) as exc:
+        pool.lease()
+    assert exc.value.reason == "invalid_session"
+
+    # 失效标记写入账号池文件，重启后仍然跳过
+    reloaded = make_pool()
+    assert {s.key: s.invalid for s in reloaded.sessions()} == {"gh_a": "invalid session", "gh_b": "invalid session"}
+    # 重新登录清除失效标记
+    _login(reloaded, "gh_a", token="token-new")
+    assert reloaded.lease(max_wait=0).key == "gh_a"
+    assert reloaded.get("gh_a").token == "token-new"
@@ -38,6 +38,8 @@ def clean_duplicate_articles():
                 seen_articles.add(article_key)
         
         # 删除重复文章
+        from core.article_dedup import forget_fingerprints
+        forget_fingerprints(session, [duplicate.id for duplicate in duplicates])
         for duplicate in duplicates:
             print(f"删除重复文章: {duplicate.title}")
             session.delete(duplicate)
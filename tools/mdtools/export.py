@@ -124,17 +124,19 @@ def process_articles(session, mp_id=None,doc_id=None, page_size=10, page_count=1
             
         # 导入状态常量
         from core.models.base import DATA_STATUS
+        from sqlalchemy.orm import undefer
         
         # 如果指定了 doc_id（导出选中文章），则不要求必须有内容
         # 如果只按 mp_id 查询（导出所有），则要求必须有内容
         # 使用与文章列表相同的过滤条件：status != DELETED（即 status != 1000）
         if doc_id is not None and len(doc_id) > 0:
             # 导出选中文章时，不要求必须有内容，但排除已删除的文章
-            query = session.query(Article).where(Article.status != DATA_STATUS.DELETED)
+            query = session.query(Article).options(undefer(Article.content)).where(Article.status != DATA_STATUS.DELETED)
             print(f"导出选中文章模式：不要求有内容，doc_id数量: {len(doc_id)}")
         else:
             # 导出所有文章时，要求必须有内容，并排除已删除的文章
-            query = session.query(Article).filter(Article.content != None).where(Article.status != DATA_STATUS.DELETED)
+            query = session.query(Article).options(undefer(Article.content))\
+                .filter(Article.content != None).where(Article.status != DATA_STATUS.DELETED)
             print(f"导出所有文章模式：要求有内容")
         
         # 如果指定了 doc_id（选中文章导出），则不使用 mp_id 过滤，因为选中的文章可能来自不同公众号
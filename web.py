@@ -105,6 +105,12 @@ async def lifespan(app: FastAPI):
     # 关闭时执行
     if _task_thread_started:
         print_info("【应用关闭】定时任务线程将在应用关闭时自动停止")
+    # 释放异步数据库连接池
+    try:
+        from core.database import ASYNC_DB
+        await ASYNC_DB.dispose()
+    except Exception as e:
+        print_warning(f"【应用关闭】释放异步数据库连接失败: {str(e)}")
 
 app = FastAPI(
     title="WeRSS API",